@@ -0,0 +1,18 @@
+# ============================================================
+# __main__.py → python -m freecad.Texmex_Uploader
+# Texmex Weavers – FreeCAD Integration
+# ============================================================
+#
+# Los módulos del workbench se importan entre sí por nombre (como los
+# carga init_gui.py): la carpeta del módulo va al sys.path.
+
+import os
+import sys
+
+mod_path = os.path.dirname(os.path.abspath(__file__))
+if mod_path not in sys.path:
+    sys.path.insert(0, mod_path)
+
+from cli import main
+
+raise SystemExit(main())
@@ -0,0 +1,299 @@
+# ============================================================
+# bulk_upload.py → Carga masiva de carpetas de FCStd (sin GUI)
+# Texmex Weavers – FreeCAD Integration
+# ============================================================
+#
+# Migración de carpetas compartidas al bucket de modelos:
+#
+#   <raíz>/<área>/<s1>/<s2>/<s3>/archivo.FCStd  →  join_key(área, s1, s2, s3, nombre)
+#
+# - N archivos a la vez (cada uno con sus propias partes en paralelo)
+# - se omiten los que ya existen con el mismo contenido: se lista el
+#   bucket UNA vez y se compara el ETag con el hash local (local_hash)
+# - manifiesto JSONL (una línea por archivo terminado): si la corrida
+#   se interrumpe, la siguiente salta lo ya hecho sin leer los archivos
+# - al final, reporte con volumen, velocidad y fallos
+#
+# Uso (no necesita FreeCAD ni Qt):
+#   python bulk_upload.py  C:\CAD\Legacy  --workers 8
+#   python -m freecad.Texmex_Uploader sync up C:\CAD\Legacy   (cli.py)
+
+import argparse
+import fnmatch
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+try:
+    import FreeCAD
+except ImportError:
+    import headless as FreeCAD
+
+from config_storage import get_data_dir
+import storage
+from storage import get_client, bucket_exists, join_key, _upload_object
+import local_hash
+import transfer
+
+DEFAULT_WORKERS = 4
+DEFAULT_PATTERN = "*.FCStd"
+
+# Niveles de carpeta que admite join_key (área + 3 subcarpetas)
+MAX_FOLDER_DEPTH = 4
+
+
+# ============================================================
+# RECORRIDO / MAPEO
+# ============================================================
+
+def object_key(root, path):
+    """Key del bucket para path (relativo a root). ValueError si no cabe."""
+    rel = os.path.relpath(path, root)
+    parts = rel.replace("\\", "/").split("/")
+    folders, name = parts[:-1], parts[-1]
+
+    if len(folders) > MAX_FOLDER_DEPTH:
+        raise ValueError(f"más de {MAX_FOLDER_DEPTH} niveles de carpeta")
+
+    folders += [""] * (MAX_FOLDER_DEPTH - len(folders))
+    return join_key(*folders, name)
+
+
+def walk_files(root, pattern=DEFAULT_PATTERN):
+    """Archivos bajo root que cumplen pattern (sin distinguir mayúsculas)."""
+    pattern = pattern.lower()
+    for folder, dirs, files in os.walk(root):
+        dirs.sort()
+        for name in sorted(files):
+            if fnmatch.fnmatch(name.lower(), pattern):
+                yield os.path.join(folder, name)
+
+
+# ============================================================
+# MANIFIESTO
+# ============================================================
+
+class Manifest:
+    """
+    JSONL con un registro por archivo terminado (subido u omitido).
+    Un archivo con el mismo tamaño y mtime que su registro no se vuelve
+    a procesar.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.done = {}
+        self._lock = threading.Lock()
+
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # línea cortada por una interrupción
+                    self.done[entry["path"]] = entry
+
+        self._file = open(path, "a", encoding="utf-8")
+
+    def is_done(self, path, st):
+        entry = self.done.get(path)
+        return bool(entry) and entry["size"] == st.st_size and entry["mtime"] == st.st_mtime_ns
+
+    def add(self, path, st, key, status, etag):
+        entry = {
+            "path": path, "key": key, "size": st.st_size,
+            "mtime": st.st_mtime_ns, "status": status, "etag": etag,
+        }
+        with self._lock:
+            self.done[path] = entry
+            self._file.write(json.dumps(entry) + "\n")
+            self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def default_manifest_path(root, bucket):
+    safe = os.path.abspath(root).replace(":", "").replace("\\", "_").replace("/", "_")
+    return os.path.join(get_data_dir("bulk"), f"{bucket}_{safe}.jsonl")
+
+
+# ============================================================
+# CARGA
+# ============================================================
+
+def _remote_objects(bucket):
+    """{key: (etag, size)} de todo el bucket en un solo listado."""
+    out = {}
+    if not bucket_exists(bucket):
+        return out
+    for obj in get_client().list_objects(bucket, recursive=True):
+        out[obj.object_name] = ((obj.etag or "").strip('"'), obj.size)
+    return out
+
+
+def bulk_upload(root, bucket=None, workers=DEFAULT_WORKERS,
+                pattern=DEFAULT_PATTERN, manifest_path=None, dry_run=False,
+                log=None, on_item=None):
+    """
+    Sube todos los archivos de root. Devuelve el reporte (dict).
+    log(texto) recibe una línea por archivo (por defecto la consola).
+    on_item(registro) recibe cada archivo: {"path", "key", "status",
+    "size"}; los fallos con "ok": False y "error".
+    """
+    log = log or (lambda text: FreeCAD.Console.PrintMessage(text + "\n"))
+    bucket = bucket or storage.BUCKET_MODEL
+    root = os.path.abspath(root)
+    manifest = Manifest(manifest_path or default_manifest_path(root, bucket))
+
+    report = {
+        "root": root, "bucket": bucket, "manifest": manifest.path,
+        "uploaded": 0, "skipped": 0, "resumed": 0, "failed": 0,
+        "bytes": 0, "failures": [],
+        # --dry-run: lo que se subiría (uploaded/bytes quedan en 0)
+        "would_upload": 0, "would_upload_bytes": 0,
+    }
+    lock = threading.Lock()
+    started = time.monotonic()
+
+    def fail(path, error):
+        with lock:
+            report["failed"] += 1
+            report["failures"].append({"path": path, "error": str(error)})
+        log(f"{'error':<9}{path}: {error}")
+        if on_item:
+            on_item({"path": path, "ok": False, "error": str(error)})
+
+    def item_done(path, key, status, nbytes):
+        log(f"{status:<9}{key}")
+        if on_item:
+            on_item({"path": path, "key": key, "status": status, "size": nbytes})
+
+    remote = _remote_objects(bucket)
+    metadata = {
+        "x-amz-meta-revision": "1.0",
+        "x-amz-meta-descripcion": "",
+        "x-amz-meta-comment": f"Carga masiva desde {root}",
+    }
+
+    def process(path):
+        st = os.stat(path)
+        key = object_key(root, path)
+
+        # Mismo contenido ya en el bucket → sin transferir
+        known = remote.get(key)
+        if known and known[1] == st.st_size:
+            sizes = transfer.candidate_part_sizes(st.st_size,
+                                                  storage.UPLOAD_PART_MB * 1024 * 1024)
+            if local_hash.matches(path, known[0], sizes):
+                manifest.add(path, st, key, "skipped", known[0])
+                return "skipped", key, 0
+
+        if dry_run:
+            return "dry-run", key, st.st_size
+
+        etag = _upload_object(path, key, metadata, bucket)
+        manifest.add(path, st, key, "uploaded", etag)
+        return "uploaded", key, st.st_size
+
+    def finish(future, path):
+        try:
+            status, key, nbytes = future.result()
+        except Exception as e:
+            fail(path, e)
+            return
+
+        with lock:
+            if status == "skipped":
+                report["skipped"] += 1
+            elif status == "dry-run":
+                report["would_upload"] += 1
+                report["would_upload_bytes"] += nbytes
+            else:
+                report["uploaded"] += 1
+                report["bytes"] += nbytes
+        item_done(path, key, status, nbytes)
+
+    # Envío acotado: nunca más de 2×workers trabajos en memoria
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as ex:
+        in_flight = {}
+
+        for path in walk_files(root, pattern):
+            try:
+                st = os.stat(path)
+            except OSError as e:
+                fail(path, e)
+                continue
+
+            if manifest.is_done(path, st):
+                report["resumed"] += 1
+                item_done(path, manifest.done[path]["key"], "resumed", 0)
+                continue
+
+            while len(in_flight) >= 2 * max(1, workers):
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    finish(future, in_flight.pop(future))
+
+            in_flight[ex.submit(process, path)] = path
+
+        done, _ = wait(in_flight)
+        for future in done:
+            finish(future, in_flight[future])
+
+    manifest.close()
+
+    elapsed = max(time.monotonic() - started, 0.001)
+    report["seconds"] = round(elapsed, 2)
+    report["mb_per_s"] = round(report["bytes"] / elapsed / (1024 * 1024), 2)
+    report["files_per_s"] = round((report["uploaded"] + report["skipped"]) / elapsed, 2)
+
+    report_path = os.path.splitext(manifest.path)[0] + ".report.json"
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    report["report"] = report_path
+
+    return report
+
+
+# ============================================================
+# LÍNEA DE COMANDOS
+# ============================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Carga masiva de FCStd al bucket de modelos")
+    parser.add_argument("root", help="carpeta raíz (sus subcarpetas = área/s1/s2/s3)")
+    parser.add_argument("--bucket", default=None, help="por defecto <bucket_model>")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--pattern", default=DEFAULT_PATTERN)
+    parser.add_argument("--manifest", default=None)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args(argv)
+
+    report = bulk_upload(
+        args.root, bucket=args.bucket, workers=args.workers,
+        pattern=args.pattern, manifest_path=args.manifest, dry_run=args.dry_run,
+        log=print,
+    )
+
+    if args.dry_run:
+        print(f"\n(dry-run) Se subirían: {report['would_upload']} "
+              f"({report['would_upload_bytes'] / (1024 * 1024):.1f} MB)")
+    print(
+        f"\nSubidos: {report['uploaded']}  Sin cambios: {report['skipped']}  "
+        f"Ya hechos: {report['resumed']}  Fallos: {report['failed']}\n"
+        f"{report['bytes'] / (1024 * 1024):.1f} MB en {report['seconds']} s "
+        f"({report['mb_per_s']} MB/s, {report['files_per_s']} archivos/s)\n"
+        f"Reporte: {report['report']}"
+    )
+    for failure in report["failures"]:
+        print(f"  ✗ {failure['path']}: {failure['error']}")
+
+    return 1 if report["failed"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,458 @@
+# ============================================================
+# cli.py → Línea de comandos (sin FreeCAD GUI ni Qt)
+# Texmex Weavers – FreeCAD Integration
+# ============================================================
+#
+# Operaciones de almacenamiento para cron / CI, sobre los mismos
+# módulos que usa el workbench (storage, transfer, download...):
+#
+#   python -m freecad.Texmex_Uploader ls [PREFIJO] [-r]
+#   python -m freecad.Texmex_Uploader stat KEY... | -
+#   python -m freecad.Texmex_Uploader upload ARCHIVO... --prefix P | --key K | -
+#   python -m freecad.Texmex_Uploader download KEY... --dest DIR | -
+#   python -m freecad.Texmex_Uploader sync up RAIZ            (bulk_upload)
+#   python -m freecad.Texmex_Uploader sync down PREFIJO DIR
+#   python -m freecad.Texmex_Uploader journal sync | compact
+#   python -m freecad.Texmex_Uploader mirror [DIR] [--prefix AREA]...
+#
+# "-" lee de stdin una entrada por línea (upload: "ruta<TAB>key").
+# Salida: una línea JSON por operación en stdout y al final una línea
+# {"op": "summary", ...}. Mensajes y errores de consola → stderr.
+# Código de salida 1 si alguna operación falló.
+#
+# Los módulos pesados (minio, storage) se importan dentro de cada
+# comando: --help y los errores de uso no tocan la red ni minio.
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+DEFAULT_WORKERS = 8
+
+# Alias de --bucket → constante de storage
+BUCKET_ALIASES = {"model": "BUCKET_MODEL", "svg": "BUCKET_SVG"}
+
+
+# ============================================================
+# SALIDA JSON
+# ============================================================
+
+class Output:
+    """Escribe una línea JSON por registro y lleva la cuenta de fallos."""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self.ok = 0
+        self.failed = 0
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+
+    def emit(self, record):
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock:
+            if record.get("ok", True):
+                self.ok += 1
+            else:
+                self.failed += 1
+            self.stream.write(line + "\n")
+
+    def summary(self, op, **extra):
+        record = {
+            "op": "summary", "command": op, "ok": self.ok, "failed": self.failed,
+            "seconds": round(time.monotonic() - self.started, 3),
+        }
+        record.update(extra)
+        with self._lock:
+            self.stream.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+            self.stream.flush()
+        return 1 if self.failed else 0
+
+
+def _run_many(op, items, fn, workers, out):
+    """
+    fn(item) → dict para cada item, con N hilos y envío acotado (no se
+    cargan miles de futures a la vez). Una excepción se convierte en
+    un registro {"ok": false, "error": ...}.
+    """
+    workers = max(1, workers)
+
+    def guarded(item):
+        try:
+            record = fn(item)
+            record.setdefault("ok", True)
+        except Exception as e:
+            record = {"op": op, "item": item, "ok": False, "error": str(e)}
+        return record
+
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        in_flight = set()
+        for item in items:
+            if len(in_flight) >= 2 * workers:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    out.emit(future.result())
+            in_flight.add(ex.submit(guarded, item))
+
+        for future in wait(in_flight)[0]:
+            out.emit(future.result())
+
+
+def _read_args(values):
+    """Los argumentos, o las líneas de stdin si el único es "-"."""
+    if values == ["-"]:
+        return (line.rstrip("\r\n") for line in sys.stdin if line.strip())
+    return iter(values)
+
+
+def _bucket(args):
+    import storage
+    name = args.bucket or "model"
+    return getattr(storage, BUCKET_ALIASES[name]) if name in BUCKET_ALIASES else name
+
+
+def _client():
+    import storage
+    return storage.get_client()
+
+
+def _metadata(pairs):
+    """["revision=1.2", ...] → {"x-amz-meta-revision": "1.2", ...}"""
+    meta = {}
+    for pair in pairs or []:
+        name, sep, value = pair.partition("=")
+        if not sep or not name:
+            raise SystemExit(f"--meta espera clave=valor: {pair}")
+        meta[f"x-amz-meta-{name.strip().lower()}"] = value
+    return meta or None
+
+
+def _local_path(dest, key, prefix=""):
+    """Ruta local de key bajo dest (sin salirse de dest)."""
+    rel = key[len(prefix):] if prefix and key.startswith(prefix) else key
+    path = os.path.normpath(os.path.join(dest, *rel.strip("/").split("/")))
+    root = os.path.normpath(dest)
+    if os.path.commonpath([root, path]) != root:
+        raise ValueError(f"key fuera del destino: {key}")
+    return path
+
+
+def _download_settings():
+    import storage
+    part_mb = storage._int_cfg(storage.cfg, "DOWNLOAD_PART_MB", 8)
+    concurrency = storage._int_cfg(storage.cfg, "DOWNLOAD_CONCURRENCY", 4)
+    return part_mb * 1024 * 1024, concurrency
+
+
+# ============================================================
+# COMANDOS
+# ============================================================
+
+def cmd_ls(args, out):
+    import journal
+
+    client = _client()
+    bucket = _bucket(args)
+    prefix = args.prefix or ""
+    # El diario (_journal/) no son modelos: sólo si se pide ese prefijo
+    show_journal = journal.is_journal_key(prefix)
+
+    for obj in client.list_objects(bucket, prefix=prefix, recursive=args.recursive):
+        if not show_journal and journal.is_journal_key(obj.object_name):
+            continue
+        if obj.is_dir:
+            out.emit({"op": "ls", "key": obj.object_name, "dir": True})
+            continue
+        out.emit({
+            "op": "ls", "key": obj.object_name, "size": obj.size,
+            "etag": (obj.etag or "").strip('"'),
+            "last_modified": obj.last_modified.isoformat() if obj.last_modified else None,
+        })
+
+    return out.summary("ls", bucket=bucket, prefix=prefix)
+
+
+def cmd_stat(args, out):
+    client = _client()
+    bucket = _bucket(args)
+
+    def stat(key):
+        try:
+            st = client.stat_object(bucket, key)
+        except Exception as e:
+            return {"op": "stat", "key": key, "ok": False, "error": str(e)}
+        return {
+            "op": "stat", "key": key, "size": st.size,
+            "etag": (st.etag or "").strip('"'),
+            "last_modified": st.last_modified.isoformat() if st.last_modified else None,
+            "content_type": st.content_type,
+            "metadata": {k.lower(): v for k, v in (st.metadata or {}).items()
+                         if k.lower().startswith("x-amz-meta-")},
+        }
+
+    _run_many("stat", _read_args(args.keys), stat, args.workers, out)
+    return out.summary("stat", bucket=bucket)
+
+
+def cmd_upload(args, out):
+    from storage import _upload_object
+
+    bucket = _bucket(args)
+    metadata = _metadata(args.meta)
+
+    if args.key and (len(args.files) != 1 or args.files == ["-"]):
+        raise SystemExit("--key sólo admite un archivo")
+
+    def targets():
+        for entry in _read_args(args.files):
+            if args.files == ["-"] and "\t" in entry:
+                path, key = entry.split("\t", 1)
+            else:
+                path = entry
+                key = args.key or "/".join(
+                    p for p in ((args.prefix or "").strip("/"), os.path.basename(path)) if p
+                )
+            yield path, key
+
+    def upload(target):
+        path, key = target
+        unchanged = []
+        etag = _upload_object(path, key, metadata, bucket,
+                              on_unchanged=unchanged.append)
+        return {"op": "upload", "path": path, "key": key, "etag": etag,
+                "size": os.path.getsize(path), "unchanged": bool(unchanged)}
+
+    _run_many("upload", targets(), upload, args.workers, out)
+    return out.summary("upload", bucket=bucket)
+
+
+def cmd_download(args, out):
+    import download
+
+    client = _client()
+    bucket = _bucket(args)
+    part_size, concurrency = _download_settings()
+
+    def fetch(key):
+        dest = _local_path(args.dest, key)
+        os.makedirs(os.path.dirname(dest) or ".", exist_ok=True)
+        download.download(client, bucket, key, dest,
+                          part_size=part_size, concurrency=concurrency)
+        return {"op": "download", "key": key, "path": dest,
+                "size": os.path.getsize(dest)}
+
+    _run_many("download", _read_args(args.keys), fetch, args.workers, out)
+    return out.summary("download", bucket=bucket)
+
+
+def cmd_sync_up(args, out):
+    import bulk_upload
+
+    bucket = _bucket(args)
+
+    def log(line):
+        # bulk_upload escribe "<estado> <key>"; a stderr con --verbose
+        if args.verbose:
+            sys.stderr.write(line + "\n")
+
+    def on_item(record):
+        out.emit({"op": "upload", **record})
+
+    report = bulk_upload.bulk_upload(
+        args.root, bucket=bucket, workers=args.workers, pattern=args.pattern,
+        manifest_path=args.manifest, dry_run=args.dry_run, log=log, on_item=on_item,
+    )
+
+    extra = {k: report[k] for k in ("uploaded", "skipped", "resumed", "bytes",
+                                    "would_upload", "would_upload_bytes",
+                                    "mb_per_s", "manifest", "report")}
+    return out.summary("sync-up", bucket=bucket, **extra)
+
+
+def cmd_sync_down(args, out):
+    import download
+    import journal
+    import local_hash
+
+    client = _client()
+    bucket = _bucket(args)
+    prefix = args.prefix or ""
+    part_size, concurrency = _download_settings()
+
+    def objects():
+        for obj in client.list_objects(bucket, prefix=prefix, recursive=True):
+            if not obj.is_dir and not journal.is_journal_key(obj.object_name):
+                yield obj.object_name, (obj.etag or "").strip('"'), obj.size
+
+    def sync(item):
+        key, etag, size = item
+        dest = _local_path(args.dest, key, prefix)
+
+        if os.path.isfile(dest) and os.path.getsize(dest) == size:
+            if local_hash.matches(dest, etag, download.candidate_part_sizes(etag, size)):
+                return {"op": "sync", "key": key, "path": dest, "status": "unchanged"}
+
+        if args.dry_run:
+            return {"op": "sync", "key": key, "path": dest, "status": "dry-run"}
+
+        os.makedirs(os.path.dirname(dest) or ".", exist_ok=True)
+        download.download(client, bucket, key, dest, size=size, etag=etag,
+                          part_size=part_size, concurrency=concurrency)
+        return {"op": "sync", "key": key, "path": dest, "status": "downloaded",
+                "size": size}
+
+    _run_many("sync", objects(), sync, args.workers, out)
+    return out.summary("sync-down", bucket=bucket, prefix=prefix)
+
+
+def cmd_journal_sync(args, out):
+    import journal
+
+    client = _client()
+    bucket = _bucket(args)
+
+    # Sin oyentes: sólo cachés e índices locales
+    import notifications
+    for change in journal.sync(client, bucket, dispatch=notifications.apply_changes):
+        out.emit({"op": "journal", "key": change["key"], "event": change["event"],
+                  "etag": change["etag"] or None})
+
+    return out.summary("journal-sync", bucket=bucket)
+
+
+def cmd_journal_compact(args, out):
+    import journal
+
+    stats = journal.compact(_client(), _bucket(args))
+    return out.summary("journal-compact", bucket=_bucket(args), **stats)
+
+
+def cmd_mirror(args, out):
+    import mirror
+    import storage
+
+    root = args.dest or mirror.get_mirror_dir()
+    if not root:
+        raise SystemExit("Indica la carpeta del espejo o configura <mirror_dir>")
+    prefixes = mirror.parse_prefixes(args.prefix) if args.prefix else None
+
+    # Sin --bucket: modelos y planos
+    if args.bucket:
+        buckets = [_bucket(args)]
+    else:
+        buckets = list(dict.fromkeys([storage.BUCKET_MODEL, storage.BUCKET_SVG]))
+
+    client = _client()
+    totals = {"downloaded": 0, "unchanged": 0, "deleted": 0, "bytes": 0}
+
+    for bucket in buckets:
+        stats = mirror.sync(client, bucket, root=root, prefixes=prefixes,
+                            workers=args.workers, dry_run=args.dry_run,
+                            on_item=lambda record: out.emit({"op": "mirror", **record}))
+        for name in totals:
+            totals[name] += stats[name]
+
+    return out.summary("mirror", root=os.path.abspath(root), **totals)
+
+
+# ============================================================
+# ARGUMENTOS
+# ============================================================
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m freecad.Texmex_Uploader",
+        description="Operaciones con la librería CAD de Texmex Weavers (salida JSON por línea)",
+    )
+    parser.add_argument("--bucket", default=None,
+                        help="model (por defecto), svg o el nombre de un bucket")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="operaciones en paralelo")
+    parser.add_argument("--verbose", action="store_true",
+                        help="mensajes de progreso en stderr")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("ls", help="lista objetos bajo un prefijo")
+    p.add_argument("prefix", nargs="?", default="")
+    p.add_argument("-r", "--recursive", action="store_true")
+    p.set_defaults(func=cmd_ls)
+
+    p = sub.add_parser("stat", help="tamaño, ETag y metadatos de objetos")
+    p.add_argument("keys", nargs="+", help='keys, o "-" para leerlas de stdin')
+    p.set_defaults(func=cmd_stat)
+
+    p = sub.add_parser("upload", help="sube archivos")
+    p.add_argument("files", nargs="+", help='archivos, o "-" para leer "ruta<TAB>key" de stdin')
+    p.add_argument("--prefix", default="", help="carpeta destino (key = prefijo/nombre)")
+    p.add_argument("--key", default=None, help="key exacta (un solo archivo)")
+    p.add_argument("--meta", action="append", metavar="CLAVE=VALOR",
+                   help="metadato x-amz-meta-CLAVE (repetible)")
+    p.set_defaults(func=cmd_upload)
+
+    p = sub.add_parser("download", help="descarga objetos")
+    p.add_argument("keys", nargs="+", help='keys, o "-" para leerlas de stdin')
+    p.add_argument("--dest", default=".", help="carpeta destino (se respeta la ruta de la key)")
+    p.set_defaults(func=cmd_download)
+
+    p = sub.add_parser("sync", help="sincroniza una carpeta local con el bucket")
+    direction = p.add_subparsers(dest="direction", required=True)
+
+    up = direction.add_parser("up", help="sube un árbol área/s1/s2/s3 (bulk_upload)")
+    up.add_argument("root")
+    up.add_argument("--pattern", default="*.FCStd")
+    up.add_argument("--manifest", default=None)
+    up.add_argument("--dry-run", action="store_true")
+    up.set_defaults(func=cmd_sync_up)
+
+    down = direction.add_parser("down", help="descarga lo que falte o haya cambiado")
+    down.add_argument("prefix")
+    down.add_argument("dest")
+    down.add_argument("--dry-run", action="store_true")
+    down.set_defaults(func=cmd_sync_down)
+
+    p = sub.add_parser("journal", help="diario de cambios _journal/ del bucket")
+    action = p.add_subparsers(dest="action", required=True)
+    action.add_parser("sync", help="aplica los cambios nuevos a los índices locales") \
+        .set_defaults(func=cmd_journal_sync)
+    action.add_parser("compact", help="compacta los días viejos y borra los caducados") \
+        .set_defaults(func=cmd_journal_compact)
+
+    p = sub.add_parser("mirror", help="espejo local de los buckets para trabajar sin conexión")
+    p.add_argument("dest", nargs="?", default=None,
+                   help="carpeta del espejo (por defecto <mirror_dir> de config.xml)")
+    p.add_argument("--prefix", action="append", metavar="AREA",
+                   help="sólo esta área o carpeta (repetible; por defecto <mirror_prefixes>)")
+    p.add_argument("--dry-run", action="store_true")
+    p.set_defaults(func=cmd_mirror)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    if args.bucket and args.bucket not in BUCKET_ALIASES and "/" in args.bucket:
+        raise SystemExit(f"Bucket inválido: {args.bucket}")
+
+    try:
+        import FreeCAD  # noqa: F401  (dentro de FreeCADCmd la consola es la suya)
+    except ImportError:
+        import headless
+        headless.VERBOSE = args.verbose
+
+    out = Output()
+    try:
+        return args.func(args, out)
+    except KeyboardInterrupt:
+        out.summary(args.command, interrupted=True)
+        return 130
+    except Exception as e:
+        out.emit({"op": args.command, "ok": False, "error": str(e)})
+        return out.summary(args.command)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
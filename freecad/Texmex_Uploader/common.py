@@ -2,55 +2,34 @@
 # common.py → Texmex Weavers FreeCAD Integration
 # ============================================================
 
-import os, sys, subprocess
+import os, threading, time
 import FreeCAD
 
-# Qt seguro
 try:
-    from PySide6 import QtWidgets
+    import FreeCADGui
 except ImportError:
-    from PySide2 import QtWidgets
-
-# ============================================================
-# Lee XML
-# ============================================================
-
-from config_storage import load_minio_config
-
-cfg = load_minio_config()
-
-ENDPOINT     = cfg.get("ENDPOINT", "")
-ACCESS_KEY   = cfg.get("ACCESS_KEY", "")
-SECRET_KEY   = cfg.get("SECRET_KEY", "")
-
-BUCKET_MODEL = cfg.get("BUCKET_MODEL", "cad3dfiles")
-BUCKET_SVG   = cfg.get("BUCKET_SVG", "svg")
-
+    FreeCADGui = None
 
+# Qt seguro
+try:
+    from PySide6 import QtWidgets, QtCore
+except ImportError:
+    from PySide2 import QtWidgets, QtCore
 
 # ============================================================
-# AUTO-INSTALAR MINIO
+# ALMACENAMIENTO (sin Qt → storage.py)
 # ============================================================
 
-def ensure_minio_installed():
-    try:
-        from minio import Minio
-        from minio.error import S3Error
-        return Minio, S3Error
-    except ImportError:
-        try:
-            python_exe = os.path.join(os.path.dirname(sys.executable), "python.exe")
-            if not os.path.exists(python_exe):
-                python_exe = sys.executable
-            subprocess.check_call([python_exe, "-m", "pip", "install", "--user", "minio"])
-            from minio import Minio
-            from minio.error import S3Error
-            return Minio, S3Error
-        except Exception as e:
-            FreeCAD.Console.PrintError(f"Error instalando minio: {e}\n")
-            return None, None
-
-Minio, S3Error = ensure_minio_installed()
+# Los ajustes (storage.BUCKET_MODEL, storage.cfg...) NO se reexportan:
+# guardar la configuración los cambia, y una copia importada se quedaría
+# con el valor viejo. Leerlos siempre como storage.<NOMBRE>.
+import storage
+from storage import (
+    ensure_minio_installed, ensure_minio,
+    get_client, bucket_exists, reset_client,
+    _slug, _pretty, invalidate_listing, list_prefix, list_subfolders,
+    find_etag_path, join_key, _upload_object,
+)
 
 
 # ============================================================
@@ -65,89 +44,6 @@ def show_popup(title, text, icon=QtWidgets.QMessageBox.Information):
     msg.exec()
 
 
-# ============================================================
-# SLUG / PRETTY HELPERS
-# ============================================================
-
-def _slug(txt: str):
-    if not txt:
-        return ""
-    return txt.strip().replace(" ", "_").replace("/", "_")
-
-def _pretty(txt: str):
-    if not txt:
-        return ""
-    return txt.replace("_", " ")
-
-
-# ============================================================
-# SUBCARPETAS (NIVEL DIRECTO)
-# ============================================================
-
-def list_subfolders(bucket: str, prefix=""):
-    """
-    Devuelve subcarpetas DIRECTAS bajo prefix.
-    Ej: "telares_circulares" → ["motores", "guias"]
-    """
-    try:
-        client = Minio(ENDPOINT, ACCESS_KEY, SECRET_KEY, secure=False)
-        if not client.bucket_exists(bucket):
-            return []
-
-        base = prefix.strip("/")
-        base = base + "/" if base else ""
-
-        subs = set()
-
-        for obj in client.list_objects(bucket, prefix=base, recursive=False):
-            key = obj.object_name[len(base):]
-            if "/" in key:
-                folder = key.split("/", 1)[0]
-                subs.add(folder)
-
-        return sorted(_pretty(s) for s in subs)
-
-    except Exception as e:
-        FreeCAD.Console.PrintError(f"Error leyendo subcarpetas {prefix}: {e}\n")
-        return []
-
-
-# ============================================================
-# BUSCAR RUTA POR ETAG
-# ============================================================
-
-def find_etag_path(bucket: str, etag: str):
-    if not etag:
-        return None
-
-    try:
-        client = Minio(ENDPOINT, ACCESS_KEY, SECRET_KEY, secure=False)
-
-        for obj in client.list_objects(bucket, recursive=True):
-            oetag = (getattr(obj, "etag", "") or "").strip('"').lower()
-            if etag.strip('"').lower() == oetag:
-                return obj.object_name
-
-    except Exception as e:
-        FreeCAD.Console.PrintError(f"Error buscando ETag: {e}\n")
-
-    return None
-
-
-# ============================================================
-# CONSTRUIR RUTA MINIO
-# ============================================================
-
-def join_key(area, s1, s2, s3, filename):
-    parts = []
-    if area: parts.append(_slug(area))
-    if s1:   parts.append(_slug(s1))
-    if s2:   parts.append(_slug(s2))
-    if s3:   parts.append(_slug(s3))
-    parts.append(filename)
-    return "/".join(parts)
-
-
 # ============================================================
 # METADATA DE FREECAD
 # ============================================================
@@ -174,28 +70,189 @@ def get_doc_metadata(doc=None):
         return {}
 
 
+def doc_modified(doc):
+    """Cambios sin guardar (en modo sin interfaz, por recomputar)."""
+    if FreeCADGui:
+        gui_doc = FreeCADGui.getDocument(doc.Name)
+        if gui_doc is not None:
+            return bool(getattr(gui_doc, "Modified", False))
+    return bool(doc.isTouched())
+
+
+def save_after_upload(doc, was_modified):
+    """
+    Guarda doc tras escribir los Base_* de una subida terminada. Si ya
+    tenía cambios sin guardar (was_modified, mirado ANTES de escribir los
+    Base_*) no se guarda: el usuario siguió trabajando durante la subida
+    y sus ediciones a medias no se guardan solas. Los Base_* quedan en el
+    documento y se guardan con su próximo guardado. True si se guardó.
+    """
+    if was_modified:
+        FreeCAD.Console.PrintMessage(
+            f"{doc.Label}: Base_etag actualizado; el documento tiene cambios "
+            f"sin guardar y no se guarda automáticamente.\n"
+        )
+        return False
+    doc.recompute()
+    doc.save()
+    return True
+
+
 # ============================================================
-# SUBIR ARCHIVO
+# SUBIDAS (recuperación y progreso)
 # ============================================================
 
-def upload_file(filepath, object_name, metadata=None, bucket=BUCKET_MODEL):
-    try:
-        client = Minio(ENDPOINT, ACCESS_KEY, SECRET_KEY, secure=False)
+def resume_pending_uploads():
+    """
+    Termina las subidas multipart que quedaron a medias (diario local),
+    reintenta las de la cola que fallaron (upload_queue.resume_failed) y
+    aborta en el servidor las abandonadas hace más de
+    UPLOAD_ABANDON_HOURS. Pensado para un hilo de fondo al arrancar.
+    """
+    import transfer
 
-        if not client.bucket_exists(bucket):
-            client.make_bucket(bucket)
+    client = get_client()
 
-        result = client.fput_object(
-            bucket,
-            object_name,
-            filepath,
-            metadata=metadata
+    try:
+        aborted = transfer.cleanup_abandoned(
+            client, [storage.BUCKET_MODEL, storage.BUCKET_SVG], storage.UPLOAD_ABANDON_HOURS
         )
+        if aborted:
+            FreeCAD.Console.PrintMessage(f"Subidas abandonadas abortadas: {aborted}\n")
+    except Exception as e:
+        FreeCAD.Console.PrintError(f"Error limpiando subidas abandonadas: {e}\n")
+
+    for journal in transfer.pending_journals():
+        bucket, key = journal.get("bucket"), journal.get("key")
 
-        return getattr(result, "etag", None)
+        if not transfer.journal_matches_source(journal):
+            # El archivo cambió o ya no existe → esa subida no tiene sentido
+            transfer.discard(client, journal)
+            continue
 
+        try:
+            _upload_object(journal["path"], key, journal.get("metadata"), bucket)
+            FreeCAD.Console.PrintMessage(f"Subida reanudada y completada: {key}\n")
+        except Exception as e:
+            FreeCAD.Console.PrintError(f"No se pudo reanudar {key}: {e}\n")
+
+    # Subidas de la cola que fallaron sin diario (una sola parte)
+    import upload_queue
+    upload_queue.resume_failed()
+
+    # Copias de la cola de subidas que ya ningún diario necesita
+    try:
+        upload_queue.cleanup_outbox(j.get("path", "") for j in transfer.pending_journals())
     except Exception as e:
-        FreeCAD.Console.PrintError(f"Error subiendo objeto: {e}\n")
-        show_popup("Error", f"No se pudo subir:\n{e}",
+        FreeCAD.Console.PrintError(f"Error limpiando bandeja de salida: {e}\n")
+
+
+def start_upload_recovery():
+    threading.Thread(target=resume_pending_uploads, daemon=True).start()
+
+
+class _UploadSignals(QtCore.QObject):
+    # (hechos, total) / (etag, error) desde el hilo de la subida
+    progress = QtCore.Signal(object, object)
+    finished = QtCore.Signal(object, object)
+
+
+class _UploadTask(QtCore.QRunnable):
+    """
+    Sube en un hilo del pool de Qt y avisa por señales: llegan en cola al
+    hilo GUI (mismo esquema que las tareas de library.py).
+    """
+    # Segundos mínimos entre señales de progreso
+    PROGRESS_INTERVAL = 0.1
+
+    def __init__(self, filepath, object_name, metadata, bucket, cancel_event):
+        super().__init__()
+        self.args = (filepath, object_name, metadata, bucket)
+        self.cancel_event = cancel_event
+        self.signals = _UploadSignals()
+        self._last_report = 0.0
+
+    def report(self, done, total):
+        now = time.monotonic()
+        if done < total and now - self._last_report < self.PROGRESS_INTERVAL:
+            return
+        self._last_report = now
+        self.signals.progress.emit(done, total)
+
+    def run(self):
+        try:
+            etag = _upload_object(*self.args, progress=self.report,
+                                  cancel_event=self.cancel_event)
+        except Exception as e:
+            self.signals.finished.emit(None, e)
+            return
+        self.signals.finished.emit(etag, None)
+
+
+def upload_file_with_progress(filepath, object_name, metadata=None, bucket=None,
+                              parent=None):
+    """
+    Sube con QProgressDialog (porcentaje, MB/s y Cancelar).
+    La subida corre en un hilo; mientras, el hilo GUI atiende eventos en
+    un QEventLoop (sin sondeo) y la función vuelve al terminar.
+    """
+    import transfer
+
+    total = max(1, os.path.getsize(filepath))
+    name = os.path.basename(filepath)
+
+    dlg = QtWidgets.QProgressDialog(f"Subiendo {name}…", "Cancelar", 0, 1000, parent)
+    dlg.setWindowTitle("Subiendo a MinIO")
+    dlg.setWindowModality(QtCore.Qt.WindowModal)
+    dlg.setMinimumDuration(0)
+    dlg.setAutoClose(False)
+    dlg.setAutoReset(False)
+    dlg.setValue(0)
+
+    state = {"etag": None, "error": None}
+    cancel = threading.Event()
+    started = time.monotonic()
+    loop = QtCore.QEventLoop()
+
+    def on_progress(done, _total):
+        if cancel.is_set():
+            return
+        elapsed = max(time.monotonic() - started, 0.001)
+        mbps = done / elapsed / (1024 * 1024)
+        dlg.setLabelText(
+            f"Subiendo {name}…\n"
+            f"{done / (1024 * 1024):.1f} / {total / (1024 * 1024):.1f} MB"
+            f"  ({mbps:.1f} MB/s)"
+        )
+        dlg.setValue(int(1000 * done / total))
+
+    def on_finished(etag, error):
+        state["etag"], state["error"] = etag, error
+        loop.quit()
+
+    def on_canceled():
+        cancel.set()
+        dlg.setLabelText("Cancelando…")
+
+    task = _UploadTask(filepath, object_name, metadata, bucket, cancel)
+    task.setAutoDelete(False)
+    task.signals.progress.connect(on_progress)
+    task.signals.finished.connect(on_finished)
+    dlg.canceled.connect(on_canceled)
+
+    QtCore.QThreadPool.globalInstance().start(task)
+    loop.exec()
+
+    dlg.close()
+
+    error = state["error"]
+    if error is not None:
+        if isinstance(error, transfer.UploadCancelled):
+            FreeCAD.Console.PrintMessage(f"Subida cancelada: {object_name}\n")
+            return None
+        FreeCAD.Console.PrintError(f"Error subiendo objeto: {error}\n")
+        show_popup("Error", f"No se pudo subir:\n{error}",
                    QtWidgets.QMessageBox.Critical)
         return None
+
+    return state["etag"]
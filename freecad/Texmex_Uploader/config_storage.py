@@ -5,16 +5,86 @@
 
 import os
 import xml.etree.ElementTree as ET
-import FreeCAD
+try:
+    import FreeCAD
+except ImportError:
+    import headless as FreeCAD
 
 CONFIG_FILENAME = "config.xml"
+CONFIG_ENV = "TEXMEX_CONFIG"
+DATA_DIR_ENV = "TEXMEX_DATA_DIR"
+
+# Ajustes opcionales (tag XML → (clave, default)).
+# No aparecen en el diálogo; se conservan al guardar.
+OPTIONAL_SETTINGS = {
+    "pool_maxsize":    ("POOL_MAXSIZE", "10"),
+    "connect_timeout": ("CONNECT_TIMEOUT", "5"),
+    "read_timeout":    ("READ_TIMEOUT", "60"),
+    "retries":         ("RETRIES", "3"),
+    "list_cache_ttl":    ("LIST_CACHE_TTL", "60"),
+    "list_negative_ttl": ("LIST_NEGATIVE_TTL", "30"),
+    "model_cache_mb":    ("MODEL_CACHE_MB", "2048"),
+    "model_cache_fresh": ("MODEL_CACHE_FRESH", "60"),
+    "preview_workers":   ("PREVIEW_WORKERS", "2"),
+    "preview_timeout":   ("PREVIEW_TIMEOUT", "120"),
+    "upload_part_mb":     ("UPLOAD_PART_MB", "16"),
+    "upload_concurrency": ("UPLOAD_CONCURRENCY", "4"),
+    "upload_abandon_hours": ("UPLOAD_ABANDON_HOURS", "24"),
+    "download_part_mb":   ("DOWNLOAD_PART_MB", "8"),
+    "download_concurrency": ("DOWNLOAD_CONCURRENCY", "4"),
+    "live_updates":       ("LIVE_UPDATES", "1"),
+    "journal":            ("JOURNAL", "1"),
+    "journal_poll":       ("JOURNAL_POLL", "30"),
+    "mirror_dir":         ("MIRROR_DIR", ""),
+    "mirror_prefixes":    ("MIRROR_PREFIXES", ""),
+    "mirror_interval":    ("MIRROR_INTERVAL", "60"),
+}
+
+# Callbacks que se ejecutan al guardar la configuración
+_listeners = []
+
+
+def add_config_listener(callback):
+    """Registra callback(cfg) que se llama tras save_minio_config."""
+    if callback not in _listeners:
+        _listeners.append(callback)
+
+
+def remove_config_listener(callback):
+    if callback in _listeners:
+        _listeners.remove(callback)
 
 def get_config_path():
-    """Devuelve la ruta al archivo XML en la carpeta del módulo."""
+    """
+    Devuelve la ruta al archivo XML en la carpeta del módulo, o la de
+    TEXMEX_CONFIG si está definida (línea de comandos, CI).
+    """
+    if os.environ.get(CONFIG_ENV):
+        return os.environ[CONFIG_ENV]
     module_dir = os.path.dirname(__file__)
     return os.path.join(module_dir, CONFIG_FILENAME)
 
 
+def get_data_dir(*parts):
+    """
+    Carpeta de datos locales del workbench (índices, cachés...).
+    Vive en el directorio de usuario de FreeCAD (o en TEXMEX_DATA_DIR si
+    está definida); se crea si no existe.
+    """
+    if os.environ.get(DATA_DIR_ENV):
+        path = os.path.join(os.environ[DATA_DIR_ENV], *parts)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    try:
+        base = FreeCAD.getUserAppDataDir()
+    except Exception:
+        base = os.path.join(os.path.expanduser("~"), ".texmex")
+    path = os.path.join(base, "TexmexUploader", *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
 # ============================================================
 # CARGAR CONFIG DESDE XML
 # ============================================================
@@ -39,7 +109,7 @@ def load_minio_config():
         tree = ET.parse(path)
         root = tree.getroot()
 
-        return {
+        cfg = {
             "ENDPOINT":     root.findtext("endpoint", ""),
             "ACCESS_KEY":   root.findtext("access_key", ""),
             "SECRET_KEY":   root.findtext("secret_key", ""),
@@ -47,6 +117,11 @@ def load_minio_config():
             "BUCKET_SVG":   root.findtext("bucket_svg", "svg")
         }
 
+        for tag, (key, default) in OPTIONAL_SETTINGS.items():
+            cfg[key] = root.findtext(tag, default)
+
+        return cfg
+
     except Exception as e:
         FreeCAD.Console.PrintError(f"Error leyendo XML config: {e}\n")
         return {}
@@ -56,9 +131,24 @@ def load_minio_config():
 # GUARDAR CONFIG EN XML
 # ============================================================
 
-def save_minio_config(endpoint, access, secret, bucket_model, bucket_svg):
+def save_minio_config(endpoint, access, secret, bucket_model, bucket_svg, **options):
+    """
+    Guarda la configuración. Los ajustes opcionales (OPTIONAL_SETTINGS) se
+    pasan por tag XML en options; si no se pasan se conserva el valor actual.
+    """
     path = get_config_path()
 
+    previous = {}
+    if os.path.exists(path):
+        try:
+            old_root = ET.parse(path).getroot()
+            for tag in OPTIONAL_SETTINGS:
+                value = old_root.findtext(tag)
+                if value is not None:
+                    previous[tag] = value
+        except Exception:
+            previous = {}
+
     root = ET.Element("minio_config")
     ET.SubElement(root, "endpoint").text = endpoint
     ET.SubElement(root, "access_key").text = access
@@ -66,7 +156,19 @@ def save_minio_config(endpoint, access, secret, bucket_model, bucket_svg):
     ET.SubElement(root, "bucket_model").text = bucket_model
     ET.SubElement(root, "bucket_svg").text = bucket_svg
 
+    for tag, (_key, default) in OPTIONAL_SETTINGS.items():
+        value = options.get(tag, previous.get(tag, default))
+        ET.SubElement(root, tag).text = str(value)
+
     tree = ET.ElementTree(root)
     tree.write(path, encoding="utf-8", xml_declaration=True)
 
     FreeCAD.Console.PrintMessage(f"MinIO configuration saved to XML: {path}\n")
+
+    # Avisar a quien dependa de la config (p.ej. sesión S3 en common.py)
+    cfg = load_minio_config()
+    for callback in list(_listeners):
+        try:
+            callback(cfg)
+        except Exception as e:
+            FreeCAD.Console.PrintError(f"Error aplicando configuración: {e}\n")
@@ -0,0 +1,240 @@
+# ============================================================
+# diagnostics.py → Dock "Diagnóstico" (tiempos de operaciones S3)
+# Texmex Weavers – FreeCAD Integration
+# ============================================================
+#
+# Muestra en vivo lo que registra metrics.py: por operación llamadas,
+# errores, reintentos, MB y percentiles; el histograma de la fila
+# seleccionada y las últimas operaciones. "Exportar" guarda los spans
+# en JSON lines para adjuntarlos a un reporte de "está lento".
+
+import os
+import time
+import FreeCAD
+
+try:
+    import FreeCADGui
+except ImportError:
+    FreeCADGui = None
+
+try:
+    from PySide6 import QtWidgets, QtCore
+except ImportError:
+    from PySide2 import QtWidgets, QtCore
+
+from common import show_popup
+import metrics
+
+DOCK_OBJECT_NAME = "TexmexDiagnosticsDock"
+
+# Milisegundos entre refrescos del dock
+REFRESH_MS = 1000
+
+# Operaciones recientes que se listan
+RECENT_ROWS = 200
+
+COLUMNS = ["Operación", "Llamadas", "Errores", "Reintentos", "MB",
+           "Media ms", "p50", "p90", "p99", "Máx ms"]
+RECENT_COLUMNS = ["Hora", "Operación", "Objeto", "ms", "KB", "Error"]
+
+
+def _bucket_label(i):
+    bounds = metrics.HISTOGRAM_BOUNDS
+    if i < len(bounds):
+        return f"≤ {bounds[i]} ms"
+    return f"> {bounds[-1]} ms"
+
+
+def _table(columns):
+    table = QtWidgets.QTableWidget(0, len(columns))
+    table.setHorizontalHeaderLabels(columns)
+    table.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+    table.setSelectionMode(QtWidgets.QAbstractItemView.SingleSelection)
+    table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+    table.verticalHeader().setVisible(False)
+    table.horizontalHeader().setStretchLastSection(True)
+    return table
+
+
+def _set_row(table, row, values):
+    for col, value in enumerate(values):
+        item = table.item(row, col)
+        if item is None:
+            item = QtWidgets.QTableWidgetItem("")
+            table.setItem(row, col, item)
+        item.setText(str(value))
+
+
+# ============================================================
+# WIDGET
+# ============================================================
+
+class DiagnosticsWidget(QtWidgets.QWidget):
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+
+        self._version = None
+        self._snapshot = {}
+
+        layout = QtWidgets.QVBoxLayout(self)
+
+        self.table = _table(COLUMNS)
+        layout.addWidget(self.table, 3)
+
+        self.histogram = QtWidgets.QLabel("")
+        self.histogram.setStyleSheet("font-family: monospace;")
+        self.histogram.setTextInteractionFlags(QtCore.Qt.TextSelectableByMouse)
+        layout.addWidget(self.histogram)
+
+        self.recent = _table(RECENT_COLUMNS)
+        layout.addWidget(self.recent, 2)
+
+        buttons = QtWidgets.QHBoxLayout()
+        self.btn_export = QtWidgets.QPushButton("Exportar JSONL…")
+        self.btn_reset = QtWidgets.QPushButton("Reiniciar")
+        buttons.addWidget(self.btn_export)
+        buttons.addWidget(self.btn_reset)
+        layout.addLayout(buttons)
+
+        self.btn_export.clicked.connect(self._on_export_clicked)
+        self.btn_reset.clicked.connect(self._on_reset_clicked)
+        self.table.itemSelectionChanged.connect(self._update_histogram)
+
+        self.timer = QtCore.QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(REFRESH_MS)
+
+        self.refresh()
+
+    # ----------------------------------------------------------
+    # Refresco
+    # ----------------------------------------------------------
+    def refresh(self):
+        if metrics.version == self._version:
+            return
+        if self._version is not None and not self.isVisible():
+            return
+        self._version = metrics.version
+        self._snapshot = metrics.snapshot()
+
+        selected = self._selected_op()
+        self.table.setRowCount(len(self._snapshot))
+        for row, (op, s) in enumerate(self._snapshot.items()):
+            _set_row(self.table, row, [
+                op, s["count"], s["errors"], s["retries"],
+                f"{s['bytes'] / 1048576:.1f}",
+                f"{s['mean_ms']:.1f}", f"{s['p50_ms']:.0f}", f"{s['p90_ms']:.0f}",
+                f"{s['p99_ms']:.0f}", f"{s['max_ms']:.0f}",
+            ])
+            if op == selected:
+                self.table.selectRow(row)
+
+        spans = metrics.recent(RECENT_ROWS)
+        self.recent.setRowCount(len(spans))
+        for row, span in enumerate(spans):
+            target = "/".join(p for p in (span["bucket"], span["key"]) if p)
+            _set_row(self.recent, row, [
+                time.strftime("%H:%M:%S", time.localtime(span["ts"])),
+                span["op"], target, f"{span['ms']:.1f}",
+                f"{span['bytes'] / 1024:.0f}" if span["bytes"] else "",
+                span["error"] or span["status"] or "",
+            ])
+
+        self._update_histogram()
+
+    def _selected_op(self):
+        items = self.table.selectedItems()
+        if not items:
+            return None
+        first = self.table.item(items[0].row(), 0)
+        return first.text() if first else None
+
+    def _update_histogram(self):
+        op = self._selected_op()
+        stats = self._snapshot.get(op) if op else None
+        if not stats:
+            self.histogram.setText("Selecciona una operación para ver su histograma.")
+            return
+
+        counts = stats["histogram"]
+        peak = max(counts) or 1
+        lines = [op]
+        for i, n in enumerate(counts):
+            if n:
+                lines.append(f"{_bucket_label(i):>12}  {'█' * max(1, 30 * n // peak)} {n}")
+        self.histogram.setText("\n".join(lines))
+
+    # ----------------------------------------------------------
+    # Botones
+    # ----------------------------------------------------------
+    def _on_export_clicked(self):
+        default = os.path.join(os.path.expanduser("~"),
+                               time.strftime("texmex_diagnostico_%Y%m%d_%H%M%S.jsonl"))
+        path, _ = QtWidgets.QFileDialog.getSaveFileName(
+            self, "Exportar diagnóstico", default, "JSON lines (*.jsonl)"
+        )
+        if not path:
+            return
+
+        try:
+            count = metrics.export_jsonl(path)
+        except Exception as e:
+            FreeCAD.Console.PrintError(f"Error exportando diagnóstico: {e}\n")
+            show_popup("Error", f"No se pudo exportar:\n{e}", QtWidgets.QMessageBox.Critical)
+            return
+
+        FreeCAD.Console.PrintMessage(f"Diagnóstico exportado ({count} operaciones): {path}\n")
+
+    def _on_reset_clicked(self):
+        metrics.reset()
+        self.refresh()
+
+
+# ============================================================
+# DOCK
+# ============================================================
+
+def show_diagnostics_dock():
+    """Muestra (o crea) el dock de diagnóstico."""
+    if not FreeCADGui:
+        return None
+
+    mw = FreeCADGui.getMainWindow()
+
+    existing = mw.findChild(QtWidgets.QDockWidget, DOCK_OBJECT_NAME)
+    if existing:
+        existing.show()
+        return existing
+
+    dock = QtWidgets.QDockWidget("Diagnóstico", mw)
+    dock.setObjectName(DOCK_OBJECT_NAME)
+    dock.setAllowedAreas(QtCore.Qt.BottomDockWidgetArea | QtCore.Qt.RightDockWidgetArea)
+    dock.setWidget(DiagnosticsWidget(dock))
+
+    mw.addDockWidget(QtCore.Qt.BottomDockWidgetArea, dock)
+    dock.show()
+    return dock
+
+
+# ============================================================
+# COMMAND
+# ============================================================
+
+class OpenDiagnosticsCmd:
+
+    def GetResources(self):
+        icon = os.path.join(os.path.dirname(__file__), "Resources/Icons/sync.svg")
+        return {
+            "Pixmap": icon,
+            "MenuText": "Diagnóstico",
+            "ToolTip": "Tiempos, errores y reintentos de las operaciones con el servidor"
+        }
+
+    def Activated(self):
+        dock = show_diagnostics_dock()
+        if dock:
+            dock.raise_()
+
+    def IsActive(self):
+        return True
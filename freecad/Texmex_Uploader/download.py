@@ -0,0 +1,269 @@
+# ============================================================
+# download.py → Descargas por rangos en paralelo (reanudables)
+# Texmex Weavers – FreeCAD Integration
+# ============================================================
+#
+# El objeto se divide en bloques de part_size que se piden con N hilos
+# (GET con Range + If-Match) y se escriben en su posición de un archivo
+# preasignado <dest>.part. Los bloques terminados se anotan en
+# <dest>.part.json: si la descarga se corta, el siguiente intento sólo
+# pide lo que falta. Al final se verifica tamaño y ETag (MD5 simple o
+# multipart) antes de renombrar a dest.
+#
+# progress(bytes_hechos, bytes_totales) se llama desde los hilos de
+# trabajo: quien lo reciba NO debe tocar widgets Qt directamente.
+
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_EXCEPTION, wait
+
+DEFAULT_PART_SIZE = 8 * 1024 * 1024
+DEFAULT_CONCURRENCY = 4
+
+# Lectura de la respuesta / del disco al verificar
+CHUNK = 1024 * 1024
+
+# Tamaños de parte probables al verificar un ETag multipart (el ETag
+# no dice con qué tamaño se subió: se prueban los que dan N partes)
+_CANDIDATE_PART_MB = (5, 8, 10, 15, 16, 32, 50, 64, 100, 128, 256, 512)
+
+
+class DownloadCancelled(Exception):
+    pass
+
+
+class DownloadVerifyError(Exception):
+    pass
+
+
+# ============================================================
+# ESTADO DE LA DESCARGA PARCIAL
+# ============================================================
+
+def _state_path(part_path):
+    return part_path + ".json"
+
+
+def _load_state(part_path, etag, size, part_size):
+    """Bloques ya escritos, si el .part corresponde a este ETag/tamaño."""
+    try:
+        with open(_state_path(part_path), "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return set()
+
+    if (state.get("etag") != etag or state.get("size") != size or
+            state.get("part_size") != part_size):
+        return set()
+    try:
+        if os.path.getsize(part_path) != size:
+            return set()
+    except OSError:
+        return set()
+    return set(state.get("done", []))
+
+
+def _save_state(part_path, etag, size, part_size, done):
+    path = _state_path(part_path)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"etag": etag, "size": size, "part_size": part_size,
+                   "done": sorted(done)}, f)
+    os.replace(tmp, path)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+# ============================================================
+# VERIFICACIÓN
+# ============================================================
+
+def _md5_of(path, offset=0, length=None):
+    h = hashlib.md5()
+    with open(path, "rb") as f:
+        f.seek(offset)
+        left = length
+        while left is None or left > 0:
+            data = f.read(CHUNK if left is None else min(CHUNK, left))
+            if not data:
+                break
+            h.update(data)
+            if left is not None:
+                left -= len(data)
+    return h
+
+
+def _multipart_etag(path, size, part_size):
+    digests = b""
+    count = 0
+    for offset in range(0, size, part_size):
+        digests += _md5_of(path, offset, min(part_size, size - offset)).digest()
+        count += 1
+    return f"{hashlib.md5(digests).hexdigest()}-{count}"
+
+
+def _configured_part_size(size):
+    """
+    Tamaño de parte con el que suben estos equipos (<upload_part_mb>,
+    ajustado como en transfer.upload), o None sin configuración.
+    """
+    try:
+        import storage
+        import transfer
+    except ImportError:
+        return None
+    mb = getattr(storage, "UPLOAD_PART_MB", None)
+    if not mb:
+        return None
+    return transfer._effective_part_size(size, mb * 1024 * 1024)
+
+
+def candidate_part_sizes(etag, size):
+    """
+    Tamaños de parte con los que un ETag multipart da N partes: primero
+    el configurado y después los habituales.
+    """
+    try:
+        parts = int((etag or "").rsplit("-", 1)[1])
+    except (IndexError, ValueError):
+        return ()
+    sizes = []
+    configured = _configured_part_size(size)
+    if configured:
+        sizes.append(configured)
+    for mb in _CANDIDATE_PART_MB:
+        sizes.append(mb * 1024 * 1024)
+    return tuple(ps for i, ps in enumerate(sizes)
+                 if (size + ps - 1) // ps == parts and ps not in sizes[:i])
+
+
+def check(path, etag, size):
+    """
+    True si path coincide con el ETag/tamaño, False si no, y None si
+    sólo coincide el tamaño y el ETag no se puede comprobar: no es MD5
+    (p.ej. cifrado SSE-KMS) o es multipart con un tamaño de parte que
+    no se conoce (otro cliente u otra configuración).
+    """
+    if os.path.getsize(path) != size:
+        return False
+
+    etag = (etag or "").strip('"').lower()
+
+    if "-" not in etag:
+        if len(etag) != 32:
+            return None
+        return _md5_of(path).hexdigest() == etag
+
+    for part_size in candidate_part_sizes(etag, size):
+        if _multipart_etag(path, size, part_size) == etag:
+            return True
+    return None
+
+
+def verify(path, etag, size):
+    """False sólo si path seguro que NO es el objeto (ver check)."""
+    return check(path, etag, size) is not False
+
+
+# ============================================================
+# DESCARGA
+# ============================================================
+
+def download(client, bucket, key, dest, size=None, etag=None,
+             part_size=None, concurrency=None, progress=None, cancel_event=None):
+    """
+    Descarga bucket/key a dest. Devuelve dest.
+    size/etag pueden venir de un stat previo para ahorrar el HEAD.
+    Lanza DownloadCancelled si cancel_event se activa y
+    DownloadVerifyError si el resultado no coincide con el ETag.
+    """
+    if size is None or not etag:
+        stat = client.stat_object(bucket, key)
+        size, etag = stat.size, stat.etag
+    size = int(size)
+    etag = (etag or "").strip('"')
+
+    part_size = max(int(part_size or DEFAULT_PART_SIZE), CHUNK)
+    concurrency = max(1, int(concurrency or DEFAULT_CONCURRENCY))
+
+    part_path = dest + ".part"
+    done = _load_state(part_path, etag, size, part_size)
+
+    if not done:
+        # Archivo preasignado: cada hilo escribe en su posición
+        with open(part_path, "wb") as f:
+            f.truncate(size)
+
+    count = max(1, (size + part_size - 1) // part_size)
+    pending = [n for n in range(count) if n not in done]
+
+    lock = threading.Lock()
+    stop = threading.Event()
+    received = [sum(min(part_size, size - n * part_size) for n in done)]
+
+    if done and progress:
+        progress(received[0], size)
+
+    def fetch(n):
+        offset = n * part_size
+        length = min(part_size, size - offset)
+        if length <= 0:
+            return
+
+        # If-Match: si el objeto cambia a mitad de descarga, falla en vez
+        # de mezclar dos versiones en el mismo archivo
+        response = client.get_object(
+            bucket, key, offset=offset, length=length,
+            request_headers={"If-Match": f'"{etag}"'},
+        )
+        try:
+            with open(part_path, "r+b") as f:
+                f.seek(offset)
+                for data in response.stream(CHUNK):
+                    if stop.is_set() or (cancel_event is not None and cancel_event.is_set()):
+                        raise DownloadCancelled()
+                    f.write(data)
+                    with lock:
+                        received[0] += len(data)
+                        current = received[0]
+                    if progress:
+                        progress(current, size)
+        finally:
+            response.close()
+            response.release_conn()
+
+        with lock:
+            done.add(n)
+            _save_state(part_path, etag, size, part_size, done)
+
+    if cancel_event is not None and cancel_event.is_set():
+        raise DownloadCancelled()
+
+    if pending and size:
+        with ThreadPoolExecutor(max_workers=concurrency) as ex:
+            futures = [ex.submit(fetch, n) for n in pending]
+            finished, _pending = wait(futures, return_when=FIRST_EXCEPTION)
+
+            failed = [f for f in finished if f.exception() is not None]
+            if failed:
+                stop.set()
+                for f in futures:
+                    f.cancel()
+                # El .part y su estado quedan para reanudar
+                raise failed[0].exception()
+
+    if not verify(part_path, etag, size):
+        _remove(part_path)
+        _remove(_state_path(part_path))
+        raise DownloadVerifyError(f"La descarga de {key} no coincide con su ETag")
+
+    os.replace(part_path, dest)
+    _remove(_state_path(part_path))
+    return dest
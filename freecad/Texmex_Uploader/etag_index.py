@@ -0,0 +1,211 @@
+# ============================================================
+# etag_index.py → Índice local ETag → ruta (SQLite)
+# Texmex Weavers – FreeCAD Integration
+# ============================================================
+#
+# Sustituye el recorrido completo del bucket en find_etag_path.
+# - _upload_object (storage.py) registra cada subida (record)
+# - delete_model_from_bucket borra la entrada (forget)
+# - Si una búsqueda falla se re-escanea el bucket una sola vez
+#   y se purgan las entradas que ya no existen.
+#
+# El archivo es compartido por todas las instancias de FreeCAD del
+# usuario (SQLite en modo WAL).
+
+import os
+import sqlite3
+import threading
+import time
+
+try:
+    import FreeCAD
+except ImportError:
+    import headless as FreeCAD
+
+from config_storage import get_data_dir
+
+INDEX_FILENAME = "etag_index.sqlite"
+
+# Filas por transacción durante un re-escaneo
+SCAN_BATCH = 1000
+
+# Segundos mínimos entre dos re-escaneos completos por fallo de búsqueda
+RESCAN_INTERVAL = 120
+
+_lock = threading.RLock()
+_conn = None
+
+
+def _normalize(etag):
+    return (etag or "").strip().strip('"').lower()
+
+
+def get_index_path():
+    return os.path.join(get_data_dir(), INDEX_FILENAME)
+
+
+def _connect():
+    global _conn
+
+    with _lock:
+        if _conn is not None:
+            return _conn
+
+        conn = sqlite3.connect(get_index_path(), timeout=10, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS objects ("
+            " bucket TEXT NOT NULL,"
+            " key TEXT NOT NULL,"
+            " etag TEXT NOT NULL,"
+            " size INTEGER,"
+            " scan INTEGER NOT NULL DEFAULT 0,"
+            " PRIMARY KEY (bucket, key))"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS objects_etag ON objects (bucket, etag)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS scans ("
+            " bucket TEXT PRIMARY KEY,"
+            " generation INTEGER NOT NULL,"
+            " finished REAL)"
+        )
+        conn.commit()
+
+        _conn = conn
+        return _conn
+
+
+# ============================================================
+# CONSULTA / ESCRITURA
+# ============================================================
+
+def lookup(bucket, etag):
+    """Devuelve la ruta registrada para el ETag o None (sin red)."""
+    etag = _normalize(etag)
+    if not etag:
+        return None
+
+    with _lock:
+        row = _connect().execute(
+            "SELECT key FROM objects WHERE bucket = ? AND etag = ? LIMIT 1",
+            (bucket, etag)
+        ).fetchone()
+
+    return row[0] if row else None
+
+
+def record(bucket, key, etag, size=None):
+    """Registra (o reemplaza) la ruta de un objeto recién subido."""
+    etag = _normalize(etag)
+    if not etag or not key:
+        return
+
+    with _lock:
+        conn = _connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO objects (bucket, key, etag, size, scan) "
+            "VALUES (?, ?, ?, ?, COALESCE("
+            " (SELECT generation FROM scans WHERE bucket = ?), 0))",
+            (bucket, key, etag, size, bucket)
+        )
+        conn.commit()
+
+
+def forget(bucket, key):
+    """Quita un objeto eliminado del índice."""
+    with _lock:
+        conn = _connect()
+        conn.execute("DELETE FROM objects WHERE bucket = ? AND key = ?", (bucket, key))
+        conn.commit()
+
+
+# ============================================================
+# RE-ESCANEO
+# ============================================================
+
+def refresh(client, bucket, prefix=""):
+    """
+    Lista el bucket (o sólo prefix) y actualiza el índice.
+    Las filas de ese rango que no aparecen en el listado se borran.
+    Devuelve el número de objetos vistos.
+    """
+    with _lock:
+        conn = _connect()
+        row = conn.execute(
+            "SELECT generation FROM scans WHERE bucket = ?", (bucket,)
+        ).fetchone()
+        generation = (row[0] if row else 0) + 1
+
+        # La generación nueva se publica ANTES de listar: un record()
+        # durante el listado la usa y la purga final no lo borra
+        conn.execute(
+            "INSERT INTO scans (bucket, generation, finished) VALUES (?, ?, NULL) "
+            "ON CONFLICT (bucket) DO UPDATE SET generation = excluded.generation",
+            (bucket, generation)
+        )
+        conn.commit()
+
+    seen = 0
+    batch = []
+
+    def flush():
+        with _lock:
+            conn.executemany(
+                "INSERT OR REPLACE INTO objects (bucket, key, etag, size, scan) "
+                "VALUES (?, ?, ?, ?, ?)",
+                batch
+            )
+            conn.commit()
+        batch.clear()
+
+    from journal import is_journal_key
+
+    for obj in client.list_objects(bucket, prefix=prefix or None, recursive=True):
+        etag = _normalize(getattr(obj, "etag", ""))
+        if not etag or is_journal_key(obj.object_name):
+            continue
+        batch.append((bucket, obj.object_name, etag, getattr(obj, "size", None), generation))
+        seen += 1
+        if len(batch) >= SCAN_BATCH:
+            flush()
+
+    if batch:
+        flush()
+
+    with _lock:
+        conn.execute(
+            "DELETE FROM objects WHERE bucket = ? AND key >= ? AND key < ? AND scan < ?",
+            (bucket, prefix, prefix + "\uffff", generation)
+        )
+        conn.execute(
+            "UPDATE scans SET finished = ? WHERE bucket = ?", (time.time(), bucket)
+        )
+        conn.commit()
+
+    return seen
+
+
+def find(client, bucket, etag):
+    """
+    Busca la ruta de un ETag: primero en el índice local y, sólo si no
+    está, re-escaneando el bucket (como mucho uno cada RESCAN_INTERVAL).
+    """
+    key = lookup(bucket, etag)
+    if key or not _normalize(etag):
+        return key
+
+    with _lock:
+        row = _connect().execute(
+            "SELECT finished FROM scans WHERE bucket = ?", (bucket,)
+        ).fetchone()
+    if row and row[0] and time.time() - row[0] < RESCAN_INTERVAL:
+        return None
+
+    try:
+        refresh(client, bucket)
+    except Exception as e:
+        FreeCAD.Console.PrintError(f"Error actualizando índice ETag: {e}\n")
+        return None
+
+    return lookup(bucket, etag)
@@ -0,0 +1,51 @@
+# ============================================================
+# headless.py → Sustituto mínimo de FreeCAD fuera de FreeCAD
+# Texmex Weavers – FreeCAD Integration
+# ============================================================
+#
+# Los módulos de almacenamiento (storage, config_storage, etag_index…)
+# hacen "import FreeCAD" sólo para la consola y la carpeta de usuario.
+# Cuando corren desde la línea de comandos (cli.py) sin FreeCAD
+# instalado, importan este módulo en su lugar:
+#
+#   try:
+#       import FreeCAD
+#   except ImportError:
+#       import headless as FreeCAD
+#
+# Los mensajes van a stderr: stdout queda libre para la salida JSON.
+
+import os
+import sys
+
+# PrintMessage sólo se muestra con VERBOSE (cli.py --verbose)
+VERBOSE = False
+
+
+class Console:
+
+    @staticmethod
+    def PrintMessage(text):
+        if VERBOSE:
+            sys.stderr.write(text)
+
+    @staticmethod
+    def PrintWarning(text):
+        sys.stderr.write(text)
+
+    @staticmethod
+    def PrintError(text):
+        sys.stderr.write(text)
+
+
+def getUserAppDataDir():
+    """
+    Carpeta de usuario de FreeCAD deducida de la ubicación del módulo
+    (<UserAppData>/Mod/TexmexUploader/...), para compartir índices y
+    cachés con el workbench. RuntimeError si no está instalado ahí.
+    """
+    here = os.path.abspath(os.path.dirname(__file__))
+    marker = os.sep + "Mod" + os.sep
+    if marker not in here:
+        raise RuntimeError("módulo fuera de la carpeta Mod de FreeCAD")
+    return here[:here.rindex(marker)] + os.sep
@@ -4,6 +4,7 @@
 
 import os
 import sys
+import time
 import FreeCAD, FreeCADGui
 from PySide2 import QtGui, QtWidgets
 
@@ -25,7 +26,7 @@ class TexmexUploaderWorkbench(FreeCADGui.Workbench):
     # INITIALIZE WORKBENCH
     # ------------------------------------------------------------
     def Initialize(self):
-
+        started = time.perf_counter()
 
         # ------------------------------------------------------------
         # PATH DEL MODULO
@@ -44,20 +45,9 @@ class TexmexUploaderWorkbench(FreeCADGui.Workbench):
         # LOAD COMMANDS
         # ------------------------------------------------------------
         try:
-            import model     # model.py
-            import svg       # svg.py
-            import config    # config.py
-            import library   # library.py
-
-            # Register commands
-            FreeCADGui.addCommand("UploadModelFile",      model.UploadToTexmexWeaversCmd())
-            FreeCADGui.addCommand("UploadCurrentProject", model.UploadCurrentProjectCmd())
-            FreeCADGui.addCommand("AddDocAttributes",     model.AddAttributesCMD())
-            FreeCADGui.addCommand("UploadTechDrawSVG",    svg.UploadTechDrawSVGCmd())
-            FreeCADGui.addCommand("ConfigMinIO",          config.ConfigMinIOCmd())
-            FreeCADGui.addCommand("CopyTemplates",        config.CopyTemplatesCmd())
-            FreeCADGui.addCommand("AddPageAttributes",    svg.AddPageAttributesCMD())
-            FreeCADGui.addCommand("OpenTexmexLibrary",    library.OpenTexmexLibraryCmd())
+            # Registro diferido: cada módulo se importa al usar su comando
+            import lazy_commands
+            lazy_commands.register_all(FreeCADGui.addCommand)
 
             # ------------------------------------------------------------
             # TOOLBARS
@@ -68,6 +58,7 @@ class TexmexUploaderWorkbench(FreeCADGui.Workbench):
 
             self.appendToolbar("SVG Tools", [
                 "UploadTechDrawSVG",
+                "UploadAllTechDrawSVG",
             ])
 
             
@@ -81,6 +72,7 @@ class TexmexUploaderWorkbench(FreeCADGui.Workbench):
 
             self.appendToolbar("Libreria CAD", [
                 "OpenTexmexLibrary",
+                "OpenTexmexTransfers",
             ])
 
             # ------------------------------------------------------------
@@ -94,7 +86,7 @@ class TexmexUploaderWorkbench(FreeCADGui.Workbench):
 
             self.appendMenu(
                 ["Texmex Weavers", "Planos SVG"],
-                ["UploadTechDrawSVG","AddPageAttributes"]
+                ["UploadTechDrawSVG", "UploadAllTechDrawSVG", "AddPageAttributes"]
             )
 
             self.appendMenu(
@@ -102,7 +94,14 @@ class TexmexUploaderWorkbench(FreeCADGui.Workbench):
                 ["ConfigMinIO", "CopyTemplates"]
             )
 
-            FreeCAD.Console.PrintMessage(" Texmex Weavers CAD loaded.\n")
+            self.appendMenu(["Texmex Weavers"], ["OpenTexmexTransfers", "OpenTexmexDiagnostics"])
+
+            FreeCAD.Console.PrintMessage(
+                f" Texmex Weavers CAD loaded ({(time.perf_counter() - started) * 1000:.0f} ms).\n"
+            )
+
+            # minio + subidas interrumpidas, fuera del hilo de la GUI
+            lazy_commands.bootstrap()
 
         except Exception as e:
             FreeCAD.Console.PrintError(f" Could not load commands: {e}\n")
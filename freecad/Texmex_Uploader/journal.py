@@ -0,0 +1,544 @@
+# ============================================================
+# journal.py → Diario de cambios en el servidor (_journal/)
+# Texmex Weavers – FreeCAD Integration
+# ============================================================
+#
+# Cada subida / borrado añade un registro compacto al diario del
+# bucket. S3 no permite añadir a un objeto, así que cada cliente junta
+# sus registros unos segundos (FLUSH_DELAY) y escribe un segmento
+# nuevo e inmutable, con la hora UTC de escritura en el nombre:
+#
+#   _journal/YYYYMMDD/HHMMSS.ffffff-<cliente>.jsonl
+#   {"t": 1760000000.0, "op": "put", "k": "area/.../x.FCStd",
+#    "e": "<etag>", "s": 1234, "r": "1.02", "c": "<cliente>"}
+#
+# Los nombres se ordenan por tiempo: cada cliente guarda un cursor y
+# sync() lista sólo lo posterior (start_after), descarga esos segmentos
+# y los aplica como las notificaciones (notifications.dispatch):
+# caché de listados, etag_index, revision_index, model_cache y librería.
+# Para tolerar relojes desfasados se relee una ventana CLOCK_SKEW hacia
+# atrás y se recuerdan los segmentos ya aplicados. De varios registros
+# del mismo objeto gana el de mayor "t" (un segmento reintentado puede
+# traer registros más viejos que otro ya escrito).
+#
+# Si no se puede escribir (sin red), los registros vuelven al búfer, se
+# reintenta cada FLUSH_RETRY segundos y se guardan en
+# get_data_dir()/journal_pending.json hasta escribirse (también entre
+# sesiones).
+#
+# compact() junta los segmentos de cada día anterior a COMPACT_AFTER_DAYS
+# en _journal/YYYYMMDD/compact.jsonl (último registro por objeto; el
+# nombre va después de los segmentos del día) y borra los días de más
+# de RETENTION_DAYS. Un cliente con el cursor más viejo que eso
+# re-escanea el bucket.
+#
+# Funciona sin notificaciones (MinIO sin listen, otros S3): el hilo de
+# fondo consulta el diario cada JOURNAL_POLL segundos.
+
+import atexit
+import io
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+try:
+    import FreeCAD
+except ImportError:
+    import headless as FreeCAD
+
+from config_storage import get_data_dir
+import storage
+
+JOURNAL_DIR = storage.JOURNAL_DIR
+JOURNAL_PREFIX = JOURNAL_DIR + "/"
+COMPACT_NAME = "compact.jsonl"
+STATE_FILENAME = "journal_state.json"
+PENDING_FILENAME = "journal_pending.json"
+
+PUT = "put"
+DELETE = "delete"
+
+# Segundos que se juntan registros antes de escribir un segmento
+FLUSH_DELAY = 2.0
+# Registros máximos por segmento
+FLUSH_MAX_RECORDS = 500
+# Segundos entre reintentos si no se pudo escribir
+FLUSH_RETRY = 30.0
+
+# Desfase de reloj tolerado entre clientes (segundos)
+CLOCK_SKEW = 300
+
+# Días completos que se dejan sin compactar / que se conservan
+COMPACT_AFTER_DAYS = 2
+RETENTION_DAYS = 30
+
+# Identifica los segmentos de este proceso
+CLIENT_ID = "{}-{}".format(
+    storage._slug(socket.gethostname() or "host")[:24] or "host",
+    uuid.uuid4().hex[:8],
+)
+
+_lock = threading.Lock()
+_buffers = {}          # bucket → [registro, ...]
+_flush_timer = None
+_exiting = False
+_state_lock = threading.Lock()
+
+
+def is_journal_key(key):
+    return (key or "").startswith(JOURNAL_PREFIX)
+
+
+# ============================================================
+# NOMBRES
+# ============================================================
+
+def _utc(ts):
+    return datetime.fromtimestamp(ts, timezone.utc)
+
+
+def segment_key(ts, client=CLIENT_ID):
+    t = _utc(ts)
+    return f"{JOURNAL_PREFIX}{t:%Y%m%d}/{t:%H%M%S}.{t:%f}-{client}.jsonl"
+
+
+def _position(ts):
+    """Clave que va justo antes de cualquier segmento escrito en ts."""
+    t = _utc(ts)
+    return f"{JOURNAL_PREFIX}{t:%Y%m%d}/{t:%H%M%S}.{t:%f}"
+
+
+def _segment_time(key):
+    """Hora (epoch) de un segmento, o None si el nombre no la lleva."""
+    parts = key[len(JOURNAL_PREFIX):].split("/")
+    if len(parts) != 2:
+        return None
+    day, name = parts
+    try:
+        if name == COMPACT_NAME:
+            t = datetime.strptime(day, "%Y%m%d") + timedelta(days=1)
+        else:
+            t = datetime.strptime(day + name[:13], "%Y%m%d%H%M%S.%f")
+    except ValueError:
+        return None
+    return t.replace(tzinfo=timezone.utc).timestamp()
+
+
+# ============================================================
+# ESCRITURA
+# ============================================================
+
+def enabled(cfg=None):
+    cfg = storage.cfg if cfg is None else cfg
+    return storage._int_cfg(cfg, "JOURNAL", 1) != 0
+
+
+def record(bucket, op, key, etag=None, size=None, revision=None):
+    """Añade un cambio al diario de bucket (se escribe en unos segundos)."""
+    if not enabled() or is_journal_key(key):
+        return
+
+    entry = {"t": round(time.time(), 3), "op": op, "k": key, "c": CLIENT_ID}
+    if etag:
+        entry["e"] = (etag or "").strip('"')
+    if size is not None:
+        entry["s"] = size
+    if revision is not None:
+        entry["r"] = str(revision)
+
+    with _lock:
+        buffer = _buffers.setdefault(bucket, [])
+        buffer.append(entry)
+        flush_now = len(buffer) >= FLUSH_MAX_RECORDS
+        if not flush_now:
+            _arm_timer(FLUSH_DELAY)
+
+    if flush_now:
+        threading.Thread(target=flush, daemon=True).start()
+
+
+def _write_segment(client, bucket, entries):
+    data = "".join(json.dumps(e, ensure_ascii=False, separators=(",", ":")) + "\n"
+                   for e in entries).encode("utf-8")
+    # Hora de escritura, no la del primer registro: un reintento tardío
+    # debe quedar después del cursor de los demás clientes
+    client.put_object(bucket, segment_key(time.time()), io.BytesIO(data), len(data),
+                      content_type="application/x-ndjson")
+
+
+def _arm_timer(delay):
+    """Con _lock: flush() dentro de delay segundos."""
+    global _flush_timer
+
+    if _flush_timer is None and not _exiting:
+        _flush_timer = threading.Timer(delay, flush)
+        _flush_timer.daemon = True
+        _flush_timer.start()
+
+
+def flush():
+    """
+    Escribe ya los registros pendientes (un segmento por bucket). Lo que
+    no se pudo escribir vuelve al búfer (y a journal_pending.json).
+    """
+    global _flush_timer
+
+    with _lock:
+        pending = {b: entries for b, entries in _buffers.items() if entries}
+        _buffers.clear()
+        if _flush_timer is not None:
+            _flush_timer.cancel()
+            _flush_timer = None
+
+    if not pending:
+        return
+
+    failed = {}
+    try:
+        client = storage.get_client()
+    except Exception as e:
+        FreeCAD.Console.PrintError(f"Diario de cambios sin conexión: {e}\n")
+        failed = pending
+    else:
+        for bucket, entries in pending.items():
+            try:
+                _write_segment(client, bucket, entries)
+            except Exception as e:
+                FreeCAD.Console.PrintError(f"No se pudo escribir el diario de {bucket}: {e}\n")
+                failed[bucket] = entries
+
+    with _lock:
+        for bucket, entries in failed.items():
+            # Delante de lo que llegó mientras tanto (orden de escritura)
+            _buffers[bucket] = entries + _buffers.get(bucket, [])
+        if failed:
+            _arm_timer(FLUSH_RETRY)
+        _save_pending()
+
+
+def _flush_at_exit():
+    global _exiting
+    _exiting = True
+    flush()
+
+
+# La línea de comandos termina en cuanto sube: que no se pierda nada
+atexit.register(_flush_at_exit)
+
+
+# ============================================================
+# REGISTROS SIN ESCRIBIR (entre sesiones)
+# ============================================================
+
+def get_pending_path():
+    return os.path.join(get_data_dir(), PENDING_FILENAME)
+
+
+def _other_servers(data):
+    return {sid: entries for sid, entries in data.items()
+            if sid.rpartition("/")[0] != storage.ENDPOINT}
+
+
+def _save_pending():
+    """Con _lock: guarda los búferes que aún no se escribieron (o borra el archivo)."""
+    path = get_pending_path()
+    data = {}
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = _other_servers(json.load(f))
+        except (OSError, ValueError):
+            data = {}
+    data.update({_state_id(b): entries for b, entries in _buffers.items() if entries})
+    try:
+        if not data:
+            if os.path.exists(path):
+                os.remove(path)
+            return
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+    except OSError as e:
+        FreeCAD.Console.PrintError(f"No se pudo guardar el diario pendiente: {e}\n")
+
+
+def _restore_pending():
+    """Registros de una sesión anterior que no llegaron a escribirse."""
+    try:
+        with open(get_pending_path(), "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return
+
+    with _lock:
+        for sid, entries in data.items():
+            endpoint, _, bucket = sid.rpartition("/")
+            if endpoint != storage.ENDPOINT or not entries:
+                continue  # otro servidor: se queda en el archivo
+            _buffers[bucket] = entries + _buffers.get(bucket, [])
+        if any(_buffers.values()):
+            _arm_timer(FLUSH_DELAY)
+
+
+# ============================================================
+# CURSOR LOCAL
+# ============================================================
+
+def get_state_path():
+    return os.path.join(get_data_dir(), STATE_FILENAME)
+
+
+def _load_state():
+    try:
+        with open(get_state_path(), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_state(state):
+    path = get_state_path()
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+
+def _state_id(bucket):
+    return f"{storage.ENDPOINT}/{bucket}"
+
+
+# ============================================================
+# LECTURA
+# ============================================================
+
+def _read_segment(client, bucket, key):
+    response = client.get_object(bucket, key)
+    try:
+        data = response.read()
+    finally:
+        response.close()
+        response.release_conn()
+
+    entries = []
+    for line in data.decode("utf-8", "replace").splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            entries.append(json.loads(line))
+        except ValueError:
+            continue
+    return entries
+
+
+def _to_change(bucket, entry):
+    """Registro del diario → cambio con la forma de notifications.parse_event."""
+    import revision_index
+
+    metadata = {}
+    if entry.get("r") is not None:
+        metadata[revision_index.REVISION_META] = entry["r"]
+
+    return {
+        "bucket": bucket,
+        "key": entry.get("k", ""),
+        "event": "delete" if entry.get("op") == DELETE else "put",
+        "etag": entry.get("e", ""),
+        "size": entry.get("s"),
+        "metadata": metadata,
+    }
+
+
+def _full_resync(client, bucket):
+    """Cursor más viejo que el diario: el índice local ya no es fiable."""
+    import etag_index
+
+    FreeCAD.Console.PrintMessage(f"Diario de {bucket} caducado, re-escaneando el bucket…\n")
+    storage.invalidate_listing(bucket)
+    etag_index.refresh(client, bucket)
+
+
+def sync(client, bucket, dispatch=None):
+    """
+    Aplica los segmentos que este cliente aún no vio.
+    Devuelve la lista de cambios aplicados (último por objeto).
+    """
+    if dispatch is None:
+        import notifications
+        dispatch = notifications.dispatch
+
+    now = time.time()
+    sid = _state_id(bucket)
+
+    with _state_lock:
+        state = _load_state()
+        entry = state.get(sid) or {}
+        cursor = entry.get("cursor")
+        applied = set(entry.get("applied") or [])
+
+        # Primera vez: sólo lo reciente (los índices se construyen solos)
+        if cursor is None:
+            cursor = now - CLOCK_SKEW
+        elif cursor < now - RETENTION_DAYS * 86400:
+            _full_resync(client, bucket)
+            cursor, applied = now - CLOCK_SKEW, set()
+
+        start = _position(cursor - CLOCK_SKEW)
+        changes = {}        # key → (t, cambio)
+        newest = cursor
+
+        for obj in client.list_objects(bucket, prefix=JOURNAL_PREFIX, recursive=True,
+                                       start_after=start):
+            key = obj.object_name
+            ts = _segment_time(key)
+            if ts is None or key in applied:
+                continue
+
+            for record_ in _read_segment(client, bucket, key):
+                k, t = record_.get("k"), record_.get("t", 0)
+                if k and (k not in changes or t >= changes[k][0]):
+                    changes[k] = (t, _to_change(bucket, record_))
+
+            applied.add(key)
+            if ts <= now + CLOCK_SKEW:
+                newest = max(newest, ts)
+
+        # Primero aplicar: si falla, el cursor no avanza y se reintenta
+        result = [change for _t, change in changes.values()]
+        if result:
+            dispatch(result)
+
+        # Recordar sólo los segmentos que aún caen en la ventana de relectura
+        horizon = newest - 2 * CLOCK_SKEW
+        applied = sorted(k for k in applied if (_segment_time(k) or 0) >= horizon)
+        state[sid] = {"cursor": newest, "applied": applied, "synced": now}
+        _save_state(state)
+
+    return result
+
+
+# ============================================================
+# COMPACTACIÓN
+# ============================================================
+
+def compact(client, bucket, now=None):
+    """
+    Junta cada día viejo en compact.jsonl y borra los caducados.
+    Idempotente: varios clientes pueden compactar a la vez.
+    Devuelve {"compacted": días, "removed": objetos borrados}.
+    """
+    from minio.deleteobjects import DeleteObject
+
+    now = time.time() if now is None else now
+    today = _utc(now).date()
+    compact_before = (today - timedelta(days=COMPACT_AFTER_DAYS)).strftime("%Y%m%d")
+    expire_before = (today - timedelta(days=RETENTION_DAYS)).strftime("%Y%m%d")
+
+    days = {}
+    for obj in client.list_objects(bucket, prefix=JOURNAL_PREFIX, recursive=True):
+        parts = obj.object_name[len(JOURNAL_PREFIX):].split("/")
+        if len(parts) == 2:
+            days.setdefault(parts[0], []).append(obj.object_name)
+
+    stats = {"compacted": 0, "removed": 0}
+    doomed = []
+
+    for day, keys in sorted(days.items()):
+        if day < expire_before:
+            doomed.extend(keys)
+            continue
+        if day >= compact_before:
+            continue
+
+        segments = sorted(k for k in keys if not k.endswith("/" + COMPACT_NAME))
+        if not segments:
+            continue
+
+        latest = {}
+        for key in sorted(keys, key=lambda k: (not k.endswith(COMPACT_NAME), k)):
+            for entry in _read_segment(client, bucket, key):
+                k = entry.get("k")
+                if k and (k not in latest or entry.get("t", 0) >= latest[k].get("t", 0)):
+                    latest[k] = entry
+
+        entries = sorted(latest.values(), key=lambda e: e.get("t", 0))
+        data = "".join(json.dumps(e, ensure_ascii=False, separators=(",", ":")) + "\n"
+                       for e in entries).encode("utf-8")
+        client.put_object(bucket, f"{JOURNAL_PREFIX}{day}/{COMPACT_NAME}",
+                          io.BytesIO(data), len(data), content_type="application/x-ndjson")
+        doomed.extend(segments)
+        stats["compacted"] += 1
+
+    if doomed:
+        errors = list(client.remove_objects(bucket, (DeleteObject(k) for k in doomed)))
+        for error in errors:
+            FreeCAD.Console.PrintError(f"No se pudo borrar {error.name}: {error.message}\n")
+        stats["removed"] = len(doomed) - len(errors)
+
+    return stats
+
+
+# ============================================================
+# HILO DE FONDO
+# ============================================================
+
+_poller = None
+
+
+def _poll_loop(stop_event):
+    last_compact = 0.0
+
+    while True:
+        interval = max(5, storage._int_cfg(storage.cfg, "JOURNAL_POLL", 30))
+        try:
+            client = storage.get_client()
+            for bucket in dict.fromkeys([storage.BUCKET_MODEL, storage.BUCKET_SVG]):
+                if storage.bucket_exists(bucket):
+                    sync(client, bucket)
+
+            # Una vez al día por cliente basta (compactar es idempotente)
+            if time.time() - last_compact > 86400:
+                last_compact = time.time()
+                for bucket in dict.fromkeys([storage.BUCKET_MODEL, storage.BUCKET_SVG]):
+                    if storage.bucket_exists(bucket):
+                        compact(client, bucket)
+
+        except Exception as e:
+            FreeCAD.Console.PrintWarning(f"No se pudo leer el diario de cambios: {e}\n")
+
+        if stop_event.wait(interval):
+            return
+
+
+def start():
+    """Consulta el diario periódicamente (si está activado)."""
+    global _poller
+
+    with _lock:
+        if _poller is not None or not enabled() or not storage.ENDPOINT:
+            return _poller
+        stop_event = threading.Event()
+        thread = threading.Thread(target=_poll_loop, args=(stop_event,),
+                                  name="TexmexJournal", daemon=True)
+        _poller = (thread, stop_event)
+        thread.start()
+        return _poller
+
+
+def stop():
+    global _poller
+
+    with _lock:
+        poller, _poller = _poller, None
+    if poller is not None:
+        poller[1].set()
+
+
+# Lo que una sesión anterior no pudo escribir
+_restore_pending()
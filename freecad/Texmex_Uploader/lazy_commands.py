@@ -0,0 +1,165 @@
+# ============================================================
+# lazy_commands.py → Registro diferido de comandos del workbench
+# Texmex Weavers – FreeCAD Integration
+# ============================================================
+#
+# Initialize() ya no importa model/svg/config/library/transfers (y con
+# ellos common → storage → minio, config.xml, índices...). Cada comando
+# se registra con un proxy que sólo conoce su icono y textos; el módulo
+# real se importa la primera vez que el usuario lo activa.
+#
+# Lo que sí debe pasar al arrancar (comprobar/instalar minio, reanudar
+# subidas interrumpidas, escuchar cambios del servidor, espejo local)
+# corre en un hilo de fondo: bootstrap().
+#
+# Los textos de COMMANDS deben coincidir con GetResources() de cada
+# clase real (se muestran antes de importarla).
+
+import importlib
+import os
+import threading
+import time
+
+try:
+    import FreeCAD
+except ImportError:
+    import headless as FreeCAD
+
+ICON_DIR = os.path.join(os.path.dirname(__file__), "Resources", "Icons")
+
+# nombre → (módulo, clase, icono, MenuText, ToolTip)
+COMMANDS = {
+    "UploadModelFile": (
+        "model", "UploadToTexmexWeaversCmd", "folder.svg",
+        "Subir Modelo FCStd", "Sube un archivo .FCStd a MinIO con metadatos"),
+    "UploadCurrentProject": (
+        "model", "UploadCurrentProjectCmd", "export.svg",
+        "Subir Proyecto Actual", "Sube el FCStd activo usando sus metadatos"),
+    "AddDocAttributes": (
+        "model", "AddAttributesCMD", "dProp.svg",
+        "Configurar Documento", "Crea las propiedades necesarias para el archivo."),
+    "UploadTechDrawSVG": (
+        "svg", "UploadTechDrawSVGCmd", "fplan.svg",
+        "Subir Página Activa (SVG)", "Exporta y sube la página activa de TechDraw como SVG"),
+    "UploadAllTechDrawSVG": (
+        "svg", "UploadAllTechDrawSVGCmd", "fplan.svg",
+        "Subir Todas las Páginas (SVG)",
+        "Exporta y sube en lote las páginas TechDraw (seleccionadas o todas)"),
+    "ConfigMinIO": (
+        "config", "ConfigMinIOCmd", "setting.svg",
+        "Configurar Servidor", "Configurar conexión S3"),
+    "CopyTemplates": (
+        "config", "CopyTemplatesCmd", "boxlogo.svg",
+        "Instalar Plantillas Texmex", "Copia las plantillas SVG a la carpeta oficial de TechDraw"),
+    "AddPageAttributes": (
+        "svg", "AddPageAttributesCMD", "pProp.svg",
+        "Agregar Atributos a Página", "Crea atributos Base_* en la(s) página(s) de TechDraw"),
+    "OpenTexmexLibrary": (
+        "library", "OpenTexmexLibraryCmd", "cloud.svg",
+        "Librería de Modelos", "Abrir librería Texmex desde MinIO"),
+    "OpenTexmexTransfers": (
+        "transfers", "OpenTransfersCmd", "cloud.svg",
+        "Transferencias", "Muestra las subidas en curso y terminadas"),
+    "OpenTexmexDiagnostics": (
+        "diagnostics", "OpenDiagnosticsCmd", "sync.svg",
+        "Diagnóstico", "Tiempos, errores y reintentos de las operaciones con el servidor"),
+}
+
+# Tiempos de carga (segundos) por módulo, para el informe de arranque
+load_times = {}
+
+
+# ============================================================
+# PROXY
+# ============================================================
+
+class LazyCommand:
+    """Comando de FreeCAD que importa su módulo al activarse."""
+
+    def __init__(self, name, module, class_name, icon, menu_text, tooltip):
+        self.name = name
+        self.module = module
+        self.class_name = class_name
+        self.resources = {
+            "Pixmap": os.path.join(ICON_DIR, icon),
+            "MenuText": menu_text,
+            "ToolTip": tooltip,
+        }
+        self._command = None
+        self._lock = threading.Lock()
+
+    def command(self):
+        """Instancia real del comando (importa el módulo la primera vez)."""
+        with self._lock:
+            if self._command is None:
+                started = time.perf_counter()
+                module = importlib.import_module(self.module)
+                load_times.setdefault(self.module, time.perf_counter() - started)
+                self._command = getattr(module, self.class_name)()
+            return self._command
+
+    def GetResources(self):
+        return dict(self.resources)
+
+    def Activated(self, *args):
+        try:
+            command = self.command()
+        except Exception as e:
+            FreeCAD.Console.PrintError(f"No se pudo cargar {self.name}: {e}\n")
+            return
+        return command.Activated(*args)
+
+    def IsActive(self):
+        # Sin importar nada: los comandos reales siempre están activos
+        if self._command is None:
+            return True
+        return self._command.IsActive()
+
+
+def register_all(add_command):
+    """Registra todos los comandos con add_command(nombre, proxy)."""
+    proxies = {}
+    for name, spec in COMMANDS.items():
+        proxies[name] = LazyCommand(name, *spec)
+        add_command(name, proxies[name])
+    return proxies
+
+
+# ============================================================
+# ARRANQUE EN SEGUNDO PLANO
+# ============================================================
+
+def _bootstrap():
+    started = time.perf_counter()
+    try:
+        import storage
+        if storage.ensure_minio() is None:
+            return
+
+        # Cambios en vivo del servidor (si está activado) y, con o sin
+        # notificaciones, el diario de cambios _journal/
+        import notifications
+        notifications.start()
+        import journal
+        journal.start()
+
+        # Espejo local para trabajar sin conexión (si hay <mirror_dir>)
+        import mirror
+        mirror.start()
+
+        # Subidas interrumpidas en la sesión anterior, al final y en su
+        # propio hilo: reanudar un archivo grande no retrasa lo anterior
+        import common
+        common.start_upload_recovery()
+    except Exception as e:
+        FreeCAD.Console.PrintError(f"Error en el arranque de Texmex: {e}\n")
+        return
+
+    load_times["bootstrap"] = time.perf_counter() - started
+
+
+def bootstrap():
+    """Comprueba minio y reanuda subidas sin bloquear la interfaz."""
+    thread = threading.Thread(target=_bootstrap, name="TexmexBootstrap", daemon=True)
+    thread.start()
+    return thread
@@ -3,6 +3,7 @@
 # ============================================================
 
 import os
+import time
 import FreeCAD
 
 try:
@@ -17,25 +18,113 @@ except ImportError:
     from PySide2 import QtWidgets, QtCore, QtGui
 
 # Utilidades comunes
-from common import (
-    Minio, ENDPOINT, ACCESS_KEY, SECRET_KEY,
-    BUCKET_MODEL,
-    list_subfolders, _slug, _pretty, show_popup
-)
+from common import invalidate_listing, _pretty, show_popup
+from config_storage import add_config_listener, remove_config_listener
 
 # Helper de preview
-from modelviewer import generate_preview_for_object
+from modelviewer import fetch_preview_source, render_preview, prefetch_thumbnails
 
 # Import helpers
 from modelimporter import (
     download_model_to_temp,
+    checkout_model_to_temp,
     open_model_as_new,
     import_model_into_current,
     delete_model_from_bucket
 )
 
+import listing_snapshot
+import metrics
+import mirror
+import notifications
+import storage
+
 DOCK_OBJECT_NAME = "TexmexModelLibraryDock"
 
+LOADING_TEXT = "Cargando…"
+
+# Hilos para red / descargas de la librería
+WORKER_THREADS = 4
+
+# Carpetas / archivos nuevos o cambiados al revalidar: color y duración
+HIGHLIGHT_COLOR = "#fff1b8"
+HIGHLIGHT_MS = 4000
+
+
+# ============================================================
+#  TAREAS EN SEGUNDO PLANO (QThreadPool)
+# ============================================================
+
+def _snapshot(prefix):
+    # Último listado conocido (listing_snapshot usa prefijos con "/" final)
+    base = prefix.strip("/")
+    return listing_snapshot.get(storage.BUCKET_MODEL, base + "/" if base else "")
+
+
+def _span_key(token):
+    # token: key, (gen, prefix) o (seq, prefix)
+    if isinstance(token, tuple):
+        token = token[-1]
+    return token if isinstance(token, str) else None
+
+
+def _source():
+    # Servidor y bucket que se muestran (cambian al guardar la config)
+    return (storage.ENDPOINT, storage.BUCKET_MODEL)
+
+
+class _RemoteSignals(QtCore.QObject):
+    # Lote de cambios del servidor (notifications.py), al hilo GUI
+    changed = QtCore.Signal(object)
+    # Configuración guardada (config_storage), al hilo GUI
+    config_changed = QtCore.Signal(object)
+
+
+class _TaskSignals(QtCore.QObject):
+    # (tarea, resultado) / (tarea, mensaje) / (tarea, hechos, total)
+    finished = QtCore.Signal(object, object)
+    failed = QtCore.Signal(object, str)
+    progress = QtCore.Signal(object, object, object)
+
+
+class _Task(QtCore.QRunnable):
+    """
+    Ejecuta fn(*args) fuera del hilo GUI y devuelve el resultado por señal.
+    Las señales llegan al widget en el hilo GUI (conexión en cola).
+    Con with_progress, fn recibe progress=callback(hechos, total).
+    """
+    # Segundos mínimos entre señales de progreso
+    PROGRESS_INTERVAL = 0.1
+
+    def __init__(self, kind, token, fn, *args, with_progress=False):
+        super().__init__()
+        self.kind = kind
+        self.token = token
+        self.fn = fn
+        self.args = args
+        self.with_progress = with_progress
+        self.signals = _TaskSignals()
+        self._last_report = 0.0
+
+    def report(self, done, total):
+        now = time.monotonic()
+        if done < total and now - self._last_report < self.PROGRESS_INTERVAL:
+            return
+        self._last_report = now
+        self.signals.progress.emit(self, done, total)
+
+    def run(self):
+        try:
+            with metrics.span(f"library.{self.kind}", key=_span_key(self.token)):
+                if self.with_progress:
+                    result = self.fn(*self.args, progress=self.report)
+                else:
+                    result = self.fn(*self.args)
+        except Exception as e:
+            self.signals.failed.emit(self, str(e))
+            return
+        self.signals.finished.emit(self, result)
+
 
 # ============================================================
 #  WIDGET PRINCIPAL
@@ -45,21 +134,56 @@ class TexmexModelLibraryWidget(QtWidgets.QWidget):
 
     def __init__(self, parent=None):
         super().__init__(parent)
-
-        self.client = Minio(
-            ENDPOINT,
-            access_key=ACCESS_KEY,
-            secret_key=SECRET_KEY,
-            secure=False
-        )
+        started = time.perf_counter()
 
         self.current_prefix = ""    
         self.current_key = None     
+        self.current_etag = None
         self.loaded_prefixes = set()
 
+        # Trabajo asíncrono: cada árbol/listado lleva un token para poder
+        # descartar respuestas que llegan tarde (el usuario ya cambió).
+        self.pool = QtCore.QThreadPool(self)
+        self.pool.setMaxThreadCount(WORKER_THREADS)
+        self._tasks = set()
+        self._tree_gen = 0
+        self._files_seq = 0
+        self._items_by_prefix = {}
+        self._current_files = []
+
+        # Sync incremental: prefijos pendientes y totales del diff
+        self._refresh_pending = 0
+        self._refresh_added = 0
+        self._refresh_removed = 0
+        self._refresh_failed = 0
+
+        # Vista de la sesión anterior (carpetas desplegadas y actual): se
+        # restaura a medida que aparecen las carpetas
+        view = listing_snapshot.get_view(storage.BUCKET_MODEL)
+        self._restore_expanded = set(view["expanded"])
+        self._restore_current = view["current"]
+        self._files_from_snapshot = False
+
         self._build_ui()
         self._load_root_areas()
 
+        # Con instantánea el árbol ya está pintado; sin ella, el "Cargando…"
+        metrics.record("library.first_paint", seconds=time.perf_counter() - started)
+
+        # Cambios en vivo: la escucha corre en otro hilo → señal en cola
+        self._remote = _RemoteSignals(self)
+        self._remote.changed.connect(self._on_remote_changes)
+        callback = self._remote.changed.emit
+        notifications.add_listener(callback)
+        self.destroyed.connect(lambda *_: notifications.remove_listener(callback))
+
+        # Otro servidor o bucket en la configuración → árbol desde cero
+        self._source = _source()
+        self._remote.config_changed.connect(self._on_config_changed)
+        on_config = self._remote.config_changed.emit
+        add_config_listener(on_config)
+        self.destroyed.connect(lambda *_: remove_config_listener(on_config))
+
 
     # ----------------------------------------------------------
     # UI
@@ -81,7 +205,7 @@ class TexmexModelLibraryWidget(QtWidgets.QWidget):
         icon_sync = QtGui.QIcon(os.path.join(os.path.dirname(__file__), "Resources/Icons/sync.svg"))
         self.btn_refresh.setIcon(icon_sync)
         self.btn_refresh.setToolTip("Refrescar librería")
-        self.btn_refresh.clicked.connect(self._load_root_areas)
+        self.btn_refresh.clicked.connect(self._refresh_tree)
 
         top.addWidget(title)
         top.addStretch()
@@ -94,6 +218,12 @@ class TexmexModelLibraryWidget(QtWidgets.QWidget):
         self.path_label.setStyleSheet("color: gray;")
         main.addWidget(self.path_label)
 
+        # Sin servidor: se navega la copia del espejo local (mirror.py)
+        self.offline_label = QtWidgets.QLabel("")
+        self.offline_label.setStyleSheet("color: #b36b00;")
+        self.offline_label.setVisible(False)
+        main.addWidget(self.offline_label)
+
         splitter = QtWidgets.QSplitter(QtCore.Qt.Horizontal)
         main.addWidget(splitter, 1)
 
@@ -135,13 +265,20 @@ class TexmexModelLibraryWidget(QtWidgets.QWidget):
         self.btn_open_new = QtWidgets.QPushButton("Abrir")
         self.btn_import = QtWidgets.QPushButton("Importar")
         self.btn_delete = QtWidgets.QPushButton("Eliminar")
+        self.btn_previews = QtWidgets.QPushButton("Vistas previas")
+        self.btn_previews.setToolTip("Genera las vistas previas de toda la carpeta")
 
         bar.addWidget(self.btn_open_new)
         bar.addWidget(self.btn_import)
         bar.addWidget(self.btn_delete)
+        bar.addWidget(self.btn_previews)
 
         rl.addLayout(bar)
 
+        self.status_label = QtWidgets.QLabel("")
+        self.status_label.setStyleSheet("color: gray;")
+        rl.addWidget(self.status_label)
+
         splitter.addWidget(right)
         splitter.setStretchFactor(0, 1)
         splitter.setStretchFactor(1, 3)
@@ -150,12 +287,108 @@ class TexmexModelLibraryWidget(QtWidgets.QWidget):
         # Signals
         # ------------------------------------------------------
         self.tree.itemExpanded.connect(self._on_item_expanded)
+        self.tree.itemCollapsed.connect(lambda *_: self._save_view())
         self.tree.currentItemChanged.connect(self._on_tree_selection_changed)
         self.file_list.currentItemChanged.connect(self._on_file_selection_changed)
 
         self.btn_open_new.clicked.connect(self._on_open_new_clicked)
         self.btn_import.clicked.connect(self._on_import_clicked)
         self.btn_delete.clicked.connect(self._on_delete_clicked)
+        self.btn_previews.clicked.connect(self._on_previews_clicked)
+
+
+    # ============================================================
+    # Infraestructura async
+    # ============================================================
+    def _run_async(self, kind, token, fn, *args, with_progress=False):
+        task = _Task(kind, token, fn, *args, with_progress=with_progress)
+        task.setAutoDelete(False)
+        task.signals.finished.connect(self._on_task_finished)
+        task.signals.failed.connect(self._on_task_failed)
+        task.signals.progress.connect(self._on_task_progress)
+        self._tasks.add(task)
+        self.pool.start(task)
+
+    def _on_task_finished(self, task, result):
+        self._tasks.discard(task)
+        kind, token = task.kind, task.token
+
+        if kind == "children":
+            self._apply_children(token, result)
+        elif kind == "refresh":
+            self._apply_refresh(token, result)
+        elif kind == "files":
+            self._apply_files(token, result)
+        elif kind == "preview":
+            self._apply_preview(token, result)
+        elif kind in ("open", "import"):
+            self._apply_download(kind, token, result)
+        elif kind == "prefetch":
+            self.status_label.setText(f"Vistas previas listas: {result[0]}/{result[1]}")
+
+    def _on_task_progress(self, task, done, total):
+        if task.kind in ("open", "import") and total:
+            self.status_label.setText(
+                f"Descargando {os.path.basename(task.token)}… "
+                f"{done / 1048576:.1f} / {total / 1048576:.1f} MB"
+            )
+
+    def _on_task_failed(self, task, message):
+        self._tasks.discard(task)
+        kind, token = task.kind, task.token
+        FreeCAD.Console.PrintError(f"Error en librería ({kind}): {message}\n")
+
+        if kind == "children":
+            gen, prefix = token
+            item = self._items_by_prefix.get(prefix) if gen == self._tree_gen else None
+            if item is not None:
+                self._remove_placeholder(item)
+                item.setData(0, QtCore.Qt.UserRole + 1, False)
+                item.setData(0, QtCore.Qt.UserRole + 2, False)
+        elif kind == "refresh":
+            gen, prefix = token
+            item = self._items_by_prefix.get(prefix) if gen == self._tree_gen else None
+            if item is not None:
+                item.setData(0, QtCore.Qt.UserRole + 2, False)
+            self._refresh_failed += 1
+            self._refresh_done()
+        elif kind == "files":
+            if token[0] == self._files_seq and self._files_from_snapshot:
+                self.status_label.setText("Sin conexión: se muestra el último listado conocido.")
+            elif token[0] == self._files_seq:
+                self.file_list.clear()
+                show_popup("Error", f"No se pudieron listar modelos:\n{message}")
+        elif kind == "preview":
+            if token == self.current_key:
+                self.preview_label.setText("Sin vista previa disponible.")
+        elif kind == "prefetch":
+            self.status_label.setText("")
+        elif kind in ("open", "import"):
+            self.status_label.setText("")
+            show_popup("Error", f"No se pudo descargar el modelo:\n{message}")
+
+    def _add_placeholder(self, item):
+        ph = QtWidgets.QTreeWidgetItem(item, [LOADING_TEXT])
+        ph.setFlags(QtCore.Qt.NoItemFlags)
+        ph.setData(0, QtCore.Qt.UserRole + 3, True)
+
+    def _remove_placeholder(self, item):
+        for i in reversed(range(item.childCount())):
+            if item.child(i).data(0, QtCore.Qt.UserRole + 3):
+                item.removeChild(item.child(i))
+
+    def _new_folder_item(self, parent, prefix, text, index=None):
+        if index is None:
+            item = QtWidgets.QTreeWidgetItem(parent, [text])
+        else:
+            item = QtWidgets.QTreeWidgetItem([text])
+            parent.insertChild(index, item)
+        item.setData(0, QtCore.Qt.UserRole, prefix)
+        item.setData(0, QtCore.Qt.UserRole + 1, False)
+        # Mostrar flecha aunque aún no sepamos si tiene hijos
+        item.setChildIndicatorPolicy(QtWidgets.QTreeWidgetItem.ShowIndicator)
+        self._items_by_prefix[prefix] = item
+        return item
 
 
     # ============================================================
@@ -163,6 +396,9 @@ class TexmexModelLibraryWidget(QtWidgets.QWidget):
     # ============================================================
     def _load_root_areas(self):
 
+        self._tree_gen += 1
+        self._items_by_prefix = {}
+
         self.tree.blockSignals(True)
         self.tree.clear()
         self.loaded_prefixes.clear()
@@ -170,18 +406,16 @@ class TexmexModelLibraryWidget(QtWidgets.QWidget):
 
         root = QtWidgets.QTreeWidgetItem(self.tree, ["Áreas"])
         root.setData(0, QtCore.Qt.UserRole, "")
-        root.setData(0, QtCore.Qt.UserRole + 1, True)
-        root.setExpanded(True)
+        root.setData(0, QtCore.Qt.UserRole + 1, False)
+        self._items_by_prefix[""] = root
 
-        areas = list_subfolders(BUCKET_MODEL, "")
-        for area in areas:
-            area_slug = _slug(area)
-            item = QtWidgets.QTreeWidgetItem(root, [area])
-            item.setData(0, QtCore.Qt.UserRole, area_slug)
-            item.setData(0, QtCore.Qt.UserRole + 1, False)
+        # Sync → la raíz siempre se vuelve a pedir; el resto sale del caché
+        self._request_children(root, refresh=True)
+        root.setExpanded(True)
 
-        self.tree.setCurrentItem(root)
-        self._load_files_for_prefix("")
+        # La carpeta de la sesión anterior ya pudo quedar seleccionada
+        if self.tree.currentItem() is None:
+            self.tree.setCurrentItem(root)
 
 
     # ============================================================
@@ -191,6 +425,9 @@ class TexmexModelLibraryWidget(QtWidgets.QWidget):
 
         loaded = item.data(0, QtCore.Qt.UserRole + 1)
         if loaded:
+            # UserRole + 4 → listado anterior a un Sync (carpeta plegada)
+            if item.data(0, QtCore.Qt.UserRole + 4):
+                self._refresh_prefix(item)
             return
 
         prefix = item.data(0, QtCore.Qt.UserRole) or ""
@@ -199,18 +436,353 @@ class TexmexModelLibraryWidget(QtWidgets.QWidget):
             item.setData(0, QtCore.Qt.UserRole + 1, True)
             return
 
-        subs = list_subfolders(BUCKET_MODEL, prefix)
+        self._request_children(item)
+
+    def _request_children(self, item, refresh=False):
+        # UserRole + 2 → petición en curso
+        if item.data(0, QtCore.Qt.UserRole + 2):
+            return
+
+        prefix = item.data(0, QtCore.Qt.UserRole) or ""
 
-        for sub in subs:
-            sub_slug = _slug(sub)
+        # Último listado conocido: se pinta ya y se revalida en segundo plano
+        cached = _snapshot(prefix)
+        if cached is not None:
+            self._apply_children((self._tree_gen, prefix), cached)
+            self._refresh_prefix(item)
+            return
+
+        item.setData(0, QtCore.Qt.UserRole + 2, True)
+        self._add_placeholder(item)
+
+        self._run_async(
+            "children", (self._tree_gen, prefix),
+            lambda: mirror.list_prefix(storage.BUCKET_MODEL, prefix, refresh=refresh)
+        )
+
+    def _apply_children(self, token, listing):
+        gen, prefix = token
+        if gen != self._tree_gen:
+            return  # árbol reconstruido mientras tanto
+
+        self._show_offline(listing)
+        folders = listing["folders"]
+
+        item = self._items_by_prefix.get(prefix)
+        if item is None:
+            return
+
+        self._remove_placeholder(item)
+
+        children = []
+        for sub_slug in folders:
             full_prefix = f"{prefix}/{sub_slug}" if prefix else sub_slug
+            children.append(self._new_folder_item(item, full_prefix, _pretty(sub_slug)))
 
-            child = QtWidgets.QTreeWidgetItem(item, [sub])
-            child.setData(0, QtCore.Qt.UserRole, full_prefix)
-            child.setData(0, QtCore.Qt.UserRole + 1, False)
+        if not folders:
+            item.setChildIndicatorPolicy(
+                QtWidgets.QTreeWidgetItem.DontShowIndicatorWhenChildless
+            )
 
         self.loaded_prefixes.add(prefix)
         item.setData(0, QtCore.Qt.UserRole + 1, True)
+        item.setData(0, QtCore.Qt.UserRole + 2, False)
+
+        self._restore_view(children)
+
+    def _restore_view(self, children):
+        """Despliega / selecciona lo que estaba así en la sesión anterior."""
+        for child in children:
+            prefix = child.data(0, QtCore.Qt.UserRole)
+            if prefix in self._restore_expanded:
+                self._restore_expanded.discard(prefix)
+                child.setExpanded(True)
+                self._ensure_children_loaded(child)
+            if self._restore_current and prefix == self._restore_current:
+                self._restore_current = None
+                self.tree.setCurrentItem(child)
+
+    def _save_view(self):
+        # Lo que aún falta restaurar también cuenta (se cierra antes de cargar)
+        expanded = {p for p, item in self._items_by_prefix.items() if p and item.isExpanded()}
+        expanded |= self._restore_expanded
+        listing_snapshot.set_view(storage.BUCKET_MODEL, expanded,
+                                  self._restore_current or self.current_prefix)
+
+
+    # ============================================================
+    # Sync incremental (sin reconstruir el árbol)
+    # ============================================================
+    def _refresh_tree(self):
+        """
+        Vuelve a listar sólo las carpetas desplegadas (y la actual) y
+        aplica el diff en su sitio: se conservan expansión y selección.
+        Las cargadas pero plegadas se marcan y se comparan al abrirlas.
+        """
+        if "" not in self._items_by_prefix:
+            self._load_root_areas()
+            return
+
+        # Lo que no se vuelve a pedir ahora tampoco debe salir del caché
+        invalidate_listing(storage.BUCKET_MODEL)
+
+        self._refresh_added = self._refresh_removed = self._refresh_failed = 0
+        targets = []
+
+        for prefix, item in self._items_by_prefix.items():
+            if not item.data(0, QtCore.Qt.UserRole + 1):
+                continue  # nunca listada: se pedirá al abrirla
+            visible = item.isExpanded() or prefix in ("", self.current_prefix)
+            if visible:
+                targets.append(item)
+            else:
+                item.setData(0, QtCore.Qt.UserRole + 4, True)
+
+        if self.current_prefix not in self._items_by_prefix:
+            self._load_files_for_prefix(self.current_prefix)
+
+        if targets:
+            self.status_label.setText("Sincronizando…")
+        for item in targets:
+            self._refresh_prefix(item)
+
+    def _refresh_prefix(self, item):
+        # UserRole + 2 → petición en curso
+        if item.data(0, QtCore.Qt.UserRole + 2):
+            return
+
+        prefix = item.data(0, QtCore.Qt.UserRole) or ""
+        item.setData(0, QtCore.Qt.UserRole + 2, True)
+        if not self._refresh_pending:
+            self._refresh_added = self._refresh_removed = self._refresh_failed = 0
+        self._refresh_pending += 1
+
+        self._run_async(
+            "refresh", (self._tree_gen, prefix),
+            lambda: mirror.list_prefix(storage.BUCKET_MODEL, prefix, refresh=True)
+        )
+
+    def _remove_folder_item(self, item):
+        """Quita item y sus descendientes de los índices y del árbol."""
+        stack = [item]
+        while stack:
+            node = stack.pop()
+            prefix = node.data(0, QtCore.Qt.UserRole)
+            if prefix is not None and self._items_by_prefix.get(prefix) is node:
+                del self._items_by_prefix[prefix]
+                self.loaded_prefixes.discard(prefix)
+            stack.extend(node.child(i) for i in range(node.childCount()))
+
+        if self.tree.currentItem() is not None:
+            current = self.tree.currentItem()
+            while current is not None and current is not item:
+                current = current.parent()
+            if current is item:
+                self.tree.setCurrentItem(item.parent())
+
+        item.parent().removeChild(item)
+
+    def _apply_refresh(self, token, listing):
+        gen, prefix = token
+        item = self._items_by_prefix.get(prefix) if gen == self._tree_gen else None
+        if item is None:
+            self._refresh_done()
+            return
+
+        item.setData(0, QtCore.Qt.UserRole + 2, False)
+        item.setData(0, QtCore.Qt.UserRole + 4, False)
+
+        self._show_offline(listing)
+        folders = listing["folders"]
+        wanted = set(folders)
+
+        existing = {}
+        for i in reversed(range(item.childCount())):
+            child = item.child(i)
+            if child.data(0, QtCore.Qt.UserRole + 3):
+                continue  # placeholder
+            slug = (child.data(0, QtCore.Qt.UserRole) or "").rsplit("/", 1)[-1]
+            if slug in wanted:
+                existing[slug] = child
+            else:
+                self._remove_folder_item(child)
+                self._refresh_removed += 1
+
+        # Insertar las nuevas en su posición (mismo orden que el listado)
+        added = []
+        for index, sub_slug in enumerate(folders):
+            if sub_slug in existing:
+                continue
+            full_prefix = f"{prefix}/{sub_slug}" if prefix else sub_slug
+            added.append(self._new_folder_item(item, full_prefix, _pretty(sub_slug), index=index))
+            self._refresh_added += 1
+        self._highlight(added)
+
+        item.setChildIndicatorPolicy(
+            QtWidgets.QTreeWidgetItem.ShowIndicator if folders
+            else QtWidgets.QTreeWidgetItem.DontShowIndicatorWhenChildless
+        )
+
+        if prefix == self.current_prefix:
+            self._patch_files(listing["files"], highlight=True)
+
+        self._refresh_done()
+
+    def _patch_files(self, files, highlight=False):
+        """
+        Diff de la lista de archivos conservando la selección.
+        Con highlight se resaltan los archivos nuevos o cambiados.
+        """
+        files = [f for f in files if f["name"].lower().endswith(".fcstd")]
+        by_key = {f["key"]: f for f in files}
+        self._current_files = files
+
+        self.file_list.blockSignals(True)
+        current_removed = False
+
+        existing = {}
+        for row in reversed(range(self.file_list.count())):
+            item = self.file_list.item(row)
+            key = item.data(QtCore.Qt.UserRole)
+            if key in by_key:
+                existing[key] = item
+                continue
+            if key and key == self.current_key:
+                current_removed = True
+            self.file_list.takeItem(row)
+
+        changed = []
+        for row, entry in enumerate(files):
+            item = existing.get(entry["key"])
+            version = (entry["etag"], entry["size"])
+            if item is None:
+                item = QtWidgets.QListWidgetItem(entry["name"])
+                item.setData(QtCore.Qt.UserRole, entry["key"])
+                self.file_list.insertItem(row, item)
+                changed.append(item)
+            elif tuple(item.data(QtCore.Qt.UserRole + 1) or ()) != version:
+                changed.append(item)
+            item.setData(QtCore.Qt.UserRole + 1, version)
+
+        self.file_list.blockSignals(False)
+
+        if highlight:
+            self._highlight(changed)
+
+        if current_removed:
+            self.current_key = None
+            self.preview_label.setText("El archivo ya no existe en el servidor.")
+
+    def _highlight(self, items):
+        """Resalta items (carpetas o archivos) durante HIGHLIGHT_MS."""
+        if not items:
+            return
+        brush = QtGui.QBrush(QtGui.QColor(HIGHLIGHT_COLOR))
+        for item in items:
+            if isinstance(item, QtWidgets.QTreeWidgetItem):
+                item.setBackground(0, brush)
+            else:
+                item.setBackground(brush)
+        QtCore.QTimer.singleShot(HIGHLIGHT_MS, lambda: self._clear_highlight(items))
+
+    def _clear_highlight(self, items):
+        for item in items:
+            try:
+                if isinstance(item, QtWidgets.QTreeWidgetItem):
+                    item.setBackground(0, QtGui.QBrush())
+                else:
+                    item.setBackground(QtGui.QBrush())
+            except RuntimeError:
+                pass  # el item ya se quitó
+
+    def _refresh_done(self):
+        self._refresh_pending = max(0, self._refresh_pending - 1)
+        if self._refresh_pending:
+            return
+        if self._refresh_failed:
+            self.status_label.setText(
+                "No se pudo sincronizar: se muestra el último listado conocido."
+            )
+        elif self._refresh_added or self._refresh_removed:
+            self.status_label.setText(
+                f"Sincronizado: {self._refresh_added} carpeta(s) nuevas, "
+                f"{self._refresh_removed} eliminadas."
+            )
+        else:
+            self.status_label.setText("Sincronizado: sin cambios.")
+
+
+    def _show_offline(self, listing):
+        """Aviso de copia local si el listado salió del espejo."""
+        synced = listing.get("offline")
+        offline = synced is not None
+
+        if offline:
+            when = (time.strftime("%d/%m/%Y %H:%M", time.localtime(synced))
+                    if synced else "sin completar")
+            self.offline_label.setText(
+                f"Sin conexión con el servidor: copia local (sincronizada {when})."
+            )
+        self.offline_label.setVisible(offline)
+        # Borrar necesita el servidor
+        self.btn_delete.setEnabled(not offline)
+
+
+    # ============================================================
+    # Configuración guardada
+    # ============================================================
+    def _on_config_changed(self, _cfg):
+        # storage ya tiene los ajustes nuevos (su listener va primero)
+        if _source() == self._source:
+            return
+        self._source = _source()
+
+        view = listing_snapshot.get_view(storage.BUCKET_MODEL)
+        self._restore_expanded = set(view["expanded"])
+        self._restore_current = view["current"]
+        self.current_prefix = ""
+        self._load_root_areas()
+
+
+    # ============================================================
+    # Cambios en vivo (notificaciones del bucket)
+    # ============================================================
+    def _on_remote_changes(self, changes):
+        """
+        Vuelve a listar sólo las carpetas a las que afecta el lote:
+          • alta → la carpeta más profunda que ya está en el árbol
+            (gana una subcarpeta) o la actual si gana un archivo;
+          • baja → la carpeta y sus ancestros (pueden quedar vacías).
+        """
+        prefixes = set()
+
+        for change in changes:
+            if change["bucket"] != storage.BUCKET_MODEL:
+                continue
+
+            parts = change["key"].strip("/").split("/")[:-1]
+            ancestors = ["/".join(parts[:i]) for i in range(len(parts) + 1)]
+
+            if change["event"] == notifications.REMOVED:
+                prefixes.update(ancestors)
+                continue
+
+            deepest = ""
+            for prefix in ancestors:
+                if prefix not in self._items_by_prefix:
+                    break
+                deepest = prefix
+            if deepest != ancestors[-1] or deepest == self.current_prefix:
+                prefixes.add(deepest)
+
+        for prefix in prefixes:
+            item = self._items_by_prefix.get(prefix)
+            if item is None or not item.data(0, QtCore.Qt.UserRole + 1):
+                continue  # nunca listada: saldrá fresca al abrirla
+            if item.isExpanded() or prefix in ("", self.current_prefix):
+                self._refresh_prefix(item)
+            else:
+                item.setData(0, QtCore.Qt.UserRole + 4, True)
 
 
     def _on_item_expanded(self, item):
@@ -218,13 +790,14 @@ class TexmexModelLibraryWidget(QtWidgets.QWidget):
             self._ensure_children_loaded(item)
         except Exception as e:
             FreeCAD.Console.PrintError(f"Error expandiendo carpeta: {e}\n")
+        self._save_view()
 
 
     # ============================================================
     # Selección de carpeta
     # ============================================================
     def _on_tree_selection_changed(self, current, previous):
-        if not current:
+        if not current or current.data(0, QtCore.Qt.UserRole + 3):
             return
 
         prefix = current.data(0, QtCore.Qt.UserRole) or ""
@@ -234,6 +807,7 @@ class TexmexModelLibraryWidget(QtWidgets.QWidget):
 
         self._ensure_children_loaded(current)
         self._load_files_for_prefix(prefix)
+        self._save_view()
 
 
     # ============================================================
@@ -244,33 +818,42 @@ class TexmexModelLibraryWidget(QtWidgets.QWidget):
         self.file_list.clear()
         self.preview_label.clear()
         self.current_key = None
+        self._current_files = []
 
         base = prefix.strip("/")
         base = base + "/" if base else ""
 
-        try:
-            objects = self.client.list_objects(
-                BUCKET_MODEL,
-                prefix=base,
-                recursive=False
-            )
-            for obj in objects:
-                key = obj.object_name
-                name_part = key[len(base):]
+        # Último listado conocido al instante; si no hay, "Cargando…"
+        cached = _snapshot(prefix)
+        self._files_from_snapshot = cached is not None
+        if cached is not None:
+            self._patch_files(cached["files"])
+        else:
+            placeholder = QtWidgets.QListWidgetItem(LOADING_TEXT)
+            placeholder.setFlags(QtCore.Qt.NoItemFlags)
+            self.file_list.addItem(placeholder)
 
-                if "/" in name_part:
-                    continue
+        self._files_seq += 1
 
-                if not name_part.lower().endswith(".fcstd"):
-                    continue
+        # Carpeta revalidándose: ese listado trae también los archivos
+        item = self._items_by_prefix.get(prefix)
+        if cached is not None and item is not None and item.data(0, QtCore.Qt.UserRole + 2):
+            return
 
-                item = QtWidgets.QListWidgetItem(name_part)
-                item.setData(QtCore.Qt.UserRole, base + name_part)
-                self.file_list.addItem(item)
+        self._run_async(
+            "files", (self._files_seq, prefix),
+            lambda: mirror.list_prefix(storage.BUCKET_MODEL, base)
+        )
 
-        except Exception as e:
-            FreeCAD.Console.PrintError(f"Error listando objetos: {e}\n")
-            show_popup("Error", f"No se pudieron listar modelos:\n{e}")
+    def _apply_files(self, token, listing):
+        seq, prefix = token
+        if seq != self._files_seq or prefix != self.current_prefix:
+            return  # el usuario ya está en otra carpeta
+
+        self._show_offline(listing)
+
+        # Sobre la instantánea: sólo se tocan (y resaltan) las diferencias
+        self._patch_files(listing["files"], highlight=self._files_from_snapshot)
 
 
     # ============================================================
@@ -278,7 +861,7 @@ class TexmexModelLibraryWidget(QtWidgets.QWidget):
     # ============================================================
     def _on_file_selection_changed(self, current, previous):
 
-        if not current:
+        if not current or not current.data(QtCore.Qt.UserRole):
             self.current_key = None
             self.preview_label.clear()
             return
@@ -286,7 +869,22 @@ class TexmexModelLibraryWidget(QtWidgets.QWidget):
         key = current.data(QtCore.Qt.UserRole)
         self.current_key = key
 
-        png = generate_preview_for_object(BUCKET_MODEL, key)
+        # ETag/tamaño del listado → la miniatura sale sin HEAD previo
+        etag, size = current.data(QtCore.Qt.UserRole + 1) or (None, None)
+        self.current_etag = etag
+
+        self.preview_label.setText(LOADING_TEXT)
+        self._run_async(
+            "preview", key,
+            lambda: fetch_preview_source(storage.BUCKET_MODEL, key, etag=etag, size=size)
+        )
+
+    def _apply_preview(self, key, local_path):
+        if key != self.current_key:
+            return  # selección cambió durante la descarga
+
+        # El render usa la GUI de FreeCAD → aquí, en el hilo principal
+        png = render_preview(local_path, etag=self.current_etag)
 
         if png and os.path.exists(png):
             pix = QtGui.QPixmap(png)
@@ -302,6 +900,25 @@ class TexmexModelLibraryWidget(QtWidgets.QWidget):
             self.preview_label.setText("Sin vista previa disponible.")
 
 
+    # ============================================================
+    # Abrir / Importar: descarga en segundo plano
+    # ============================================================
+    def _apply_download(self, kind, key, local_path):
+        self.status_label.setText("")
+
+        if kind == "open":
+            open_model_as_new(storage.BUCKET_MODEL, key, local_path=local_path)
+        else:
+            import_model_into_current(storage.BUCKET_MODEL, key, local_path=local_path)
+
+    def _start_download(self, kind):
+        key = self.current_key
+        self.status_label.setText(f"Descargando {os.path.basename(key)}…")
+        # Abrir → copia de trabajo (se guarda); Importar → lectura del caché
+        fn = checkout_model_to_temp if kind == "open" else download_model_to_temp
+        self._run_async(kind, key, fn, storage.BUCKET_MODEL, key, with_progress=True)
+
+
     # ============================================================
     # Botón: Abrir nuevo
     # ============================================================
@@ -309,7 +926,7 @@ class TexmexModelLibraryWidget(QtWidgets.QWidget):
         if not self.current_key:
             show_popup("Atención", "Selecciona un archivo primero.")
             return
-        open_model_as_new(BUCKET_MODEL, self.current_key)
+        self._start_download("open")
 
     # ============================================================
     # Botón: Importar
@@ -318,7 +935,23 @@ class TexmexModelLibraryWidget(QtWidgets.QWidget):
         if not self.current_key:
             show_popup("Atención", "Selecciona un archivo primero.")
             return
-        import_model_into_current(BUCKET_MODEL, self.current_key)
+        self._start_download("import")
+
+    # ============================================================
+    # Botón: Vistas previas de la carpeta (procesos headless)
+    # ============================================================
+    def _on_previews_clicked(self):
+        files = list(self._current_files)
+        if not files:
+            return
+
+        self.status_label.setText("Generando vistas previas…")
+
+        def job():
+            ok = prefetch_thumbnails(storage.BUCKET_MODEL, files)
+            return ok, len([f for f in files if f["name"].lower().endswith(".fcstd")])
+
+        self._run_async("prefetch", self.current_prefix, job)
 
     # ============================================================
     # Botón: Eliminar
@@ -337,7 +970,7 @@ class TexmexModelLibraryWidget(QtWidgets.QWidget):
         if confirm != QtWidgets.QMessageBox.Yes:
             return
 
-        if delete_model_from_bucket(BUCKET_MODEL, self.current_key):
+        if delete_model_from_bucket(storage.BUCKET_MODEL, self.current_key):
             self._load_files_for_prefix(self.current_prefix)
             self.preview_label.clear()
             self.current_key = None
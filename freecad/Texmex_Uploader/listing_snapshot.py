@@ -0,0 +1,167 @@
+# ============================================================
+# listing_snapshot.py → Último listado conocido de cada carpeta (en disco)
+# Texmex Weavers – FreeCAD Integration
+# ============================================================
+#
+# storage.list_prefix anota aquí cada listado que trae del servidor.
+# Al abrir la librería se pinta al instante lo último conocido (árbol,
+# carpetas desplegadas, carpeta actual y sus archivos) y después se
+# revalida en segundo plano (stale-while-revalidate).
+#
+#   get_data_dir()/listing_snapshot.json
+#   {"listings": {"<endpoint>/<bucket>": {prefix: {"t", "folders", "files"}}},
+#    "views":    {"<endpoint>/<bucket>": {"expanded": [...], "current": prefix}}}
+#
+# Se guarda unos segundos después del último cambio (y al salir) y se
+# conservan como mucho MAX_PREFIXES carpetas, las más recientes.
+
+import atexit
+import json
+import os
+import threading
+import time
+import uuid
+
+try:
+    import FreeCAD
+except ImportError:
+    import headless as FreeCAD
+
+from config_storage import get_data_dir
+
+SNAPSHOT_FILENAME = "listing_snapshot.json"
+
+# Carpetas que se conservan (las listadas más recientemente)
+MAX_PREFIXES = 1000
+
+# Segundos que se juntan cambios antes de escribir el archivo
+SAVE_DELAY = 2.0
+
+_lock = threading.Lock()
+_data = None
+_dirty = False
+_save_timer = None
+
+
+def _sid(bucket):
+    import storage
+    return f"{storage.ENDPOINT}/{bucket}"
+
+
+def get_snapshot_path():
+    return os.path.join(get_data_dir(), SNAPSHOT_FILENAME)
+
+
+def _load():
+    """Datos en memoria (se leen del disco la primera vez). Con _lock."""
+    global _data
+
+    if _data is None:
+        try:
+            with open(get_snapshot_path(), "r", encoding="utf-8") as f:
+                _data = json.load(f)
+        except (OSError, ValueError):
+            _data = {}
+        _data.setdefault("listings", {})
+        _data.setdefault("views", {})
+    return _data
+
+
+def _schedule_save():
+    """Con _lock: guarda dentro de SAVE_DELAY segundos."""
+    global _dirty, _save_timer
+
+    _dirty = True
+    if _save_timer is None:
+        _save_timer = threading.Timer(SAVE_DELAY, save)
+        _save_timer.daemon = True
+        _save_timer.start()
+
+
+# ============================================================
+# LISTADOS
+# ============================================================
+
+def record(bucket, prefix, listing):
+    """Anota el listado de prefix ("area/maquina/") traído del servidor."""
+    with _lock:
+        listings = _load()["listings"].setdefault(_sid(bucket), {})
+        listings[prefix] = {
+            "t": time.time(),
+            "folders": listing["folders"],
+            "files": listing["files"],
+        }
+        _schedule_save()
+
+
+def get(bucket, prefix):
+    """Último listado conocido de prefix, o None. No modificar."""
+    with _lock:
+        entry = _load()["listings"].get(_sid(bucket), {}).get(prefix)
+    if entry is None:
+        return None
+    return {"folders": entry["folders"], "files": entry["files"], "snapshot": entry["t"]}
+
+
+# ============================================================
+# VISTA DE LA LIBRERÍA
+# ============================================================
+
+def set_view(bucket, expanded, current):
+    """Carpetas desplegadas y carpeta actual, para restaurarlas al abrir."""
+    view = {"expanded": sorted(expanded), "current": current}
+    with _lock:
+        views = _load()["views"]
+        if views.get(_sid(bucket)) == view:
+            return
+        views[_sid(bucket)] = view
+        _schedule_save()
+
+
+def get_view(bucket):
+    """{"expanded": [prefijos], "current": prefijo} (vacío si no hay)."""
+    with _lock:
+        view = _load()["views"].get(_sid(bucket)) or {}
+    return {"expanded": list(view.get("expanded") or []), "current": view.get("current") or ""}
+
+
+# ============================================================
+# GUARDAR
+# ============================================================
+
+def _prune(data):
+    entries = [(entry["t"], sid, prefix)
+               for sid, listings in data["listings"].items()
+               for prefix, entry in listings.items()]
+    if len(entries) <= MAX_PREFIXES:
+        return
+    entries.sort()
+    for _t, sid, prefix in entries[:len(entries) - MAX_PREFIXES]:
+        del data["listings"][sid][prefix]
+
+
+def save():
+    """Escribe ya los cambios pendientes (atómico)."""
+    global _dirty, _save_timer
+
+    with _lock:
+        if _save_timer is not None:
+            _save_timer.cancel()
+            _save_timer = None
+        if _data is None or not _dirty:
+            return
+        _dirty = False
+        _prune(_data)
+        text = json.dumps(_data, ensure_ascii=False, separators=(",", ":"))
+
+    path = get_snapshot_path()
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, path)
+    except OSError as e:
+        FreeCAD.Console.PrintWarning(f"No se pudo guardar la instantánea de listados: {e}\n")
+
+
+atexit.register(save)
@@ -0,0 +1,183 @@
+# ============================================================
+# local_hash.py → ETag local de un archivo (caché SQLite)
+# Texmex Weavers – FreeCAD Integration
+# ============================================================
+#
+# Calcula en UNA sola lectura del archivo:
+#   - el MD5 completo (ETag de una subida en una sola parte)
+#   - el ETag multipart "md5(md5(p1)+md5(p2)+...)-N" para cada tamaño
+#     de parte pedido
+# El resultado se guarda por (ruta, tamaño, mtime): si el archivo no
+# cambió, la segunda consulta no lee nada del disco.
+#
+# Además se anota qué ETag remoto corresponde a un archivo que se
+# guardó justo después de subirlo (mark_synced): al escribir Base_etag
+# el FCStd cambia, pero sigue siendo "lo mismo que hay en el servidor".
+
+import hashlib
+import os
+import sqlite3
+import threading
+
+from config_storage import get_data_dir
+
+CACHE_FILENAME = "local_hash.sqlite"
+
+CHUNK = 1024 * 1024
+
+_lock = threading.RLock()
+_conn = None
+
+
+def _normalize(etag):
+    return (etag or "").strip().strip('"').lower()
+
+
+def _connect():
+    global _conn
+
+    with _lock:
+        if _conn is not None:
+            return _conn
+
+        conn = sqlite3.connect(os.path.join(get_data_dir(), CACHE_FILENAME),
+                               timeout=10, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS hashes ("
+            " path TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " mtime INTEGER NOT NULL,"
+            " part_size INTEGER NOT NULL,"
+            " etag TEXT NOT NULL,"
+            " PRIMARY KEY (path, size, mtime, part_size))"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS synced ("
+            " path TEXT PRIMARY KEY,"
+            " size INTEGER NOT NULL,"
+            " mtime INTEGER NOT NULL,"
+            " etag TEXT NOT NULL)"
+        )
+        conn.commit()
+
+        _conn = conn
+        return _conn
+
+
+def _compute(path, part_sizes):
+    """{0: md5, part_size: etag multipart, ...} leyendo el archivo una vez."""
+    full = hashlib.md5()
+    parts = {ps: {"digests": b"", "current": hashlib.md5(), "fill": 0, "count": 0}
+             for ps in part_sizes}
+
+    with open(path, "rb") as f:
+        while True:
+            data = f.read(CHUNK)
+            if not data:
+                break
+            full.update(data)
+
+            for ps, st in parts.items():
+                view = memoryview(data)
+                while view:
+                    take = min(len(view), ps - st["fill"])
+                    st["current"].update(view[:take])
+                    st["fill"] += take
+                    view = view[take:]
+                    if st["fill"] == ps:
+                        st["digests"] += st["current"].digest()
+                        st["count"] += 1
+                        st["current"] = hashlib.md5()
+                        st["fill"] = 0
+
+    out = {0: full.hexdigest()}
+    for ps, st in parts.items():
+        digests, count = st["digests"], st["count"]
+        if st["fill"]:
+            digests += st["current"].digest()
+            count += 1
+        out[ps] = f"{hashlib.md5(digests).hexdigest()}-{count}"
+    return out
+
+
+def etags(path, part_sizes=()):
+    """
+    ETags posibles del archivo: {0: md5, part_size: "...-N"}.
+    Sólo se lee el archivo si falta alguno en el caché.
+    """
+    st = os.stat(path)
+    apath = os.path.normcase(os.path.abspath(path))
+    mtime = st.st_mtime_ns
+    wanted = [0] + [int(ps) for ps in part_sizes if ps]
+
+    conn = _connect()
+    with _lock:
+        rows = conn.execute(
+            "SELECT part_size, etag FROM hashes WHERE path = ? AND size = ? AND mtime = ?",
+            (apath, st.st_size, mtime),
+        ).fetchall()
+    found = {ps: etag for ps, etag in rows}
+
+    missing = [ps for ps in wanted if ps not in found]
+    if missing:
+        computed = _compute(path, [ps for ps in wanted if ps])
+        with _lock:
+            # Versiones anteriores del archivo ya no sirven
+            conn.execute("DELETE FROM hashes WHERE path = ? AND (size != ? OR mtime != ?)",
+                         (apath, st.st_size, mtime))
+            conn.executemany(
+                "INSERT OR REPLACE INTO hashes (path, size, mtime, part_size, etag) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(apath, st.st_size, mtime, ps, etag) for ps, etag in computed.items()],
+            )
+            conn.commit()
+        found.update(computed)
+
+    return {ps: found[ps] for ps in wanted}
+
+
+def matches(path, remote_etag, part_sizes=()):
+    """True si el contenido de path corresponde al ETag remoto."""
+    remote = _normalize(remote_etag)
+    if not remote:
+        return False
+    return remote in {_normalize(e) for e in etags(path, part_sizes).values()}
+
+
+def mark_synced(path, remote_etag):
+    """Anota que path, tal como está ahora, corresponde al ETag remoto."""
+    st = os.stat(path)
+    apath = os.path.normcase(os.path.abspath(path))
+    conn = _connect()
+    with _lock:
+        conn.execute(
+            "INSERT OR REPLACE INTO synced (path, size, mtime, etag) VALUES (?, ?, ?, ?)",
+            (apath, st.st_size, st.st_mtime_ns, _normalize(remote_etag)),
+        )
+        conn.commit()
+
+
+def in_sync(path, remote_etag, part_sizes=()):
+    """
+    True si path no cambió desde que se subió con ese ETag: mismo
+    contenido, o sin tocar desde mark_synced.
+    """
+    remote = _normalize(remote_etag)
+    if not remote:
+        return False
+    try:
+        st = os.stat(path)
+    except OSError:
+        return False
+
+    conn = _connect()
+    with _lock:
+        row = conn.execute(
+            "SELECT size, mtime, etag FROM synced WHERE path = ?",
+            (os.path.normcase(os.path.abspath(path)),),
+        ).fetchone()
+    if row == (st.st_size, st.st_mtime_ns, remote):
+        return True
+    return matches(path, remote, part_sizes)
@@ -0,0 +1,326 @@
+# ============================================================
+# metrics.py → Tiempos por operación S3 (spans, contadores, histogramas)
+# Texmex Weavers – FreeCAD Integration
+# ============================================================
+#
+# Dos niveles de span, en la misma tabla:
+#
+#   s3.list, s3.stat, s3.get, s3.put, s3.remove, s3.multipart_*...
+#       Cada petición HTTP del cliente compartido. instrument(client)
+#       envuelve Minio._url_open, por donde pasan todas las llamadas
+#       (list_objects, stat_object, get_object, put_object, partes...).
+#
+#   storage.list_prefix, modelimporter.fetch, library.children...
+#       Operaciones de los helpers, con span("nombre", bucket, key).
+#       Las peticiones hechas dentro quedan con parent = ese nombre.
+#
+# Sin Qt: lo usan el workbench, la línea de comandos y los benchmarks.
+# El dock "Diagnóstico" (diagnostics.py) lee snapshot() y recent().
+
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Límites superiores (ms) de las cubetas del histograma; la última es ∞
+HISTOGRAM_BOUNDS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000]
+
+# Spans individuales que se conservan para el dock y la exportación
+MAX_SPANS = 5000
+
+# Respuestas S3 que no son fallos (HEAD antes de subir un objeto nuevo...)
+NOT_FOUND_CODES = {"NoSuchKey", "NoSuchBucket", "NoSuchUpload", "ResourceNotFound"}
+
+_lock = threading.Lock()
+_stats = {}
+_spans = deque(maxlen=MAX_SPANS)
+_local = threading.local()
+
+# Sube con cada span registrado: el dock sólo repinta si cambió
+version = 0
+
+
+# ============================================================
+# ESTADÍSTICAS
+# ============================================================
+
+class OpStats:
+    """Contadores e histograma de latencias de una operación."""
+
+    __slots__ = ("count", "errors", "retries", "bytes", "total_ms", "max_ms", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.retries = 0
+        self.bytes = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(HISTOGRAM_BOUNDS) + 1)
+
+    def add(self, ms, nbytes, retries, error):
+        self.count += 1
+        self.errors += 1 if error else 0
+        self.retries += retries
+        self.bytes += nbytes
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+        index = len(HISTOGRAM_BOUNDS)
+        for i, bound in enumerate(HISTOGRAM_BOUNDS):
+            if ms <= bound:
+                index = i
+                break
+        self.buckets[index] += 1
+
+    def percentile(self, q):
+        """Cota superior (ms) de la cubeta donde cae el cuantil q."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= target and n:
+                if i < len(HISTOGRAM_BOUNDS):
+                    return min(float(HISTOGRAM_BOUNDS[i]), round(self.max_ms, 3))
+                return round(self.max_ms, 3)
+        return self.max_ms
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "retries": self.retries,
+            "bytes": self.bytes,
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "p50_ms": self.percentile(0.50),
+            "p90_ms": self.percentile(0.90),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": round(self.max_ms, 3),
+            "histogram": list(self.buckets),
+        }
+
+
+# ============================================================
+# REGISTRO
+# ============================================================
+
+def record(op, bucket=None, key=None, seconds=0.0, nbytes=0, retries=0,
+           error=None, parent=None, status=None):
+    """Registra una operación ya terminada. status: código S3 sin error."""
+    global version
+
+    ms = seconds * 1000.0
+    entry = {
+        "ts": round(time.time(), 3),
+        "op": op,
+        "bucket": bucket,
+        "key": key,
+        "bytes": int(nbytes or 0),
+        "ms": round(ms, 3),
+        "retries": int(retries or 0),
+        "error": error,
+        "status": status,
+        "parent": parent,
+    }
+
+    with _lock:
+        stats = _stats.get(op)
+        if stats is None:
+            stats = _stats[op] = OpStats()
+        stats.add(ms, entry["bytes"], entry["retries"], error)
+        _spans.append(entry)
+        version += 1
+
+
+def _current_parent():
+    stack = getattr(_local, "stack", None)
+    return stack[-1].op if stack else None
+
+
+class Span:
+    """Operación en curso; bytes/retries se pueden ir sumando."""
+
+    __slots__ = ("op", "bucket", "key", "bytes", "retries", "error", "parent", "started")
+
+    def __init__(self, op, bucket=None, key=None):
+        self.op = op
+        self.bucket = bucket
+        self.key = key
+        self.bytes = 0
+        self.retries = 0
+        self.error = None
+        self.parent = _current_parent()
+        self.started = time.perf_counter()
+
+
+@contextmanager
+def span(op, bucket=None, key=None):
+    """
+    with span("modelimporter.fetch", bucket, key) as s:
+        ...
+        s.bytes = tamaño
+    Una excepción se registra como error y se vuelve a lanzar.
+    """
+    s = Span(op, bucket, key)
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    stack.append(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.error = s.error or _describe(e)
+        raise
+    finally:
+        stack.pop()
+        record(s.op, s.bucket, s.key, time.perf_counter() - s.started,
+               s.bytes, s.retries, s.error, s.parent)
+
+
+def _describe(e):
+    code = getattr(e, "code", None)
+    return f"{type(e).__name__}: {code}" if code else f"{type(e).__name__}: {e}"[:200]
+
+
+# ============================================================
+# INSTRUMENTAR EL CLIENTE MINIO
+# ============================================================
+
+def _s3_op(method, object_name, query, headers):
+    """Nombre de la operación a partir de la petición HTTP."""
+    query = query or {}
+    if method == "HEAD":
+        return "s3.stat" if object_name else "s3.bucket_exists"
+    if method == "GET":
+        if object_name:
+            return "s3.multipart_list_parts" if "uploadId" in query else "s3.get"
+        if "location" in query:
+            return "s3.location"
+        if "events" in query:
+            return "s3.listen"
+        if "uploads" in query:
+            return "s3.multipart_list"
+        return "s3.list"
+    if method == "PUT":
+        if not object_name:
+            return "s3.make_bucket"
+        if "uploadId" in query:
+            return "s3.multipart_part"
+        if headers and "x-amz-copy-source" in {k.lower() for k in headers}:
+            return "s3.copy"
+        return "s3.put"
+    if method == "POST":
+        if "uploads" in query:
+            return "s3.multipart_create"
+        if "uploadId" in query:
+            return "s3.multipart_complete"
+        if "delete" in query:
+            return "s3.remove"
+        return "s3.post"
+    if method == "DELETE":
+        if "uploadId" in query:
+            return "s3.multipart_abort"
+        return "s3.remove" if object_name else "s3.remove_bucket"
+    return f"s3.{method.lower()}"
+
+
+def _response_retries(response):
+    retries = getattr(response, "retries", None)
+    return len(getattr(retries, "history", ()) or ())
+
+
+def instrument(client):
+    """
+    Envuelve client._url_open para registrar cada petición.
+    Idempotente; devuelve el mismo cliente.
+    """
+    if getattr(client, "_texmex_instrumented", False):
+        return client
+
+    url_open = client._url_open
+
+    def _url_open(method, region, bucket_name=None, object_name=None,
+                  body=None, headers=None, query_params=None, *args, **kwargs):
+        op = _s3_op(method, object_name, query_params, headers)
+        key = object_name
+        if not key and query_params and query_params.get("prefix"):
+            key = query_params.get("prefix")
+        started = time.perf_counter()
+        parent = _current_parent()
+
+        try:
+            response = url_open(method, region, bucket_name, object_name, body,
+                                headers, query_params, *args, **kwargs)
+        except Exception as e:
+            retries = len(getattr(getattr(e, "retries", None), "history", ()) or ())
+            code = getattr(e, "code", None)
+            if code in NOT_FOUND_CODES:
+                record(op, bucket_name, key, time.perf_counter() - started,
+                       0, retries, None, parent, status=code)
+            else:
+                record(op, bucket_name, key, time.perf_counter() - started,
+                       0, retries, _describe(e), parent)
+            raise
+
+        if method == "GET":
+            try:
+                nbytes = int(response.headers.get("Content-Length") or 0)
+            except (TypeError, ValueError):
+                nbytes = 0
+        else:
+            nbytes = len(body) if isinstance(body, (bytes, bytearray, memoryview)) else 0
+
+        record(op, bucket_name, key, time.perf_counter() - started,
+               nbytes, _response_retries(response), None, parent)
+        return response
+
+    client._url_open = _url_open
+    client._texmex_instrumented = True
+    return client
+
+
+# ============================================================
+# CONSULTA / EXPORTACIÓN
+# ============================================================
+
+def snapshot():
+    """{op: estadísticas} de todo lo registrado desde reset()."""
+    with _lock:
+        return {op: stats.as_dict() for op, stats in sorted(_stats.items())}
+
+
+def recent(limit=200):
+    """Últimos spans, el más reciente primero."""
+    with _lock:
+        items = list(_spans)[-limit:]
+    items.reverse()
+    return items
+
+
+def reset():
+    global version
+    with _lock:
+        _stats.clear()
+        _spans.clear()
+        version += 1
+
+
+def export_jsonl(path):
+    """
+    Escribe los spans conservados (uno por línea) y al final una línea
+    {"summary": snapshot()}. Devuelve el número de spans.
+    """
+    with _lock:
+        items = list(_spans)
+        summary = {op: stats.as_dict() for op, stats in sorted(_stats.items())}
+
+    with open(path, "w", encoding="utf-8") as f:
+        for entry in items:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        f.write(json.dumps({"summary": summary, "bounds_ms": HISTOGRAM_BOUNDS},
+                           ensure_ascii=False) + "\n")
+
+    return len(items)
@@ -0,0 +1,581 @@
+# ============================================================
+# mirror.py → Espejo local de los buckets (trabajo sin conexión)
+# Texmex Weavers – FreeCAD Integration
+# ============================================================
+#
+# Copia BUCKET_MODEL y BUCKET_SVG (o sólo algunas áreas) a una carpeta
+# local, para los equipos de planta que se quedan sin red:
+#
+#   <mirror_dir>/<bucket>/<key>          archivos (misma ruta que en S3)
+#   <mirror_dir>/mirror_state.json       {bucket: {"synced", "prefixes",
+#                                          "objects": {key: {e, s, m}}}}
+#   <mirror_dir>/.lock                   sincronización en curso
+#
+# sync() lista el bucket y compara por ETag con el estado: sólo se
+# descargan (en paralelo, download.py → .part verificado y renombrado)
+# los objetos nuevos o cambiados, y se borran del disco los que ya no
+# están en el servidor. Un archivo local modificado (tamaño o mtime
+# distintos a los anotados) se vuelve a descargar.
+#
+# Sin servidor, list_prefix(), fetch() y current_etag() responden desde
+# el espejo: la librería, abrir, importar y las vistas previas siguen
+# funcionando.
+#
+# Ajustes: <mirror_dir> (vacío = desactivado), <mirror_prefixes> (áreas
+# separadas por comas; vacío = todo el bucket) y <mirror_interval>
+# (minutos entre sincronizaciones de fondo; 0 = sólo a mano o desde la
+# línea de comandos).
+
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+try:
+    import FreeCAD
+except ImportError:
+    import headless as FreeCAD
+
+from config_storage import add_config_listener
+import download
+import storage
+
+STATE_FILENAME = "mirror_state.json"
+LOCK_FILENAME = ".lock"
+
+# Un .lock sin tocar en este tiempo es de una sincronización caída
+STALE_LOCK_SECONDS = 30 * 60
+
+# Archivos que se descargan a la vez
+DEFAULT_WORKERS = 4
+
+# El estado se guarda cada tantas descargas: un corte no repite todo
+SAVE_EVERY = 25
+
+# Tras un fallo de conexión, segundos en que se responde desde el
+# espejo sin volver a esperar al servidor
+OFFLINE_RETRY = 60
+
+# Segundos que se espera tras un cambio remoto antes de sincronizar
+# (un lote de subidas → una sola pasada)
+CHANGE_SETTLE = 10
+
+_lock = threading.Lock()
+_state_cache = {}       # ruta → (mtime_ns, estado)
+_offline_until = 0.0
+_worker = None
+
+
+# ============================================================
+# AJUSTES
+# ============================================================
+
+def get_mirror_dir(cfg=None):
+    """Carpeta del espejo, o None si no está configurado."""
+    cfg = storage.cfg if cfg is None else cfg
+    path = (cfg.get("MIRROR_DIR") or "").strip()
+    return os.path.abspath(os.path.expanduser(path)) if path else None
+
+
+def parse_prefixes(parts):
+    """
+    ["Telares Circulares/Motores", ...] → ["Telares_Circulares/Motores/", ...]
+    Sin ninguno → [""] (todo el bucket).
+    """
+    prefixes = []
+    for part in parts:
+        prefix = storage._norm_prefix("/".join(
+            storage._slug(p) for p in (part or "").strip().split("/") if p.strip()
+        ))
+        if prefix and prefix not in prefixes:
+            prefixes.append(prefix)
+    return prefixes or [""]
+
+
+def mirror_prefixes(cfg=None):
+    """Prefijos que se copian según <mirror_prefixes> (áreas separadas por comas)."""
+    cfg = storage.cfg if cfg is None else cfg
+    return parse_prefixes((cfg.get("MIRROR_PREFIXES") or "").split(","))
+
+
+def enabled(cfg=None):
+    return get_mirror_dir(cfg) is not None
+
+
+def is_offline_error(e):
+    """El servidor no responde (red, DNS, timeout), no un error S3."""
+    try:
+        from urllib3.exceptions import HTTPError
+    except ImportError:
+        HTTPError = OSError
+    return isinstance(e, (OSError, HTTPError))
+
+
+# ============================================================
+# RUTAS / ESTADO
+# ============================================================
+
+def _local_path(root, bucket, key):
+    """Ruta local de key (sin salirse de <root>/<bucket>)."""
+    base = os.path.normpath(os.path.join(root, bucket))
+    path = os.path.normpath(os.path.join(base, *key.strip("/").split("/")))
+    if os.path.commonpath([base, path]) != base or path == base:
+        raise ValueError(f"key fuera del espejo: {key}")
+    return path
+
+
+def _state_path(root):
+    return os.path.join(root, STATE_FILENAME)
+
+
+def _load_state(root):
+    """Estado del espejo (se relee sólo si el archivo cambió)."""
+    path = _state_path(root)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return {}
+
+    with _lock:
+        hit = _state_cache.get(path)
+    if hit and hit[0] == mtime:
+        return hit[1]
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+    with _lock:
+        _state_cache[path] = (mtime, state)
+    return state
+
+
+def _save_state(root, state):
+    path = _state_path(root)
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+    with _lock:
+        _state_cache.pop(path, None)
+
+
+def _acquire_lock(root):
+    path = os.path.join(root, LOCK_FILENAME)
+    for _attempt in range(2):
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            os.write(fd, str(os.getpid()).encode())
+            os.close(fd)
+            return path
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(path) > STALE_LOCK_SECONDS:
+                    os.remove(path)
+                    continue
+            except OSError:
+                continue
+            break
+    raise RuntimeError(f"Otra sincronización del espejo está en curso: {root}")
+
+
+def _touch_lock(path):
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def _release_lock(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _remove_file(root, bucket, path):
+    """Borra path y las carpetas que queden vacías hasta <root>/<bucket>."""
+    os.remove(path)
+    base = os.path.normpath(os.path.join(root, bucket))
+    folder = os.path.dirname(path)
+    while folder != base and os.path.commonpath([base, folder]) == base:
+        try:
+            os.rmdir(folder)
+        except OSError:
+            break
+        folder = os.path.dirname(folder)
+
+
+def _is_current(path, entry, etag, size):
+    """El archivo local es el que se anotó y coincide con el remoto."""
+    if not entry or entry.get("e") != etag or entry.get("s") != size:
+        return False
+    try:
+        st = os.stat(path)
+    except OSError:
+        return False
+    return st.st_size == size and int(st.st_mtime) == entry.get("m")
+
+
+# ============================================================
+# SINCRONIZACIÓN
+# ============================================================
+
+def _remote_objects(client, bucket, prefixes):
+    """{key: (etag, tamaño, last_modified)} bajo los prefijos elegidos."""
+    import journal
+
+    remote = {}
+    for prefix in prefixes:
+        for obj in client.list_objects(bucket, prefix=prefix, recursive=True):
+            key = obj.object_name
+            if obj.is_dir or key.endswith("/") or journal.is_journal_key(key):
+                continue
+            remote[key] = ((obj.etag or "").strip('"'), obj.size, obj.last_modified)
+    return remote
+
+
+def sync(client, bucket, root=None, prefixes=None, workers=DEFAULT_WORKERS,
+         dry_run=False, on_item=None, cancel_event=None):
+    """
+    Deja <root>/<bucket> igual que el bucket (bajo prefixes).
+    on_item(registro) recibe cada descarga, borrado o fallo.
+    Devuelve {"downloaded", "unchanged", "deleted", "failed", "bytes"}.
+    """
+    import local_hash
+
+    root = root or get_mirror_dir()
+    if not root:
+        raise RuntimeError("No hay carpeta de espejo configurada (<mirror_dir>).")
+    prefixes = prefixes or mirror_prefixes()
+    os.makedirs(root, exist_ok=True)
+
+    part_size = storage._int_cfg(storage.cfg, "DOWNLOAD_PART_MB", 8) * 1024 * 1024
+    concurrency = storage._int_cfg(storage.cfg, "DOWNLOAD_CONCURRENCY", 4)
+
+    stats = {"downloaded": 0, "unchanged": 0, "deleted": 0, "failed": 0, "bytes": 0}
+
+    def emit(record):
+        if on_item:
+            on_item(dict(record, bucket=bucket))
+
+    lock_path = _acquire_lock(root)
+    try:
+        # Primero el listado completo: si falla no se borra nada
+        if not storage.bucket_exists(bucket):
+            raise RuntimeError(f"El bucket {bucket} no existe")
+        remote = _remote_objects(client, bucket, prefixes)
+
+        state = dict(_load_state(root))
+        bucket_state = state.get(bucket) or {}
+        objects = dict(bucket_state.get("objects") or {})
+
+        # Lo que ya no está en el servidor (o quedó fuera de los prefijos)
+        for key in sorted(set(objects) - set(remote)):
+            path = _local_path(root, bucket, key)
+            if not dry_run:
+                try:
+                    _remove_file(root, bucket, path)
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    stats["failed"] += 1
+                    emit({"key": key, "path": path, "ok": False, "error": str(e)})
+                    continue
+                del objects[key]
+            stats["deleted"] += 1
+            emit({"key": key, "path": path, "status": "deleted"})
+
+        pending = []
+        for key, (etag, size, modified) in remote.items():
+            path = _local_path(root, bucket, key)
+            if _is_current(path, objects.get(key), etag, size):
+                stats["unchanged"] += 1
+                continue
+
+            # Archivo ya presente sin anotar (p.ej. de "sync down"): se adopta
+            if (os.path.isfile(path) and os.path.getsize(path) == size and
+                    local_hash.matches(path, etag, download.candidate_part_sizes(etag, size))):
+                objects[key] = {"e": etag, "s": size, "m": int(os.path.getmtime(path))}
+                stats["unchanged"] += 1
+                continue
+
+            pending.append((key, etag, size, modified, path))
+
+        if dry_run:
+            for key, _etag, size, _modified, path in pending:
+                emit({"key": key, "path": path, "status": "dry-run", "size": size})
+            stats["downloaded"] = len(pending)
+            return stats
+
+        def fetch(item):
+            key, etag, size, modified, path = item
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            download.download(client, bucket, key, path, size=size, etag=etag,
+                              part_size=part_size, concurrency=concurrency,
+                              cancel_event=cancel_event)
+            # Fecha del servidor: en el explorador se ve qué es más nuevo
+            if modified is not None:
+                ts = modified.timestamp()
+                os.utime(path, (ts, ts))
+            return {"e": etag, "s": size, "m": int(os.path.getmtime(path))}
+
+        def save():
+            state[bucket] = {"synced": bucket_state.get("synced"),
+                             "prefixes": prefixes, "objects": objects}
+            _save_state(root, state)
+            _touch_lock(lock_path)
+
+        save()
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as ex:
+            futures = {ex.submit(fetch, item): item for item in pending}
+            for n, future in enumerate(as_completed(futures), 1):
+                key, _etag, size, _modified, path = futures[future]
+                try:
+                    objects[key] = future.result()
+                except download.DownloadCancelled:
+                    continue
+                except Exception as e:
+                    stats["failed"] += 1
+                    emit({"key": key, "path": path, "ok": False, "error": str(e)})
+                    continue
+                stats["downloaded"] += 1
+                stats["bytes"] += size
+                emit({"key": key, "path": path, "status": "downloaded", "size": size})
+                if n % SAVE_EVERY == 0:
+                    save()
+
+        complete = not stats["failed"] and not (cancel_event and cancel_event.is_set())
+        if complete:
+            bucket_state["synced"] = time.time()
+        save()
+
+    finally:
+        _release_lock(lock_path)
+
+    return stats
+
+
+def sync_all(client=None, root=None, prefixes=None, workers=DEFAULT_WORKERS,
+             on_item=None, cancel_event=None):
+    """sync() de BUCKET_MODEL y BUCKET_SVG. Devuelve {bucket: stats}."""
+    client = client or storage.get_client()
+    result = {}
+    for bucket in dict.fromkeys([storage.BUCKET_MODEL, storage.BUCKET_SVG]):
+        if cancel_event is not None and cancel_event.is_set():
+            break
+        result[bucket] = sync(client, bucket, root=root, prefixes=prefixes, workers=workers,
+                              on_item=on_item, cancel_event=cancel_event)
+    return result
+
+
+# ============================================================
+# LECTURA SIN CONEXIÓN
+# ============================================================
+
+def synced_at(bucket):
+    """Hora (epoch) de la última sincronización completa, o None."""
+    root = get_mirror_dir()
+    if not root:
+        return None
+    return (_load_state(root).get(bucket) or {}).get("synced")
+
+
+def local_listing(bucket, prefix=""):
+    """
+    Listado de UN nivel desde el espejo, con la forma de
+    storage.list_prefix más "offline": hora de la última sincronización.
+    None si el bucket no está en el espejo.
+    """
+    root = get_mirror_dir()
+    if not root:
+        return None
+    bucket_state = _load_state(root).get(bucket)
+    if not bucket_state:
+        return None
+
+    base = storage._norm_prefix(prefix)
+    folders = set()
+    files = []
+
+    for key, entry in (bucket_state.get("objects") or {}).items():
+        if not key.startswith(base):
+            continue
+        name = key[len(base):]
+        if "/" in name:
+            folders.add(name.split("/", 1)[0])
+            continue
+        files.append({"name": name, "key": key, "size": entry.get("s"),
+                      "etag": entry.get("e", "")})
+
+    return {
+        "folders": sorted(folders),
+        "files": sorted(files, key=lambda f: f["name"].lower()),
+        "offline": bucket_state.get("synced") or 0,
+    }
+
+
+def _local_entry(bucket, key):
+    root = get_mirror_dir()
+    if not root:
+        return None, None
+    entry = ((_load_state(root).get(bucket) or {}).get("objects") or {}).get(key)
+    return root, entry
+
+
+def local_path(bucket, key, etag=None):
+    """Ruta del objeto en el espejo si está completo (y con ese ETag)."""
+    root, entry = _local_entry(bucket, key)
+    if not entry or (etag and entry.get("e") != (etag or "").strip('"')):
+        return None
+    try:
+        path = _local_path(root, bucket, key)
+        if os.path.getsize(path) != entry.get("s"):
+            return None
+    except (OSError, ValueError):
+        return None
+    return path
+
+
+def offline():
+    """True durante OFFLINE_RETRY segundos tras un fallo de conexión."""
+    return time.monotonic() < _offline_until
+
+
+def _with_fallback(remote, local):
+    """
+    remote() o, si el servidor no responde, local() (si devuelve None
+    se relanza el error). Tras un fallo se usa local() directamente
+    durante OFFLINE_RETRY segundos, sin esperar a la red.
+    """
+    global _offline_until
+
+    if offline():
+        result = local()
+        if result is not None:
+            return result
+
+    try:
+        result = remote()
+    except Exception as e:
+        if not is_offline_error(e):
+            raise
+        result = local()
+        if result is None:
+            raise
+        if not offline():
+            FreeCAD.Console.PrintWarning(f"Servidor sin respuesta, usando el espejo local: {e}\n")
+        _offline_until = time.monotonic() + OFFLINE_RETRY
+        return result
+
+    _offline_until = 0.0
+    return result
+
+
+def list_prefix(bucket, prefix="", refresh=False):
+    """storage.list_prefix o el listado del espejo (lleva "offline")."""
+    return _with_fallback(lambda: storage.list_prefix(bucket, prefix, refresh=refresh),
+                          lambda: local_listing(bucket, prefix))
+
+
+def fetch(bucket, key, fetch_remote):
+    """fetch_remote() (p.ej. model_cache.fetch) o la copia del espejo. Sólo lectura."""
+    return _with_fallback(fetch_remote, lambda: local_path(bucket, key))
+
+
+def current_etag(bucket, key):
+    """ETag del objeto en el servidor o, sin conexión, el de la copia del espejo."""
+    def remote():
+        return (storage.get_client().stat_object(bucket, key).etag or "").strip('"')
+
+    def local():
+        return (_local_entry(bucket, key)[1] or {}).get("e")
+
+    return _with_fallback(remote, local)
+
+
+# ============================================================
+# HILO DE FONDO
+# ============================================================
+
+def _interval(cfg=None):
+    cfg = storage.cfg if cfg is None else cfg
+    return storage._int_cfg(cfg, "MIRROR_INTERVAL", 60) * 60
+
+
+def _mirrored(change):
+    if change["bucket"] not in (storage.BUCKET_MODEL, storage.BUCKET_SVG):
+        return False
+    return any(change["key"].startswith(p) for p in mirror_prefixes())
+
+
+def _sync_loop(stop_event, wake_event):
+    while not stop_event.is_set():
+        try:
+            stats = sync_all(cancel_event=stop_event)
+            changed = sum(s["downloaded"] + s["deleted"] for s in stats.values())
+            if changed:
+                FreeCAD.Console.PrintMessage(f"Espejo local actualizado: {changed} cambio(s).\n")
+        except Exception as e:
+            FreeCAD.Console.PrintWarning(f"No se pudo sincronizar el espejo local: {e}\n")
+
+        # Hasta el próximo intervalo o un cambio remoto (+ CHANGE_SETTLE)
+        if wake_event.wait(max(60, _interval())):
+            wake_event.clear()
+            stop_event.wait(CHANGE_SETTLE)
+
+
+def start():
+    """Sincroniza el espejo en segundo plano (si está configurado)."""
+    global _worker
+
+    with _lock:
+        if _worker is not None:
+            return _worker
+        if not enabled() or _interval() <= 0 or not storage.ENDPOINT:
+            return None
+
+        import notifications
+
+        stop_event = threading.Event()
+        wake_event = threading.Event()
+
+        def on_changes(changes):
+            if any(_mirrored(c) for c in changes):
+                wake_event.set()
+
+        notifications.add_listener(on_changes)
+        thread = threading.Thread(target=_sync_loop, args=(stop_event, wake_event),
+                                  name="TexmexMirror", daemon=True)
+        _worker = (thread, stop_event, wake_event, on_changes)
+        thread.start()
+        return _worker
+
+
+def stop():
+    global _worker
+
+    with _lock:
+        worker, _worker = _worker, None
+    if worker is not None:
+        import notifications
+        _thread, stop_event, wake_event, on_changes = worker
+        notifications.remove_listener(on_changes)
+        stop_event.set()
+        wake_event.set()
+
+
+def _restart(new_cfg=None):
+    # Otra carpeta, otros prefijos o intervalo 0 → arrancar de nuevo
+    if _worker is None:
+        return
+    stop()
+    start()
+
+
+add_config_listener(_restart)
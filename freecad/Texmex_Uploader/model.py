@@ -20,13 +20,14 @@ except:
 
 # Common utilities
 from common import (
-    Minio, S3Error,
-    ENDPOINT, ACCESS_KEY, SECRET_KEY,
-    BUCKET_MODEL,
-    show_popup, get_doc_metadata,
-    upload_file, list_subfolders,
+    show_popup, get_doc_metadata, doc_modified, save_after_upload,
+    upload_file_with_progress, list_subfolders,
     find_etag_path, join_key, _slug, _pretty
 )
+from transfers import enqueue_upload
+import local_hash
+import storage
+import upload_queue
 
 
 # ============================================================
@@ -44,6 +45,26 @@ def clean_path(*parts):
     return "/".join(out)
 
 
+def _unchanged_since_upload(doc, etag):
+    """
+    El FCStd en disco es el que se subió con ese ETag (mismo contenido,
+    o sin tocar desde que se guardó Base_etag tras la subida) y no hay
+    cambios sin guardar.
+    """
+    import transfer
+
+    path = doc.FileName
+    try:
+        if doc_modified(doc):
+            return False
+        part_sizes = transfer.candidate_part_sizes(
+            os.path.getsize(path), storage.UPLOAD_PART_MB * 1024 * 1024)
+        return local_hash.in_sync(path, etag, part_sizes)
+    except Exception as e:
+        FreeCAD.Console.PrintWarning(f"No se pudo comparar con la última subida: {e}\n")
+        return False
+
+
 # ============================================================
 # METADATA FORM DIALOG
 # ============================================================
@@ -143,7 +164,7 @@ class MetadataForm(QtWidgets.QDialog):
 
         def fill_s1():
             area_slug = _slug(self.area_combo.currentText())
-            folders = list_subfolders(BUCKET_MODEL, area_slug)
+            folders = list_subfolders(storage.BUCKET_MODEL, area_slug)
 
             self.s1.blockSignals(True)
             self.s1.clear()
@@ -160,7 +181,7 @@ class MetadataForm(QtWidgets.QDialog):
             self.s2.clear()
             self.s2.addItems(["<Raíz>", "<Crear nuevo…>"])
             if prefix:
-                self.s2.addItems(list_subfolders(BUCKET_MODEL, prefix))
+                self.s2.addItems(list_subfolders(storage.BUCKET_MODEL, prefix))
             self.s2.blockSignals(False)
             self._refresh_visibility()
 
@@ -177,7 +198,7 @@ class MetadataForm(QtWidgets.QDialog):
             self.s3.clear()
             self.s3.addItems(["<Raíz>", "<Crear nuevo…>"])
             if prefix:
-                self.s3.addItems(list_subfolders(BUCKET_MODEL, prefix))
+                self.s3.addItems(list_subfolders(storage.BUCKET_MODEL, prefix))
             self.s3.blockSignals(False)
             self._refresh_visibility()
 
@@ -372,7 +393,7 @@ class UploadToTexmexWeaversCmd:
         # --------------------------------------------------------
         # BUSCAR RUTA POR ETAG (si existe)
         # --------------------------------------------------------
-        etag_path = find_etag_path(BUCKET_MODEL, etag_doc)
+        etag_path = find_etag_path(storage.BUCKET_MODEL, etag_doc)
 
         if etag_doc and etag_path:
             parts = etag_path.split("/")
@@ -443,7 +464,7 @@ class UploadToTexmexWeaversCmd:
 
         # Subir archivo al bucket
         
-        etag = upload_file(path, object_name, metadata, BUCKET_MODEL)
+        etag = upload_file_with_progress(path, object_name, metadata, storage.BUCKET_MODEL, parent)
 
         # --------------------------------------------------------
         # SI SUBIÓ BIEN
@@ -493,7 +514,24 @@ class UploadCurrentProjectCmd:
         # --------------------------------------------------------
         # SI EXISTE ETag → buscar ruta y auto-incrementar versión
         # --------------------------------------------------------
-        etag_path = find_etag_path(BUCKET_MODEL, etag_doc)
+        etag_path = find_etag_path(storage.BUCKET_MODEL, etag_doc)
+
+        # --------------------------------------------------------
+        # SIN CAMBIOS desde la última subida → antes de subir la
+        # revisión y guardar (eso cambiaría metadatos y bytes)
+        # --------------------------------------------------------
+        if etag_doc and etag_path and _unchanged_since_upload(doc, etag_doc):
+            answer = QtWidgets.QMessageBox.question(
+                None,
+                "Sin cambios",
+                f"El documento no cambió desde la última subida:\n{etag_path}\n"
+                f"ETag: {etag_doc}\n\n¿Subir una nueva revisión de todos modos?",
+                QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No,
+                QtWidgets.QMessageBox.No
+            )
+            if answer != QtWidgets.QMessageBox.Yes:
+                FreeCAD.Console.PrintMessage(f"Sin cambios, no se sube: {etag_path}\n")
+                return
 
         if etag_doc and etag_path:
             # camino tipo: area/s1/s2/s3/name.FCStd
@@ -563,26 +601,51 @@ class UploadCurrentProjectCmd:
             "x-amz-meta-comment": data["comment"]
         }
         
-        etag = upload_file(doc.FileName, object_name, metadata, BUCKET_MODEL)
+        # --------------------------------------------------------
+        # Subida en segundo plano (dock "Transferencias"); el usuario
+        # puede seguir trabajando. Al terminar, en el hilo GUI:
+        # --------------------------------------------------------
+        doc_name = doc.Name
+
+        def on_done(job):
+            if job.state == upload_queue.FAILED:
+                show_popup("Error", f"No se pudo subir:\n{object_name}\n\n{job.error}",
+                           QtWidgets.QMessageBox.Critical)
+                return
+            if job.state != upload_queue.DONE:
+                return
+
+            target = FreeCAD.listDocuments().get(doc_name)
+            if target is None:
+                FreeCAD.Console.PrintWarning(
+                    f"{object_name} subido, pero el documento ya no está abierto: "
+                    f"Base_etag no se actualizó.\n"
+                )
+                return
+
+            # Si el usuario siguió editando, el FCStd ya no es lo subido
+            # y el documento no se guarda (ver save_after_upload)
+            modified = doc_modified(target)
+            uploaded_file = job.source_unchanged() and not modified
 
-        if etag:
             try:
                 # Actualizar atributos en el documento FreeCAD
-                doc.Base_etag = etag
-                doc.Base_revision = str(data["revision"])
-                doc.Base_descripcion = data["descripcion"]
-                doc.Base_comment = data["comment"]
+                target.Base_etag = job.etag
+                target.Base_revision = str(data["revision"])
+                target.Base_descripcion = data["descripcion"]
+                target.Base_comment = data["comment"]
 
-                doc.recompute()
-                doc.save()
+                saved = save_after_upload(target, modified)
+
+                # El guardado cambia el FCStd (Base_etag), pero sigue
+                # siendo lo subido: la próxima vez → "sin cambios"
+                if saved and uploaded_file:
+                    local_hash.mark_synced(target.FileName, job.etag)
 
             except Exception as e:
                 FreeCAD.Console.PrintError(f"Error guardando metadatos: {e}\n")
 
-            show_popup(
-                "Completado",
-                f"Proyecto subido:\n{object_name}\nETag: {etag}"
-            )
+        enqueue_upload(doc.FileName, object_name, metadata, storage.BUCKET_MODEL, on_done=on_done)
 
     def IsActive(self):
         return True
@@ -0,0 +1,357 @@
+# ============================================================
+# model_cache.py → Caché local de modelos descargados
+# Texmex Weavers – FreeCAD Integration
+# ============================================================
+#
+# Estructura en disco (get_data_dir("model_cache")):
+#
+#   <sha1(bucket/key)>/
+#       meta.json              bucket, key, etag, size, mtime, checked
+#       <etag>/<basename>      contenido (nombre original → FreeCAD
+#                              muestra el nombre correcto del documento)
+#       .lock                  descarga en curso (otra instancia)
+#
+# - Dentro de FRESH_SECONDS desde la última validación no se hace
+#   ninguna petición; después basta un HEAD (stat_object).
+# - Las descargas van por rangos en paralelo (download.py) a un .part
+#   que se verifica y se renombra (atómico). Un .part interrumpido se
+#   reanuda en el siguiente fetch del mismo ETag.
+# - Se expulsan las entradas menos usadas hasta quedar bajo el límite.
+#
+# Los archivos del caché son de SOLO LECTURA: para abrir y guardar un
+# modelo se usa checkout(), que entrega una copia de trabajo.
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+
+try:
+    import FreeCAD
+except ImportError:
+    import headless as FreeCAD
+
+from config_storage import get_data_dir, load_minio_config, add_config_listener
+import download
+
+META_FILENAME = "meta.json"
+LOCK_FILENAME = ".lock"
+
+# Un .lock más viejo que esto se considera abandonado (instancia caída)
+STALE_LOCK_SECONDS = 30 * 60
+
+# Entradas usadas hace menos de esto no se expulsan: alguien acaba de
+# recibir su ruta (aunque una sola ya pase de <model_cache_mb>)
+EVICT_GRACE_SECONDS = 60
+
+_lock = threading.RLock()
+_key_locks = {}
+
+_settings = {}
+
+
+def _apply_settings(cfg):
+    try:
+        max_mb = float(cfg.get("MODEL_CACHE_MB", 2048))
+    except (TypeError, ValueError):
+        max_mb = 2048
+    try:
+        fresh = float(cfg.get("MODEL_CACHE_FRESH", 60))
+    except (TypeError, ValueError):
+        fresh = 60
+    try:
+        part_mb = int(cfg.get("DOWNLOAD_PART_MB", 8))
+        concurrency = int(cfg.get("DOWNLOAD_CONCURRENCY", 4))
+    except (TypeError, ValueError):
+        part_mb, concurrency = 8, 4
+
+    with _lock:
+        _settings["max_bytes"] = int(max_mb * 1024 * 1024)
+        _settings["fresh"] = fresh
+        _settings["part_size"] = part_mb * 1024 * 1024
+        _settings["concurrency"] = concurrency
+
+
+def _setting(name):
+    with _lock:
+        if not _settings:
+            _apply_settings(load_minio_config())
+        return _settings[name]
+
+
+add_config_listener(_apply_settings)
+
+
+# ============================================================
+# RUTAS / META
+# ============================================================
+
+def get_cache_dir():
+    return get_data_dir("model_cache")
+
+
+def _entry_dir(bucket, key):
+    digest = hashlib.sha1(f"{bucket}/{key}".encode("utf-8")).hexdigest()
+    return os.path.join(get_cache_dir(), digest)
+
+
+def _data_path(entry, etag, key):
+    return os.path.join(entry, etag, os.path.basename(key))
+
+
+def _read_meta(entry):
+    try:
+        with open(os.path.join(entry, META_FILENAME), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_meta(entry, meta):
+    path = os.path.join(entry, META_FILENAME)
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(tmp, path)
+
+
+def _is_valid(entry, meta):
+    """El archivo existe y nadie lo modificó desde que se descargó."""
+    if not meta:
+        return False
+    path = _data_path(entry, meta.get("etag", ""), meta.get("key", ""))
+    try:
+        st = os.stat(path)
+    except OSError:
+        return False
+    return st.st_size == meta.get("size") and int(st.st_mtime) == meta.get("mtime")
+
+
+def _key_lock(entry):
+    with _lock:
+        return _key_locks.setdefault(entry, threading.Lock())
+
+
+# ============================================================
+# LOCK ENTRE INSTANCIAS
+# ============================================================
+
+def _acquire_file_lock(entry, timeout=600):
+    path = os.path.join(entry, LOCK_FILENAME)
+    deadline = time.time() + timeout
+
+    while True:
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            os.write(fd, str(os.getpid()).encode())
+            os.close(fd)
+            return path
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(path) > STALE_LOCK_SECONDS:
+                    os.remove(path)
+                    continue
+            except OSError:
+                continue
+
+            if time.time() > deadline:
+                raise TimeoutError(f"Caché bloqueado por otra instancia: {entry}")
+            time.sleep(0.5)
+
+
+def _release_file_lock(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+# ============================================================
+# API
+# ============================================================
+
+def fetch(client, bucket, key, progress=None, cancel_event=None):
+    """
+    Ruta local (solo lectura) del objeto, descargándolo sólo si cambió.
+    progress/cancel_event se pasan a download.download.
+    """
+    entry = _entry_dir(bucket, key)
+
+    with _key_lock(entry):
+        os.makedirs(entry, exist_ok=True)
+        meta = _read_meta(entry)
+
+        # 1) Fresco: sin red
+        if _is_valid(entry, meta) and time.time() - meta.get("checked", 0) < _setting("fresh"):
+            _touch(entry, meta)
+            return _data_path(entry, meta["etag"], key)
+
+        # 2) Validar con HEAD
+        stat = client.stat_object(bucket, key)
+        etag = (getattr(stat, "etag", "") or "").strip('"')
+
+        if _is_valid(entry, meta) and meta.get("etag") == etag:
+            meta["checked"] = time.time()
+            _write_meta(entry, meta)
+            _touch(entry, meta)
+            return _data_path(entry, etag, key)
+
+        # 3) Descargar
+        lock_path = _acquire_file_lock(entry)
+        try:
+            # Otra instancia pudo descargarlo mientras esperábamos
+            meta = _read_meta(entry)
+            if not (_is_valid(entry, meta) and meta.get("etag") == etag):
+                meta = _download(client, bucket, key, entry, etag, stat.size,
+                                 progress=progress, cancel_event=cancel_event)
+        finally:
+            _release_file_lock(lock_path)
+
+    evict(exclude=(entry,))
+    return _data_path(entry, etag, key)
+
+
+def checkout(client, bucket, key, progress=None):
+    """
+    Copia de trabajo editable del objeto (FreeCAD guarda sobre ella).
+    Cada ruta del bucket tiene su propia carpeta → sin choques de nombre.
+    """
+    return working_copy(bucket, key, fetch(client, bucket, key, progress=progress))
+
+
+def working_copy(bucket, key, source):
+    """Copia source (caché o espejo local) a la carpeta de trabajo de key."""
+    digest = hashlib.sha1(f"{bucket}/{key}".encode("utf-8")).hexdigest()[:12]
+    work_dir = os.path.join(tempfile.gettempdir(), "TexmexLibrary", digest)
+    os.makedirs(work_dir, exist_ok=True)
+
+    work_path = os.path.join(work_dir, os.path.basename(key))
+    tmp = f"{work_path}.{uuid.uuid4().hex}.part"
+    shutil.copyfile(source, tmp)
+    os.replace(tmp, work_path)
+    return work_path
+
+
+def _download(client, bucket, key, entry, etag, size, progress=None, cancel_event=None):
+    final = _data_path(entry, etag, key)
+    os.makedirs(os.path.dirname(final), exist_ok=True)
+
+    # El .part queda junto a final: si se corta, se reanuda con el mismo ETag
+    download.download(
+        client, bucket, key, final, size=size, etag=etag,
+        part_size=_setting("part_size"),
+        concurrency=_setting("concurrency"),
+        progress=progress,
+        cancel_event=cancel_event,
+    )
+
+    st = os.stat(final)
+    meta = {
+        "bucket": bucket,
+        "key": key,
+        "etag": etag,
+        "size": st.st_size,
+        "mtime": int(st.st_mtime),
+        "checked": time.time(),
+        "used": time.time(),
+    }
+    _write_meta(entry, meta)
+
+    # Versiones anteriores del mismo objeto ya no sirven
+    for name in os.listdir(entry):
+        path = os.path.join(entry, name)
+        if name != etag and os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+
+    return meta
+
+
+def _touch(entry, meta):
+    meta["used"] = time.time()
+    try:
+        _write_meta(entry, meta)
+    except OSError:
+        pass
+
+
+def invalidate(bucket, key):
+    """Borra la entrada de un objeto (p.ej. tras eliminarlo del bucket)."""
+    entry = _entry_dir(bucket, key)
+    with _key_lock(entry):
+        shutil.rmtree(entry, ignore_errors=True)
+
+
+# ============================================================
+# EXPULSIÓN LRU
+# ============================================================
+
+def _dir_size(path):
+    total = 0
+    for root, _dirs, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def evict(max_bytes=None, exclude=()):
+    """
+    Borra las entradas menos usadas hasta quedar bajo max_bytes. Nunca
+    las de exclude ni las usadas en los últimos EVICT_GRACE_SECONDS.
+    """
+    if max_bytes is None:
+        max_bytes = _setting("max_bytes")
+    keep = {os.path.normcase(os.path.abspath(e)) for e in exclude}
+    recent = time.time() - EVICT_GRACE_SECONDS
+
+    base = get_cache_dir()
+    entries = []
+    total = 0
+
+    for name in os.listdir(base):
+        entry = os.path.join(base, name)
+        if not os.path.isdir(entry):
+            continue
+        size = _dir_size(entry)
+        meta = _read_meta(entry) or {}
+        # Sin meta: primera descarga en curso (o cortada) → la fecha de
+        # la carpeta, para que el margen EVICT_GRACE_SECONDS la proteja
+        used = meta.get("used")
+        if used is None:
+            try:
+                used = os.path.getmtime(entry)
+            except OSError:
+                continue
+        entries.append((used, size, entry))
+        total += size
+
+    entries.sort()
+
+    for used, size, entry in entries:
+        if total <= max_bytes:
+            break
+        if used >= recent or os.path.normcase(os.path.abspath(entry)) in keep:
+            continue
+        # No tocar lo que otro hilo está trayendo...
+        key_lock = _key_lock(entry)
+        if not key_lock.acquire(blocking=False):
+            continue
+        try:
+            # ...ni lo que otra instancia está descargando
+            if os.path.exists(os.path.join(entry, LOCK_FILENAME)):
+                continue
+            shutil.rmtree(entry)
+            total -= size
+        except OSError as e:
+            # En Windows un FCStd abierto no se puede borrar
+            FreeCAD.Console.PrintWarning(f"No se pudo expulsar del caché {entry}: {e}\n")
+        finally:
+            key_lock.release()
+
+    return total
@@ -3,8 +3,6 @@
 # Texmex Weavers – FreeCAD Integration
 # ============================================================
 
-import os
-import tempfile
 import FreeCAD
 
 try:
@@ -12,45 +10,52 @@ try:
 except ImportError:
     FreeCADGui = None
 
-from common import Minio, ENDPOINT, ACCESS_KEY, SECRET_KEY, show_popup
+from common import get_client, show_popup, invalidate_listing
+import etag_index
+import journal
+import metrics
+import mirror
+import model_cache
 
 
-def _get_temp_dir():
-    base = os.path.join(tempfile.gettempdir(), "TexmexLibrary")
-    if not os.path.exists(base):
-        os.makedirs(base, exist_ok=True)
-    return base
+def _fetch(bucket, key, progress=None):
+    # Sin servidor → la copia del espejo local (mirror.py)
+    return mirror.fetch(
+        bucket, key, lambda: model_cache.fetch(get_client(), bucket, key, progress=progress)
+    )
 
 
-def download_model_to_temp(bucket, key):
+def download_model_to_temp(bucket, key, progress=None):
     """
-    Descarga el archivo MinIO (key) a un archivo temporal.
+    Ruta local del archivo MinIO (key) desde el caché de modelos.
+    Sólo lectura: no guardar sobre ella (ver checkout_model_to_temp).
     """
-    temp_dir = _get_temp_dir()
-    local_path = os.path.join(temp_dir, os.path.basename(key))
-
-    client = Minio(
-        ENDPOINT,
-        access_key=ACCESS_KEY,
-        secret_key=SECRET_KEY,
-        secure=False
-    )
+    with metrics.span("modelimporter.fetch", bucket, key):
+        return _fetch(bucket, key, progress)
 
-    client.fget_object(bucket, key, local_path)
-    return local_path
 
+def checkout_model_to_temp(bucket, key, progress=None):
+    """
+    Copia de trabajo del modelo (sale del caché; se puede guardar).
+    """
+    with metrics.span("modelimporter.checkout", bucket, key):
+        return model_cache.working_copy(bucket, key, _fetch(bucket, key, progress))
 
-def open_model_as_new(bucket, key):
+
+def open_model_as_new(bucket, key, local_path=None):
+    """
+    Abre el modelo como documento nuevo. Si local_path ya viene descargado
+    (p.ej. desde un hilo de trabajo) no se vuelve a descargar.
+    """
     try:
-        local_path = download_model_to_temp(bucket, key)
+        if not local_path:
+            local_path = checkout_model_to_temp(bucket, key)
         doc = FreeCAD.openDocument(local_path)
 
         # ========================================================
         # EXTRAER ETag real del archivo descargado
         # ========================================================
-        client = Minio(ENDPOINT, access_key=ACCESS_KEY, secret_key=SECRET_KEY, secure=False)
-        stat = client.stat_object(bucket, key)
-        etag = getattr(stat, "etag", "")
+        etag = mirror.current_etag(bucket, key)
 
         # Guardar atributos en el documento
         try:
@@ -71,7 +76,7 @@ def open_model_as_new(bucket, key):
         show_popup("Error", f"No se pudo abrir el modelo:\n{e}")
 
 
-def import_model_into_current(bucket, key):
+def import_model_into_current(bucket, key, local_path=None):
     """
     Importa todos los objetos de un archivo .FCStd al documento actual.
     """
@@ -83,7 +88,8 @@ def import_model_into_current(bucket, key):
             FreeCADGui.SendMsgToActiveView("ViewFit")
 
     try:
-        local_path = download_model_to_temp(bucket, key)
+        if not local_path:
+            local_path = download_model_to_temp(bucket, key)
 
         src_doc = FreeCAD.openDocument(local_path)
 
@@ -100,8 +106,7 @@ def import_model_into_current(bucket, key):
         # Actualizar ETag del documento actual al importar
         # ========================================================
         try:
-            stat = client.stat_object(bucket, key)
-            etag = getattr(stat, "etag", "")
+            etag = mirror.current_etag(bucket, key)
 
             cur_doc.Base_etag = etag
             cur_doc.Base_revision = "1.00"  # o lo que ocupes
@@ -134,13 +139,12 @@ def delete_model_from_bucket(bucket, key):
     Elimina un archivo del bucket. Devuelve True si tuvo éxito.
     """
     try:
-        client = Minio(
-            ENDPOINT,
-            access_key=ACCESS_KEY,
-            secret_key=SECRET_KEY,
-            secure=False
-        )
-        client.remove_object(bucket, key)
+        with metrics.span("modelimporter.delete", bucket, key):
+            get_client().remove_object(bucket, key)
+        journal.record(bucket, journal.DELETE, key)
+        etag_index.forget(bucket, key)
+        invalidate_listing(bucket, key)
+        model_cache.invalidate(bucket, key)
         return True
     except Exception as e:
         FreeCAD.Console.PrintError(f"Error eliminando modelo: {e}\n")
@@ -5,6 +5,9 @@
 
 import os
 import tempfile
+import uuid
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
 import FreeCAD
 
 try:
@@ -12,27 +15,76 @@ try:
 except:
     FreeCADGui = None
 
-from common import Minio, ENDPOINT, ACCESS_KEY, SECRET_KEY
+from common import get_client
+from preview_pool import get_pool, get_thumbnail_paths
+import metrics
+import mirror
+import model_cache
+import remote_zip
 
-
-def _get_temp_dir():
-    base = os.path.join(tempfile.gettempdir(), "TexmexLibrary")
-    os.makedirs(base, exist_ok=True)
-    return base
+# Descargas simultáneas al pre-generar previews de una carpeta
+PREFETCH_THREADS = 4
 
 
 def _download_temp_file(bucket, key):
-    temp_dir = _get_temp_dir()
-    local_path = os.path.join(temp_dir, os.path.basename(key))
+    with metrics.span("modelviewer.fetch", bucket, key):
+        return mirror.fetch(bucket, key, lambda: model_cache.fetch(get_client(), bucket, key))
+
+
+# ============================================================
+# Miniatura embebida (thumbnails/Thumbnail.png) por rangos HTTP
+# ============================================================
+
+def _write_atomic(path, data):
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _local_thumbnail(path):
+    try:
+        with zipfile.ZipFile(path) as z:
+            return z.read(remote_zip.FCSTD_THUMBNAIL)
+    except KeyError:
+        return None
+
+
+def fetch_embedded_thumbnail(bucket, key, etag=None, size=None):
+    """
+    PNG local con la miniatura embebida del FCStd, o None si no tiene.
+    Se guarda por ETag: la segunda vez no hay ninguna petición.
+    etag/size pueden venir del listado para ahorrar el HEAD.
+    """
+    client = get_client()
+
+    if not etag or size is None:
+        stat = client.stat_object(bucket, key)
+        etag = stat.etag
+        size = stat.size
+
+    png_path, none_path = get_thumbnail_paths(etag)
+
+    if os.path.exists(png_path):
+        return png_path
+    if os.path.exists(none_path):
+        return None
+
+    # Con copia en el espejo local (mirror.py) se lee del disco
+    local = mirror.local_path(bucket, key, etag)
+
+    with metrics.span("modelviewer.thumbnail", bucket, key) as span:
+        if local:
+            data = _local_thumbnail(local)
+        else:
+            data = remote_zip.read_fcstd_thumbnail(client, bucket, key, size=size)
+            span.bytes = len(data or b"")
+    if not data:
+        _write_atomic(none_path, b"")
+        return None
 
-    client = Minio(
-        ENDPOINT,
-        access_key=ACCESS_KEY,
-        secret_key=SECRET_KEY,
-        secure=False
-    )
-    client.fget_object(bucket, key, local_path)
-    return local_path
+    _write_atomic(png_path, data)
+    return png_path
 
 
 # ============================================================
@@ -77,11 +129,25 @@ def _open_doc_with_gui(path):
 # Generación de preview
 # ============================================================
 
-def _generate_fcstd_preview(fcstd_path):
-
+def _generate_fcstd_preview(fcstd_path, etag=None):
+    """
+    Render con la GUI de FreeCAD. El PNG va a la caché de miniaturas bajo
+    su ETag, como los del pool (fcstd_path es una entrada de model_cache
+    o del espejo: no se escribe nada a su lado). Sin ETag conocido va a
+    un temporal que no se reutiliza.
+    """
     if not FreeCADGui:
         return None
 
+    if etag:
+        preview_png, _marker = get_thumbnail_paths(etag)
+        if os.path.exists(preview_png):
+            return preview_png
+    else:
+        preview_png = os.path.join(
+            tempfile.gettempdir(), f"texmex_preview_{uuid.uuid4().hex}.png"
+        )
+
     # Guardar estado previo
     old_doc = FreeCAD.ActiveDocument
     old_gui_name = None
@@ -98,15 +164,21 @@ def _generate_fcstd_preview(fcstd_path):
         FreeCAD.Console.PrintError("No se pudo abrir documento para preview.\n")
         return None
 
-    preview_png = os.path.splitext(fcstd_path)[0] + "_preview.png"
+    # saveImage deduce el formato de la extensión → temporal .png
+    tmp_png = f"{preview_png}.{uuid.uuid4().hex}.png"
 
     try:
         view.viewIsometric()
         view.fitAll()
-        view.saveImage(preview_png, 512, 512, "Current")
+        view.saveImage(tmp_png, 512, 512, "Current")
+        os.replace(tmp_png, preview_png)
     except Exception as e:
         FreeCAD.Console.PrintError(f"Error generando preview: {e}\n")
         preview_png = None
+        try:
+            os.remove(tmp_png)
+        except OSError:
+            pass
 
     finally:
         # Cerrar documento temporal
@@ -125,16 +197,86 @@ def _generate_fcstd_preview(fcstd_path):
     return preview_png if (preview_png and os.path.exists(preview_png)) else None
 
 
-def generate_preview_for_object(bucket, key):
-    ext = os.path.splitext(key)[1].lower()
+def fetch_preview_source(bucket, key, etag=None, size=None):
+    """
+    Parte de red del preview (segura en un hilo de trabajo).
+    Devuelve un PNG (miniatura embebida o render headless) o, si no hay
+    FreeCADCmd disponible, la ruta local del FCStd para render_preview.
+    None si falla.
+    """
+    if os.path.splitext(key)[1].lower() != ".fcstd":
+        return None
+
+    try:
+        if not etag or size is None:
+            stat = get_client().stat_object(bucket, key)
+            etag, size = stat.etag, stat.size
+    except Exception as e:
+        FreeCAD.Console.PrintError(f"No se pudo consultar {key}: {e}\n")
+        return None
+
+    # 1) Miniatura embebida (o render previo): unos KB, sin abrir documento
+    try:
+        png = fetch_embedded_thumbnail(bucket, key, etag=etag, size=size)
+        if png:
+            return png
+    except Exception as e:
+        FreeCAD.Console.PrintWarning(f"Sin miniatura embebida ({key}): {e}\n")
 
+    # 2) Respaldo: descargar el modelo para renderizarlo
     try:
         local_path = _download_temp_file(bucket, key)
     except Exception as e:
         FreeCAD.Console.PrintError(f"No se pudo descargar: {e}\n")
         return None
 
-    if ext == ".fcstd":
-        return _generate_fcstd_preview(local_path)
+    # 3) Render en proceso FreeCADCmd aparte (no toca la sesión del usuario)
+    pool = get_pool()
+    if pool is None:
+        return local_path
 
-    return None
+    try:
+        return pool.submit(local_path, etag).result()
+    except Exception as e:
+        FreeCAD.Console.PrintError(f"Error generando preview de {key}: {e}\n")
+        return None
+
+
+def prefetch_thumbnails(bucket, entries, progress=None):
+    """
+    Genera en paralelo las miniaturas de una carpeta (entries = archivos
+    de list_prefix). Pensado para un hilo de trabajo.
+    progress(hechos, total) se llama tras cada archivo.
+    Devuelve cuántas miniaturas quedaron disponibles.
+    """
+    entries = [e for e in entries if e["name"].lower().endswith(".fcstd")]
+    total = len(entries)
+    done = ok = 0
+
+    with ThreadPoolExecutor(max_workers=PREFETCH_THREADS) as ex:
+        futures = [
+            ex.submit(fetch_preview_source, bucket, e["key"], e.get("etag"), e.get("size"))
+            for e in entries
+        ]
+        for future in futures:
+            result = future.result()
+            done += 1
+            if result and result.lower().endswith(".png"):
+                ok += 1
+            if progress:
+                progress(done, total)
+
+    return ok
+
+
+def render_preview(local_path, etag=None):
+    """
+    Parte GUI del preview: SIEMPRE en el hilo principal de Qt.
+    Si local_path ya es un PNG (miniatura) no hay nada que renderizar.
+    etag (del listado) decide dónde queda el PNG en la caché de miniaturas.
+    """
+    if not local_path:
+        return None
+    if local_path.lower().endswith(".png"):
+        return local_path
+    return _generate_fcstd_preview(local_path, etag)
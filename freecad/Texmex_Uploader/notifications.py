@@ -0,0 +1,318 @@
+# ============================================================
+# notifications.py → Cambios en vivo del servidor (MinIO)
+# Texmex Weavers – FreeCAD Integration
+# ============================================================
+#
+# Un hilo por bucket (BUCKET_MODEL, BUCKET_SVG) escucha
+# listen_bucket_notification (extensión de MinIO: una petición larga
+# que va devolviendo eventos). Los eventos se agrupan en lotes
+# (BATCH_WINDOW sin actividad o BATCH_MAX_DELAY como máximo) y cada lote:
+#
+#   • invalida el caché de listados y actualiza los índices locales
+#     (etag_index, revision_index) y el caché de modelos;
+#   • se entrega a los oyentes registrados (la librería lo usa para
+#     volver a listar sólo las carpetas afectadas).
+#
+# Si la conexión se cae se reintenta con espera creciente. Si el
+# servidor no soporta la API (S3 de Amazon...) se desiste sin más.
+# Se desactiva con <live_updates>0</live_updates> en config.xml.
+
+import queue
+import threading
+import time
+from urllib.parse import unquote_plus
+
+try:
+    import FreeCAD
+except ImportError:
+    import headless as FreeCAD
+
+from config_storage import add_config_listener
+import storage
+import metrics
+from journal import JOURNAL_PREFIX
+
+EVENTS = ("s3:ObjectCreated:*", "s3:ObjectRemoved:*")
+
+# Segundos sin eventos que cierran un lote / máximo que espera un lote
+BATCH_WINDOW = 0.5
+BATCH_MAX_DELAY = 3.0
+
+# Espera entre reconexiones (crece hasta RECONNECT_MAX)
+RECONNECT_MIN = 1.0
+RECONNECT_MAX = 60.0
+
+# MinIO manda un espacio cada pocos segundos; sin nada en este tiempo
+# la conexión se da por muerta y se reconecta
+LISTEN_READ_TIMEOUT = 120
+
+# Códigos de error que indican que el servidor no tiene la API
+UNSUPPORTED_CODES = {"NotImplemented", "MethodNotAllowed", "XNotImplemented"}
+
+CREATED = "put"
+REMOVED = "delete"
+
+_lock = threading.Lock()
+_listeners = []
+_listener = None
+
+
+# ============================================================
+# EVENTOS
+# ============================================================
+
+def parse_event(event):
+    """Registros de un evento MinIO → [{bucket, key, event, etag, size, metadata}]."""
+    changes = []
+    for rec in event.get("Records") or []:
+        name = rec.get("eventName", "")
+        s3 = rec.get("s3") or {}
+        obj = s3.get("object") or {}
+        key = unquote_plus(obj.get("key", ""))
+        if not key or key.startswith(JOURNAL_PREFIX):
+            continue
+        changes.append({
+            "bucket": (s3.get("bucket") or {}).get("name", ""),
+            "key": key,
+            "event": REMOVED if "ObjectRemoved" in name else CREATED,
+            "etag": (obj.get("eTag") or "").strip('"'),
+            "size": obj.get("size"),
+            "metadata": obj.get("userMetadata") or {},
+        })
+    return changes
+
+
+def apply_changes(changes):
+    """Invalida cachés e índices locales para un lote de cambios."""
+    import etag_index
+    import model_cache
+    import revision_index
+
+    for change in changes:
+        bucket, key = change["bucket"], change["key"]
+        storage.invalidate_listing(bucket, key)
+
+        try:
+            model_cache.invalidate(bucket, key)
+
+            if change["event"] == REMOVED:
+                etag_index.forget(bucket, key)
+                if bucket == storage.BUCKET_SVG:
+                    revision_index.forget(bucket, key)
+                continue
+
+            if change["etag"]:
+                etag_index.record(bucket, key, change["etag"], change["size"])
+            if bucket == storage.BUCKET_SVG:
+                revision = None
+                for name, value in change["metadata"].items():
+                    if name.lower() == revision_index.REVISION_META:
+                        revision = value
+                revision_index.record(bucket, key, revision)
+
+        except Exception as e:
+            FreeCAD.Console.PrintError(f"Error aplicando cambio remoto {key}: {e}\n")
+
+
+# ============================================================
+# OYENTES
+# ============================================================
+
+def add_listener(callback):
+    """Registra callback(changes) que se llama (desde un hilo) por lote."""
+    with _lock:
+        if callback not in _listeners:
+            _listeners.append(callback)
+
+
+def remove_listener(callback):
+    with _lock:
+        if callback in _listeners:
+            _listeners.remove(callback)
+
+
+def dispatch(changes):
+    """Aplica un lote (de aquí o de journal.sync) y avisa a los oyentes."""
+    apply_changes(changes)
+    with _lock:
+        callbacks = list(_listeners)
+    for callback in callbacks:
+        try:
+            callback(changes)
+        except Exception as e:
+            FreeCAD.Console.PrintError(f"Error en oyente de cambios: {e}\n")
+
+
+# ============================================================
+# ESCUCHA
+# ============================================================
+
+def _build_client():
+    """Cliente propio: la petición larga no ocupa el pool compartido."""
+    import urllib3
+
+    Minio = storage.ensure_minio()
+    if Minio is None:
+        raise RuntimeError("La librería minio no está instalada.")
+
+    return metrics.instrument(Minio(
+        storage.ENDPOINT,
+        access_key=storage.ACCESS_KEY,
+        secret_key=storage.SECRET_KEY,
+        secure=False,
+        http_client=urllib3.PoolManager(
+            timeout=urllib3.Timeout(connect=storage.CONNECT_TIMEOUT, read=LISTEN_READ_TIMEOUT),
+            maxsize=len(EVENTS),
+            retries=False,
+        ),
+    ))
+
+
+class NotificationListener:
+    """Hilos de escucha (uno por bucket) + hilo que agrupa y entrega lotes."""
+
+    def __init__(self, buckets, dispatch=dispatch):
+        self.buckets = [b for b in dict.fromkeys(buckets) if b]
+        self.dispatch = dispatch
+        self.stop_event = threading.Event()
+        self.events = queue.Queue()
+        self.connected = set()
+        self._streams = {}
+        self._threads = []
+
+    def start(self):
+        client = _build_client()
+        for bucket in self.buckets:
+            thread = threading.Thread(target=self._listen, args=(client, bucket),
+                                      name=f"TexmexListen-{bucket}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+        thread = threading.Thread(target=self._batch_loop, name="TexmexListenBatch", daemon=True)
+        thread.start()
+        self._threads.append(thread)
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+        # Cerrar las respuestas desbloquea readline() en los hilos de escucha
+        for stream in list(self._streams.values()):
+            try:
+                stream._close_response()
+            except Exception:
+                pass
+        self.events.put(None)
+
+    # ----------------------------------------------------------
+    def _listen(self, client, bucket):
+        delay = RECONNECT_MIN
+
+        while not self.stop_event.is_set():
+            try:
+                stream = client.listen_bucket_notification(bucket, events=EVENTS)
+                self._streams[bucket] = stream
+                with stream:
+                    for event in stream:
+                        if self.stop_event.is_set():
+                            return
+                        if bucket not in self.connected:
+                            self.connected.add(bucket)
+                        delay = RECONNECT_MIN
+                        for change in parse_event(event):
+                            self.events.put(change)
+
+            except Exception as e:
+                if self.stop_event.is_set():
+                    return
+                if getattr(e, "code", None) in UNSUPPORTED_CODES or isinstance(e, ValueError):
+                    FreeCAD.Console.PrintWarning(
+                        f"El servidor no envía notificaciones de {bucket}: {e}\n"
+                    )
+                    return
+                if bucket in self.connected:
+                    self.connected.discard(bucket)
+                    FreeCAD.Console.PrintWarning(
+                        f"Notificaciones de {bucket} interrumpidas, reconectando: {e}\n"
+                    )
+
+            # Reconexión con espera creciente
+            if self.stop_event.wait(delay):
+                return
+            delay = min(RECONNECT_MAX, delay * 2)
+
+    def _batch_loop(self):
+        while not self.stop_event.is_set():
+            first = self.events.get()
+            if first is None:
+                return
+
+            batch = {(first["bucket"], first["key"]): first}
+            deadline = time.monotonic() + BATCH_MAX_DELAY
+
+            while True:
+                timeout = min(BATCH_WINDOW, deadline - time.monotonic())
+                if timeout <= 0:
+                    break
+                try:
+                    change = self.events.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if change is None:
+                    return
+                # El último evento de cada objeto es el que vale
+                batch[(change["bucket"], change["key"])] = change
+
+            try:
+                self.dispatch(list(batch.values()))
+            except Exception as e:
+                FreeCAD.Console.PrintError(f"Error procesando notificaciones: {e}\n")
+
+
+# ============================================================
+# ARRANQUE / PARADA
+# ============================================================
+
+def enabled(cfg=None):
+    cfg = storage.cfg if cfg is None else cfg
+    return storage._int_cfg(cfg, "LIVE_UPDATES", 1) != 0 and bool(cfg.get("ENDPOINT"))
+
+
+def start():
+    """Arranca la escucha de BUCKET_MODEL y BUCKET_SVG si está activada."""
+    global _listener
+
+    with _lock:
+        if _listener is not None:
+            return _listener
+        if not enabled():
+            return None
+        try:
+            _listener = NotificationListener([storage.BUCKET_MODEL, storage.BUCKET_SVG]).start()
+        except Exception as e:
+            FreeCAD.Console.PrintError(f"No se pudo iniciar la escucha de cambios: {e}\n")
+            return None
+        return _listener
+
+
+def stop():
+    global _listener
+
+    with _lock:
+        listener, _listener = _listener, None
+    if listener is not None:
+        listener.stop()
+
+
+def running():
+    return _listener is not None
+
+
+def _restart(new_cfg=None):
+    # Otro servidor/buckets → escuchar de nuevo con la config nueva
+    if _listener is None:
+        return
+    stop()
+    start()
+
+
+add_config_listener(_restart)
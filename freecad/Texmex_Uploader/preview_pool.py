@@ -0,0 +1,275 @@
+# ============================================================
+# preview_pool.py → Pool de procesos FreeCADCmd para previews
+# Texmex Weavers – FreeCAD Integration
+# ============================================================
+#
+# Cuando un FCStd no trae miniatura embebida, el preview se renderiza
+# en procesos FreeCADCmd separados (preview_worker.py) en lugar de
+# abrir el documento en la sesión del usuario:
+#   - cola de trabajos compartida y N procesos persistentes
+#   - timeout por trabajo: el proceso colgado se mata y se reemplaza
+#   - un proceso que muere sólo falla SU trabajo
+#   - resultados en caché persistente por ETag (get_thumbnail_paths)
+
+import json
+import os
+import queue
+import subprocess
+import sys
+import threading
+from concurrent.futures import Future
+
+import FreeCAD
+
+from config_storage import get_data_dir, load_minio_config, add_config_listener
+from preview_worker import RESPONSE_MARK
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "preview_worker.py")
+
+# Reiniciar el proceso cada N trabajos (fugas de memoria de OCC/Coin)
+MAX_JOBS_PER_WORKER = 50
+
+# Segundos para que FreeCADCmd arranque y diga "ready"
+STARTUP_TIMEOUT = 60
+
+PREVIEW_SIZE = 512
+
+
+# ============================================================
+# CACHÉ DE MINIATURAS (por ETag)
+# ============================================================
+
+def get_thumbnail_paths(etag):
+    """
+    (png, marcador) de la miniatura de un ETag.
+    El marcador indica que el FCStd no trae miniatura embebida.
+    """
+    base = get_data_dir("thumbnails")
+    etag = (etag or "").strip('"')
+    return os.path.join(base, f"{etag}.png"), os.path.join(base, f"{etag}.none")
+
+
+# ============================================================
+# LOCALIZAR FreeCADCmd
+# ============================================================
+
+def find_freecadcmd():
+    """Ruta del ejecutable headless de FreeCAD, o None."""
+    try:
+        home = FreeCAD.getHomePath()
+    except Exception:
+        home = os.path.dirname(os.path.dirname(sys.executable))
+
+    names = ("FreeCADCmd.exe", "freecadcmd.exe") if os.name == "nt" \
+        else ("FreeCADCmd", "freecadcmd")
+
+    for folder in (os.path.join(home, "bin"), home, os.path.dirname(sys.executable)):
+        for name in names:
+            path = os.path.join(folder, name)
+            if os.path.isfile(path):
+                return path
+    return None
+
+
+# ============================================================
+# PROCESO TRABAJADOR
+# ============================================================
+
+class _WorkerProcess:
+    """Un FreeCADCmd vivo + hilo lector de su stdout."""
+
+    def __init__(self, exe):
+        flags = getattr(subprocess, "CREATE_NO_WINDOW", 0)
+        self.proc = subprocess.Popen(
+            [exe, WORKER_SCRIPT],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            encoding="utf-8",
+            bufsize=1,
+            creationflags=flags,
+        )
+        self.replies = queue.Queue()
+        self.jobs_done = 0
+
+        reader = threading.Thread(target=self._read_stdout, daemon=True)
+        reader.start()
+
+        ready = self._wait_reply(STARTUP_TIMEOUT)
+        if not ready or not ready.get("ready"):
+            self.kill()
+            raise RuntimeError("FreeCADCmd no arrancó el worker de previews")
+
+    def _read_stdout(self):
+        for line in self.proc.stdout:
+            if line.startswith(RESPONSE_MARK):
+                try:
+                    self.replies.put(json.loads(line[len(RESPONSE_MARK):]))
+                except ValueError:
+                    pass
+        # EOF → proceso terminado
+        self.replies.put({"exited": True})
+
+    def _wait_reply(self, timeout):
+        try:
+            return self.replies.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def run(self, job_id, fcstd, png, timeout):
+        self.proc.stdin.write(json.dumps({
+            "id": job_id, "fcstd": fcstd, "png": png, "size": PREVIEW_SIZE
+        }) + "\n")
+        self.proc.stdin.flush()
+
+        while True:
+            reply = self._wait_reply(timeout)
+            if reply is None:
+                raise TimeoutError("El worker de previews no respondió")
+            if reply.get("exited"):
+                raise RuntimeError("El worker de previews terminó inesperadamente")
+            if reply.get("id") == job_id:
+                self.jobs_done += 1
+                return reply
+
+    def alive(self):
+        return self.proc.poll() is None
+
+    def kill(self):
+        try:
+            self.proc.kill()
+            self.proc.wait(timeout=5)
+        except Exception:
+            pass
+
+
+# ============================================================
+# POOL
+# ============================================================
+
+class PreviewPool:
+
+    def __init__(self, exe, workers=2, timeout=120):
+        self.exe = exe
+        self.timeout = timeout
+        self.jobs = queue.Queue()
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self._threads = []
+
+        for _ in range(max(1, workers)):
+            t = threading.Thread(target=self._loop, daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def submit(self, fcstd, etag):
+        """
+        Encola el render de fcstd. Devuelve un Future con la ruta PNG.
+        Trabajos repetidos del mismo ETag comparten el mismo Future.
+        """
+        png, _marker = get_thumbnail_paths(etag)
+
+        with self._lock:
+            if etag in self._pending:
+                return self._pending[etag]
+
+            future = Future()
+            if os.path.exists(png):
+                future.set_result(png)
+                return future
+
+            self._next_id += 1
+            self._pending[etag] = future
+            self.jobs.put((self._next_id, fcstd, png, etag, future))
+            return future
+
+    def shutdown(self):
+        for _ in self._threads:
+            self.jobs.put(None)
+
+    def _loop(self):
+        worker = None
+
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                break
+
+            job_id, fcstd, png, etag, future = job
+            try:
+                if worker is None or not worker.alive() or \
+                        worker.jobs_done >= MAX_JOBS_PER_WORKER:
+                    if worker is not None:
+                        worker.kill()
+                    worker = _WorkerProcess(self.exe)
+
+                reply = worker.run(job_id, fcstd, png, self.timeout)
+                if reply.get("ok") and os.path.exists(png):
+                    future.set_result(png)
+                else:
+                    future.set_exception(RuntimeError(reply.get("error", "sin imagen")))
+
+            except Exception as e:
+                # Timeout o caída: el proceso se descarta, el pool sigue
+                if worker is not None:
+                    worker.kill()
+                    worker = None
+                future.set_exception(e)
+
+            finally:
+                with self._lock:
+                    self._pending.pop(etag, None)
+
+        if worker is not None:
+            worker.kill()
+
+
+# ============================================================
+# INSTANCIA COMPARTIDA
+# ============================================================
+
+_pool = None
+_pool_lock = threading.Lock()
+_pool_disabled = False
+
+
+def get_pool():
+    """Pool compartido, o None si no hay FreeCADCmd disponible."""
+    global _pool, _pool_disabled
+
+    with _pool_lock:
+        if _pool is not None or _pool_disabled:
+            return _pool
+
+        exe = find_freecadcmd()
+        if not exe:
+            FreeCAD.Console.PrintWarning(
+                "FreeCADCmd no encontrado: previews se renderizan en la sesión.\n"
+            )
+            _pool_disabled = True
+            return None
+
+        cfg = load_minio_config()
+        try:
+            workers = int(cfg.get("PREVIEW_WORKERS", 2))
+            timeout = float(cfg.get("PREVIEW_TIMEOUT", 120))
+        except (TypeError, ValueError):
+            workers, timeout = 2, 120
+
+        _pool = PreviewPool(exe, workers=workers, timeout=timeout)
+        return _pool
+
+
+def _reset_pool(_cfg=None):
+    global _pool, _pool_disabled
+
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+        _pool = None
+        _pool_disabled = False
+
+
+add_config_listener(_reset_pool)
@@ -0,0 +1,157 @@
+# ============================================================
+# preview_worker.py → Proceso headless de renderizado de previews
+# Texmex Weavers – FreeCAD Integration
+# ============================================================
+#
+# Se ejecuta DENTRO de FreeCADCmd (sin GUI), lanzado por preview_pool.
+# Protocolo por stdin/stdout, una línea JSON por trabajo:
+#
+#   → {"id": 1, "fcstd": "...", "png": "...", "size": 512}
+#   ← @@TEXMEX@@ {"id": 1, "ok": true}
+#
+# Las respuestas llevan el prefijo RESPONSE_MARK porque FreeCAD también
+# escribe mensajes propios en stdout.
+
+import json
+import os
+import struct
+import sys
+import zlib
+
+import FreeCAD
+
+RESPONSE_MARK = "@@TEXMEX@@ "
+
+# Orientación isométrica (misma que View3DInventor::viewIsometric)
+ISOMETRIC = (0.424708, 0.17592, 0.339851, 0.820473)
+
+TESSELLATION = 0.5
+
+
+def _write_png(path, width, height, rgb):
+    """PNG RGB sin dependencias. Coin entrega filas de abajo hacia arriba."""
+    stride = width * 3
+    raw = b"".join(
+        b"\x00" + rgb[y * stride:(y + 1) * stride]
+        for y in reversed(range(height))
+    )
+
+    def chunk(tag, data):
+        return (struct.pack(">I", len(data)) + tag + data +
+                struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF))
+
+    png = (b"\x89PNG\r\n\x1a\n" +
+           chunk(b"IHDR", struct.pack(">2I5B", width, height, 8, 2, 0, 0, 0)) +
+           chunk(b"IDAT", zlib.compress(raw, 6)) +
+           chunk(b"IEND", b""))
+
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(png)
+    os.replace(tmp, path)
+
+
+def _visible_shapes(doc):
+    for obj in doc.Objects:
+        shape = getattr(obj, "Shape", None)
+        if shape is None or shape.isNull():
+            continue
+        if not getattr(obj, "Visibility", True):
+            continue
+        yield shape
+
+
+def _build_scene(doc):
+    from pivy import coin
+
+    root = coin.SoSeparator()
+
+    camera = coin.SoOrthographicCamera()
+    camera.orientation.setValue(coin.SbRotation(*ISOMETRIC))
+    root.addChild(camera)
+
+    light = coin.SoDirectionalLight()
+    light.direction.setValue(coin.SbVec3f(-1, -1, -1))
+    root.addChild(light)
+
+    hints = coin.SoShapeHints()
+    hints.vertexOrdering = coin.SoShapeHints.COUNTERCLOCKWISE
+    root.addChild(hints)
+
+    material = coin.SoMaterial()
+    material.diffuseColor.setValue(0.8, 0.8, 0.8)
+    root.addChild(material)
+
+    count = 0
+    for shape in _visible_shapes(doc):
+        points, triangles = shape.tessellate(TESSELLATION)
+        if not triangles:
+            continue
+
+        sep = coin.SoSeparator()
+        coords = coin.SoCoordinate3()
+        coords.point.setValues(0, len(points), [[p.x, p.y, p.z] for p in points])
+        sep.addChild(coords)
+
+        index = []
+        for a, b, c in triangles:
+            index.extend((a, b, c, -1))
+        faces = coin.SoIndexedFaceSet()
+        faces.coordIndex.setValues(0, len(index), index)
+        sep.addChild(faces)
+
+        root.addChild(sep)
+        count += 1
+
+    return root, camera, count
+
+
+def render(fcstd, png, size=512):
+    from pivy import coin
+
+    doc = FreeCAD.openDocument(fcstd)
+    try:
+        root, camera, count = _build_scene(doc)
+        if not count:
+            raise RuntimeError("El documento no tiene geometría visible")
+
+        viewport = coin.SbViewportRegion(size, size)
+        camera.viewAll(root, viewport)
+
+        renderer = coin.SoOffscreenRenderer(viewport)
+        renderer.setBackgroundColor(coin.SbColor(1.0, 1.0, 1.0))
+        if not renderer.render(root):
+            raise RuntimeError("SoOffscreenRenderer falló")
+
+        _write_png(png, size, size, renderer.getBuffer())
+    finally:
+        FreeCAD.closeDocument(doc.Name)
+
+
+def _reply(payload):
+    sys.stdout.write(RESPONSE_MARK + json.dumps(payload) + "\n")
+    sys.stdout.flush()
+
+
+def main():
+    _reply({"ready": True})
+
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+
+        try:
+            job = json.loads(line)
+        except ValueError:
+            continue
+
+        try:
+            render(job["fcstd"], job["png"], int(job.get("size", 512)))
+            _reply({"id": job.get("id"), "ok": True})
+        except Exception as e:
+            _reply({"id": job.get("id"), "ok": False, "error": str(e)})
+
+
+if __name__ == "__main__":
+    main()
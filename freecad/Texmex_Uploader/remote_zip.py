@@ -0,0 +1,225 @@
+# ============================================================
+# remote_zip.py → Lectura de miembros de un ZIP remoto (FCStd)
+# Texmex Weavers – FreeCAD Integration
+# ============================================================
+#
+# Un FCStd es un ZIP. Para leer un solo miembro (p.ej. la miniatura
+# thumbnails/Thumbnail.png) basta con:
+#   1) GET por rango de la cola → End Of Central Directory
+#   2) GET por rango del directorio central (si no vino en la cola)
+#   3) GET por rango de la cabecera local + datos del miembro
+# Unos pocos KB en vez de descargar el archivo completo.
+
+import struct
+import zlib
+
+FCSTD_THUMBNAIL = "thumbnails/Thumbnail.png"
+
+# Primer intento de cola (suele incluir EOCD + directorio central);
+# si no alcanza se pide el máximo: EOCD (22) + comentario (65535)
+_TAIL_GUESS = 16 * 1024
+_TAIL_SIZE = 22 + 65535
+
+# Bytes extra al leer cabecera local (nombre/extra locales pueden
+# diferir del directorio central)
+_LOCAL_SLACK = 1024
+
+_EOCD_SIG = b"PK\x05\x06"
+_ZIP64_LOCATOR_SIG = b"PK\x06\x07"
+_ZIP64_EOCD_SIG = b"PK\x06\x06"
+_CENTRAL_SIG = b"PK\x01\x02"
+_LOCAL_SIG = b"PK\x03\x04"
+
+
+class RemoteZipError(Exception):
+    pass
+
+
+class RemoteZip:
+    """
+    Acceso de sólo lectura a un ZIP guardado en S3 mediante rangos.
+    size se puede pasar (p.ej. desde el listado) para evitar el HEAD.
+    """
+
+    def __init__(self, client, bucket, key, size=None):
+        self.client = client
+        self.bucket = bucket
+        self.key = key
+
+        if size is None:
+            size = client.stat_object(bucket, key).size
+        self.size = int(size)
+
+        self._entries = None
+        self._tail = b""
+        self._tail_offset = self.size
+
+    # ----------------------------------------------------------
+    # Rango HTTP
+    # ----------------------------------------------------------
+    def _read(self, offset, length):
+        # Lo que ya tenemos de la cola no se vuelve a pedir
+        if offset >= self._tail_offset and offset + length <= self.size:
+            start = offset - self._tail_offset
+            return self._tail[start:start + length]
+
+        response = self.client.get_object(self.bucket, self.key, offset=offset, length=length)
+        try:
+            return response.read()
+        finally:
+            response.close()
+            response.release_conn()
+
+    # ----------------------------------------------------------
+    # Directorio central
+    # ----------------------------------------------------------
+    def _load_directory(self):
+        if self._entries is not None:
+            return
+
+        for guess in (_TAIL_GUESS, _TAIL_SIZE):
+            tail_len = min(self.size, guess)
+            tail_offset = self.size - tail_len
+            self._tail = self._read(tail_offset, tail_len)
+            self._tail_offset = tail_offset
+
+            pos = self._tail.rfind(_EOCD_SIG)
+            if pos >= 0 and len(self._tail) - pos >= 22:
+                break
+            if tail_len == self.size:
+                pos = -1
+                break
+
+        if pos < 0:
+            raise RemoteZipError("No es un ZIP (sin EOCD)")
+
+        (_sig, _disk, _cd_disk, _n_disk, total, cd_size, cd_offset,
+         _clen) = struct.unpack("<4s4H2IH", self._tail[pos:pos + 22])
+
+        # ZIP64 (archivos > 4 GB o > 65535 miembros)
+        if cd_offset == 0xFFFFFFFF or cd_size == 0xFFFFFFFF or total == 0xFFFF:
+            loc = pos - 20
+            if loc < 0 or self._tail[loc:loc + 4] != _ZIP64_LOCATOR_SIG:
+                raise RemoteZipError("ZIP64 sin localizador")
+            (eocd64_offset,) = struct.unpack("<Q", self._tail[loc + 8:loc + 16])
+            eocd64 = self._read(eocd64_offset, 56)
+            if eocd64[:4] != _ZIP64_EOCD_SIG:
+                raise RemoteZipError("ZIP64 EOCD inválido")
+            total, cd_size, cd_offset = struct.unpack("<3Q", eocd64[32:56])
+
+        directory = self._read(cd_offset, cd_size)
+        self._entries = self._parse_directory(directory, total)
+
+    @staticmethod
+    def _parse_directory(data, total):
+        entries = {}
+        pos = 0
+
+        for _ in range(total):
+            if data[pos:pos + 4] != _CENTRAL_SIG:
+                raise RemoteZipError("Directorio central corrupto")
+
+            (_sig, _vmade, _vneed, flags, method, _mtime, _mdate, crc,
+             csize, usize, nlen, elen, clen, _disk, _iattr, _eattr,
+             local_offset) = struct.unpack("<4s6H3I5H2I", data[pos:pos + 46])
+
+            name_raw = data[pos + 46:pos + 46 + nlen]
+            extra = data[pos + 46 + nlen:pos + 46 + nlen + elen]
+            name = name_raw.decode("utf-8" if flags & 0x800 else "cp437")
+
+            # Campos ZIP64 en el extra (id 0x0001)
+            if 0xFFFFFFFF in (csize, usize, local_offset):
+                usize, csize, local_offset = _zip64_extra(extra, usize, csize, local_offset)
+
+            entries[name] = {
+                "method": method,
+                "flags": flags,
+                "crc": crc,
+                "csize": csize,
+                "usize": usize,
+                "offset": local_offset,
+            }
+            pos += 46 + nlen + elen + clen
+
+        return entries
+
+    # ----------------------------------------------------------
+    # API
+    # ----------------------------------------------------------
+    def namelist(self):
+        self._load_directory()
+        return list(self._entries)
+
+    def find(self, name):
+        """Nombre real del miembro (búsqueda sin distinguir mayúsculas)."""
+        self._load_directory()
+        if name in self._entries:
+            return name
+        lower = name.lower()
+        for candidate in self._entries:
+            if candidate.lower() == lower:
+                return candidate
+        return None
+
+    def read(self, name):
+        """Contenido descomprimido de un miembro."""
+        real = self.find(name)
+        if real is None:
+            raise KeyError(name)
+
+        info = self._entries[real]
+        if info["flags"] & 0x1:
+            raise RemoteZipError("Miembro cifrado")
+
+        want = 30 + len(real.encode("utf-8")) + _LOCAL_SLACK + info["csize"]
+        want = min(want, self.size - info["offset"])
+        blob = self._read(info["offset"], want)
+
+        if blob[:4] != _LOCAL_SIG:
+            raise RemoteZipError("Cabecera local inválida")
+
+        nlen, elen = struct.unpack("<2H", blob[26:30])
+        start = 30 + nlen + elen
+        data = blob[start:start + info["csize"]]
+        if len(data) < info["csize"]:
+            data += self._read(info["offset"] + len(blob), info["csize"] - len(data))
+
+        if info["method"] == 0:
+            out = data
+        elif info["method"] == 8:
+            out = zlib.decompressobj(-15).decompress(data)
+        else:
+            raise RemoteZipError(f"Compresión no soportada: {info['method']}")
+
+        if zlib.crc32(out) & 0xFFFFFFFF != info["crc"]:
+            raise RemoteZipError("CRC incorrecto")
+
+        return out
+
+
+def _zip64_extra(extra, usize, csize, local_offset):
+    pos = 0
+    while pos + 4 <= len(extra):
+        header_id, size = struct.unpack("<2H", extra[pos:pos + 4])
+        if header_id == 0x0001:
+            field = extra[pos + 4:pos + 4 + size]
+            idx = 0
+            if usize == 0xFFFFFFFF:
+                (usize,) = struct.unpack("<Q", field[idx:idx + 8])
+                idx += 8
+            if csize == 0xFFFFFFFF:
+                (csize,) = struct.unpack("<Q", field[idx:idx + 8])
+                idx += 8
+            if local_offset == 0xFFFFFFFF:
+                (local_offset,) = struct.unpack("<Q", field[idx:idx + 8])
+            break
+        pos += 4 + size
+    return usize, csize, local_offset
+
+
+def read_fcstd_thumbnail(client, bucket, key, size=None):
+    """PNG embebido en el FCStd remoto, o None si no tiene miniatura."""
+    rz = RemoteZip(client, bucket, key, size=size)
+    if rz.find(FCSTD_THUMBNAIL) is None:
+        return None
+    return rz.read(FCSTD_THUMBNAIL)
@@ -0,0 +1,272 @@
+# ============================================================
+# revision_index.py → Índice nombre → revisiones de planos (SQLite)
+# Texmex Weavers – FreeCAD Integration
+# ============================================================
+#
+# Sustituye el recorrido completo de BUCKET_SVG (+ un HEAD por cada
+# coincidencia) al proponer la revisión de un plano:
+# - se construye UNA vez con un listado que incluye metadatos de
+#   usuario (MinIO los devuelve con include_user_meta)
+# - cada subida registra su revisión (record)
+# - se vuelve a listar sólo si el índice tiene más de REBUILD_INTERVAL
+#   (subidas hechas desde otras PCs)
+# Si el servidor no devuelve metadatos en el listado, la revisión se
+# pide con HEAD sólo para los objetos del nombre consultado, una vez.
+#
+# Desde la GUI (wait=False) no se espera a reconstruir un índice caducado:
+# se reconstruye en un hilo y se responde con el que hay. Un bucket cuyo
+# índice nunca se construyó sí espera (si no, se ignorarían las revisiones
+# del servidor), igual que los pocos HEAD del nombre consultado.
+
+import os
+import sqlite3
+import threading
+import time
+
+try:
+    import FreeCAD
+except ImportError:
+    import headless as FreeCAD
+
+from config_storage import get_data_dir
+
+INDEX_FILENAME = "revision_index.sqlite"
+
+REVISION_META = "x-amz-meta-revision"
+
+# Filas por transacción durante la construcción
+SCAN_BATCH = 1000
+
+# Segundos tras los que el índice se reconstruye desde el servidor
+REBUILD_INTERVAL = 6 * 3600
+
+_lock = threading.RLock()
+_conn = None
+_busy = set()   # buckets con una reconstrucción en segundo plano
+
+
+def drawing_name(key):
+    """Nombre del plano: basename sin extensión .svg."""
+    name = os.path.basename(key or "")
+    if name.lower().endswith(".svg"):
+        name = name[:-4]
+    return name
+
+
+def _parse_revision(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _connect():
+    global _conn
+
+    with _lock:
+        if _conn is not None:
+            return _conn
+
+        conn = sqlite3.connect(os.path.join(get_data_dir(), INDEX_FILENAME),
+                               timeout=10, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS drawings ("
+            " bucket TEXT NOT NULL,"
+            " key TEXT NOT NULL,"
+            " name TEXT NOT NULL,"
+            " revision REAL,"
+            " scan INTEGER NOT NULL DEFAULT 0,"
+            " PRIMARY KEY (bucket, key))"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS drawings_name ON drawings (bucket, name)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS scans ("
+            " bucket TEXT PRIMARY KEY,"
+            " generation INTEGER NOT NULL,"
+            " finished REAL)"
+        )
+        conn.commit()
+
+        _conn = conn
+        return _conn
+
+
+# ============================================================
+# ESCRITURA
+# ============================================================
+
+def record(bucket, key, revision):
+    """Registra la revisión de un plano recién subido."""
+    with _lock:
+        conn = _connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO drawings (bucket, key, name, revision, scan) "
+            "VALUES (?, ?, ?, ?, COALESCE("
+            " (SELECT generation FROM scans WHERE bucket = ?), 0))",
+            (bucket, key, drawing_name(key), _parse_revision(revision), bucket)
+        )
+        conn.commit()
+
+
+def forget(bucket, key):
+    with _lock:
+        conn = _connect()
+        conn.execute("DELETE FROM drawings WHERE bucket = ? AND key = ?", (bucket, key))
+        conn.commit()
+
+
+def build(client, bucket):
+    """
+    Lista el bucket completo (con metadatos) y reemplaza el índice.
+    Devuelve el número de objetos vistos.
+    """
+    with _lock:
+        conn = _connect()
+        row = conn.execute(
+            "SELECT generation FROM scans WHERE bucket = ?", (bucket,)
+        ).fetchone()
+        generation = (row[0] if row else 0) + 1
+
+        # Generación publicada ANTES de listar: un record() durante el
+        # listado la usa y la purga final no lo borra (ver etag_index)
+        conn.execute(
+            "INSERT INTO scans (bucket, generation, finished) VALUES (?, ?, NULL) "
+            "ON CONFLICT (bucket) DO UPDATE SET generation = excluded.generation",
+            (bucket, generation)
+        )
+        conn.commit()
+
+    seen = 0
+    batch = []
+
+    def flush():
+        with _lock:
+            conn.executemany(
+                "INSERT OR REPLACE INTO drawings (bucket, key, name, revision, scan) "
+                "VALUES (?, ?, ?, ?, ?)",
+                batch
+            )
+            conn.commit()
+        batch.clear()
+
+    from journal import is_journal_key
+
+    for obj in client.list_objects(bucket, recursive=True, include_user_meta=True):
+        if obj.is_dir or is_journal_key(obj.object_name):
+            continue
+
+        meta = obj.metadata or {}
+        revision = None
+        for name, value in meta.items():
+            if name.lower() == REVISION_META:
+                revision = _parse_revision(value)
+                break
+
+        batch.append((bucket, obj.object_name, drawing_name(obj.object_name),
+                      revision, generation))
+        seen += 1
+        if len(batch) >= SCAN_BATCH:
+            flush()
+
+    if batch:
+        flush()
+
+    with _lock:
+        conn.execute(
+            "DELETE FROM drawings WHERE bucket = ? AND scan < ?", (bucket, generation)
+        )
+        conn.execute(
+            "UPDATE scans SET finished = ? WHERE bucket = ?", (time.time(), bucket)
+        )
+        conn.commit()
+
+    return seen
+
+
+# ============================================================
+# CONSULTA
+# ============================================================
+
+def _index_age(bucket):
+    """Segundos desde el último build() del bucket, o None si nunca se hizo."""
+    with _lock:
+        row = _connect().execute(
+            "SELECT finished FROM scans WHERE bucket = ?", (bucket,)
+        ).fetchone()
+    if not row or not row[0]:
+        return None
+    return time.time() - row[0]
+
+
+def _resolve(client, bucket, keys):
+    """HEAD de los objetos cuya revisión no vino en el listado."""
+    revisions = {}
+    for key in keys:
+        stat = client.stat_object(bucket, key)
+        revisions[key] = _parse_revision((stat.metadata or {}).get(REVISION_META, "0"))
+        record(bucket, key, revisions[key])
+    return revisions
+
+
+def _in_background(client, bucket):
+    """build() en un hilo; uno por bucket a la vez."""
+    with _lock:
+        if bucket in _busy:
+            return
+        _busy.add(bucket)
+
+    def run():
+        try:
+            build(client, bucket)
+        except Exception as e:
+            FreeCAD.Console.PrintWarning(f"No se pudo actualizar el índice de revisiones: {e}\n")
+        finally:
+            with _lock:
+                _busy.discard(bucket)
+
+    threading.Thread(target=run, daemon=True).start()
+
+
+def lookup(client, bucket, name, wait=True):
+    """
+    (keys, revisión máxima) del plano name. revisión None si no existe.
+    Sólo hay red si el índice no está construido o caducó, o faltan
+    revisiones (HEAD de esos objetos). Con wait=False un índice caducado
+    se reconstruye en segundo plano y se responde con el que hay; uno
+    que nunca se construyó se construye siempre antes de responder.
+    """
+    name = drawing_name(name)
+    age = _index_age(bucket)
+    if age is None or (wait and age > REBUILD_INTERVAL):
+        build(client, bucket)
+    elif age > REBUILD_INTERVAL:
+        _in_background(client, bucket)
+
+    with _lock:
+        rows = _connect().execute(
+            "SELECT key, revision FROM drawings WHERE bucket = ? AND name = ?",
+            (bucket, name)
+        ).fetchall()
+
+    # Revisiones que el listado no trajo → HEAD sólo de estos objetos
+    missing = [key for key, revision in rows if revision is None]
+    revisions = _resolve(client, bucket, missing)
+    rows = [(key, revisions.get(key, revision)) for key, revision in rows]
+
+    if not rows:
+        return [], None
+    return [r[0] for r in rows], max(r[1] for r in rows)
+
+
+def propose_revision(client, bucket, name, proposed, wait=True):
+    """
+    Siempre una revisión nueva: la mayor entre la propuesta y la máxima
+    existente, + 0.01. wait: ver lookup.
+    """
+    _keys, max_rev = lookup(client, bucket, name, wait=wait)
+    proposed = float(proposed)
+    if max_rev is not None:
+        proposed = max(proposed, max_rev)
+    return round(proposed + 0.01, 2)
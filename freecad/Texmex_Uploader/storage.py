@@ -0,0 +1,448 @@
+# ============================================================
+# storage.py → Sesión S3 y operaciones de almacenamiento (sin Qt)
+# Texmex Weavers – FreeCAD Integration
+# ============================================================
+#
+# Todo lo que habla con MinIO sin tocar la interfaz: configuración,
+# cliente compartido, caché de listados y subida de objetos.
+# Lo usan tanto el workbench (common.py reexporta las funciones) como
+# la línea de comandos (cli.py), que arranca sin FreeCAD ni PySide.
+# Los ajustes (BUCKET_MODEL, ENDPOINT...) cambian al guardar la config:
+# desde fuera se leen como storage.<NOMBRE>, nunca con "from storage import".
+
+import os, sys, subprocess, threading, time
+
+try:
+    import FreeCAD
+except ImportError:
+    import headless as FreeCAD
+
+# ============================================================
+# Lee XML
+# ============================================================
+
+from config_storage import load_minio_config, add_config_listener
+import etag_index
+import listing_snapshot
+import metrics
+
+cfg = load_minio_config()
+
+
+def _int_cfg(cfg, key, default):
+    try:
+        return int(float(cfg.get(key, default)))
+    except (TypeError, ValueError):
+        return default
+
+
+def _apply_config(new_cfg):
+    """Copia la configuración a las constantes del módulo."""
+    global cfg
+    global ENDPOINT, ACCESS_KEY, SECRET_KEY, BUCKET_MODEL, BUCKET_SVG
+    global POOL_MAXSIZE, CONNECT_TIMEOUT, READ_TIMEOUT, RETRIES
+    global LIST_CACHE_TTL, LIST_NEGATIVE_TTL
+    global UPLOAD_PART_MB, UPLOAD_CONCURRENCY, UPLOAD_ABANDON_HOURS
+
+    cfg = new_cfg
+
+    ENDPOINT     = cfg.get("ENDPOINT", "")
+    ACCESS_KEY   = cfg.get("ACCESS_KEY", "")
+    SECRET_KEY   = cfg.get("SECRET_KEY", "")
+
+    BUCKET_MODEL = cfg.get("BUCKET_MODEL", "cad3dfiles")
+    BUCKET_SVG   = cfg.get("BUCKET_SVG", "svg")
+
+    # Ajustes del pool HTTP (keep-alive) → ver OPTIONAL_SETTINGS en config_storage
+    POOL_MAXSIZE    = _int_cfg(cfg, "POOL_MAXSIZE", 10)
+    CONNECT_TIMEOUT = _int_cfg(cfg, "CONNECT_TIMEOUT", 5)
+    READ_TIMEOUT    = _int_cfg(cfg, "READ_TIMEOUT", 60)
+    RETRIES         = _int_cfg(cfg, "RETRIES", 3)
+
+    # Caché de listados (segundos)
+    LIST_CACHE_TTL    = _int_cfg(cfg, "LIST_CACHE_TTL", 60)
+    LIST_NEGATIVE_TTL = _int_cfg(cfg, "LIST_NEGATIVE_TTL", 30)
+
+    # Subidas multipart
+    UPLOAD_PART_MB     = _int_cfg(cfg, "UPLOAD_PART_MB", 16)
+    UPLOAD_CONCURRENCY = _int_cfg(cfg, "UPLOAD_CONCURRENCY", 4)
+    UPLOAD_ABANDON_HOURS = _int_cfg(cfg, "UPLOAD_ABANDON_HOURS", 24)
+
+
+_apply_config(cfg)
+
+
+# ============================================================
+# AUTO-INSTALAR MINIO
+# ============================================================
+
+# transfer.py y metrics.py usan APIs privadas de minio: misma serie
+# que pyproject.toml
+MINIO_REQUIREMENT = "minio>=7.2,<8"
+
+
+def ensure_minio_installed():
+    try:
+        from minio import Minio
+        from minio.error import S3Error
+        return Minio, S3Error
+    except ImportError:
+        try:
+            python_exe = os.path.join(os.path.dirname(sys.executable), "python.exe")
+            if not os.path.exists(python_exe):
+                python_exe = sys.executable
+            subprocess.check_call([python_exe, "-m", "pip", "install", "--user", MINIO_REQUIREMENT])
+            from minio import Minio
+            from minio.error import S3Error
+            return Minio, S3Error
+        except Exception as e:
+            FreeCAD.Console.PrintError(f"Error instalando minio: {e}\n")
+            return None, None
+
+
+# El pip install de ensure_minio_installed puede tardar minutos: al
+# importar sólo se intenta el import; la instalación la hace
+# ensure_minio() (hilo de arranque o primer get_client).
+try:
+    from minio import Minio
+    from minio.error import S3Error
+except ImportError:
+    Minio, S3Error = None, None
+
+_minio_lock = threading.Lock()
+
+
+def ensure_minio():
+    """Clase Minio, instalando la librería si falta. None si no se pudo."""
+    global Minio, S3Error
+
+    with _minio_lock:
+        if Minio is None:
+            Minio, S3Error = ensure_minio_installed()
+    return Minio
+
+
+# ============================================================
+# SESIÓN S3 COMPARTIDA (un cliente + pool keep-alive por proceso)
+# ============================================================
+
+_session_lock = threading.RLock()
+_client = None
+_known_buckets = set()
+
+
+def _build_http_client():
+    """PoolManager de urllib3 con keep-alive TCP y reintentos."""
+    import socket
+    import urllib3
+    from urllib3.connection import HTTPConnection
+
+    socket_options = list(HTTPConnection.default_socket_options)
+    socket_options.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+
+    return urllib3.PoolManager(
+        timeout=urllib3.Timeout(connect=CONNECT_TIMEOUT, read=READ_TIMEOUT),
+        maxsize=max(1, POOL_MAXSIZE),
+        block=False,
+        retries=urllib3.Retry(
+            total=RETRIES,
+            backoff_factor=0.2,
+            status_forcelist=[500, 502, 503, 504],
+        ),
+        socket_options=socket_options,
+    )
+
+
+def get_client():
+    """
+    Devuelve el cliente Minio compartido del proceso.
+    Se crea la primera vez y se reutiliza (mismas conexiones TCP).
+    """
+    global _client
+
+    if ensure_minio() is None:
+        raise RuntimeError("La librería minio no está instalada.")
+
+    with _session_lock:
+        if _client is None:
+            _client = metrics.instrument(Minio(
+                ENDPOINT,
+                access_key=ACCESS_KEY,
+                secret_key=SECRET_KEY,
+                secure=False,
+                http_client=_build_http_client()
+            ))
+        return _client
+
+
+def bucket_exists(bucket: str, create=False):
+    """
+    bucket_exists con caché: sólo la primera consulta va al servidor.
+    Con create=True crea el bucket si no existe.
+    """
+    with _session_lock:
+        if bucket in _known_buckets:
+            return True
+
+    client = get_client()
+    exists = client.bucket_exists(bucket)
+
+    if not exists and create:
+        client.make_bucket(bucket)
+        exists = True
+
+    if exists:
+        with _session_lock:
+            _known_buckets.add(bucket)
+
+    return exists
+
+
+def reset_client(new_cfg=None):
+    """
+    Descarta el cliente compartido (y su pool) para que se reconstruya
+    con la configuración actual. Se llama al guardar la config.
+    """
+    global _client
+
+    with _session_lock:
+        if new_cfg:
+            _apply_config(new_cfg)
+
+        old = _client
+        _client = None
+        _known_buckets.clear()
+
+    invalidate_listing()
+
+    if old is not None:
+        try:
+            old._http.clear()
+        except Exception:
+            pass
+
+
+add_config_listener(reset_client)
+
+
+# ============================================================
+# SLUG / PRETTY HELPERS
+# ============================================================
+
+def _slug(txt: str):
+    if not txt:
+        return ""
+    return txt.strip().replace(" ", "_").replace("/", "_")
+
+def _pretty(txt: str):
+    if not txt:
+        return ""
+    return txt.replace("_", " ")
+
+
+# ============================================================
+# CACHÉ DE LISTADOS (bucket, prefix) → TTL
+# ============================================================
+
+_listing_lock = threading.Lock()
+_listing_cache = {}
+
+# Carpeta raíz del diario de cambios (journal.py): no se lista
+JOURNAL_DIR = "_journal"
+
+
+def _norm_prefix(prefix):
+    base = (prefix or "").strip("/")
+    return base + "/" if base else ""
+
+
+def invalidate_listing(bucket=None, key=None):
+    """
+    Invalida el caché de listados.
+      • sin argumentos → todo
+      • bucket         → todo ese bucket
+      • bucket + key   → el prefijo de key y todos sus ancestros
+    """
+    with _listing_lock:
+        if bucket is None:
+            _listing_cache.clear()
+            return
+
+        if key is None:
+            for ck in [ck for ck in _listing_cache if ck[0] == bucket]:
+                del _listing_cache[ck]
+            return
+
+        parts = key.strip("/").split("/")[:-1]
+        _listing_cache.pop((bucket, ""), None)
+        for i in range(1, len(parts) + 1):
+            _listing_cache.pop((bucket, "/".join(parts[:i]) + "/"), None)
+
+
+def list_prefix(bucket: str, prefix="", refresh=False):
+    """
+    Listado de UN nivel bajo prefix, con caché compartido.
+    Devuelve {"folders": [slug, ...], "files": [{name, key, size, etag}, ...]}.
+    Los prefijos vacíos también se cachean (LIST_NEGATIVE_TTL).
+    Lanza excepción si falla la red (no se cachea).
+    """
+    base = _norm_prefix(prefix)
+    ck = (bucket, base)
+    now = time.monotonic()
+
+    if not refresh:
+        with _listing_lock:
+            hit = _listing_cache.get(ck)
+        if hit and hit[0] > now:
+            return hit[1]
+
+    folders = set()
+    files = []
+
+    with metrics.span("storage.list_prefix", bucket, base):
+        if bucket_exists(bucket):
+            for obj in get_client().list_objects(bucket, prefix=base, recursive=False):
+                name = obj.object_name[len(base):]
+                if "/" in name:
+                    folder = name.split("/", 1)[0]
+                    if base or folder != JOURNAL_DIR:
+                        folders.add(folder)
+                    continue
+                files.append({
+                    "name": name,
+                    "key": obj.object_name,
+                    "size": getattr(obj, "size", None),
+                    "etag": (getattr(obj, "etag", "") or "").strip('"'),
+                })
+
+    listing = {
+        "folders": sorted(folders),
+        "files": sorted(files, key=lambda f: f["name"].lower()),
+    }
+
+    ttl = LIST_CACHE_TTL if (folders or files) else LIST_NEGATIVE_TTL
+    with _listing_lock:
+        _listing_cache[ck] = (now + ttl, listing)
+
+    # Lo último conocido, para pintar la librería al abrirla
+    listing_snapshot.record(bucket, base, listing)
+
+    return listing
+
+
+# ============================================================
+# SUBCARPETAS (NIVEL DIRECTO)
+# ============================================================
+
+def list_subfolders(bucket: str, prefix=""):
+    """
+    Devuelve subcarpetas DIRECTAS bajo prefix.
+    Ej: "telares_circulares" → ["motores", "guias"]
+    """
+    try:
+        return [_pretty(s) for s in list_prefix(bucket, prefix)["folders"]]
+
+    except Exception as e:
+        FreeCAD.Console.PrintError(f"Error leyendo subcarpetas {prefix}: {e}\n")
+        return []
+
+
+# ============================================================
+# BUSCAR RUTA POR ETAG
+# ============================================================
+
+def find_etag_path(bucket: str, etag: str):
+    """
+    Ruta del objeto con ese ETag. Usa el índice local (etag_index) y sólo
+    escanea el bucket cuando el ETag no está registrado.
+    """
+    if not etag:
+        return None
+
+    try:
+        with metrics.span("storage.find_etag_path", bucket, etag):
+            return etag_index.find(get_client(), bucket, etag)
+
+    except Exception as e:
+        FreeCAD.Console.PrintError(f"Error buscando ETag: {e}\n")
+
+    return None
+
+
+# ============================================================
+# CONSTRUIR RUTA MINIO
+# ============================================================
+
+def join_key(area, s1, s2, s3, filename):
+    parts = []
+    if area: parts.append(_slug(area))
+    if s1:   parts.append(_slug(s1))
+    if s2:   parts.append(_slug(s2))
+    if s3:   parts.append(_slug(s3))
+    parts.append(filename)
+    return "/".join(parts)
+
+
+# ============================================================
+# SUBIR ARCHIVO
+# ============================================================
+
+def _upload_object(filepath, object_name, metadata=None, bucket=None,
+                   progress=None, cancel_event=None, on_unchanged=None, hash_path=None):
+    """
+    Sube sin popups (apto para hilos). Lanza excepción si falla.
+    Si el objeto remoto ya es idéntico no se transfiere nada y se llama
+    on_unchanged(etag). hash_path: ver transfer.unchanged_etag.
+    Sin bucket → BUCKET_MODEL (el de la configuración actual).
+    """
+    import transfer
+
+    bucket = bucket or BUCKET_MODEL
+
+    client = get_client()
+    bucket_exists(bucket, create=True)
+
+    part_size = UPLOAD_PART_MB * 1024 * 1024
+    size = os.path.getsize(filepath)
+
+    with metrics.span("storage.upload", bucket, object_name) as span:
+        # Mismo contenido y metadatos en el servidor → "sin cambios"
+        etag = transfer.unchanged_etag(client, bucket, object_name, filepath,
+                                       metadata=metadata, part_size=part_size,
+                                       hash_path=hash_path)
+        if etag:
+            FreeCAD.Console.PrintMessage(f"Sin cambios, no se sube: {object_name}\n")
+            if progress:
+                progress(size, size)
+            if on_unchanged:
+                on_unchanged(etag)
+        else:
+            etag = transfer.upload(
+                client, bucket, object_name, filepath,
+                metadata=metadata,
+                part_size=part_size,
+                concurrency=UPLOAD_CONCURRENCY,
+                progress=progress,
+                cancel_event=cancel_event
+            )
+            span.bytes = size
+            invalidate_listing(bucket, object_name)
+
+            import journal
+            journal.record(bucket, journal.PUT, object_name, etag, size,
+                           (metadata or {}).get("x-amz-meta-revision"))
+
+    try:
+        etag_index.record(bucket, object_name, etag, size)
+    except Exception as e:
+        FreeCAD.Console.PrintError(f"Error actualizando índice ETag: {e}\n")
+
+    if bucket == BUCKET_SVG:
+        import revision_index
+        try:
+            revision_index.record(bucket, object_name,
+                                  (metadata or {}).get("x-amz-meta-revision"))
+        except Exception as e:
+            FreeCAD.Console.PrintError(f"Error actualizando índice de revisiones: {e}\n")
+
+    return etag
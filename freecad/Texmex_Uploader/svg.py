@@ -3,6 +3,8 @@
 # ============================================================
 
 import os
+import shutil
+import tempfile
 import FreeCAD
 
 # GUI seguro
@@ -17,19 +19,91 @@ except ImportError:
 # IMPORTAR UTILIDADES COMPARTIDAS
 # =============================================================================
 from common import (
-    Minio, S3Error,
-    ENDPOINT, ACCESS_KEY, SECRET_KEY,
-    BUCKET_SVG,
-    show_popup, get_doc_metadata,
-    upload_file, list_subfolders,
+    get_client,
+    show_popup, get_doc_metadata, doc_modified, save_after_upload,
+    list_prefix, list_subfolders,
     join_key, find_etag_path, _slug, _pretty
 )
+from transfers import enqueue_upload, show_transfers_dock
+import revision_index
+import storage
+import upload_queue
 
 # Qt
 try:
-    from PySide6 import QtWidgets
+    from PySide6 import QtWidgets, QtCore
 except ImportError:
-    from PySide2 import QtWidgets
+    from PySide2 import QtWidgets, QtCore
+
+
+# =============================================================================
+# Área + 3 niveles de subcarpetas (combos enlazados)
+# =============================================================================
+def _add_folder_rows(layout):
+    """Agrega Área / Subcarpeta 1-3 a layout. Devuelve los 4 combos."""
+    row = QtWidgets.QHBoxLayout()
+    row.addWidget(QtWidgets.QLabel("Área:"))
+    area_combo = QtWidgets.QComboBox()
+    area_combo.addItems([
+        "telares circulares",
+        "telares de banda",
+        "extrusion",
+        "laminadora",
+        "torre de enfriamiento"
+    ])
+    row.addWidget(area_combo)
+    layout.addLayout(row)
+
+    def mkr(label):
+        r = QtWidgets.QHBoxLayout()
+        r.addWidget(QtWidgets.QLabel(label))
+        combo = QtWidgets.QComboBox()
+        r.addWidget(combo)
+        return r, combo
+
+    row, s1_combo = mkr("Subcarpeta 1:")
+    layout.addLayout(row)
+
+    row, s2_combo = mkr("Subcarpeta 2:")
+    layout.addLayout(row)
+
+    row, s3_combo = mkr("Subcarpeta 3:")
+    layout.addLayout(row)
+
+    def fill1():
+        area = _slug(area_combo.currentText())
+        items = list_subfolders(storage.BUCKET_SVG, area)
+        s1_combo.clear()
+        s1_combo.addItems(["<Raíz>"] + items)
+
+    def fill2():
+        area = _slug(area_combo.currentText())
+        s1 = s1_combo.currentText()
+        s2_combo.clear()
+        if s1 != "<Raíz>":
+            path = f"{area}/{_slug(s1)}"
+            items = list_subfolders(storage.BUCKET_SVG, path)
+            s2_combo.addItems(["<Raíz>"] + items)
+        else:
+            s2_combo.addItem("<Raíz>")
+
+    def fill3():
+        area = _slug(area_combo.currentText())
+        s1, s2 = s1_combo.currentText(), s2_combo.currentText()
+        s3_combo.clear()
+        if s1 != "<Raíz>" and s2 != "<Raíz>":
+            path = f"{area}/{_slug(s1)}/{_slug(s2)}"
+            items = list_subfolders(storage.BUCKET_SVG, path)
+            s3_combo.addItems(["<Raíz>"] + items)
+        else:
+            s3_combo.addItem("<Raíz>")
+
+    area_combo.currentIndexChanged.connect(fill1)
+    s1_combo.currentIndexChanged.connect(fill2)
+    s2_combo.currentIndexChanged.connect(fill3)
+
+    fill1(); fill2(); fill3()
+    return area_combo, s1_combo, s2_combo, s3_combo
 
 
 # =============================================================================
@@ -61,70 +135,8 @@ class MetadataFormSVG(QtWidgets.QDialog):
         row.addWidget(self.name_edit)
         layout.addLayout(row)
 
-        # ---------------- Área ----------------
-        row = QtWidgets.QHBoxLayout()
-        row.addWidget(QtWidgets.QLabel("Área:"))
-        self.area = QtWidgets.QComboBox()
-        self.area.addItems([
-            "telares circulares",
-            "telares de banda",
-            "extrusion",
-            "laminadora",
-            "torre de enfriamiento"
-        ])
-        row.addWidget(self.area)
-        layout.addLayout(row)
-
-        # ---------------- Subcarpetas dinámicas ----------------
-        def mkr(label):
-            r = QtWidgets.QHBoxLayout()
-            r.addWidget(QtWidgets.QLabel(label))
-            combo = QtWidgets.QComboBox()
-            r.addWidget(combo)
-            return r, combo
-
-        row, self.s1 = mkr("Subcarpeta 1:")
-        layout.addLayout(row)
-
-        row, self.s2 = mkr("Subcarpeta 2:")
-        layout.addLayout(row)
-
-        row, self.s3 = mkr("Subcarpeta 3:")
-        layout.addLayout(row)
-
-        def fill1():
-            area = _slug(self.area.currentText())
-            items = list_subfolders(BUCKET_SVG, area)
-            self.s1.clear()
-            self.s1.addItems(["<Raíz>"] + items)
-
-        def fill2():
-            area = _slug(self.area.currentText())
-            s1 = self.s1.currentText()
-            self.s2.clear()
-            if s1 != "<Raíz>":
-                path = f"{area}/{_slug(s1)}"
-                items = list_subfolders(BUCKET_SVG, path)
-                self.s2.addItems(["<Raíz>"] + items)
-            else:
-                self.s2.addItem("<Raíz>")
-
-        def fill3():
-            area = _slug(self.area.currentText())
-            s1, s2 = self.s1.currentText(), self.s2.currentText()
-            self.s3.clear()
-            if s1 != "<Raíz>" and s2 != "<Raíz>":
-                path = f"{area}/{_slug(s1)}/{_slug(s2)}"
-                items = list_subfolders(BUCKET_SVG, path)
-                self.s3.addItems(["<Raíz>"] + items)
-            else:
-                self.s3.addItem("<Raíz>")
-
-        self.area.currentIndexChanged.connect(fill1)
-        self.s1.currentIndexChanged.connect(fill2)
-        self.s2.currentIndexChanged.connect(fill3)
-
-        fill1(); fill2(); fill3()
+        # ---------------- Área / subcarpetas ----------------
+        self.area, self.s1, self.s2, self.s3 = _add_folder_rows(layout)
 
         # ---------------- Revisión ----------------
         row = QtWidgets.QHBoxLayout()
@@ -206,23 +218,12 @@ class UploadTechDrawSVGCmd:
         TechDrawGui.exportPageAsSvg(page, svg_path)
         FreeCAD.Console.PrintMessage(f"SVG exportado: {svg_path}\n")
 
-        # ---- Auto-versionado previo ----
-        client = Minio(ENDPOINT, ACCESS_KEY, SECRET_KEY, secure=False)
+        # ---- Auto-versionado previo (índice nombre → revisión) ----
         try:
-            dname = default_name.replace(".svg", "")
-            proposed = float(default_revision)
-            max_rev = proposed
-
-            for obj in client.list_objects(BUCKET_SVG, recursive=True):
-                if obj.object_name.endswith(f"/{dname}.svg") or obj.object_name.endswith(f"/{dname}"):
-                    meta = client.stat_object(BUCKET_SVG, obj.object_name)
-                    rv = float(meta.metadata.get("x-amz-meta-revision", "0"))
-                    max_rev = max(max_rev, rv)
-
-            if proposed <= max_rev:
-                proposed = round(max_rev + 0.01, 2)
-
-            default_revision = proposed
+            # Sin esperar a la red: el índice se pone al día en segundo plano
+            default_revision = revision_index.propose_revision(
+                get_client(), storage.BUCKET_SVG, default_name, default_revision, wait=False
+            )
 
         except Exception as e:
             FreeCAD.Console.PrintError(f"Auto-version error: {e}\n")
@@ -251,7 +252,7 @@ class UploadTechDrawSVGCmd:
 
         # ---- Si existe ETag → mantener ruta ----
         if current_etag:
-            etag_path = find_etag_path(BUCKET_SVG, current_etag)
+            etag_path = find_etag_path(storage.BUCKET_SVG, current_etag)
         else:
             etag_path = None
 
@@ -277,9 +278,9 @@ class UploadTechDrawSVGCmd:
 
         same = None
         try:
-            for obj in client.list_objects(BUCKET_SVG, prefix=prefix, recursive=False):
-                if obj.object_name.endswith(f"/{fname}"):
-                    same = obj
+            for entry in list_prefix(storage.BUCKET_SVG, prefix, refresh=True)["files"]:
+                if entry["name"] == fname:
+                    same = entry["key"]
                     break
         except Exception as e:
             FreeCAD.Console.PrintError(f"Error búsqueda duplicado: {e}\n")
@@ -289,7 +290,7 @@ class UploadTechDrawSVGCmd:
             msg.setWindowTitle("Archivo duplicado")
             msg.setIcon(QtWidgets.QMessageBox.Warning)
             msg.setText(
-                f"Ya existe un SVG llamado:\n\n{same.object_name}\n\n"
+                f"Ya existe un SVG llamado:\n\n{same}\n\n"
                 "¿Actualizar o crear nueva versión?"
             )
             update_btn = msg.addButton("Actualizar", QtWidgets.QMessageBox.AcceptRole)
@@ -313,30 +314,374 @@ class UploadTechDrawSVGCmd:
             "x-amz-meta-company": doc_meta.get("company", "")
         }
 
-        new_etag = upload_file(svg_path, object_name, metadata, bucket=BUCKET_SVG)
+        # ---- Subida en segundo plano; metadatos de la página en el hilo GUI ----
+        doc_name = page.Document.Name
+        page_name = page.Name
 
-        if new_etag:
-            if hasattr(page, "Base_etag"):
-                page.Base_etag = new_etag
-            if hasattr(page, "Base_descripcion"):
-                page.Base_descripcion = data["descripcion"]
-            if hasattr(page, "Base_comment"):
-                page.Base_comment = data["comentario"]
-            if hasattr(page, "Base_revision"):
-                page.Base_revision = str(data["revision"])
+        def on_done(job):
+            if job.state == upload_queue.FAILED:
+                show_popup("Error", f"No se pudo subir:\n{object_name}\n\n{job.error}",
+                           QtWidgets.QMessageBox.Critical)
+                return
+            if job.state != upload_queue.DONE:
+                return
 
-            FreeCAD.ActiveDocument.recompute()
-            FreeCAD.ActiveDocument.save()
+            doc = FreeCAD.listDocuments().get(doc_name)
+            target = doc.getObject(page_name) if doc else None
+            if target is None:
+                FreeCAD.Console.PrintWarning(
+                    f"{object_name} subido, pero la página ya no existe: "
+                    f"Base_etag no se actualizó.\n"
+                )
+                return
 
-            show_popup(
-                "Éxito",
-                f"SVG '{fname}' subido.\n\nRuta final:\n{object_name}\nETag: {new_etag}"
-            )
+            modified = doc_modified(doc)
+            if hasattr(target, "Base_etag"):
+                target.Base_etag = job.etag
+            if hasattr(target, "Base_descripcion"):
+                target.Base_descripcion = data["descripcion"]
+            if hasattr(target, "Base_comment"):
+                target.Base_comment = data["comentario"]
+            if hasattr(target, "Base_revision"):
+                target.Base_revision = str(data["revision"])
+
+            save_after_upload(doc, modified)
+
+        enqueue_upload(svg_path, object_name, metadata, storage.BUCKET_SVG, on_done=on_done)
 
     def IsActive(self):
         return True
 
 
+# ============================================================
+# COMMAND: Subir TODAS las páginas (o las seleccionadas) en lote
+# ============================================================
+
+
+def _techdraw_pages(doc):
+    """Páginas seleccionadas; si no hay selección, todas las del documento."""
+    sel = [o for o in FreeCADGui.Selection.getSelection()
+           if getattr(o, "TypeId", "") == "TechDraw::DrawPage"]
+    if sel:
+        return sel
+    return [o for o in doc.Objects if getattr(o, "TypeId", "") == "TechDraw::DrawPage"]
+
+
+def _folder_value(combo):
+    text = combo.currentText()
+    return "" if text in ("", "<Raíz>") else text
+
+
+def _taken_targets(plans):
+    """
+    Destinos del lote donde ya hay un SVG que no es el de la página
+    (páginas nuevas, o renombradas, con un nombre ya usado en la carpeta).
+    """
+    taken = set()
+    listed = {}
+    for plan in plans:
+        key = plan["object_name"]
+        if key == plan.get("uploaded_as"):
+            continue
+        prefix = key.rsplit("/", 1)[0] + "/" if "/" in key else ""
+        if prefix not in listed:
+            try:
+                files = list_prefix(storage.BUCKET_SVG, prefix, refresh=True)["files"]
+                listed[prefix] = {entry["key"] for entry in files}
+            except Exception as e:
+                FreeCAD.Console.PrintError(f"Error búsqueda duplicado: {e}\n")
+                listed[prefix] = set()
+        if key in listed[prefix]:
+            taken.add(key)
+    return taken
+
+
+def _ask_taken(taken):
+    """"update" / "version" / "skip", o None si se cancela el lote."""
+    msg = QtWidgets.QMessageBox(FreeCADGui.getMainWindow())
+    msg.setWindowTitle("Archivos duplicados")
+    msg.setIcon(QtWidgets.QMessageBox.Warning)
+    msg.setText(
+        f"Ya existen {len(taken)} SVG con el mismo nombre en la carpeta de destino.\n\n"
+        "¿Actualizarlos, crear nueva versión u omitir esas páginas?"
+    )
+    msg.setDetailedText("\n".join(sorted(taken)))
+    update_btn = msg.addButton("Actualizar", QtWidgets.QMessageBox.AcceptRole)
+    version_btn = msg.addButton("Nueva versión", QtWidgets.QMessageBox.ActionRole)
+    skip_btn = msg.addButton("Omitir", QtWidgets.QMessageBox.ActionRole)
+    msg.addButton("Cancelar", QtWidgets.QMessageBox.RejectRole)
+    msg.exec()
+
+    return {update_btn: "update", version_btn: "version",
+            skip_btn: "skip"}.get(msg.clickedButton())
+
+
+class BatchSVGDialog(QtWidgets.QDialog):
+    """
+    Una sola ventana para el lote:
+      - tabla de páginas (marcar / desmarcar) con revisión y destino
+      - carpeta para las páginas que aún no existen en el bucket
+    """
+    def __init__(self, plans, parent=None):
+        super().__init__(parent)
+
+        self.setWindowTitle("Subir páginas TechDraw")
+        self.setMinimumWidth(720)
+        self.plans = plans
+
+        layout = QtWidgets.QVBoxLayout(self)
+
+        self.table = QtWidgets.QTableWidget(len(plans), 3)
+        self.table.setHorizontalHeaderLabels(["Página", "Revisión", "Destino"])
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+
+        for row, plan in enumerate(plans):
+            item = QtWidgets.QTableWidgetItem(plan["fname"])
+            item.setFlags(item.flags() | QtCore.Qt.ItemIsUserCheckable)
+            item.setCheckState(QtCore.Qt.Checked)
+            self.table.setItem(row, 0, item)
+            self.table.setItem(row, 1, QtWidgets.QTableWidgetItem(f"{plan['revision']:.2f}"))
+            self.table.setItem(row, 2, QtWidgets.QTableWidgetItem(
+                plan["object_name"] or "(nueva → carpeta de abajo)"
+            ))
+        layout.addWidget(self.table)
+
+        new_pages = [p for p in plans if not p["object_name"]]
+        box = QtWidgets.QGroupBox(f"Carpeta para páginas nuevas ({len(new_pages)})")
+        box_layout = QtWidgets.QVBoxLayout(box)
+        self.area, self.s1, self.s2, self.s3 = _add_folder_rows(box_layout)
+        box.setEnabled(bool(new_pages))
+        layout.addWidget(box)
+
+        btn = QtWidgets.QDialogButtonBox(QtWidgets.QDialogButtonBox.Ok |
+                                         QtWidgets.QDialogButtonBox.Cancel)
+        btn.accepted.connect(self.accept)
+        btn.rejected.connect(self.reject)
+        layout.addWidget(btn)
+
+    def selected_plans(self):
+        """Planes marcados, con object_name resuelto para las páginas nuevas."""
+        area = _slug(self.area.currentText())
+        s1, s2, s3 = (_slug(_folder_value(c)) for c in (self.s1, self.s2, self.s3))
+
+        out = []
+        for row, plan in enumerate(self.plans):
+            if self.table.item(row, 0).checkState() != QtCore.Qt.Checked:
+                continue
+            if not plan["object_name"]:
+                plan["object_name"] = join_key(area, s1, s2, s3, plan["fname"])
+            out.append(plan)
+        return out
+
+
+class UploadAllTechDrawSVGCmd:
+
+    # Lote en curso (None si no hay): no se lanza otro hasta que termine
+    _running = None
+
+    def GetResources(self):
+        return {
+            "Pixmap": os.path.join(os.path.dirname(__file__), "./Resources/Icons/fplan.svg"),
+            "MenuText": "Subir Todas las Páginas (SVG)",
+            "ToolTip": "Exporta y sube en lote las páginas TechDraw (seleccionadas o todas)"
+        }
+
+    def Activated(self):
+        if not FreeCADGui or not TechDrawGui:
+            show_popup("Error", "FreeCAD GUI o TechDraw no disponibles.")
+            return
+
+        if UploadAllTechDrawSVGCmd._running is not None:
+            show_popup("Subida en curso",
+                       "Ya hay un lote de páginas subiéndose (ver Transferencias).")
+            return
+
+        doc = FreeCAD.ActiveDocument
+        if not doc:
+            show_popup("Error", "No hay documento activo.")
+            return
+
+        pages = _techdraw_pages(doc)
+        if not pages:
+            show_popup("Error", "No se encontraron páginas TechDraw.")
+            return
+
+        # ---- Plan por página (índices locales: casi sin red) ----
+        client = get_client()
+        plans = []
+        for page in pages:
+            name = getattr(page, "Label", page.Name)
+            fname = name if name.lower().endswith(".svg") else f"{name}.svg"
+
+            try:
+                revision = revision_index.propose_revision(
+                    client, storage.BUCKET_SVG, name,
+                    getattr(page, "Base_revision", "") or "1.00", wait=False
+                )
+            except Exception as e:
+                FreeCAD.Console.PrintError(f"Auto-version error ({name}): {e}\n")
+                revision = 1.00
+
+            # Si ya existe (ETag) → se mantiene su ruta
+            object_name = None
+            etag = getattr(page, "Base_etag", "")
+            etag_path = find_etag_path(storage.BUCKET_SVG, etag) if etag else None
+            if etag_path:
+                parts = etag_path.split("/")
+                parts[-1] = fname
+                object_name = "/".join(parts)
+
+            plans.append({
+                "page": page.Name,
+                "fname": fname,
+                "revision": float(revision),
+                "descripcion": getattr(page, "Base_descripcion", "") or "",
+                "comentario": getattr(page, "Base_comment", "") or "",
+                "object_name": object_name,
+                "uploaded_as": etag_path,
+            })
+
+        dlg = BatchSVGDialog(plans, FreeCADGui.getMainWindow())
+        if not dlg.exec():
+            return
+        plans = dlg.selected_plans()
+        if not plans:
+            return
+
+        # ---- Destinos ocupados por OTRO plano con el mismo nombre ----
+        results = {}
+        taken = _taken_targets(plans)
+        if taken:
+            choice = _ask_taken(taken)
+            if choice is None:
+                return
+            for plan in plans:
+                if plan["object_name"] not in taken:
+                    continue
+                if choice == "skip":
+                    results[plan["page"]] = ("error", "destino existente")
+                elif choice == "version":
+                    plan["revision"] = round(plan["revision"] + 0.01, 2)
+
+        # ---- Exportar todas las páginas (hilo GUI, una pasada) ----
+        out_dir = tempfile.mkdtemp(prefix="texmex_svg_")
+        seen = set()
+
+        for plan in plans:
+            if plan["page"] in results:
+                continue
+            if plan["object_name"] in seen:
+                results[plan["page"]] = ("error", "destino repetido en el lote")
+                continue
+            seen.add(plan["object_name"])
+
+            plan["svg_path"] = os.path.join(out_dir, plan["fname"])
+            try:
+                TechDrawGui.exportPageAsSvg(doc.getObject(plan["page"]), plan["svg_path"])
+            except Exception as e:
+                results[plan["page"]] = ("error", f"exportando: {e}")
+
+        doc_meta = get_doc_metadata(doc)
+        todo = [p for p in plans if p["page"] not in results]
+
+        # ---- Encolar (la cola copia cada SVG al encolar) ----
+        # El resumen y los Base_* se aplican en _finish_batch cuando
+        # termina el último trabajo (on_done llega en el hilo GUI)
+        batch = {"doc": doc.Name, "plans": plans, "results": results,
+                 "pending": len(todo)}
+        UploadAllTechDrawSVGCmd._running = batch
+
+        def on_done(job, plan):
+            if job.state == upload_queue.DONE:
+                results[plan["page"]] = ("sin cambios" if job.unchanged else "ok", job.etag)
+            elif job.state == upload_queue.CANCELLED:
+                results[plan["page"]] = ("error", "cancelado")
+            else:
+                results[plan["page"]] = ("error", job.error or "sin resultado")
+            batch["pending"] -= 1
+            if batch["pending"] == 0:
+                self._finish_batch(batch)
+
+        queue = upload_queue.get_queue()
+        for plan in todo:
+            metadata = {
+                "x-amz-meta-revision": str(plan["revision"]),
+                "x-amz-meta-descripcion": plan["descripcion"],
+                "x-amz-meta-comment": plan["comentario"],
+                "x-amz-meta-createdby": doc_meta.get("createdby", ""),
+                "x-amz-meta-lastmodifiedby": doc_meta.get("lastmodifiedby", ""),
+                "x-amz-meta-company": doc_meta.get("company", "")
+            }
+            try:
+                queue.submit(plan["svg_path"], plan["object_name"], metadata,
+                             storage.BUCKET_SVG,
+                             on_done=lambda job, plan=plan: on_done(job, plan))
+            except Exception as e:
+                results[plan["page"]] = ("error", f"encolando: {e}")
+                batch["pending"] -= 1
+
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+        if batch["pending"] == 0:
+            self._finish_batch(batch)
+        else:
+            show_transfers_dock()
+
+    def _finish_batch(self, batch):
+        UploadAllTechDrawSVGCmd._running = None
+        plans, results = batch["plans"], batch["results"]
+
+        # ---- Atributos Base_* de las páginas subidas (hilo GUI) ----
+        doc = FreeCAD.listDocuments().get(batch["doc"])
+        modified = doc_modified(doc) if doc else False
+        changed = False
+        for plan in plans:
+            status, value = results.get(plan["page"], ("error", "sin resultado"))
+            page = doc.getObject(plan["page"]) if doc else None
+            if status == "error" or page is None:
+                continue
+            for att, val in (("Base_etag", value),
+                             ("Base_revision", str(plan["revision"])),
+                             ("Base_descripcion", plan["descripcion"]),
+                             ("Base_comment", plan["comentario"])):
+                if hasattr(page, att):
+                    setattr(page, att, val)
+            changed = True
+
+        if changed:
+            save_after_upload(doc, modified)
+        elif doc is None:
+            FreeCAD.Console.PrintWarning(
+                "Lote de SVG subido, pero el documento ya no está abierto: "
+                "Base_etag no se actualizó.\n"
+            )
+
+        # ---- Un solo resumen con el resultado de cada página ----
+        lines = []
+        ok = 0
+        for plan in plans:
+            status, value = results.get(plan["page"], ("error", "sin resultado"))
+            if status == "error":
+                lines.append(f"✗ {plan['fname']}: {value}")
+            else:
+                ok += 1
+                lines.append(f"✓ {plan['fname']} → {plan['object_name']} ({status})")
+
+        msg = QtWidgets.QMessageBox(FreeCADGui.getMainWindow())
+        msg.setWindowTitle("Subida de páginas")
+        msg.setIcon(QtWidgets.QMessageBox.Information if ok == len(plans)
+                    else QtWidgets.QMessageBox.Warning)
+        msg.setText(f"Páginas subidas: {ok} de {len(plans)}")
+        msg.setDetailedText("\n".join(lines))
+        msg.exec()
+
+    def IsActive(self):
+        # Un solo lote a la vez
+        return UploadAllTechDrawSVGCmd._running is None
+
+
 # ============================================================
 # COMMAND: AddPageAttributesCMD (SVG Pages)
 # ============================================================
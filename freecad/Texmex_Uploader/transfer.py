@@ -0,0 +1,385 @@
+# ============================================================
+# transfer.py → Motor de subidas multipart en paralelo
+# Texmex Weavers – FreeCAD Integration
+# ============================================================
+#
+# Divide el archivo en partes de part_size y las sube con N hilos
+# sobre el pool de conexiones del cliente compartido (storage.get_client).
+# progress(bytes_hechos, bytes_totales) se llama desde los hilos de
+# trabajo: quien lo reciba NO debe tocar widgets Qt directamente.
+#
+# Diario de subidas (get_data_dir("uploads")/<sha1(bucket/key)>.json):
+# upload ID, ETag de cada parte y huella del archivo (tamaño, mtime,
+# hash de muestras). Si la subida se corta, el siguiente intento (o el
+# siguiente arranque de FreeCAD) continúa desde la última parte hecha.
+
+import datetime
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, FIRST_EXCEPTION, wait
+
+from minio.datatypes import Part
+from minio.helpers import genheaders, MIN_PART_SIZE, MAX_MULTIPART_COUNT
+
+from config_storage import get_data_dir
+import local_hash
+
+DEFAULT_PART_SIZE = 16 * 1024 * 1024
+DEFAULT_CONCURRENCY = 4
+
+
+# Muestras para la huella rápida del archivo (inicio / medio / final)
+FINGERPRINT_SAMPLE = 1024 * 1024
+
+# Lectura de la subida en una sola parte (cada bloque mira Cancelar)
+CHUNK = 1024 * 1024
+
+
+class UploadCancelled(Exception):
+    pass
+
+
+# ============================================================
+# DIARIO DE SUBIDAS
+# ============================================================
+
+def _journal_path(bucket, key):
+    digest = hashlib.sha1(f"{bucket}/{key}".encode("utf-8")).hexdigest()
+    return os.path.join(get_data_dir("uploads"), f"{digest}.json")
+
+
+def fingerprint(path):
+    """Huella barata del archivo: tamaño, mtime y hash de 3 muestras."""
+    st = os.stat(path)
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for offset in (0, st.st_size // 2, max(0, st.st_size - FINGERPRINT_SAMPLE)):
+            f.seek(offset)
+            h.update(f.read(FINGERPRINT_SAMPLE))
+    return {"size": st.st_size, "mtime": int(st.st_mtime), "hash": h.hexdigest()}
+
+
+def load_journal(bucket, key):
+    try:
+        with open(_journal_path(bucket, key), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _save_journal(journal):
+    path = _journal_path(journal["bucket"], journal["key"])
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(journal, f)
+    os.replace(tmp, path)
+
+
+def _drop_journal(bucket, key):
+    try:
+        os.remove(_journal_path(bucket, key))
+    except OSError:
+        pass
+
+
+def pending_journals():
+    """Todos los diarios de subidas no terminadas."""
+    folder = get_data_dir("uploads")
+    out = []
+    for name in os.listdir(folder):
+        if not name.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(folder, name), "r", encoding="utf-8") as f:
+                out.append(json.load(f))
+        except (OSError, ValueError):
+            pass
+    return out
+
+
+def journal_matches_source(journal):
+    """El archivo local sigue siendo el mismo que se empezó a subir."""
+    try:
+        return fingerprint(journal["path"]) == journal["fingerprint"]
+    except (OSError, KeyError):
+        return False
+
+
+def discard(client, journal):
+    """Aborta la subida del diario en el servidor y borra el diario."""
+    try:
+        client._abort_multipart_upload(journal["bucket"], journal["key"], journal["upload_id"])
+    except Exception:
+        pass
+    _drop_journal(journal["bucket"], journal["key"])
+
+
+def _server_parts(client, bucket, key, upload_id):
+    """Partes que el servidor ya tiene {n: etag}. Lanza si el upload no existe."""
+    parts = {}
+    marker = None
+    while True:
+        result = client._list_parts(bucket, key, upload_id, part_number_marker=marker)
+        for part in result.parts:
+            parts[part.part_number] = part.etag
+        if not result.is_truncated:
+            return parts
+        marker = result.next_part_number_marker
+
+
+def cleanup_abandoned(client, buckets, max_age_hours):
+    """
+    Aborta subidas multipart más viejas que max_age_hours (con o sin
+    diario local: también las que dejó otra PC que se cayó).
+    """
+    limit = datetime.datetime.now(datetime.timezone.utc) - \
+        datetime.timedelta(hours=max_age_hours)
+    aborted = 0
+
+    for journal in pending_journals():
+        if time.time() - journal.get("created", 0) > max_age_hours * 3600:
+            discard(client, journal)
+            aborted += 1
+
+    for bucket in buckets:
+        key_marker = upload_marker = None
+        while True:
+            result = client._list_multipart_uploads(
+                bucket, key_marker=key_marker, upload_id_marker=upload_marker
+            )
+            for up in result.uploads:
+                if up.initiated_time and up.initiated_time < limit:
+                    try:
+                        client._abort_multipart_upload(bucket, up.object_name, up.upload_id)
+                        _drop_journal(bucket, up.object_name)
+                        aborted += 1
+                    except Exception:
+                        pass
+            if not result.is_truncated or not result.next_key_marker:
+                break
+            key_marker = result.next_key_marker
+            upload_marker = result.next_upload_id_marker
+
+    return aborted
+
+
+class _ProgressReader:
+    """
+    Envuelve un archivo y reporta lo leído (subida en una sola parte).
+    Lee como mucho chunk bytes por llamada: el callback se llama a menudo
+    y puede cortar la lectura lanzando una excepción.
+    """
+
+    def __init__(self, fileobj, callback, chunk=None):
+        self.fileobj = fileobj
+        self.callback = callback
+        self.chunk = chunk
+
+    def read(self, size=-1):
+        if self.chunk and (size is None or size < 0 or size > self.chunk):
+            size = self.chunk
+        data = self.fileobj.read(size)
+        if data and self.callback:
+            self.callback(len(data))
+        return data
+
+
+def _effective_part_size(total, part_size):
+    """Respeta el mínimo de S3 (5 MiB) y el máximo de 10000 partes."""
+    part_size = max(int(part_size or DEFAULT_PART_SIZE), MIN_PART_SIZE)
+    while total > part_size * MAX_MULTIPART_COUNT:
+        part_size *= 2
+    return part_size
+
+
+def _read_range(path, offset, length):
+    with open(path, "rb") as f:
+        f.seek(offset)
+        return f.read(length)
+
+
+# ============================================================
+# SUBIDAS SIN CAMBIOS
+# ============================================================
+
+def _same_metadata(remote, metadata):
+    for name, value in (metadata or {}).items():
+        name = name.lower()
+        if not name.startswith("x-amz-meta-"):
+            name = "x-amz-meta-" + name
+        if (remote.get(name) or "") != (value or ""):
+            return False
+    return True
+
+
+def candidate_part_sizes(total, part_size=None):
+    """
+    Tamaños de parte con los que pudo subirse un archivo de total bytes:
+    el de upload() y el de put_object de versiones anteriores (5 MiB).
+    """
+    return (_effective_part_size(total, part_size), MIN_PART_SIZE)
+
+
+def unchanged_etag(client, bucket, key, path, metadata=None, part_size=None,
+                   hash_path=None):
+    """
+    ETag de bucket/key si ya tiene exactamente el contenido de path (y los
+    mismos metadatos); None si hay que subir. Un HEAD + el hash local
+    (cacheado por ruta/tamaño/mtime en local_hash). hash_path: archivo
+    idéntico con la ruta por la que se cachea (el original de una copia).
+    """
+    try:
+        stat = client.stat_object(bucket, key)
+    except Exception:
+        return None  # no existe (o no se puede consultar) → subir
+
+    total = os.path.getsize(path)
+    if stat.size != total or not _same_metadata(stat.metadata or {}, metadata):
+        return None
+
+    part_sizes = candidate_part_sizes(total, part_size)
+    if local_hash.matches(hash_path or path, stat.etag, part_sizes):
+        return (stat.etag or "").strip('"')
+    return None
+
+
+def upload(client, bucket, key, path, metadata=None,
+           part_size=None, concurrency=None, progress=None, cancel_event=None):
+    """
+    Sube path a bucket/key. Devuelve el ETag resultante.
+    Lanza UploadCancelled si cancel_event se activa.
+    """
+    total = os.path.getsize(path)
+    part_size = _effective_part_size(total, part_size)
+    concurrency = max(1, int(concurrency or DEFAULT_CONCURRENCY))
+
+    lock = threading.Lock()
+    done = [0]
+
+    def advance(nbytes):
+        # También dentro de la subida en una sola parte: Cancelar corta
+        # la lectura y la petición no llega a enviarse
+        if cancel_event is not None and cancel_event.is_set():
+            raise UploadCancelled()
+        with lock:
+            done[0] += nbytes
+            current = done[0]
+        if progress:
+            progress(current, total)
+
+    if cancel_event is not None and cancel_event.is_set():
+        raise UploadCancelled()
+
+    # ---------- Archivo pequeño → una sola petición ----------
+    if total <= part_size:
+        with open(path, "rb") as f:
+            # part_size explícito → una sola parte → ETag = MD5 del archivo
+            result = client.put_object(
+                bucket, key, _ProgressReader(f, advance, CHUNK), total,
+                metadata=metadata, part_size=part_size,
+            )
+        return getattr(result, "etag", None)
+
+    # ---------- Multipart en paralelo (reanudable) ----------
+    journal = _resume_or_start(client, bucket, key, path, metadata, part_size)
+    upload_id = journal["upload_id"]
+    part_size = journal["part_size"]
+
+    count = (total + part_size - 1) // part_size
+    stop = threading.Event()
+    journal_lock = threading.Lock()
+
+    completed = {int(n): etag for n, etag in journal["parts"].items()}
+    for n in completed:
+        offset = (n - 1) * part_size
+        done[0] += min(part_size, total - offset)
+    if completed and progress:
+        progress(done[0], total)
+
+    def send(part_number):
+        if stop.is_set() or (cancel_event is not None and cancel_event.is_set()):
+            raise UploadCancelled()
+        offset = (part_number - 1) * part_size
+        data = _read_range(path, offset, min(part_size, total - offset))
+        etag = client._upload_part(bucket, key, data, None, upload_id, part_number)
+
+        with journal_lock:
+            journal["parts"][str(part_number)] = etag
+            _save_journal(journal)
+
+        advance(len(data))
+        return Part(part_number, etag)
+
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as ex:
+            futures = [
+                ex.submit(send, n) for n in range(1, count + 1) if n not in completed
+            ]
+            finished, _pending = wait(futures, return_when=FIRST_EXCEPTION)
+
+            failed = [f for f in finished if f.exception() is not None]
+            if failed:
+                stop.set()
+                for f in futures:
+                    f.cancel()
+                raise failed[0].exception()
+
+        parts = [Part(int(n), etag) for n, etag in journal["parts"].items()]
+        parts.sort(key=lambda p: p.part_number)
+
+        result = client._complete_multipart_upload(bucket, key, upload_id, parts)
+        _drop_journal(bucket, key)
+        return getattr(result, "etag", None)
+
+    except UploadCancelled:
+        # Cancelación explícita → no se reanuda
+        discard(client, journal)
+        raise
+
+    # Cualquier otro error (red, caída...) deja el diario para reanudar
+
+
+def _resume_or_start(client, bucket, key, path, metadata, part_size):
+    """Diario válido para path (reanudado) o uno nuevo."""
+    fp = fingerprint(path)
+    journal = load_journal(bucket, key)
+
+    if journal:
+        same = (
+            journal.get("fingerprint") == fp and
+            journal.get("path") == os.path.abspath(path) and
+            journal.get("metadata") == (metadata or {})
+        )
+        if same:
+            try:
+                # Fuente de verdad: lo que el servidor confirma tener
+                journal["parts"] = {
+                    str(n): etag for n, etag in
+                    _server_parts(client, bucket, key, journal["upload_id"]).items()
+                }
+                _save_journal(journal)
+                return journal
+            except Exception:
+                pass  # upload expirado o abortado → empezar de nuevo
+        discard(client, journal)
+
+    headers = genheaders(metadata, None, None, None, False)
+    headers.setdefault("Content-Type", "application/octet-stream")
+
+    journal = {
+        "bucket": bucket,
+        "key": key,
+        "path": os.path.abspath(path),
+        "fingerprint": fp,
+        "metadata": metadata or {},
+        "part_size": part_size,
+        "upload_id": client._create_multipart_upload(bucket, key, headers),
+        "parts": {},
+        "created": time.time(),
+    }
+    _save_journal(journal)
+    return journal
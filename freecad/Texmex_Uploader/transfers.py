@@ -0,0 +1,210 @@
+# ============================================================
+# transfers.py → Dock "Transferencias" (cola de subidas)
+# Texmex Weavers – FreeCAD Integration
+# ============================================================
+
+import os
+import FreeCAD
+
+try:
+    import FreeCADGui
+except ImportError:
+    FreeCADGui = None
+
+try:
+    from PySide6 import QtWidgets, QtCore
+except ImportError:
+    from PySide2 import QtWidgets, QtCore
+
+from common import show_popup
+import upload_queue
+from upload_queue import get_queue, FINISHED_STATES, RUNNING
+
+DOCK_OBJECT_NAME = "TexmexTransfersDock"
+
+COLUMNS = ["Archivo", "Destino", "Estado", "Progreso", "Velocidad"]
+
+
+def _mb(nbytes):
+    return nbytes / (1024 * 1024)
+
+
+# ============================================================
+# WIDGET
+# ============================================================
+
+class TransfersWidget(QtWidgets.QWidget):
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+
+        self.queue = get_queue()
+        self._rows = {}
+
+        layout = QtWidgets.QVBoxLayout(self)
+
+        self.table = QtWidgets.QTableWidget(0, len(COLUMNS))
+        self.table.setHorizontalHeaderLabels(COLUMNS)
+        self.table.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self.table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        layout.addWidget(self.table)
+
+        self.summary = QtWidgets.QLabel("")
+        self.summary.setStyleSheet("color: gray;")
+        layout.addWidget(self.summary)
+
+        buttons = QtWidgets.QHBoxLayout()
+        self.btn_cancel = QtWidgets.QPushButton("Cancelar")
+        self.btn_clear = QtWidgets.QPushButton("Limpiar terminadas")
+        buttons.addWidget(self.btn_cancel)
+        buttons.addWidget(self.btn_clear)
+        layout.addLayout(buttons)
+
+        self.btn_cancel.clicked.connect(self._on_cancel_clicked)
+        self.btn_clear.clicked.connect(self._on_clear_clicked)
+        self.queue.job_changed.connect(self._on_job_changed)
+
+        for job in self.queue.jobs:
+            self._on_job_changed(job)
+
+    # ----------------------------------------------------------
+    # Filas
+    # ----------------------------------------------------------
+    def _row_for(self, job):
+        row = self._rows.get(job.id)
+        if row is None:
+            row = self.table.rowCount()
+            self.table.insertRow(row)
+            for col in range(len(COLUMNS)):
+                self.table.setItem(row, col, QtWidgets.QTableWidgetItem(""))
+            self.table.item(row, 0).setData(QtCore.Qt.UserRole, job.id)
+            self._rows[job.id] = row
+        return row
+
+    def _on_job_changed(self, job):
+        row = self._row_for(job)
+
+        state = job.state
+        if job.cancel_event.is_set() and state not in FINISHED_STATES:
+            state = "cancelando…"
+        elif job.attempts > 1 and state not in FINISHED_STATES:
+            state = f"{state} (intento {job.attempts})"
+        elif job.state == upload_queue.FAILED:
+            state = f"error: {job.error}"
+        elif job.state == upload_queue.DONE and job.unchanged:
+            state = "sin cambios"
+
+        percent = 100.0 * job.done / job.total if job.total else 100.0
+        speed = f"{_mb(job.speed()):.1f} MB/s" if job.started else ""
+
+        self.table.item(row, 0).setText(os.path.basename(job.source))
+        self.table.item(row, 1).setText(f"{job.bucket}/{job.key}")
+        self.table.item(row, 2).setText(state)
+        self.table.item(row, 3).setText(
+            f"{percent:.0f}%  ({_mb(job.done):.1f} / {_mb(job.total):.1f} MB)"
+        )
+        self.table.item(row, 4).setText(speed)
+
+        self._update_summary()
+
+    def _update_summary(self):
+        running = [j for j in self.queue.jobs if j.state == RUNNING]
+        pending = self.queue.active_count() - len(running)
+        speed = sum(j.speed() for j in running)
+        self.summary.setText(
+            f"Subiendo: {len(running)}   En cola: {pending}   "
+            f"Total: {_mb(speed):.1f} MB/s"
+        )
+
+    def _rebuild(self):
+        self.table.setRowCount(0)
+        self._rows = {}
+        for job in self.queue.jobs:
+            self._on_job_changed(job)
+        self._update_summary()
+
+    # ----------------------------------------------------------
+    # Botones
+    # ----------------------------------------------------------
+    def _selected_jobs(self):
+        ids = set()
+        for item in self.table.selectedItems():
+            ids.add(self.table.item(item.row(), 0).data(QtCore.Qt.UserRole))
+        return [j for j in self.queue.jobs if j.id in ids]
+
+    def _on_cancel_clicked(self):
+        jobs = self._selected_jobs()
+        if not jobs:
+            show_popup("Atención", "Selecciona una transferencia.")
+            return
+        for job in jobs:
+            self.queue.cancel(job)
+
+    def _on_clear_clicked(self):
+        self.queue.clear_finished()
+        self._rebuild()
+
+
+# ============================================================
+# DOCK
+# ============================================================
+
+def show_transfers_dock():
+    """Muestra (o crea) el dock de transferencias."""
+    if not FreeCADGui:
+        return None
+
+    mw = FreeCADGui.getMainWindow()
+
+    existing = mw.findChild(QtWidgets.QDockWidget, DOCK_OBJECT_NAME)
+    if existing:
+        existing.show()
+        return existing
+
+    dock = QtWidgets.QDockWidget("Transferencias", mw)
+    dock.setObjectName(DOCK_OBJECT_NAME)
+    dock.setAllowedAreas(QtCore.Qt.BottomDockWidgetArea | QtCore.Qt.RightDockWidgetArea)
+    dock.setWidget(TransfersWidget(dock))
+
+    mw.addDockWidget(QtCore.Qt.BottomDockWidgetArea, dock)
+    dock.show()
+    return dock
+
+
+def enqueue_upload(path, key, metadata=None, bucket=None, on_done=None):
+    """Encola la subida y muestra el dock. Devuelve el UploadJob o None."""
+    try:
+        job = get_queue().submit(path, key, metadata, bucket, on_done=on_done)
+    except Exception as e:
+        FreeCAD.Console.PrintError(f"No se pudo encolar {key}: {e}\n")
+        show_popup("Error", f"No se pudo encolar la subida:\n{e}",
+                   QtWidgets.QMessageBox.Critical)
+        return None
+
+    show_transfers_dock()
+    return job
+
+
+# ============================================================
+# COMMAND
+# ============================================================
+
+class OpenTransfersCmd:
+
+    def GetResources(self):
+        icon = os.path.join(os.path.dirname(__file__), "Resources/Icons/cloud.svg")
+        return {
+            "Pixmap": icon,
+            "MenuText": "Transferencias",
+            "ToolTip": "Muestra las subidas en curso y terminadas"
+        }
+
+    def Activated(self):
+        dock = show_transfers_dock()
+        if dock:
+            dock.raise_()
+
+    def IsActive(self):
+        return True
@@ -0,0 +1,394 @@
+# ============================================================
+# upload_queue.py → Cola de subidas en segundo plano
+# Texmex Weavers – FreeCAD Integration
+# ============================================================
+#
+# Los comandos de subida encolan un trabajo y vuelven de inmediato:
+#   - pool acotado de QUEUE_WORKERS hilos
+#   - estado por trabajo (pendiente / subiendo / completado / error /
+#     cancelado), bytes, velocidad, intentos
+#   - reintentos con espera creciente (la subida multipart se reanuda
+#     desde las partes ya enviadas, ver transfer.py)
+#   - el archivo se copia a una bandeja de salida al encolar: el usuario
+#     puede seguir guardando el documento mientras se sube
+#   - on_done(job) se ejecuta en el hilo GUI (escribir Base_etag, etc.)
+#   - si el servidor ya tiene el mismo contenido, job.unchanged = True
+#
+# El dock "Transferencias" (transfers.py) escucha job_changed.
+#
+# Un trabajo con error definitivo no se pierde: si es multipart, su
+# diario (transfer.py) lo reanuda al arrancar; si no, se anota en
+# upload_failed.json y resume_failed() lo reintenta al arrancar.
+
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import FreeCAD
+
+try:
+    from PySide6 import QtCore
+except ImportError:
+    from PySide2 import QtCore
+
+from config_storage import get_data_dir
+
+# Subidas simultáneas (cada una usa además sus propios hilos de partes)
+QUEUE_WORKERS = 2
+
+# Reintentos ante errores de red (además del primer intento)
+MAX_RETRIES = 3
+RETRY_BASE_SECONDS = 2
+
+# Segundos mínimos entre notificaciones de progreso de un trabajo
+PROGRESS_INTERVAL = 0.2
+
+PENDING = "pendiente"
+RUNNING = "subiendo"
+DONE = "completado"
+FAILED = "error"
+CANCELLED = "cancelado"
+
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+FAILED_FILENAME = "upload_failed.json"
+
+
+class UploadJob:
+    """Un archivo a subir y su estado (lo lee el dock desde el hilo GUI)."""
+
+    def __init__(self, path, key, metadata, bucket, on_done=None):
+        self.id = uuid.uuid4().hex
+        self.source = path
+        self.path = path
+        self.key = key
+        self.metadata = metadata or {}
+        self.bucket = bucket
+        self.on_done = on_done
+
+        st = os.stat(path)
+        self.state = PENDING
+        self.total = st.st_size
+        # Para saber si el original cambió después de encolar
+        self.source_mtime = st.st_mtime_ns
+        self.done = 0
+        self.attempts = 0
+        self.etag = None
+        self.unchanged = False
+        self.error = ""
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+
+        self.cancel_event = threading.Event()
+        self._last_report = 0.0
+
+    @property
+    def name(self):
+        return os.path.basename(self.key)
+
+    def source_unchanged(self):
+        """El original sigue siendo el archivo que se encoló."""
+        try:
+            st = os.stat(self.source)
+        except OSError:
+            return False
+        return (st.st_size, st.st_mtime_ns) == (self.total, self.source_mtime)
+
+    def speed(self):
+        """Bytes por segundo del intento actual (o del total si terminó)."""
+        if not self.started:
+            return 0.0
+        end = self.finished or time.time()
+        return self.done / max(end - self.started, 0.001)
+
+
+class UploadQueue(QtCore.QObject):
+    # Emitidas desde hilos de trabajo → llegan en cola al hilo GUI
+    job_changed = QtCore.Signal(object)
+    _job_finished = QtCore.Signal(object)
+
+    def __init__(self, workers=QUEUE_WORKERS):
+        super().__init__()
+        self.jobs = []
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self._job_finished.connect(self._on_job_finished)
+
+    # ----------------------------------------------------------
+    # API
+    # ----------------------------------------------------------
+    def submit(self, path, key, metadata=None, bucket=None, on_done=None):
+        """
+        Encola la subida de path → bucket/key. Devuelve el UploadJob.
+        El archivo se copia antes de volver (instantánea).
+        """
+        import storage
+
+        job = UploadJob(path, key, metadata, bucket or storage.BUCKET_MODEL, on_done=on_done)
+        job.path = _snapshot(path, job.id)
+
+        self.jobs.append(job)
+        self.job_changed.emit(job)
+        self._executor.submit(self._run, job)
+        return job
+
+    def cancel(self, job):
+        if job.state in FINISHED_STATES:
+            return
+        # Un trabajo pendiente lo descarta _run al arrancar
+        job.cancel_event.set()
+        self.job_changed.emit(job)
+
+    def clear_finished(self):
+        self.jobs = [j for j in self.jobs if j.state not in FINISHED_STATES]
+
+    def active_count(self):
+        return len([j for j in self.jobs if j.state not in FINISHED_STATES])
+
+    # ----------------------------------------------------------
+    # Hilo de trabajo
+    # ----------------------------------------------------------
+    def _run(self, job):
+        import transfer
+        from storage import _upload_object
+
+        def progress(done, _total):
+            job.done = done
+            now = time.monotonic()
+            if now - job._last_report >= PROGRESS_INTERVAL:
+                job._last_report = now
+                self.job_changed.emit(job)
+
+        while True:
+            if job.cancel_event.is_set():
+                job.state = CANCELLED
+                break
+
+            job.attempts += 1
+            job.state = RUNNING
+            job.started = time.time()
+            job.done = 0
+            self.job_changed.emit(job)
+
+            try:
+                job.etag = _upload_object(
+                    job.path, job.key, job.metadata, job.bucket,
+                    progress=progress, cancel_event=job.cancel_event,
+                    on_unchanged=lambda _etag: setattr(job, "unchanged", True),
+                    hash_path=_hash_path(job)
+                )
+                job.state = DONE
+                break
+
+            except transfer.UploadCancelled:
+                job.state = CANCELLED
+                break
+
+            except Exception as e:
+                job.error = str(e)
+                if job.attempts > MAX_RETRIES:
+                    job.state = FAILED
+                    break
+
+                FreeCAD.Console.PrintWarning(
+                    f"Subida de {job.name} falló ({e}); reintento {job.attempts}/{MAX_RETRIES}\n"
+                )
+                job.state = PENDING
+                self.job_changed.emit(job)
+                job.cancel_event.wait(RETRY_BASE_SECONDS ** job.attempts)
+
+        job.finished = time.time()
+
+        # Con error definitivo la copia se conserva para reintentarla
+        # en el próximo arranque (diario multipart o upload_failed.json)
+        if job.state == FAILED:
+            _remember_failed(job)
+        else:
+            _discard_snapshot(job.path, job.source)
+
+        self._job_finished.emit(job)
+
+    # ----------------------------------------------------------
+    # Hilo GUI
+    # ----------------------------------------------------------
+    def _on_job_finished(self, job):
+        if job.state == DONE and not job.unchanged:
+            FreeCAD.Console.PrintMessage(f"Subido: {job.key} (ETag {job.etag})\n")
+        elif job.state == FAILED:
+            FreeCAD.Console.PrintError(f"No se pudo subir {job.key}: {job.error}\n")
+
+        self.job_changed.emit(job)
+
+        if job.on_done is not None:
+            try:
+                job.on_done(job)
+            except Exception as e:
+                FreeCAD.Console.PrintError(f"Error tras subir {job.key}: {e}\n")
+
+
+# ============================================================
+# BANDEJA DE SALIDA (instantáneas de los archivos encolados)
+# ============================================================
+
+def get_outbox_dir():
+    return get_data_dir("outbox")
+
+
+def _snapshot(path, job_id):
+    folder = os.path.join(get_outbox_dir(), job_id)
+    os.makedirs(folder, exist_ok=True)
+    copy = os.path.join(folder, os.path.basename(path))
+    shutil.copy2(path, copy)
+    return copy
+
+
+def _hash_path(job):
+    """
+    Ruta por la que se cachea el hash (local_hash): la del original si
+    no cambió desde que se copió, así el caché sirve entre trabajos; si
+    cambió, la de la copia.
+    """
+    return job.source if job.source_unchanged() else job.path
+
+
+def _discard_snapshot(path, source):
+    if path == source:
+        return
+    shutil.rmtree(os.path.dirname(path), ignore_errors=True)
+
+
+def cleanup_outbox(keep_paths=()):
+    """
+    Borra instantáneas que ya no referencia ningún diario de subida ni
+    upload_failed.json.
+    """
+    keep_paths = list(keep_paths) + [e["path"] for e in failed_uploads()]
+    keep = {os.path.normcase(os.path.abspath(p)) for p in keep_paths}
+    base = get_outbox_dir()
+
+    for name in os.listdir(base):
+        folder = os.path.join(base, name)
+        if not os.path.isdir(folder):
+            continue
+        files = [os.path.join(folder, f) for f in os.listdir(folder)]
+        if any(os.path.normcase(os.path.abspath(f)) in keep for f in files):
+            continue
+        if _queue is not None and any(
+            os.path.dirname(j.path) == folder and j.state not in FINISHED_STATES
+            for j in _queue.jobs
+        ):
+            continue
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+# ============================================================
+# SUBIDAS FALLIDAS (se reintentan al arrancar)
+# ============================================================
+
+_failed_lock = threading.Lock()
+
+
+def get_failed_path():
+    return os.path.join(get_data_dir(), FAILED_FILENAME)
+
+
+def _load_failed():
+    """Con _failed_lock."""
+    try:
+        with open(get_failed_path(), "r", encoding="utf-8") as f:
+            entries = json.load(f)
+    except (OSError, ValueError):
+        return []
+    return entries if isinstance(entries, list) else []
+
+
+def _write_failed(entries):
+    """Con _failed_lock; atómico."""
+    path = get_failed_path()
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entries, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, path)
+    except OSError as e:
+        FreeCAD.Console.PrintWarning(f"No se pudo guardar {FAILED_FILENAME}: {e}\n")
+
+
+def _remember_failed(job):
+    """Anota job si ningún diario multipart lo va a reanudar."""
+    import transfer
+
+    journal = transfer.load_journal(job.bucket, job.key)
+    if journal and journal.get("path") == os.path.abspath(job.path):
+        return
+
+    with _failed_lock:
+        entries = [e for e in _load_failed() if e.get("key") != job.key or
+                   e.get("bucket") != job.bucket]
+        entries.append({
+            "id": job.id, "path": job.path, "source": job.source, "key": job.key,
+            "metadata": job.metadata, "bucket": job.bucket, "error": job.error,
+            "t": time.time(),
+        })
+        _write_failed(entries)
+
+
+def _forget_failed(entry_id):
+    with _failed_lock:
+        entries = _load_failed()
+        kept = [e for e in entries if e.get("id") != entry_id]
+        if len(kept) != len(entries):
+            _write_failed(kept)
+
+
+def failed_uploads():
+    """Subidas fallidas pendientes de reintento."""
+    with _failed_lock:
+        return _load_failed()
+
+
+def resume_failed():
+    """
+    Reintenta las subidas anotadas en upload_failed.json (hilo de fondo
+    al arrancar). Las que vuelven a fallar siguen anotadas.
+    """
+    from storage import _upload_object
+
+    for entry in failed_uploads():
+        key = entry.get("key")
+        path = entry.get("path") or ""
+        if not os.path.isfile(path):
+            FreeCAD.Console.PrintError(
+                f"Subida de {key} descartada: ya no existe su copia ({path}).\n"
+            )
+            _forget_failed(entry.get("id"))
+            continue
+
+        try:
+            _upload_object(path, key, entry.get("metadata"), entry.get("bucket"))
+        except Exception as e:
+            FreeCAD.Console.PrintError(f"No se pudo reintentar {key}: {e}\n")
+            continue
+
+        FreeCAD.Console.PrintMessage(f"Subida fallida reintentada y completada: {key}\n")
+        _forget_failed(entry.get("id"))
+        _discard_snapshot(path, entry.get("source"))
+
+
+# ============================================================
+# INSTANCIA COMPARTIDA
+# ============================================================
+
+_queue = None
+
+
+def get_queue():
+    """Cola compartida. Crear SIEMPRE desde el hilo GUI."""
+    global _queue
+    if _queue is None:
+        _queue = UploadQueue()
+    return _queue
@@ -0,0 +1,89 @@
+# ============================================================
+# support.py → Entorno común de las pruebas (sin FreeCAD ni Qt)
+# Texmex Weavers – FreeCAD Integration
+# ============================================================
+#
+# Importarlo ANTES que cualquier módulo del workbench: pone el módulo y
+# tools/ en sys.path y manda config.xml y la carpeta de datos a un
+# directorio temporal (TEXMEX_CONFIG / TEXMEX_DATA_DIR), para no tocar
+# la configuración real.
+#
+# FakeS3TestCase: clase base de las pruebas que necesitan servidor
+# (tools/fake_s3.py, en proceso; uno por clase de prueba).
+
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+TESTS = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(TESTS)
+MOD_PATH = os.path.join(ROOT, "freecad", "Texmex_Uploader")
+TOOLS = os.path.join(ROOT, "tools")
+
+for _path in (TOOLS, MOD_PATH):
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
+
+WORKDIR = tempfile.mkdtemp(prefix="texmex_tests_")
+atexit.register(shutil.rmtree, WORKDIR, True)
+
+os.environ["TEXMEX_CONFIG"] = os.path.join(WORKDIR, "config.xml")
+os.environ["TEXMEX_DATA_DIR"] = os.path.join(WORKDIR, "data")
+
+
+def write_file(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+def multipart_etag(data, part_size):
+    """ETag S3 de data subido en partes de part_size."""
+    import hashlib
+    digests = b"".join(hashlib.md5(data[i:i + part_size]).digest()
+                       for i in range(0, len(data), part_size))
+    return f"{hashlib.md5(digests).hexdigest()}-{(len(data) + part_size - 1) // part_size}"
+
+
+class FakeS3TestCase(unittest.TestCase):
+    """
+    Arranca un servidor S3 falso para la clase (cls.server, cls.client).
+      BUCKETS → buckets que se crean al arrancar
+      CONFIG  → (bucket_model, bucket_svg): config.xml apunta al servidor
+                y cls.client es storage.get_client(); si no, un Minio suelto
+    """
+
+    BUCKETS = ()
+    CONFIG = None
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        from fake_s3 import FakeS3Server
+        cls.server = FakeS3Server().start()
+
+        if cls.CONFIG:
+            import config_storage
+            import storage
+            config_storage.save_minio_config(cls.server.endpoint, "test", "test", *cls.CONFIG)
+            cls.client = storage.get_client()
+        else:
+            from minio import Minio
+            cls.client = Minio(cls.server.endpoint, access_key="test", secret_key="test",
+                               secure=False)
+
+        for bucket in cls.BUCKETS:
+            cls.client.make_bucket(bucket)
+
+    @classmethod
+    def tearDownClass(cls):
+        # Registros del diario pendientes, antes de parar el servidor
+        journal = sys.modules.get("journal")
+        if journal is not None:
+            journal.flush()
+        cls.server.stop()
+        super().tearDownClass()
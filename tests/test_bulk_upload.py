@@ -0,0 +1,64 @@
+# ============================================================
+# test_bulk_upload.py → Carga masiva: reporte, dry-run y omitidos
+# Texmex Weavers – FreeCAD Integration
+# ============================================================
+
+import os
+import unittest
+
+import support
+
+import bulk_upload
+
+
+class BulkUploadTest(support.FakeS3TestCase):
+
+    BUCKETS = ("masiva",)
+    CONFIG = ("masiva", "masiva-svg")
+
+    def setUp(self):
+        self.root = os.path.join(support.WORKDIR, "legacy")
+        for rel in ("Telares/Motores/a.FCStd", "Telares/b.FCStd", "c.FCStd"):
+            support.write_file(os.path.join(self.root, *rel.split("/")), b"x" * 1000)
+
+    def _run(self, name, **kwargs):
+        manifest = os.path.join(support.WORKDIR, f"{name}.jsonl")
+        return bulk_upload.bulk_upload(self.root, bucket="masiva", manifest_path=manifest,
+                                       log=lambda text: None, **kwargs)
+
+    def _keys(self):
+        return sorted(o.object_name for o in self.client.list_objects("masiva", recursive=True)
+                      if not o.object_name.startswith("_journal/"))
+
+    def test_dry_run_uploads_nothing(self):
+        report = self._run("dry", dry_run=True)
+        self.assertEqual((report["would_upload"], report["would_upload_bytes"]), (3, 3000))
+        self.assertEqual((report["uploaded"], report["bytes"], report["mb_per_s"]), (0, 0, 0))
+        self.assertEqual(self._keys(), [])
+
+    def test_upload_then_skip_unchanged(self):
+        report = self._run("real")
+        self.assertEqual((report["uploaded"], report["bytes"], report["failed"]), (3, 3000, 0))
+        self.assertEqual(self._keys(), ["Telares/Motores/a.FCStd", "Telares/b.FCStd", "c.FCStd"])
+
+        # Otro manifiesto: se comparan ETags con el listado, sin subir
+        report = self._run("again")
+        self.assertEqual((report["uploaded"], report["skipped"]), (0, 3))
+
+        # Mismo manifiesto: ni siquiera se leen los archivos
+        items = []
+        report = self._run("real", on_item=items.append)
+        self.assertEqual((report["uploaded"], report["resumed"]), (0, 3))
+        self.assertEqual(sorted((i["key"], i["status"]) for i in items),
+                         [("Telares/Motores/a.FCStd", "resumed"),
+                          ("Telares/b.FCStd", "resumed"), ("c.FCStd", "resumed")])
+
+    def test_on_item_reports_every_file(self):
+        items = []
+        self._run("items", dry_run=True, on_item=items.append)
+        self.assertEqual(len(items), 3)
+        self.assertTrue(all(i["status"] == "dry-run" and i["size"] == 1000 for i in items))
+
+
+if __name__ == "__main__":
+    unittest.main()
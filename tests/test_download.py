@@ -0,0 +1,80 @@
+# ============================================================
+# test_download.py → Verificación de ETags y descarga por rangos
+# Texmex Weavers – FreeCAD Integration
+# ============================================================
+
+import hashlib
+import os
+import unittest
+
+import support
+
+import download
+import storage
+import transfer
+
+MIB = 1024 * 1024
+
+
+class VerifyTest(unittest.TestCase):
+
+    def setUp(self):
+        self._part_mb = storage.UPLOAD_PART_MB
+        # 11 MiB en partes de 6 MiB → "-2"; 8 y 10 MiB también dan 2 partes
+        self.data = os.urandom(11 * MIB)
+        self.path = support.write_file(os.path.join(support.WORKDIR, "verify.bin"), self.data)
+
+    def tearDown(self):
+        storage.UPLOAD_PART_MB = self._part_mb
+
+    def test_single_part(self):
+        etag = hashlib.md5(self.data).hexdigest()
+        self.assertIs(download.check(self.path, etag, len(self.data)), True)
+        self.assertIs(download.check(self.path, "0" * 32, len(self.data)), False)
+        self.assertFalse(download.verify(self.path, etag, len(self.data) + 1))
+
+    def test_multipart_known_part_size(self):
+        etag = support.multipart_etag(self.data, 8 * MIB)
+        self.assertIs(download.check(self.path, etag, len(self.data)), True)
+
+    def test_multipart_configured_part_size_first(self):
+        storage.UPLOAD_PART_MB = 6
+        etag = support.multipart_etag(self.data, 6 * MIB)
+        sizes = download.candidate_part_sizes(etag, len(self.data))
+        self.assertEqual(sizes[0], 6 * MIB)
+        self.assertEqual(len(sizes), len(set(sizes)))
+        self.assertIs(download.check(self.path, etag, len(self.data)), True)
+
+    def test_multipart_unknown_part_size_is_not_corruption(self):
+        # Subido con 6 MiB, que no está en la lista ni configurado:
+        # otros tamaños dan las mismas 2 partes pero no lo reproducen
+        storage.UPLOAD_PART_MB = 16
+        etag = support.multipart_etag(self.data, 6 * MIB)
+        self.assertNotIn(6 * MIB, download.candidate_part_sizes(etag, len(self.data)))
+        self.assertIsNone(download.check(self.path, etag, len(self.data)))
+        self.assertTrue(download.verify(self.path, etag, len(self.data)))
+
+    def test_non_md5_etag_checks_size_only(self):
+        self.assertIsNone(download.check(self.path, "kms-opaque", len(self.data)))
+        self.assertFalse(download.verify(self.path, "kms-opaque", 1))
+
+
+class DownloadTest(support.FakeS3TestCase):
+
+    BUCKETS = ("models",)
+
+    def test_download_multipart_uploaded_with_other_part_size(self):
+        data = os.urandom(11 * MIB)
+        src = support.write_file(os.path.join(support.WORKDIR, "src.bin"), data)
+        etag = transfer.upload(self.client, "models", "a/pieza.FCStd", src, part_size=6 * MIB)
+        self.assertTrue(etag.endswith("-2"))
+
+        dest = os.path.join(support.WORKDIR, "dest.FCStd")
+        download.download(self.client, "models", "a/pieza.FCStd", dest, part_size=4 * MIB)
+        with open(dest, "rb") as f:
+            self.assertEqual(f.read(), data)
+        self.assertFalse(os.path.exists(dest + ".part"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+# ============================================================
+# test_etag_index.py → Índice ETag → ruta: búsqueda y re-escaneo
+# Texmex Weavers – FreeCAD Integration
+# ============================================================
+
+import unittest
+
+import support
+
+import etag_index
+
+
+class _RecordWhileListing:
+    """Cliente que registra una subida a mitad del listado."""
+
+    def __init__(self, client, on_first):
+        self.client = client
+        self.on_first = on_first
+
+    def list_objects(self, *args, **kwargs):
+        for n, obj in enumerate(self.client.list_objects(*args, **kwargs)):
+            if n == 0:
+                self.on_first()
+            yield obj
+
+
+class EtagIndexTest(support.FakeS3TestCase):
+
+    BUCKETS = ("indice",)
+
+    def test_refresh_purges_deleted_objects(self):
+        self.server.seed("indice", "a/uno.FCStd", b"uno")
+        self.server.seed("indice", "a/dos.FCStd", b"dos")
+        etag_index.refresh(self.client, "indice")
+        etag = self.client.stat_object("indice", "a/dos.FCStd").etag
+        self.assertEqual(etag_index.lookup("indice", etag), "a/dos.FCStd")
+
+        self.client.remove_object("indice", "a/dos.FCStd")
+        etag_index.refresh(self.client, "indice")
+        self.assertIsNone(etag_index.lookup("indice", etag))
+
+    def test_record_during_refresh_survives_the_purge(self):
+        self.server.seed("indice", "b/viejo.FCStd", b"viejo")
+        etag_index.refresh(self.client, "indice")
+
+        # Subida de otro hilo mientras se lista (aún no está en el listado)
+        client = _RecordWhileListing(
+            self.client, lambda: etag_index.record("indice", "b/nuevo.FCStd", '"abc123"', 3))
+        etag_index.refresh(client, "indice")
+        self.assertEqual(etag_index.lookup("indice", "abc123"), "b/nuevo.FCStd")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+# ============================================================
+# test_journal.py → Diario de cambios: nombres, cursor, compactación
+# Texmex Weavers – FreeCAD Integration
+# ============================================================
+
+import json
+import os
+import time
+import unittest
+
+import support
+
+import config_storage
+import journal
+import storage
+
+DAY = 86400
+
+
+def _segment(entries):
+    return "".join(json.dumps(e) + "\n" for e in entries).encode("utf-8")
+
+
+def _put(key, etag, t, op=journal.PUT):
+    return {"t": t, "op": op, "k": key, "e": etag, "c": "otro"}
+
+
+class SegmentNameTest(unittest.TestCase):
+
+    def test_segment_time_round_trip(self):
+        ts = 1760000000.123456
+        key = journal.segment_key(ts, client="pc-1")
+        self.assertTrue(key.startswith(journal.JOURNAL_PREFIX + "20251009/"))
+        self.assertAlmostEqual(journal._segment_time(key), ts, places=5)
+
+    def test_names_sort_by_time(self):
+        keys = [journal.segment_key(t, client=c)
+                for t, c in [(1760000000.5, "b"), (1760000000.25, "z"), (1760003600, "a")]]
+        self.assertEqual(sorted(keys), [keys[1], keys[0], keys[2]])
+        # _position va antes de cualquier segmento de ese instante
+        self.assertLess(journal._position(1760000000.25), keys[1])
+
+    def test_compact_sorts_after_its_day(self):
+        day = journal.JOURNAL_PREFIX + "20251009/"
+        compact = day + journal.COMPACT_NAME
+        self.assertGreater(compact, journal.segment_key(1760054399.9, client="zz"))
+        self.assertEqual(journal._segment_time(compact),
+                         journal._segment_time(journal.segment_key(1760054400, client="a")))
+
+    def test_foreign_names(self):
+        self.assertIsNone(journal._segment_time(journal.JOURNAL_PREFIX + "notas.txt"))
+        self.assertIsNone(journal._segment_time(journal.JOURNAL_PREFIX + "2025/x/y.jsonl"))
+
+
+class JournalServerTest(support.FakeS3TestCase):
+
+    CONFIG = ("diario", "diario-svg")
+
+    buckets = 0
+
+    def setUp(self):
+        JournalServerTest.buckets += 1
+        self.bucket = f"diario-{JournalServerTest.buckets}"
+        self.client.make_bucket(self.bucket)
+
+    def _sync(self):
+        applied = []
+        journal.sync(self.client, self.bucket, dispatch=applied.extend)
+        return {c["key"]: c for c in applied}
+
+    def test_cursor_only_returns_new_segments(self):
+        now = time.time()
+        self.server.seed(self.bucket, journal.segment_key(now - 10, "a"),
+                         _segment([_put("x.FCStd", "e1", now - 10)]))
+        self.assertEqual(set(self._sync()), {"x.FCStd"})
+        self.assertEqual(self._sync(), {})
+
+        self.server.seed(self.bucket, journal.segment_key(now - 5, "b"),
+                         _segment([_put("y.FCStd", "e2", now - 5)]))
+        self.assertEqual(set(self._sync()), {"y.FCStd"})
+
+    def test_latest_record_wins_over_segment_order(self):
+        now = time.time()
+        # Segmento reintentado: escrito después, pero con un registro más viejo
+        self.server.seed(self.bucket, journal.segment_key(now - 20, "a"),
+                         _segment([_put("x.FCStd", "nuevo", now - 20)]))
+        self.server.seed(self.bucket, journal.segment_key(now - 10, "b"),
+                         _segment([_put("x.FCStd", "viejo", now - 60)]))
+        self.assertEqual(self._sync()["x.FCStd"]["etag"], "nuevo")
+
+    def test_compact_keeps_latest_per_object_and_expires_old_days(self):
+        now = time.time()
+        old = now - 5 * DAY
+        expired = now - (journal.RETENTION_DAYS + 2) * DAY
+        recent = now - 60
+        s1 = journal.segment_key(old, "a")
+        s2 = journal.segment_key(old + 1, "b")
+        s3 = journal.segment_key(expired, "a")
+        s4 = journal.segment_key(recent, "a")
+        self.server.seed(self.bucket, s1, _segment([_put("x.FCStd", "e2", old + 5),
+                                                    _put("y.FCStd", "y1", old)]))
+        self.server.seed(self.bucket, s2, _segment([_put("x.FCStd", "e1", old + 1)]))
+        self.server.seed(self.bucket, s3, _segment([_put("z.FCStd", "z1", expired)]))
+        self.server.seed(self.bucket, s4, _segment([_put("w.FCStd", "w1", recent)]))
+
+        stats = journal.compact(self.client, self.bucket, now=now)
+        self.assertEqual(stats, {"compacted": 1, "removed": 3})
+
+        keys = sorted(o.object_name for o in self.client.list_objects(
+            self.bucket, prefix=journal.JOURNAL_PREFIX, recursive=True))
+        compact_key = s1.rsplit("/", 1)[0] + "/" + journal.COMPACT_NAME
+        self.assertEqual(keys, sorted([compact_key, s4]))
+
+        entries = journal._read_segment(self.client, self.bucket, compact_key)
+        self.assertEqual({e["k"]: e["e"] for e in entries}, {"x.FCStd": "e2", "y.FCStd": "y1"})
+        self.assertEqual([e["t"] for e in entries], sorted(e["t"] for e in entries))
+
+        # Compactar otra vez no cambia nada (idempotente)
+        self.assertEqual(journal.compact(self.client, self.bucket, now=now),
+                         {"compacted": 0, "removed": 0})
+
+    def test_failed_flush_keeps_records(self):
+        original = journal._write_segment
+
+        def broken(client, bucket, entries):
+            raise OSError("sin red")
+
+        journal._write_segment = broken
+        try:
+            journal.record(self.bucket, journal.PUT, "a/p.FCStd", "e1", 5)
+            journal.flush()
+        finally:
+            journal._write_segment = original
+
+        with journal._lock:
+            self.assertEqual([e["k"] for e in journal._buffers[self.bucket]], ["a/p.FCStd"])
+        with open(journal.get_pending_path(), "r", encoding="utf-8") as f:
+            self.assertIn(journal._state_id(self.bucket), json.load(f))
+
+        journal.flush()
+        self.assertFalse(os.path.exists(journal.get_pending_path()))
+        self.assertEqual(set(self._sync()), {"a/p.FCStd"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+# ============================================================
+# test_listing_snapshot.py → Último listado conocido y vista guardada
+# Texmex Weavers – FreeCAD Integration
+# ============================================================
+
+import json
+import os
+import unittest
+
+import support
+
+import listing_snapshot
+
+
+LISTING = {"folders": ["motores"], "files": [{"name": "p.FCStd", "key": "a/p.FCStd",
+                                               "size": 5, "etag": "abc"}]}
+
+
+class ListingSnapshotTest(unittest.TestCase):
+
+    def setUp(self):
+        self._reset()
+        try:
+            os.remove(listing_snapshot.get_snapshot_path())
+        except OSError:
+            pass
+
+    def _reset(self):
+        # Cancela el guardado pendiente y olvida lo que hay en memoria
+        listing_snapshot.save()
+        listing_snapshot._data = None
+        listing_snapshot._dirty = False
+
+    def test_record_and_get(self):
+        listing_snapshot.record("modelos", "a/", LISTING)
+        got = listing_snapshot.get("modelos", "a/")
+        self.assertEqual((got["folders"], got["files"]), (LISTING["folders"], LISTING["files"]))
+        self.assertIn("snapshot", got)
+
+        self.assertIsNone(listing_snapshot.get("modelos", "b/"))
+        self.assertIsNone(listing_snapshot.get("otro", "a/"))
+
+    def test_save_writes_and_reloads_from_disk(self):
+        listing_snapshot.record("modelos", "a/", LISTING)
+        listing_snapshot.set_view("modelos", {"b/", "a/"}, "a/")
+        listing_snapshot.save()
+        self.assertFalse(listing_snapshot._dirty)
+
+        listing_snapshot._data = None
+        self.assertEqual(listing_snapshot.get("modelos", "a/")["files"], LISTING["files"])
+        self.assertEqual(listing_snapshot.get_view("modelos"),
+                         {"expanded": ["a/", "b/"], "current": "a/"})
+
+    def test_unreadable_file_starts_empty(self):
+        support.write_file(listing_snapshot.get_snapshot_path(), b"{no es json")
+        self.assertIsNone(listing_snapshot.get("modelos", "a/"))
+        self.assertEqual(listing_snapshot.get_view("modelos"), {"expanded": [], "current": ""})
+
+    def test_same_view_does_not_schedule_a_save(self):
+        listing_snapshot.set_view("modelos", ["a/"], "a/")
+        listing_snapshot.save()
+
+        listing_snapshot.set_view("modelos", ["a/"], "a/")
+        self.assertFalse(listing_snapshot._dirty)
+        listing_snapshot.set_view("modelos", ["a/"], "")
+        self.assertTrue(listing_snapshot._dirty)
+
+    def test_prune_keeps_the_most_recent_prefixes(self):
+        self.addCleanup(setattr, listing_snapshot, "MAX_PREFIXES", listing_snapshot.MAX_PREFIXES)
+        listing_snapshot.MAX_PREFIXES = 2
+
+        data = {"listings": {
+            "s/modelos": {"a/": {"t": 1}, "b/": {"t": 4}},
+            "s/planos": {"c/": {"t": 3}, "d/": {"t": 2}},
+        }, "views": {}}
+        listing_snapshot._prune(data)
+        self.assertEqual(data["listings"], {"s/modelos": {"b/": {"t": 4}},
+                                            "s/planos": {"c/": {"t": 3}}})
+
+    def test_save_prunes_the_file(self):
+        self.addCleanup(setattr, listing_snapshot, "MAX_PREFIXES", listing_snapshot.MAX_PREFIXES)
+        listing_snapshot.MAX_PREFIXES = 1
+
+        listing_snapshot.record("modelos", "a/", LISTING)
+        listing_snapshot.record("modelos", "b/", LISTING)
+        listing_snapshot.save()
+
+        with open(listing_snapshot.get_snapshot_path(), encoding="utf-8") as f:
+            listings = json.load(f)["listings"]
+        self.assertEqual([list(p) for p in listings.values()], [["b/"]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+# ============================================================
+# test_local_hash.py → ETags locales y "sin cambios" al subir
+# Texmex Weavers – FreeCAD Integration
+# ============================================================
+
+import hashlib
+import os
+import shutil
+import unittest
+
+import support
+
+import local_hash
+import transfer
+
+MIB = 1024 * 1024
+
+
+class LocalHashTest(unittest.TestCase):
+
+    def setUp(self):
+        self.data = os.urandom(6 * MIB + 123)
+        self.path = support.write_file(os.path.join(support.WORKDIR, "hash", "a.FCStd"), self.data)
+
+    def test_etags_single_pass(self):
+        etags = local_hash.etags(self.path, (5 * MIB, 2 * MIB))
+        self.assertEqual(etags[0], hashlib.md5(self.data).hexdigest())
+        self.assertEqual(etags[5 * MIB], support.multipart_etag(self.data, 5 * MIB))
+        self.assertEqual(etags[2 * MIB], support.multipart_etag(self.data, 2 * MIB))
+        self.assertTrue(local_hash.matches(self.path, f'"{etags[0].upper()}"'))
+
+    def test_in_sync_after_mark_synced(self):
+        remote = support.multipart_etag(self.data, 5 * MIB)
+        self.assertTrue(local_hash.in_sync(self.path, remote, (5 * MIB,)))
+
+        # Guardar Base_etag cambia el archivo, pero sigue siendo lo subido
+        with open(self.path, "ab") as f:
+            f.write(b"Base_etag")
+        self.assertFalse(local_hash.in_sync(self.path, remote, (5 * MIB,)))
+        local_hash.mark_synced(self.path, remote)
+        self.assertTrue(local_hash.in_sync(self.path, f'"{remote}"', (5 * MIB,)))
+
+        # Una edición posterior ya no está sincronizada
+        with open(self.path, "ab") as f:
+            f.write(b"edit")
+        self.assertFalse(local_hash.in_sync(self.path, remote, (5 * MIB,)))
+
+
+class UnchangedEtagTest(support.FakeS3TestCase):
+
+    BUCKETS = ("models",)
+
+    def test_unchanged_uses_hash_of_original_path(self):
+        data = os.urandom(256 * 1024)
+        src = support.write_file(os.path.join(support.WORKDIR, "src", "b.FCStd"), data)
+        meta = {"x-amz-meta-revision": "1.0"}
+        etag = transfer.upload(self.client, "models", "b.FCStd", src, metadata=meta)
+
+        # Copia en la bandeja de salida (como upload_queue._snapshot)
+        copy = os.path.join(support.WORKDIR, "outbox", "job", "b.FCStd")
+        os.makedirs(os.path.dirname(copy), exist_ok=True)
+        shutil.copy2(src, copy)
+
+        self.assertEqual(transfer.unchanged_etag(self.client, "models", "b.FCStd", copy,
+                                                 metadata=meta, hash_path=src), etag)
+        rows = local_hash._connect().execute(
+            "SELECT COUNT(*) FROM hashes WHERE path = ?",
+            (os.path.normcase(os.path.abspath(src)),)).fetchone()[0]
+        self.assertGreater(rows, 0)
+
+        # Otros metadatos → hay que subir
+        self.assertIsNone(transfer.unchanged_etag(self.client, "models", "b.FCStd", copy,
+                                                  metadata={"x-amz-meta-revision": "1.01"}))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+# ============================================================
+# test_metrics.py → Percentiles del histograma de latencias
+# Texmex Weavers – FreeCAD Integration
+# ============================================================
+
+import unittest
+
+import support  # noqa: F401  (entorno de pruebas)
+
+import metrics
+
+
+class PercentileTest(unittest.TestCase):
+
+    def _stats(self, samples):
+        stats = metrics.OpStats()
+        for ms in samples:
+            stats.add(ms, 0, 0, False)
+        return stats
+
+    def test_empty(self):
+        self.assertEqual(metrics.OpStats().percentile(0.5), 0.0)
+
+    def test_bucket_upper_bound(self):
+        # 90 en la cubeta de 5 ms, 10 en la de 500 ms
+        stats = self._stats([3] * 90 + [300] * 10)
+        self.assertEqual(stats.percentile(0.50), 5.0)
+        self.assertEqual(stats.percentile(0.90), 5.0)
+        # La cota de la cubeta (500) no pasa del máximo visto
+        self.assertEqual(stats.percentile(0.95), 300.0)
+        self.assertEqual(stats.percentile(0.99), 300.0)
+
+    def test_overflow_bucket_uses_max(self):
+        stats = self._stats([1, 1, 25000.5])
+        self.assertEqual(stats.percentile(0.50), 1.0)
+        self.assertEqual(stats.percentile(0.99), 25000.5)
+
+    def test_as_dict(self):
+        stats = self._stats([10, 20, 30])
+        data = stats.as_dict()
+        self.assertEqual(data["count"], 3)
+        self.assertEqual(data["mean_ms"], 20.0)
+        self.assertEqual(data["p50_ms"], 20.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
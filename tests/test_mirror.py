@@ -0,0 +1,70 @@
+# ============================================================
+# test_mirror.py → Espejo local: prefijos, rutas y sincronización
+# Texmex Weavers – FreeCAD Integration
+# ============================================================
+
+import os
+import unittest
+
+import support
+
+import config_storage
+import mirror
+import storage
+
+
+class PrefixesTest(unittest.TestCase):
+
+    def test_parse_prefixes(self):
+        self.assertEqual(
+            mirror.parse_prefixes(["Telares Circulares/Motores", " ", "/Hilos/ ",
+                                   "Telares Circulares/Motores/"]),
+            ["Telares_Circulares/Motores/", "Hilos/"],
+        )
+
+    def test_no_prefixes_means_whole_bucket(self):
+        self.assertEqual(mirror.parse_prefixes([]), [""])
+        self.assertEqual(mirror.parse_prefixes(["", " / "]), [""])
+
+
+class LocalPathTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = os.path.join(support.WORKDIR, "espejo")
+
+    def test_inside_bucket(self):
+        self.assertEqual(mirror._local_path(self.root, "cad", "/area/maq/p.FCStd"),
+                         os.path.join(self.root, "cad", "area", "maq", "p.FCStd"))
+
+    def test_rejects_keys_outside_bucket(self):
+        for key in ("../otro/p.FCStd", "area/../../x", "", "/"):
+            with self.assertRaises(ValueError, msg=key):
+                mirror._local_path(self.root, "cad", key)
+
+
+class SyncTest(support.FakeS3TestCase):
+
+    BUCKETS = ("espejo-cad",)
+    CONFIG = ("espejo-cad", "espejo-svg")
+
+    def test_sync_downloads_and_deletes(self):
+        root = os.path.join(support.WORKDIR, "espejo-sync")
+        self.server.seed("espejo-cad", "area/a.FCStd", b"a" * 100)
+        self.server.seed("espejo-cad", "area/b.FCStd", b"b" * 50)
+        self.server.seed("espejo-cad", "otra/c.FCStd", b"c")
+
+        stats = mirror.sync(self.client, "espejo-cad", root=root, prefixes=["area/"])
+        self.assertEqual((stats["downloaded"], stats["failed"]), (2, 0))
+        with open(os.path.join(root, "espejo-cad", "area", "a.FCStd"), "rb") as f:
+            self.assertEqual(f.read(), b"a" * 100)
+        self.assertFalse(os.path.exists(os.path.join(root, "espejo-cad", "otra")))
+
+        # Segunda pasada: nada que bajar; lo borrado en el servidor se borra
+        self.client.remove_object("espejo-cad", "area/b.FCStd")
+        stats = mirror.sync(self.client, "espejo-cad", root=root, prefixes=["area/"])
+        self.assertEqual((stats["downloaded"], stats["unchanged"], stats["deleted"]), (0, 1, 1))
+        self.assertFalse(os.path.exists(os.path.join(root, "espejo-cad", "area", "b.FCStd")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+# ============================================================
+# test_model_cache.py → Caché de modelos y expulsión LRU
+# Texmex Weavers – FreeCAD Integration
+# ============================================================
+
+import os
+import time
+import unittest
+
+import support
+
+import model_cache
+
+
+class ModelCacheTest(support.FakeS3TestCase):
+
+    BUCKETS = ("cache",)
+
+    def setUp(self):
+        model_cache._setting("max_bytes")
+        self._settings = dict(model_cache._settings)
+
+    def tearDown(self):
+        model_cache._settings.update(self._settings)
+
+    def test_entry_larger_than_cap_survives_its_fetch(self):
+        model_cache._settings["max_bytes"] = 1024
+        self.server.seed("cache", "grande.FCStd", os.urandom(64 * 1024))
+
+        path = model_cache.fetch(self.client, "cache", "grande.FCStd")
+        self.assertTrue(os.path.exists(path))
+        self.assertEqual(os.path.getsize(path), 64 * 1024)
+
+    def test_evict_removes_least_recently_used_first(self):
+        model_cache._settings["fresh"] = 3600
+        paths = {}
+        for name in ("a", "b", "c"):
+            self.server.seed("cache", f"lru/{name}.FCStd", os.urandom(10 * 1024))
+            paths[name] = model_cache.fetch(self.client, "cache", f"lru/{name}.FCStd")
+
+        # "a" usada hace mucho, "b" hace poco (pasada la gracia), "c" ahora
+        old = time.time() - 10 * model_cache.EVICT_GRACE_SECONDS
+        for name, used in (("a", old), ("b", old + 1)):
+            entry = model_cache._entry_dir("cache", f"lru/{name}.FCStd")
+            meta = model_cache._read_meta(entry)
+            meta["used"] = used
+            model_cache._write_meta(entry, meta)
+
+        others = sum(model_cache._dir_size(os.path.join(model_cache.get_cache_dir(), n))
+                     for n in os.listdir(model_cache.get_cache_dir()))
+        model_cache.evict(max_bytes=others - 1)
+
+        self.assertFalse(os.path.exists(paths["a"]))
+        self.assertTrue(os.path.exists(paths["b"]))
+        self.assertTrue(os.path.exists(paths["c"]))
+
+    def test_evict_spares_a_first_fetch_in_progress(self):
+        # Carpeta recién creada por fetch(), todavía sin meta ni .lock
+        entry = model_cache._entry_dir("cache", "nuevo/p.FCStd")
+        support.write_file(os.path.join(entry, "x", "p.FCStd.part"), b"p" * 4096)
+        model_cache.evict(max_bytes=0)
+        self.assertTrue(os.path.isdir(entry))
+
+        # Otro hilo la está trayendo (lock por key)
+        old = time.time() - 10 * model_cache.EVICT_GRACE_SECONDS
+        os.utime(entry, (old, old))
+        with model_cache._key_lock(entry):
+            model_cache.evict(max_bytes=0)
+        self.assertTrue(os.path.isdir(entry))
+
+        # Abandonada hace rato → se puede expulsar
+        model_cache.evict(max_bytes=0)
+        self.assertFalse(os.path.isdir(entry))
+
+
+if __name__ == "__main__":
+    unittest.main()
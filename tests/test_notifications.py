@@ -0,0 +1,145 @@
+# ============================================================
+# test_notifications.py → Eventos de MinIO: lectura, aplicación y lotes
+# Texmex Weavers – FreeCAD Integration
+# ============================================================
+
+import queue
+import threading
+import time
+import unittest
+
+import support
+
+import etag_index
+import notifications
+import revision_index
+import storage
+
+
+def _record(name, key, bucket="modelos", etag='"abc"', size=3, metadata=None):
+    obj = {"key": key, "eTag": etag, "size": size}
+    if metadata is not None:
+        obj["userMetadata"] = metadata
+    return {"eventName": name, "s3": {"bucket": {"name": bucket}, "object": obj}}
+
+
+def _change(key, event=notifications.CREATED, bucket="modelos", etag="abc", size=3,
+            metadata=None):
+    return {"bucket": bucket, "key": key, "event": event, "etag": etag,
+            "size": size, "metadata": metadata or {}}
+
+
+class ParseEventTest(unittest.TestCase):
+
+    def test_created_and_removed_records(self):
+        changes = notifications.parse_event({"Records": [
+            _record("s3:ObjectCreated:Put", "a/pieza+1%C3%B1.FCStd",
+                    metadata={"X-Amz-Meta-Revision": "1.05"}),
+            _record("s3:ObjectRemoved:Delete", "a/vieja.FCStd", etag=None, size=None),
+        ]})
+        self.assertEqual(changes, [
+            _change("a/pieza 1ñ.FCStd", metadata={"X-Amz-Meta-Revision": "1.05"}),
+            _change("a/vieja.FCStd", notifications.REMOVED, etag="", size=None),
+        ])
+
+    def test_journal_and_empty_records_are_skipped(self):
+        self.assertEqual(notifications.parse_event({}), [])
+        self.assertEqual(notifications.parse_event({"Records": None}), [])
+        self.assertEqual(notifications.parse_event({"Records": [
+            _record("s3:ObjectCreated:Put", notifications.JOURNAL_PREFIX + "x/1.jsonl"),
+            _record("s3:ObjectCreated:Put", ""),
+            {"eventName": "s3:ObjectCreated:Put"},
+        ]}), [])
+
+
+class ApplyChangesTest(unittest.TestCase):
+
+    def _revision(self, bucket, key):
+        row = revision_index._connect().execute(
+            "SELECT revision FROM drawings WHERE bucket = ? AND key = ?", (bucket, key)
+        ).fetchone()
+        return row[0] if row else None
+
+    def test_invalidates_listing_of_the_key_and_its_ancestors(self):
+        with storage._listing_lock:
+            for prefix in ("", "a/", "a/b/", "c/"):
+                storage._listing_cache[("modelos", prefix)] = (time.monotonic() + 60, {})
+
+        notifications.apply_changes([_change("a/b/pieza.FCStd")])
+        self.assertEqual([ck for ck in storage._listing_cache if ck[0] == "modelos"],
+                         [("modelos", "c/")])
+
+    def test_created_and_removed_update_etag_index(self):
+        notifications.apply_changes([_change("d/pieza.FCStd", etag="e1")])
+        self.assertEqual(etag_index.lookup("modelos", "e1"), "d/pieza.FCStd")
+
+        notifications.apply_changes([_change("d/pieza.FCStd", notifications.REMOVED, etag="")])
+        self.assertIsNone(etag_index.lookup("modelos", "e1"))
+
+    def test_svg_bucket_updates_revision_index(self):
+        svg = storage.BUCKET_SVG
+        notifications.apply_changes([
+            _change("e/PLANO.svg", bucket=svg, metadata={"X-Amz-Meta-Revision": "1.25"}),
+        ])
+        self.assertEqual(self._revision(svg, "e/PLANO.svg"), 1.25)
+
+        notifications.apply_changes([_change("e/PLANO.svg", notifications.REMOVED, bucket=svg)])
+        self.assertIsNone(self._revision(svg, "e/PLANO.svg"))
+
+    def test_other_buckets_do_not_touch_revision_index(self):
+        notifications.apply_changes([
+            _change("f/PLANO.svg", metadata={"X-Amz-Meta-Revision": "2.00"}),
+        ])
+        self.assertIsNone(self._revision("modelos", "f/PLANO.svg"))
+
+
+class BatchLoopTest(unittest.TestCase):
+
+    def setUp(self):
+        self.batches = queue.Queue()
+        self.listener = notifications.NotificationListener([], dispatch=self.batches.put)
+        for name in ("BATCH_WINDOW", "BATCH_MAX_DELAY"):
+            self.addCleanup(setattr, notifications, name, getattr(notifications, name))
+
+    def _run(self):
+        thread = threading.Thread(target=self.listener._batch_loop, daemon=True)
+        thread.start()
+        self.addCleanup(thread.join, 5)
+        self.addCleanup(self.listener.stop)
+
+    def test_queued_events_form_one_batch_and_the_last_event_wins(self):
+        notifications.BATCH_WINDOW = 0.2
+        for change in (_change("g/a.FCStd"), _change("g/b.FCStd"),
+                       _change("g/a.FCStd", notifications.REMOVED, etag="")):
+            self.listener.events.put(change)
+        self._run()
+
+        batch = self.batches.get(timeout=5)
+        self.assertEqual(sorted((c["key"], c["event"]) for c in batch), [
+            ("g/a.FCStd", notifications.REMOVED),
+            ("g/b.FCStd", notifications.CREATED),
+        ])
+        self.assertTrue(self.batches.empty())
+
+    def test_max_delay_closes_a_batch_without_a_quiet_window(self):
+        notifications.BATCH_WINDOW = 30
+        notifications.BATCH_MAX_DELAY = 0.2
+        self._run()
+
+        started = time.monotonic()
+        self.listener.events.put(_change("h/a.FCStd"))
+        batch = self.batches.get(timeout=5)
+        self.assertEqual([c["key"] for c in batch], ["h/a.FCStd"])
+        self.assertLess(time.monotonic() - started, 5)
+
+    def test_stop_ends_the_loop(self):
+        notifications.BATCH_WINDOW = 0.05
+        thread = threading.Thread(target=self.listener._batch_loop, daemon=True)
+        thread.start()
+        self.listener.stop()
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+
+
+if __name__ == "__main__":
+    unittest.main()
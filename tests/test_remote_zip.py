@@ -0,0 +1,66 @@
+# ============================================================
+# test_remote_zip.py → Miniatura de un FCStd por rangos
+# Texmex Weavers – FreeCAD Integration
+# ============================================================
+
+import io
+import os
+import unittest
+import zipfile
+
+import support
+
+import remote_zip
+
+
+def _fcstd(members, comment=b""):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        for name, data, method in members:
+            zf.writestr(name, data, compress_type=method)
+        zf.comment = comment
+    return buf.getvalue()
+
+
+class RemoteZipTest(support.FakeS3TestCase):
+
+    BUCKETS = ("modelos",)
+
+    def _seed(self, key, data):
+        self.server.seed("modelos", key, data)
+        return key
+
+    def test_deflated_thumbnail(self):
+        png = b"\x89PNG" + os.urandom(2000) + b"\x00" * 4000
+        data = _fcstd([
+            ("Document.xml", b"<Document/>" * 500, zipfile.ZIP_DEFLATED),
+            ("big.brp", os.urandom(64 * 1024), zipfile.ZIP_STORED),
+            (remote_zip.FCSTD_THUMBNAIL, png, zipfile.ZIP_DEFLATED),
+        ])
+        key = self._seed("a/pieza.FCStd", data)
+        self.assertEqual(remote_zip.read_fcstd_thumbnail(self.client, "modelos", key), png)
+        # Con el tamaño del listado no hace falta el HEAD
+        self.assertEqual(
+            remote_zip.read_fcstd_thumbnail(self.client, "modelos", key, size=len(data)), png)
+
+    def test_long_comment_needs_second_tail(self):
+        # El EOCD queda fuera de la primera cola (_TAIL_GUESS)
+        png = b"\x89PNG" + os.urandom(500)
+        data = _fcstd([(remote_zip.FCSTD_THUMBNAIL, png, zipfile.ZIP_STORED)],
+                      comment=b"x" * (remote_zip._TAIL_GUESS + 1000))
+        key = self._seed("a/comentario.FCStd", data)
+        self.assertEqual(remote_zip.read_fcstd_thumbnail(self.client, "modelos", key), png)
+
+    def test_without_thumbnail(self):
+        data = _fcstd([("Document.xml", b"<Document/>", zipfile.ZIP_DEFLATED)])
+        key = self._seed("a/sin_miniatura.FCStd", data)
+        self.assertIsNone(remote_zip.read_fcstd_thumbnail(self.client, "modelos", key))
+
+    def test_not_a_zip(self):
+        key = self._seed("a/roto.FCStd", os.urandom(3000))
+        with self.assertRaises(remote_zip.RemoteZipError):
+            remote_zip.read_fcstd_thumbnail(self.client, "modelos", key)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+# ============================================================
+# test_revision_index.py → Propuesta de revisión de planos
+# Texmex Weavers – FreeCAD Integration
+# ============================================================
+
+import time
+import unittest
+
+import support
+
+import revision_index
+
+
+class ProposeRevisionTest(support.FakeS3TestCase):
+
+    BUCKETS = ("planos",)
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server.seed("planos", "a/PLANO-1.svg", b"<svg/>", {"x-amz-meta-revision": "1.05"})
+        cls.server.seed("planos", "b/PLANO-1.svg", b"<svg/>", {"x-amz-meta-revision": "1.20"})
+
+    def test_record_during_build_survives_the_purge(self):
+        self.client.make_bucket("planos4")
+        self.server.seed("planos4", "x/R.svg", b"<svg/>", {"x-amz-meta-revision": "1.00"})
+        revision_index.build(self.client, "planos4")
+
+        client = self.client
+
+        class RecordWhileListing:
+            def list_objects(self, *args, **kwargs):
+                for n, obj in enumerate(client.list_objects(*args, **kwargs)):
+                    if n == 0:
+                        revision_index.record("planos4", "y/R.svg", "2.00")
+                    yield obj
+
+        revision_index.build(RecordWhileListing(), "planos4")
+        keys, revision = revision_index.lookup(self.client, "planos4", "R")
+        self.assertEqual((sorted(keys), revision), (["x/R.svg", "y/R.svg"], 2.0))
+
+    def _wait_background(self, bucket):
+        deadline = time.time() + 10
+        while bucket in revision_index._busy and time.time() < deadline:
+            time.sleep(0.01)
+
+    def test_propose(self):
+        # Mayor que la existente → igual sube 0.01 (como siempre)
+        self.assertEqual(revision_index.propose_revision(self.client, "planos", "PLANO-1", 2.0),
+                         2.01)
+        self.assertEqual(revision_index.propose_revision(self.client, "planos", "PLANO-1.svg",
+                                                         "1.00"), 1.21)
+        self.assertEqual(revision_index.propose_revision(self.client, "planos", "NUEVO", 1.0),
+                         1.01)
+
+    def test_no_wait_builds_a_missing_index_first(self):
+        self.client.make_bucket("planos2")
+        self.server.seed("planos2", "x/P.svg", b"<svg/>", {"x-amz-meta-revision": "3.00"})
+
+        # Índice nunca construido: se construye antes de responder
+        self.assertEqual(revision_index.propose_revision(self.client, "planos2", "P", 1.0,
+                                                         wait=False), 3.01)
+
+    def test_no_wait_answers_from_stale_index_and_rebuilds_in_background(self):
+        self.client.make_bucket("planos3")
+        self.server.seed("planos3", "x/Q.svg", b"<svg/>", {"x-amz-meta-revision": "3.00"})
+        revision_index.build(self.client, "planos3")
+
+        # Subida desde otra PC con el índice ya caducado
+        self.server.seed("planos3", "y/Q.svg", b"<svg/>", {"x-amz-meta-revision": "4.00"})
+        with revision_index._lock:
+            revision_index._connect().execute(
+                "UPDATE scans SET finished = ? WHERE bucket = ?",
+                (time.time() - revision_index.REBUILD_INTERVAL - 1, "planos3"))
+
+        self.assertEqual(revision_index.propose_revision(self.client, "planos3", "Q", 1.0,
+                                                         wait=False), 3.01)
+        self._wait_background("planos3")
+        self.assertEqual(revision_index.propose_revision(self.client, "planos3", "Q", 1.0,
+                                                         wait=False), 4.01)
+
+if __name__ == "__main__":
+    unittest.main()
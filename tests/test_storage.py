@@ -0,0 +1,101 @@
+# ============================================================
+# test_storage.py → Ajustes leídos al llamar (no al importar) y caché
+#                   de listados
+# Texmex Weavers – FreeCAD Integration
+# ============================================================
+
+import os
+import unittest
+
+import support
+
+import config_storage
+import storage
+
+
+class ConfigReloadTest(support.FakeS3TestCase):
+
+    def _save(self, bucket_model):
+        config_storage.save_minio_config(self.server.endpoint, "test", "test",
+                                         bucket_model, "planos")
+
+    def test_upload_default_bucket_follows_saved_config(self):
+        path = support.write_file(os.path.join(support.WORKDIR, "cfg", "p.FCStd"), b"pieza")
+
+        self._save("primero")
+        self.assertEqual(storage.BUCKET_MODEL, "primero")
+        storage._upload_object(path, "a/p.FCStd")
+
+        self._save("segundo")
+        self.assertEqual(storage.BUCKET_MODEL, "segundo")
+        storage._upload_object(path, "a/p.FCStd")
+
+        client = storage.get_client()
+        for bucket in ("primero", "segundo"):
+            self.assertEqual(client.stat_object(bucket, "a/p.FCStd").size, 5)
+
+
+class ListingCacheTest(support.FakeS3TestCase):
+
+    BUCKETS = ("listados",)
+    CONFIG = ("listados", "planos")
+
+    def setUp(self):
+        storage.invalidate_listing()
+
+    def _lists(self):
+        return self.server.requests.get("list", 0)
+
+    def _names(self, prefix):
+        return [f["name"] for f in storage.list_prefix("listados", prefix)["files"]]
+
+    def test_listing_is_served_from_cache_until_invalidated(self):
+        self.server.seed("listados", "a/uno.FCStd", b"uno")
+        self.assertEqual(self._names("a"), ["uno.FCStd"])
+        lists = self._lists()
+
+        # Cambio por fuera de storage: el caché todavía no lo ve
+        self.server.seed("listados", "a/dos.FCStd", b"dos")
+        self.assertEqual(self._names("a/"), ["uno.FCStd"])
+        self.assertEqual(self._lists(), lists)
+
+        storage.invalidate_listing("listados", "a/dos.FCStd")
+        self.assertEqual(self._names("a"), ["dos.FCStd", "uno.FCStd"])
+        self.assertEqual(self._lists(), lists + 1)
+
+    def test_expired_entry_is_listed_again(self):
+        old_ttl = storage.LIST_CACHE_TTL
+        self.addCleanup(setattr, storage, "LIST_CACHE_TTL", old_ttl)
+        storage.LIST_CACHE_TTL = 0
+
+        self.server.seed("listados", "b/uno.FCStd", b"uno")
+        storage.list_prefix("listados", "b")
+        lists = self._lists()
+        storage.list_prefix("listados", "b")
+        self.assertEqual(self._lists(), lists + 1)
+
+    def test_empty_prefix_is_cached_and_refresh_bypasses_it(self):
+        self.assertEqual(storage.list_prefix("listados", "vacia"), {"folders": [], "files": []})
+        lists = self._lists()
+        storage.list_prefix("listados", "vacia")
+        self.assertEqual(self._lists(), lists)
+
+        self.server.seed("listados", "vacia/nuevo.FCStd", b"nuevo")
+        self.assertEqual(
+            [f["name"] for f in storage.list_prefix("listados", "vacia", refresh=True)["files"]],
+            ["nuevo.FCStd"])
+        self.assertEqual(self._lists(), lists + 1)
+
+    def test_invalidate_key_drops_its_prefix_and_ancestors_only(self):
+        for prefix in ("", "c", "c/d", "e"):
+            storage.list_prefix("listados", prefix)
+
+        storage.invalidate_listing("listados", "c/d/pieza.FCStd")
+        self.assertEqual(sorted(p for _b, p in storage._listing_cache), ["e/"])
+
+        storage.invalidate_listing("listados")
+        self.assertEqual(storage._listing_cache, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
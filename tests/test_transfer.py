@@ -0,0 +1,126 @@
+# ============================================================
+# test_transfer.py → Subida multipart: paralela, reanudable, cancelable
+# Texmex Weavers – FreeCAD Integration
+# ============================================================
+
+import os
+import threading
+import time
+import unittest
+
+import support
+
+import transfer
+
+MIB = 1024 * 1024
+
+
+class _FlakyClient:
+    """Cliente real que falla al subir la parte fail_part."""
+
+    def __init__(self, client, fail_part=None):
+        self.client = client
+        self.fail_part = fail_part
+        self.sent = []
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+    def _upload_part(self, bucket, key, data, headers, upload_id, part_number):
+        if part_number == self.fail_part:
+            raise ConnectionError("red caída")
+        self.sent.append(part_number)
+        return self.client._upload_part(bucket, key, data, headers, upload_id, part_number)
+
+
+class TransferTest(support.FakeS3TestCase):
+
+    BUCKETS = ("subidas",)
+
+    def setUp(self):
+        # 13 MiB en partes de 5 MiB → 3 partes
+        self.data = os.urandom(13 * MIB)
+        self.path = support.write_file(os.path.join(support.WORKDIR, "subir.FCStd"), self.data)
+
+    def _uploads(self):
+        return self.server.buckets["subidas"].uploads
+
+    def _content(self, key):
+        response = self.client.get_object("subidas", key)
+        try:
+            return response.read()
+        finally:
+            response.close()
+            response.release_conn()
+
+    def test_parallel_multipart(self):
+        seen = []
+        etag = transfer.upload(self.client, "subidas", "a/grande.FCStd", self.path,
+                               part_size=5 * MIB, concurrency=3,
+                               progress=lambda done, total: seen.append((done, total)))
+        self.assertEqual(etag, support.multipart_etag(self.data, 5 * MIB))
+        self.assertEqual(seen[-1], (len(self.data), len(self.data)))
+        self.assertEqual(self._content("a/grande.FCStd"), self.data)
+        self.assertIsNone(transfer.load_journal("subidas", "a/grande.FCStd"))
+        self.assertEqual(self._uploads(), {})
+
+    def test_resume_after_failure_sends_only_missing_parts(self):
+        flaky = _FlakyClient(self.client, fail_part=3)
+        with self.assertRaises(ConnectionError):
+            transfer.upload(flaky, "subidas", "a/reanudar.FCStd", self.path,
+                            part_size=5 * MIB, concurrency=1)
+
+        journal = transfer.load_journal("subidas", "a/reanudar.FCStd")
+        self.assertEqual(sorted(journal["parts"]), ["1", "2"])
+        self.assertTrue(transfer.journal_matches_source(journal))
+
+        retry = _FlakyClient(self.client)
+        etag = transfer.upload(retry, "subidas", "a/reanudar.FCStd", self.path,
+                               part_size=5 * MIB, concurrency=1)
+        self.assertEqual(retry.sent, [3])
+        self.assertEqual(etag, support.multipart_etag(self.data, 5 * MIB))
+        self.assertEqual(self._content("a/reanudar.FCStd"), self.data)
+        self.assertIsNone(transfer.load_journal("subidas", "a/reanudar.FCStd"))
+
+    def test_cancel_discards_multipart(self):
+        cancel = threading.Event()
+        with self.assertRaises(transfer.UploadCancelled):
+            transfer.upload(self.client, "subidas", "a/cancelada.FCStd", self.path,
+                            part_size=5 * MIB, concurrency=1, cancel_event=cancel,
+                            progress=lambda done, total: cancel.set())
+        self.assertIsNone(transfer.load_journal("subidas", "a/cancelada.FCStd"))
+        self.assertEqual(self._uploads(), {})
+        self.assertNotIn("a/cancelada.FCStd", self.server.buckets["subidas"].objects)
+
+    def test_cancel_single_part_while_reading(self):
+        # Cancelar tras el primer bloque leído: la petición no se envía
+        cancel = threading.Event()
+        with self.assertRaises(transfer.UploadCancelled):
+            transfer.upload(self.client, "subidas", "a/simple.FCStd", self.path,
+                            part_size=16 * MIB, cancel_event=cancel,
+                            progress=lambda done, total: cancel.set())
+        self.assertNotIn("a/simple.FCStd", self.server.buckets["subidas"].objects)
+
+    def test_cleanup_abandoned(self):
+        # Diario local viejo (p.ej. PC caída) y subida ajena vieja sin diario
+        flaky = _FlakyClient(self.client, fail_part=2)
+        with self.assertRaises(ConnectionError):
+            transfer.upload(flaky, "subidas", "a/vieja.FCStd", self.path,
+                            part_size=5 * MIB, concurrency=1)
+        journal = transfer.load_journal("subidas", "a/vieja.FCStd")
+        journal["created"] = time.time() - 3 * 3600
+        transfer._save_journal(journal)
+
+        headers = {"Content-Type": "application/octet-stream"}
+        other = self.client._create_multipart_upload("subidas", "b/ajena.FCStd", headers)
+        recent = self.client._create_multipart_upload("subidas", "b/reciente.FCStd", headers)
+        self._uploads()[other]["initiated"] = time.time() - 3 * 3600
+
+        self.assertEqual(transfer.cleanup_abandoned(self.client, ["subidas"], 1), 2)
+        self.assertIsNone(transfer.load_journal("subidas", "a/vieja.FCStd"))
+        self.assertEqual(list(self._uploads()), [recent])
+        self.client._abort_multipart_upload("subidas", "b/reciente.FCStd", recent)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,20 @@
+# ============================================================
+# tests.py → Ejecuta las pruebas (python tests/tests.py)
+# Texmex Weavers – FreeCAD Integration
+# ============================================================
+#
+# Pruebas de la lógica sin FreeCAD ni Qt; las que hablan con S3 usan
+# el servidor en proceso de tools/fake_s3.py. También con pytest.
+
+import os
+import sys
+import unittest
+
+TESTS = os.path.dirname(os.path.abspath(__file__))
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, TESTS)
+    suite = unittest.defaultTestLoader.discover(TESTS, pattern="test_*.py", top_level_dir=TESTS)
+    result = unittest.TextTestRunner(verbosity=2).run(suite)
+    sys.exit(0 if result.wasSuccessful() else 1)
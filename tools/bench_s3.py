@@ -0,0 +1,454 @@
+# ============================================================
+# bench_s3.py → Benchmarks de las rutas S3 del workbench
+# Texmex Weavers – FreeCAD Integration
+# ============================================================
+#
+# Siembra una librería sintética (área/s1/s2/s3/pieza.FCStd + planos
+# SVG con revisión) de 1k / 10k / 100k objetos y mide, con el cliente
+# minio real y los módulos del workbench (storage, etag_index,
+# revision_index, download...):
+#
+#   list_prefix_cold      listado de un nivel sin caché (list_prefix)
+#   list_subfolders_warm  list_subfolders con el caché ya lleno
+#   find_etag_scan        primera búsqueda de ETag (recorre el bucket)
+#   find_etag_warm        búsquedas de ETag con el índice construido
+#   stat / stat_parallel  HEAD secuencial y con 16 hilos
+#   upload_small          _upload_object de archivos de 64 KiB
+#   upload_unchanged      la misma subida otra vez (sólo HEAD)
+#   upload_large          archivo grande multipart (--large-mb)
+#   download_small/large  download.download (rangos en paralelo)
+#   svg_index_build       construcción del índice de revisiones
+#   svg_propose_warm      propose_revision con el índice construido
+#
+# Servidor: fake_s3.py en proceso (por defecto), un binario MinIO local
+# (--minio-binary) o uno existente (--endpoint). Resultados en JSON
+# (--json) para comparar entre commits (--baseline).
+#
+#   python tools/bench_s3.py --sizes 1000,10000 --json bench.json
+#   python tools/bench_s3.py --baseline bench.json
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+TOOLS = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(TOOLS)
+MOD_PATH = os.path.join(ROOT, "freecad", "Texmex_Uploader")
+
+DEFAULT_SIZES = "1000,10000,100000"
+DEFAULT_ITERATIONS = 200
+DEFAULT_LARGE_MB = 40
+DEFAULT_LARGE_ITERATIONS = 3
+PARALLEL_THREADS = 16
+SEED_THREADS = 32
+
+OBJECT_BYTES = 512
+SMALL_UPLOAD_BYTES = 64 * 1024
+
+AREAS = ["telares", "extrusion", "urdido", "tejido",
+         "acabado", "mantenimiento", "almacen", "calidad"]
+
+# Empeoramiento de p50 tolerado frente a --baseline
+DEFAULT_MAX_REGRESSION = 0.25
+
+
+# ============================================================
+# LIBRERÍA SINTÉTICA
+# ============================================================
+
+def model_key(i):
+    return "/".join([
+        AREAS[i % len(AREAS)],
+        f"maquina_{(i // len(AREAS)) % 25:02d}",
+        f"grupo_{(i // 200) % 10}",
+        f"sub_{(i // 2000) % 5}",
+        f"pieza_{i:06d}.FCStd",
+    ])
+
+
+def model_data(i):
+    return (b"%08d" % i) * (OBJECT_BYTES // 8)
+
+
+def svg_count(n):
+    return max(100, n // 10)
+
+
+def svg_key(j, n):
+    # ~2 revisiones de cada plano en carpetas distintas
+    name = f"PLANO-{j % max(1, svg_count(n) // 2):05d}"
+    return "/".join([AREAS[j % len(AREAS)], f"maquina_{j % 25:02d}", name + ".svg"])
+
+
+def seed(put, n, bucket_model, bucket_svg):
+    """put(bucket, key, data, metadata) para toda la librería."""
+    for i in range(n):
+        put(bucket_model, model_key(i), model_data(i),
+            {"x-amz-meta-revision": "1.0", "x-amz-meta-comment": "bench"})
+    for j in range(svg_count(n)):
+        put(bucket_svg, svg_key(j, n), b"<svg>%d</svg>" % j,
+            {"x-amz-meta-revision": f"1.{j % 50:02d}"})
+
+
+def folder_prefixes(n):
+    """Prefijos de carpeta existentes a 0..3 niveles."""
+    prefixes = {""}
+    for i in range(0, n, max(1, n // 500)):
+        parts = model_key(i).split("/")[:-1]
+        for depth in range(1, len(parts)):
+            prefixes.add("/".join(parts[:depth]))
+    return sorted(prefixes)
+
+
+# ============================================================
+# SERVIDORES
+# ============================================================
+
+class FakeTarget:
+    name = "fake"
+
+    def __init__(self):
+        sys.path.insert(0, TOOLS)
+        from fake_s3 import FakeS3Server
+        self.server = FakeS3Server().start()
+        self.endpoint = self.server.endpoint
+        self.access = self.secret = "bench"
+
+    def put(self, bucket, key, data, metadata):
+        self.server.seed(bucket, key, data, metadata)
+
+    def requests(self):
+        return dict(self.server.requests)
+
+    def stop(self):
+        self.server.stop()
+
+
+class RemoteTarget:
+    """MinIO existente o lanzado desde un binario local."""
+    name = "minio"
+
+    def __init__(self, endpoint, access, secret, process=None, workdir=None):
+        self.endpoint = endpoint
+        self.access = access
+        self.secret = secret
+        self.process = process
+        self.workdir = workdir
+        self._pool = ThreadPoolExecutor(max_workers=SEED_THREADS)
+        self._futures = []
+
+    @classmethod
+    def launch(cls, binary):
+        workdir = tempfile.mkdtemp(prefix="texmex_bench_minio_")
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            port = s.getsockname()[1]
+        env = dict(os.environ, MINIO_ROOT_USER="benchbench", MINIO_ROOT_PASSWORD="benchbench")
+        process = subprocess.Popen(
+            [binary, "server", workdir, "--address", f"127.0.0.1:{port}", "--quiet"],
+            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+                break
+            except OSError:
+                time.sleep(0.2)
+        else:
+            process.kill()
+            raise RuntimeError("MinIO no arrancó")
+        return cls(f"127.0.0.1:{port}", "benchbench", "benchbench", process, workdir)
+
+    def put(self, bucket, key, data, metadata):
+        import io
+        import storage
+        storage.bucket_exists(bucket, create=True)
+        client = storage.get_client()
+        meta = {k[len("x-amz-meta-"):]: v for k, v in metadata.items()}
+        self._futures.append(self._pool.submit(
+            client.put_object, bucket, key, io.BytesIO(data), len(data), metadata=meta))
+        if len(self._futures) >= 4 * SEED_THREADS:
+            self.flush()
+
+    def flush(self):
+        for future in self._futures:
+            future.result()
+        self._futures = []
+
+    def requests(self):
+        return {}
+
+    def stop(self):
+        self.flush()
+        self._pool.shutdown()
+        if self.process:
+            self.process.terminate()
+            self.process.wait(10)
+            shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+# ============================================================
+# MEDICIÓN
+# ============================================================
+
+def _percentile(ordered, q):
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def stats(latencies, nbytes=0, wall=None, requests=None):
+    """Latencias en segundos → dict en ms / ops/s / MB/s."""
+    ordered = sorted(latencies)
+    total = wall if wall is not None else sum(ordered)
+    total = max(total, 1e-9)
+    out = {
+        "n": len(ordered),
+        "mean_ms": round(1000 * sum(ordered) / max(1, len(ordered)), 3),
+        "p50_ms": round(1000 * _percentile(ordered, 0.50), 3),
+        "p90_ms": round(1000 * _percentile(ordered, 0.90), 3),
+        "p99_ms": round(1000 * _percentile(ordered, 0.99), 3),
+        "min_ms": round(1000 * (ordered[0] if ordered else 0), 3),
+        "max_ms": round(1000 * (ordered[-1] if ordered else 0), 3),
+        "ops_per_s": round(len(ordered) / total, 2),
+    }
+    if nbytes:
+        out["mb_per_s"] = round(nbytes / total / (1024 * 1024), 2)
+    if requests is not None:
+        out["requests"] = requests
+    return out
+
+
+def timed(fn, items):
+    latencies = []
+    for item in items:
+        started = time.perf_counter()
+        fn(item)
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def _request_delta(target, before):
+    after = target.requests()
+    delta = {k: v - before.get(k, 0) for k, v in after.items() if v - before.get(k, 0)}
+    return delta or None
+
+
+# ============================================================
+# CORRIDA POR TAMAÑO
+# ============================================================
+
+def run_size(target, n, iterations, large_mb, large_iterations, workdir, log):
+    import config_storage
+    import storage
+    import revision_index
+    import download
+
+    bucket_model = f"bench-cad-{n}"
+    bucket_svg = f"bench-svg-{n}"
+    config_storage.save_minio_config(target.endpoint, target.access, target.secret,
+                                     bucket_model, bucket_svg)
+    client = storage.get_client()
+
+    log(f"[{n}] sembrando {n} modelos + {svg_count(n)} planos…")
+    started = time.perf_counter()
+    storage.bucket_exists(bucket_model, create=True)
+    storage.bucket_exists(bucket_svg, create=True)
+    seed(target.put, n, bucket_model, bucket_svg)
+    if hasattr(target, "flush"):
+        target.flush()
+    log(f"[{n}] sembrado en {time.perf_counter() - started:.1f} s")
+
+    rng = random.Random(n)
+    results = {}
+
+    def measure(name, fn, items, nbytes=0):
+        before = target.requests()
+        latencies = timed(fn, items)
+        results[name] = stats(latencies, nbytes, requests=_request_delta(target, before))
+        log(f"[{n}] {name:<22} p50 {results[name]['p50_ms']:>9.2f} ms  "
+            f"p99 {results[name]['p99_ms']:>9.2f} ms")
+
+    # --- listados ---
+    prefixes = folder_prefixes(n)
+    sample = [rng.choice(prefixes) for _ in range(iterations)]
+    measure("list_prefix_cold", lambda p: storage.list_prefix(bucket_model, p, refresh=True), sample)
+    measure("list_subfolders_warm", lambda p: storage.list_subfolders(bucket_model, p), sample)
+
+    # --- ETag ---
+    keys = [model_key(rng.randrange(n)) for _ in range(iterations)]
+    etags = [hashlib.md5(model_data(int(k.rsplit("_", 1)[1][:6]))).hexdigest() for k in keys]
+    measure("find_etag_scan", lambda e: storage.find_etag_path(bucket_model, e), etags[:1])
+    measure("find_etag_warm", lambda e: storage.find_etag_path(bucket_model, e), etags)
+
+    # --- HEAD ---
+    measure("stat", lambda k: client.stat_object(bucket_model, k), keys)
+
+    before = target.requests()
+    started = time.perf_counter()
+    many = keys * 4
+    with ThreadPoolExecutor(max_workers=PARALLEL_THREADS) as ex:
+        latencies = list(ex.map(lambda k: timed(lambda x: client.stat_object(bucket_model, x), [k])[0], many))
+    results["stat_parallel"] = stats(latencies, wall=time.perf_counter() - started,
+                                     requests=_request_delta(target, before))
+    log(f"[{n}] {'stat_parallel':<22} {results['stat_parallel']['ops_per_s']:>9.0f} ops/s")
+
+    # --- subidas ---
+    small = []
+    for i in range(iterations):
+        path = os.path.join(workdir, f"up_{n}_{i}.FCStd")
+        with open(path, "wb") as f:
+            f.write(os.urandom(SMALL_UPLOAD_BYTES))
+        small.append((path, f"bench/subidas/up_{i}.FCStd"))
+    meta = {"x-amz-meta-revision": "1.0"}
+    upload = lambda pk: storage._upload_object(pk[0], pk[1], meta, bucket_model)
+    measure("upload_small", upload, small, nbytes=SMALL_UPLOAD_BYTES * len(small))
+    measure("upload_unchanged", upload, small)
+
+    large = []
+    for i in range(large_iterations):
+        path = os.path.join(workdir, f"big_{n}_{i}.FCStd")
+        with open(path, "wb") as f:
+            for _ in range(large_mb):
+                f.write(os.urandom(1024 * 1024))
+        large.append((path, f"bench/subidas/big_{i}.FCStd"))
+    measure("upload_large", upload, large, nbytes=large_mb * 1024 * 1024 * len(large))
+
+    # --- descargas ---
+    dest = os.path.join(workdir, "dl")
+    os.makedirs(dest, exist_ok=True)
+
+    def fetch(key):
+        download.download(client, bucket_model, key, os.path.join(dest, os.path.basename(key)))
+
+    measure("download_small", fetch, keys, nbytes=OBJECT_BYTES * len(keys))
+    measure("download_large", fetch, [k for _p, k in large],
+            nbytes=large_mb * 1024 * 1024 * len(large))
+
+    # --- revisiones de planos ---
+    measure("svg_index_build", lambda _x: revision_index.build(client, bucket_svg), [None])
+    names = [os.path.basename(svg_key(rng.randrange(svg_count(n)), n))[:-4] for _ in range(iterations)]
+    measure("svg_propose_warm",
+            lambda name: revision_index.propose_revision(client, bucket_svg, name, 1.0), names)
+
+    for path, _key in small + large:
+        os.remove(path)
+    shutil.rmtree(dest, ignore_errors=True)
+    return results
+
+
+# ============================================================
+# REPORTE / COMPARACIÓN
+# ============================================================
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(report, baseline, max_regression=DEFAULT_MAX_REGRESSION):
+    """Textos con las operaciones cuyo p50 empeoró más de max_regression."""
+    problems = []
+    for size, ops in report["results"].items():
+        for op, current in ops.items():
+            before = baseline.get("results", {}).get(size, {}).get(op)
+            if not before or not before.get("p50_ms"):
+                continue
+            change = current["p50_ms"] / before["p50_ms"] - 1
+            if change > max_regression and current["p50_ms"] - before["p50_ms"] > 0.5:
+                problems.append(f"[{size}] {op}: p50 {before['p50_ms']:.2f} → "
+                                f"{current['p50_ms']:.2f} ms (+{change:.0%})")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks S3 del workbench Texmex")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="objetos por corrida, separados por coma")
+    parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS)
+    parser.add_argument("--large-mb", type=int, default=DEFAULT_LARGE_MB)
+    parser.add_argument("--large-iterations", type=int, default=DEFAULT_LARGE_ITERATIONS)
+    parser.add_argument("--endpoint", default=None, help="MinIO existente (host:puerto)")
+    parser.add_argument("--access", default="")
+    parser.add_argument("--secret", default="")
+    parser.add_argument("--minio-binary", default=None, help="lanza este binario de MinIO")
+    parser.add_argument("--json", default=None, help="guarda los resultados")
+    parser.add_argument("--baseline", default=None, help="resultados anteriores para comparar")
+    parser.add_argument("--max-regression", type=float, default=DEFAULT_MAX_REGRESSION)
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="texmex_bench_")
+
+    # Config e índices propios: no se toca la instalación del usuario
+    os.environ["TEXMEX_CONFIG"] = os.path.join(workdir, "config.xml")
+    os.environ["TEXMEX_DATA_DIR"] = os.path.join(workdir, "data")
+    sys.path.insert(0, MOD_PATH)
+
+    def log(text):
+        sys.stderr.write(text + "\n")
+
+    if args.endpoint:
+        target = RemoteTarget(args.endpoint, args.access, args.secret)
+    elif args.minio_binary:
+        target = RemoteTarget.launch(args.minio_binary)
+    else:
+        target = FakeTarget()
+
+    import minio
+    report = {
+        "meta": {
+            "commit": _commit(),
+            "python": sys.version.split()[0],
+            "minio": getattr(minio, "__version__", None),
+            "server": target.name,
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "iterations": args.iterations,
+            "large_mb": args.large_mb,
+        },
+        "results": {},
+    }
+
+    try:
+        for size in [int(s) for s in args.sizes.split(",") if s.strip()]:
+            report["results"][str(size)] = run_size(
+                target, size, args.iterations, args.large_mb, args.large_iterations,
+                workdir, log,
+            )
+    finally:
+        target.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            problems = compare(report, json.load(f), args.max_regression)
+        for problem in problems:
+            log(f"✗ {problem}")
+        if problems:
+            return 1
+        log("Sin regresiones frente a la referencia.")
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,560 @@
+# ============================================================
+# fake_s3.py → Servidor S3 mínimo en proceso (benchmarks)
+# Texmex Weavers – FreeCAD Integration
+# ============================================================
+#
+# Implementa sobre HTTP/1.1 (keep-alive) justo lo que usa el workbench
+# a través de la librería minio, para medir con el cliente real sin
+# necesitar un MinIO:
+#   - buckets: HEAD / PUT / GET ?location
+#   - objetos: PUT, HEAD, GET (Range, If-Match), DELETE, POST ?delete
+#   - ListObjectsV2 con prefix, delimiter, max-keys, continuation-token
+#     y metadata=true (extensión de MinIO)
+#   - multipart: crear, subir parte, completar, abortar, listar partes
+#     y subidas en curso
+#   - ListenBucketNotification (GET ?events=..., extensión de MinIO):
+#     un JSON por línea, chunked, con un espacio de keep-alive
+# No valida firmas ni permisos. seed() carga objetos sin pasar por HTTP.
+
+import bisect
+import hashlib
+import json
+import queue
+import threading
+import time
+import uuid
+import xml.etree.ElementTree as ET
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote_plus, unquote, urlsplit
+from xml.sax.saxutils import escape
+
+NS = "http://s3.amazonaws.com/doc/2006-03-01/"
+
+# Segundos entre espacios de keep-alive en las escuchas de eventos
+LISTEN_KEEPALIVE = 1.0
+
+
+def _iso(ts):
+    return time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime(ts))
+
+
+def _http_date(ts):
+    return formatdate(ts, usegmt=True)
+
+
+class _Object:
+    __slots__ = ("data", "etag", "metadata", "mtime", "content_type")
+
+    def __init__(self, data, etag, metadata, content_type="application/octet-stream"):
+        self.data = data
+        self.etag = etag
+        self.metadata = metadata
+        self.mtime = time.time()
+        self.content_type = content_type
+
+
+class _Bucket:
+
+    def __init__(self):
+        self.objects = {}
+        self.keys = []          # ordenadas, para listar con bisect
+        self.uploads = {}       # upload_id → {key, metadata, parts, initiated}
+        self._unsorted = False
+
+    def put(self, key, obj, bulk=False):
+        if key not in self.objects:
+            if bulk:
+                # Carga masiva: se ordena una vez, al listar
+                self.keys.append(key)
+                self._unsorted = True
+            else:
+                self.sorted_keys()
+                bisect.insort(self.keys, key)
+        self.objects[key] = obj
+
+    def sorted_keys(self):
+        if self._unsorted:
+            self.keys.sort()
+            self._unsorted = False
+        return self.keys
+
+    def delete(self, key):
+        if self.objects.pop(key, None) is not None:
+            self.sorted_keys()
+            i = bisect.bisect_left(self.keys, key)
+            if i < len(self.keys) and self.keys[i] == key:
+                del self.keys[i]
+
+
+# ============================================================
+# SERVIDOR
+# ============================================================
+
+class FakeS3Server:
+    """Servidor en un hilo. endpoint → "127.0.0.1:puerto"."""
+
+    def __init__(self, host="127.0.0.1", port=0):
+        self.buckets = {}
+        self.lock = threading.RLock()
+        self.requests = {}
+        self.listeners = []         # [(bucket, queue)] de las escuchas abiertas
+
+        handler = type("Handler", (_Handler,), {"s3": self})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self.endpoint = f"{host}:{self.httpd.server_address[1]}"
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def count(self, op):
+        with self.lock:
+            self.requests[op] = self.requests.get(op, 0) + 1
+
+    def notify(self, bucket, key, event_name, obj=None):
+        """Evento con la forma de MinIO para las escuchas de bucket."""
+        record = {
+            "eventName": event_name,
+            "s3": {
+                "bucket": {"name": bucket},
+                "object": {"key": quote_plus(key)},
+            },
+        }
+        if obj is not None:
+            record["s3"]["object"].update({
+                "eTag": obj.etag,
+                "size": len(obj.data),
+                "userMetadata": {"X-Amz-Meta-" + k[len("x-amz-meta-"):].title(): v
+                                 for k, v in obj.metadata.items()},
+            })
+        line = json.dumps({"Records": [record]})
+        for name, q in list(self.listeners):
+            if name == bucket:
+                q.put(line)
+
+    def drop_listeners(self):
+        """Corta en seco las escuchas abiertas (para probar reconexiones)."""
+        for _name, q in list(self.listeners):
+            q.put(None)
+
+    def seed(self, bucket, key, data, metadata=None):
+        """Carga un objeto directamente (sin HTTP)."""
+        with self.lock:
+            b = self.buckets.setdefault(bucket, _Bucket())
+            b.put(key, _Object(data, hashlib.md5(data).hexdigest(), dict(metadata or {})),
+                  bulk=True)
+
+
+# ============================================================
+# PETICIONES
+# ============================================================
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    s3 = None
+
+    def log_message(self, fmt, *args):
+        pass
+
+    # ----------------------------------------------------------
+    # Respuesta
+    # ----------------------------------------------------------
+    def _send(self, status, body=b"", headers=None, head=False):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if "Content-Length" not in (headers or {}):
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body and not head:
+            self.wfile.write(body)
+
+    def _xml(self, status, body):
+        data = ('<?xml version="1.0" encoding="UTF-8"?>\n' + body).encode()
+        self._send(status, data, {"Content-Type": "application/xml"})
+
+    def _error(self, status, code, message="", key="", bucket="", head=False):
+        if head:
+            self._send(status, head=True)
+            return
+        self._xml(status, (
+            f"<Error><Code>{code}</Code><Message>{escape(message or code)}</Message>"
+            f"<Key>{escape(key)}</Key><BucketName>{escape(bucket)}</BucketName>"
+            f"<Resource>/{escape(bucket)}/{escape(key)}</Resource>"
+            f"<RequestId>fake</RequestId><HostId>fake</HostId></Error>"
+        ))
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        data = self.rfile.read(length) if length else b""
+        if "aws-chunked" in (self.headers.get("Content-Encoding") or ""):
+            data = _decode_aws_chunked(data)
+        return data
+
+    def _target(self):
+        parts = urlsplit(self.path)
+        path = unquote(parts.path).lstrip("/")
+        bucket, _sep, key = path.partition("/")
+        query = {k: v[0] for k, v in parse_qs(parts.query, keep_blank_values=True).items()}
+        return bucket, key, query
+
+    def _bucket(self, name, head=False):
+        b = self.s3.buckets.get(name)
+        if b is None:
+            self._error(404, "NoSuchBucket", bucket=name, head=head)
+        return b
+
+    # ----------------------------------------------------------
+    # Verbos
+    # ----------------------------------------------------------
+    def do_HEAD(self):
+        bucket, key, _query = self._target()
+        with self.s3.lock:
+            b = self._bucket(bucket, head=True)
+            if b is None:
+                return
+            if not key:
+                self.s3.count("head_bucket")
+                self._send(200, head=True)
+                return
+            self.s3.count("head")
+            obj = b.objects.get(key)
+        if obj is None:
+            self._error(404, "NoSuchKey", key=key, bucket=bucket, head=True)
+            return
+        self._send(200, headers=self._object_headers(obj, len(obj.data)), head=True)
+
+    def do_GET(self):
+        bucket, key, query = self._target()
+        with self.s3.lock:
+            if "location" in query:
+                self._xml(200, f'<LocationConstraint xmlns="{NS}"></LocationConstraint>')
+                return
+            b = self._bucket(bucket)
+            if b is None:
+                return
+            if not key and "events" in query:
+                self.s3.count("listen")
+                events = queue.Queue()
+                self.s3.listeners.append((bucket, events))
+                obj = None
+            elif not key and "uploads" in query:
+                self.s3.count("list_uploads")
+                self._list_uploads(bucket, b, query)
+                return
+            elif not key:
+                self.s3.count("list")
+                self._list_objects(bucket, b, query)
+                return
+            elif "uploadId" in query:
+                self.s3.count("list_parts")
+                self._list_parts(bucket, key, b, query)
+                return
+            else:
+                self.s3.count("get")
+                obj = b.objects.get(key)
+
+        if not key:
+            self._listen(bucket, events)
+            return
+
+        if obj is None:
+            self._error(404, "NoSuchKey", key=key, bucket=bucket)
+            return
+
+        if_match = self.headers.get("If-Match")
+        if if_match and if_match.strip('"') != obj.etag:
+            self._error(412, "PreconditionFailed", key=key, bucket=bucket)
+            return
+
+        data = obj.data
+        status = 200
+        headers = self._object_headers(obj, len(data))
+        rng = self.headers.get("Range")
+        if rng and rng.startswith("bytes="):
+            start, _sep, end = rng[6:].partition("-")
+            start = int(start)
+            end = min(int(end) if end else len(data) - 1, len(data) - 1)
+            headers["Content-Range"] = f"bytes {start}-{end}/{len(data)}"
+            data = data[start:end + 1]
+            headers["Content-Length"] = str(len(data))
+            status = 206
+        self._send(status, data, headers)
+
+    def do_PUT(self):
+        bucket, key, query = self._target()
+        body = self._body()
+        with self.s3.lock:
+            if not key:
+                self.s3.count("make_bucket")
+                self.s3.buckets.setdefault(bucket, _Bucket())
+                self._send(200)
+                return
+            b = self._bucket(bucket)
+            if b is None:
+                return
+
+            if "uploadId" in query:
+                self.s3.count("upload_part")
+                upload = b.uploads.get(query["uploadId"])
+                if upload is None:
+                    self._error(404, "NoSuchUpload", key=key, bucket=bucket)
+                    return
+                digest = hashlib.md5(body)
+                upload["parts"][int(query["partNumber"])] = (body, digest.hexdigest(), time.time())
+                self._send(200, headers={"ETag": f'"{digest.hexdigest()}"'})
+                return
+
+            self.s3.count("put")
+            etag = hashlib.md5(body).hexdigest()
+            obj = _Object(body, etag, self._user_metadata(),
+                          self.headers.get("Content-Type") or "application/octet-stream")
+            b.put(key, obj)
+            self.s3.notify(bucket, key, "s3:ObjectCreated:Put", obj)
+        self._send(200, headers={"ETag": f'"{etag}"'})
+
+    def do_POST(self):
+        bucket, key, query = self._target()
+        body = self._body()
+        with self.s3.lock:
+            b = self._bucket(bucket)
+            if b is None:
+                return
+
+            if "uploads" in query:
+                self.s3.count("create_multipart")
+                upload_id = uuid.uuid4().hex
+                b.uploads[upload_id] = {
+                    "key": key, "metadata": self._user_metadata(),
+                    "parts": {}, "initiated": time.time(),
+                }
+                self._xml(200, (
+                    f'<InitiateMultipartUploadResult xmlns="{NS}"><Bucket>{escape(bucket)}</Bucket>'
+                    f"<Key>{escape(key)}</Key><UploadId>{upload_id}</UploadId>"
+                    f"</InitiateMultipartUploadResult>"
+                ))
+                return
+
+            if "uploadId" in query:
+                self.s3.count("complete_multipart")
+                upload = b.uploads.pop(query["uploadId"], None)
+                if upload is None:
+                    self._error(404, "NoSuchUpload", key=key, bucket=bucket)
+                    return
+                numbers = [int(el.text) for el in ET.fromstring(body).iter()
+                           if el.tag.endswith("PartNumber")]
+                parts = [upload["parts"][n] for n in numbers]
+                data = b"".join(p[0] for p in parts)
+                digests = b"".join(bytes.fromhex(p[1]) for p in parts)
+                etag = f"{hashlib.md5(digests).hexdigest()}-{len(parts)}"
+                obj = _Object(data, etag, upload["metadata"])
+                b.put(key, obj)
+                self.s3.notify(bucket, key, "s3:ObjectCreated:CompleteMultipartUpload", obj)
+                self._xml(200, (
+                    f'<CompleteMultipartUploadResult xmlns="{NS}"><Location>/{escape(bucket)}/{escape(key)}</Location>'
+                    f"<Bucket>{escape(bucket)}</Bucket><Key>{escape(key)}</Key>"
+                    f'<ETag>"{etag}"</ETag></CompleteMultipartUploadResult>'
+                ))
+                return
+
+            if not key and "delete" in query:
+                self.s3.count("delete_many")
+                deleted = []
+                for el in ET.fromstring(body).iter():
+                    if el.tag.endswith("Key") and el.text in b.objects:
+                        b.delete(el.text)
+                        deleted.append(el.text)
+                        self.s3.notify(bucket, el.text, "s3:ObjectRemoved:Delete")
+                # Quiet: sólo se informan los errores
+                self._xml(200, f'<DeleteResult xmlns="{NS}"></DeleteResult>')
+                return
+
+        self._error(400, "InvalidRequest", key=key, bucket=bucket)
+
+    def do_DELETE(self):
+        bucket, key, query = self._target()
+        with self.s3.lock:
+            b = self._bucket(bucket)
+            if b is None:
+                return
+            if "uploadId" in query:
+                self.s3.count("abort_multipart")
+                b.uploads.pop(query["uploadId"], None)
+            else:
+                self.s3.count("delete")
+                if key in b.objects:
+                    b.delete(key)
+                    self.s3.notify(bucket, key, "s3:ObjectRemoved:Delete")
+        self._send(204)
+
+    def _listen(self, bucket, events):
+        """Eventos de bucket hasta que el cliente corta o drop_listeners()."""
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def chunk(text):
+            data = (text + "\n").encode()
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+            self.wfile.flush()
+
+        try:
+            while True:
+                try:
+                    line = events.get(timeout=LISTEN_KEEPALIVE)
+                except queue.Empty:
+                    line = " "
+                if line is None:
+                    break   # corte sin cerrar el chunked → error en el cliente
+                chunk(line)
+        except OSError:
+            pass
+        finally:
+            with self.s3.lock:
+                self.s3.listeners = [(n, q) for n, q in self.s3.listeners if q is not events]
+            self.close_connection = True
+
+    # ----------------------------------------------------------
+    # Ayudantes
+    # ----------------------------------------------------------
+    def _user_metadata(self):
+        return {name.lower(): value for name, value in self.headers.items()
+                if name.lower().startswith("x-amz-meta-")}
+
+    def _object_headers(self, obj, length):
+        headers = {
+            "Content-Length": str(length),
+            "Content-Type": obj.content_type,
+            "ETag": f'"{obj.etag}"',
+            "Last-Modified": _http_date(obj.mtime),
+            "Accept-Ranges": "bytes",
+        }
+        for name, value in obj.metadata.items():
+            headers["X-Amz-Meta-" + name[len("x-amz-meta-"):].title()] = value
+        return headers
+
+    def _list_objects(self, bucket, b, query):
+        prefix = query.get("prefix", "")
+        delimiter = query.get("delimiter", "")
+        max_keys = int(query.get("max-keys") or 1000)
+        token = query.get("continuation-token") or query.get("start-after") or ""
+        with_meta = query.get("metadata") == "true"
+
+        keys = b.sorted_keys()
+
+        # token = último elemento devuelto (key o prefijo común)
+        start = bisect.bisect_left(keys, prefix)
+        if token:
+            if delimiter and token.endswith(delimiter):
+                after = bisect.bisect_left(keys, token + "\U0010ffff")
+            else:
+                after = bisect.bisect_right(keys, token)
+            start = max(start, after)
+
+        contents, prefixes = [], []
+        next_token = None
+        i = start
+        while i < len(keys):
+            key = keys[i]
+            if not key.startswith(prefix):
+                break
+            if len(contents) + len(prefixes) >= max_keys:
+                next_token = prefixes[-1] if prefixes and prefixes[-1] > (contents or [""])[-1] \
+                    else contents[-1]
+                break
+
+            rest = key[len(prefix):]
+            if delimiter and delimiter in rest:
+                common = prefix + rest.split(delimiter, 1)[0] + delimiter
+                prefixes.append(common)
+                # Saltar todas las keys bajo ese prefijo común
+                i = bisect.bisect_left(keys, common + "\U0010ffff")
+                continue
+
+            contents.append(key)
+            i += 1
+
+        out = [f'<ListBucketResult xmlns="{NS}"><Name>{escape(bucket)}</Name>'
+               f"<Prefix>{escape(prefix)}</Prefix><KeyCount>{len(contents) + len(prefixes)}</KeyCount>"
+               f"<MaxKeys>{max_keys}</MaxKeys><Delimiter>{escape(delimiter)}</Delimiter>"
+               f"<IsTruncated>{'true' if next_token else 'false'}</IsTruncated>"]
+        if next_token:
+            out.append(f"<NextContinuationToken>{escape(next_token)}</NextContinuationToken>")
+        for key in contents:
+            obj = b.objects[key]
+            out.append(
+                f"<Contents><Key>{escape(key)}</Key><LastModified>{_iso(obj.mtime)}</LastModified>"
+                f'<ETag>"{obj.etag}"</ETag><Size>{len(obj.data)}</Size>'
+                f"<StorageClass>STANDARD</StorageClass>"
+            )
+            if with_meta and obj.metadata:
+                out.append("<UserMetadata>")
+                for name, value in obj.metadata.items():
+                    tag = "X-Amz-Meta-" + name[len("x-amz-meta-"):].title()
+                    out.append(f"<{tag}>{escape(value)}</{tag}>")
+                out.append("</UserMetadata>")
+            out.append("</Contents>")
+        for common in prefixes:
+            out.append(f"<CommonPrefixes><Prefix>{escape(common)}</Prefix></CommonPrefixes>")
+        out.append("</ListBucketResult>")
+        self._xml(200, "".join(out))
+
+    def _list_parts(self, bucket, key, b, query):
+        upload = b.uploads.get(query["uploadId"])
+        if upload is None:
+            self._error(404, "NoSuchUpload", key=key, bucket=bucket)
+            return
+        marker = int(query.get("part-number-marker") or 0)
+        out = [f'<ListPartsResult xmlns="{NS}"><Bucket>{escape(bucket)}</Bucket>'
+               f"<Key>{escape(key)}</Key><UploadId>{query['uploadId']}</UploadId>"
+               f"<IsTruncated>false</IsTruncated>"]
+        for number in sorted(n for n in upload["parts"] if n > marker):
+            data, etag, ts = upload["parts"][number]
+            out.append(f"<Part><PartNumber>{number}</PartNumber><LastModified>{_iso(ts)}</LastModified>"
+                       f'<ETag>"{etag}"</ETag><Size>{len(data)}</Size></Part>')
+        out.append("</ListPartsResult>")
+        self._xml(200, "".join(out))
+
+    def _list_uploads(self, bucket, b, query):
+        out = [f'<ListMultipartUploadsResult xmlns="{NS}"><Bucket>{escape(bucket)}</Bucket>'
+               f"<IsTruncated>false</IsTruncated>"]
+        for upload_id, upload in sorted(b.uploads.items(), key=lambda kv: kv[1]["key"]):
+            out.append(f"<Upload><Key>{escape(upload['key'])}</Key><UploadId>{upload_id}</UploadId>"
+                       f"<Initiated>{_iso(upload['initiated'])}</Initiated></Upload>")
+        out.append("</ListMultipartUploadsResult>")
+        self._xml(200, "".join(out))
+
+
+def _decode_aws_chunked(data):
+    """Cuerpo 'aws-chunked' (firma por trozos) → bytes."""
+    out = []
+    pos = 0
+    while pos < len(data):
+        end = data.index(b"\r\n", pos)
+        size = int(data[pos:end].split(b";", 1)[0], 16)
+        pos = end + 2
+        if size == 0:
+            break
+        out.append(data[pos:pos + size])
+        pos += size + 2
+    return b"".join(out)
+
+
+if __name__ == "__main__":
+    server = FakeS3Server(port=9000).start()
+    print(f"Fake S3 en http://{server.endpoint} (Ctrl+C para salir)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
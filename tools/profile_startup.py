@@ -0,0 +1,385 @@
+# ============================================================
+# profile_startup.py → Tiempos de arranque del workbench
+# Texmex Weavers – FreeCAD Integration
+# ============================================================
+#
+# Carga init_gui.py y los módulos de comandos contra FreeCAD/FreeCADGui
+# de mentira, en un intérprete nuevo por corrida (python -X importtime),
+# y reporta:
+#   - tiempo de cargar init_gui.py y de Initialize()
+#   - costo de registrar cada comando (addCommand + GetResources)
+#   - costo de la primera activación de cada módulo de comandos
+#   - import por módulo (propio / acumulado), como -X importtime
+#
+# Sin PySide instalado se usan módulos Qt de mentira (el reporte lo
+# indica con "qt": "stub"): los tiempos de Qt no cuentan, los nuestros sí.
+#
+# Uso:
+#   python tools/profile_startup.py                      (tabla)
+#   python tools/profile_startup.py --runs 7 --json r.json
+#   python tools/profile_startup.py --baseline r.json    (exit 1 si empeora)
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MOD_PATH = os.path.join(ROOT, "freecad", "Texmex_Uploader")
+
+DEFAULT_RUNS = 5
+DEFAULT_TOP = 15
+
+# Empeoramiento tolerado frente a --baseline (fracción) y piso absoluto
+# (ms) para no fallar por ruido en fases de microsegundos
+DEFAULT_MAX_REGRESSION = 0.25
+NOISE_FLOOR_MS = 5.0
+
+
+# ============================================================
+# STUBS (sólo en el proceso hijo)
+# ============================================================
+
+class _AnyMeta(type):
+    """Atributos de clase desconocidos (QMessageBox.Information...)."""
+
+    def __getattr__(cls, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return _Anything()
+
+    def __or__(cls, other):
+        return cls
+
+    __ror__ = __or__
+
+
+class _Anything(metaclass=_AnyMeta):
+    """Objeto que acepta cualquier atributo, llamada o herencia."""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __call__(self, *args, **kwargs):
+        return _Anything()
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return _Anything()
+
+    def __or__(self, other):
+        return self
+
+    __ror__ = __and__ = __rand__ = __or__
+
+    def __iter__(self):
+        return iter(())
+
+    def __bool__(self):
+        return False
+
+
+class _StubModule(types.ModuleType):
+    """Módulo cuyos atributos desconocidos son clases/objetos _Anything."""
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        value = _AnyMeta(name, (_Anything,), {})
+        setattr(self, name, value)
+        return value
+
+
+def _install_freecad_stubs(app_dir, registry):
+    fc = _StubModule("FreeCAD")
+
+    class Console:
+        @staticmethod
+        def PrintMessage(text):
+            registry["console"].append(text)
+
+        PrintWarning = PrintError = PrintLog = PrintMessage
+
+    fc.Console = Console
+    fc.ActiveDocument = None
+    fc.getUserAppDataDir = lambda: app_dir + os.sep
+    fc.getResourceDir = lambda: app_dir + os.sep
+    fc.getHomePath = lambda: app_dir + os.sep
+    fc.listDocuments = lambda: {}
+
+    gui = _StubModule("FreeCADGui")
+
+    class Workbench:
+        def appendToolbar(self, name, commands):
+            registry["toolbars"][name] = list(commands)
+
+        def appendMenu(self, path, commands):
+            registry["menus"].append([path, list(commands)])
+
+    def addCommand(name, command):
+        started = time.perf_counter()
+        command.GetResources()  # FreeCAD la pide al registrar
+        registry["commands"][name] = {
+            "object": command,
+            "ms": (time.perf_counter() - started) * 1000,
+        }
+
+    gui.Workbench = Workbench
+    gui.addCommand = addCommand
+    gui.addWorkbench = lambda wb: registry["workbenches"].append(wb)
+    gui.getMainWindow = lambda: None
+
+    sys.modules["FreeCAD"] = fc
+    sys.modules["FreeCADGui"] = gui
+    for name in ("TechDraw", "TechDrawGui", "Part", "Import", "ImportGui"):
+        sys.modules.setdefault(name, _StubModule(name))
+
+
+def _install_qt_stubs():
+    """PySide2/PySide6 de mentira si no hay ninguno. Devuelve "real"/"stub"."""
+    for name in ("PySide6", "PySide2"):
+        try:
+            __import__(name + ".QtWidgets")
+            return "real"
+        except ImportError:
+            pass
+
+    for name in ("PySide2", "PySide6"):
+        package = _StubModule(name)
+        package.__path__ = []
+        sys.modules[name] = package
+        for sub in ("QtCore", "QtGui", "QtWidgets", "QtSvg", "QtSvgWidgets"):
+            module = _StubModule(f"{name}.{sub}")
+            setattr(package, sub, module)
+            sys.modules[f"{name}.{sub}"] = module
+    return "stub"
+
+
+# ============================================================
+# PROCESO HIJO: una corrida
+# ============================================================
+
+def _child(activate):
+    app_dir = tempfile.mkdtemp(prefix="texmex_profile_")
+    registry = {"commands": {}, "toolbars": {}, "menus": [], "workbenches": [], "console": []}
+
+    _install_freecad_stubs(app_dir, registry)
+    qt = _install_qt_stubs()
+
+    # config.xml de mentira: el del módulo no se toca
+    os.environ["TEXMEX_CONFIG"] = os.path.join(app_dir, "config.xml")
+    sys.path.insert(0, MOD_PATH)
+
+    result = {"qt": qt, "phases": {}, "commands": {}, "activation": {}, "errors": []}
+
+    # El hilo de arranque (minio, subidas pendientes) correría a la vez
+    # que las medidas y mezclaría los tiempos de import: se registra la
+    # llamada pero no se lanza. Su import sí cuenta como fase propia.
+    # (Versiones sin lazy_commands también se pueden medir.)
+    started = time.perf_counter()
+    try:
+        import lazy_commands
+    except ImportError:
+        lazy_commands = None
+    else:
+        result["phases"]["lazy_commands"] = (time.perf_counter() - started) * 1000
+        lazy_commands.bootstrap = lambda: registry.setdefault("bootstrap", True)
+
+    # FreeCAD ejecuta init_gui.py como script (no como import)
+    started = time.perf_counter()
+    path = os.path.join(MOD_PATH, "init_gui.py")
+    with open(path, "r", encoding="utf-8") as f:
+        code = compile(f.read(), path, "exec")
+    exec(code, {"__name__": "InitGui", "__file__": path})
+    result["phases"]["init_gui"] = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    for wb in registry["workbenches"]:
+        wb.Initialize()
+    result["phases"]["Initialize"] = (time.perf_counter() - started) * 1000
+
+    result["errors"] += [t.strip() for t in registry["console"] if "Could not" in t]
+    if lazy_commands and not registry.get("bootstrap"):
+        result["errors"].append("Initialize no lanzó lazy_commands.bootstrap()")
+    result["commands"] = {n: c["ms"] for n, c in registry["commands"].items()}
+
+    if activate:
+        # Primera activación: importar el módulo real de cada comando
+        for name, entry in registry["commands"].items():
+            command = entry["object"]
+            loader = getattr(command, "command", None)
+            if loader is None:
+                continue
+            started = time.perf_counter()
+            try:
+                loader()
+            except Exception as e:
+                result["errors"].append(f"{name}: {e}")
+            result["activation"][name] = (time.perf_counter() - started) * 1000
+
+    json.dump(result, sys.stdout)
+
+
+# ============================================================
+# PROCESO PADRE: corridas, importtime y reporte
+# ============================================================
+
+def _parse_importtime(stderr):
+    """{módulo: (propio_us, acumulado_us)} de la salida de -X importtime."""
+    out = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            head, cumulative, name = line.split("|")
+            out[name.strip()] = (int(head.split(":")[1]), int(cumulative))
+        except ValueError:
+            continue
+    return out
+
+
+def _run_once(activate):
+    cmd = [sys.executable, "-X", "importtime", os.path.abspath(__file__), "--child"]
+    if activate:
+        cmd.append("--activate")
+    proc = subprocess.run(cmd, capture_output=True, text=True, cwd=ROOT)
+    if proc.returncode != 0:
+        raise RuntimeError(f"La corrida falló:\n{proc.stderr[-2000:]}")
+    return json.loads(proc.stdout), _parse_importtime(proc.stderr)
+
+
+def _own_modules():
+    return {os.path.splitext(n)[0] for n in os.listdir(MOD_PATH) if n.endswith(".py")}
+
+
+def profile(runs=DEFAULT_RUNS, activate=True, top=DEFAULT_TOP):
+    """Corre runs veces y devuelve el reporte con medianas."""
+    samples = [_run_once(activate) for _ in range(max(1, runs))]
+
+    def median(values):
+        return round(statistics.median(values), 3)
+
+    def merge(section):
+        keys = {k for result, _imports in samples for k in result[section]}
+        return {k: median([r[section].get(k, 0.0) for r, _i in samples]) for k in sorted(keys)}
+
+    imports = {}
+    names = {name for _r, imp in samples for name in imp}
+    for name in names:
+        values = [imp[name] for _r, imp in samples if name in imp]
+        imports[name] = {
+            "self_ms": median([v[0] / 1000 for v in values]),
+            "cumulative_ms": median([v[1] / 1000 for v in values]),
+        }
+
+    own = _own_modules()
+    ranked = sorted(imports.items(), key=lambda kv: kv[1]["cumulative_ms"], reverse=True)
+
+    phases = merge("phases")
+    report = {
+        "python": sys.version.split()[0],
+        "runs": len(samples),
+        "qt": samples[0][0]["qt"],
+        "phases": phases,
+        "startup_ms": round(sum(phases.values()), 3),
+        "commands": merge("commands"),
+        "activation": merge("activation"),
+        "own_modules": {k: v for k, v in ranked if k in own},
+        "top_imports": dict(ranked[:top]),
+        "errors": sorted({e for r, _i in samples for e in r["errors"]}),
+    }
+    return report
+
+
+def compare(report, baseline, max_regression=DEFAULT_MAX_REGRESSION):
+    """Lista de textos con las fases que empeoraron frente a baseline."""
+    problems = []
+    checks = [("startup_ms", report["startup_ms"], baseline.get("startup_ms"))]
+    for section in ("phases", "activation"):
+        for name, value in report[section].items():
+            checks.append((f"{section}.{name}", value, baseline.get(section, {}).get(name)))
+
+    for name, value, before in checks:
+        if before is None:
+            continue
+        if value - before > max(NOISE_FLOOR_MS, before * max_regression):
+            problems.append(f"{name}: {before:.1f} ms → {value:.1f} ms")
+    return problems
+
+
+def print_report(report):
+    print(f"Python {report['python']}  ·  {report['runs']} corridas (mediana)  ·  Qt {report['qt']}")
+    print(f"\nArranque (init_gui + Initialize): {report['startup_ms']:.1f} ms")
+    for name, ms in report["phases"].items():
+        print(f"  {name:<28}{ms:>9.2f} ms")
+
+    print("\nRegistro de comandos:")
+    for name, ms in report["commands"].items():
+        print(f"  {name:<28}{ms:>9.3f} ms")
+
+    if report["activation"]:
+        print("\nPrimera activación (import del módulo):")
+        for name, ms in sorted(report["activation"].items(), key=lambda kv: -kv[1]):
+            print(f"  {name:<28}{ms:>9.2f} ms")
+
+    print("\nMódulos propios (import):        propio   acumulado")
+    for name, t in report["own_modules"].items():
+        print(f"  {name:<28}{t['self_ms']:>9.2f} {t['cumulative_ms']:>9.2f} ms")
+
+    print("\nImports más caros:               propio   acumulado")
+    for name, t in report["top_imports"].items():
+        print(f"  {name[:28]:<28}{t['self_ms']:>9.2f} {t['cumulative_ms']:>9.2f} ms")
+
+    for error in report["errors"]:
+        print(f"\n✗ {error}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Perfil de arranque del workbench Texmex")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS)
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP)
+    parser.add_argument("--no-activate", action="store_true",
+                        help="no importar los módulos de comandos tras Initialize")
+    parser.add_argument("--json", default=None, help="guarda el reporte en este archivo")
+    parser.add_argument("--baseline", default=None, help="reporte anterior para comparar")
+    parser.add_argument("--max-regression", type=float, default=DEFAULT_MAX_REGRESSION)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--activate", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        _child(args.activate)
+        return 0
+
+    report = profile(args.runs, activate=not args.no_activate, top=args.top)
+    print_report(report)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+    status = 1 if report["errors"] else 0
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        problems = compare(report, baseline, args.max_regression)
+        if problems:
+            print("\nEmpeoró frente a la referencia:")
+            for problem in problems:
+                print(f"  ✗ {problem}")
+            status = 1
+        else:
+            print("\nSin regresiones frente a la referencia.")
+
+    return status
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())